@@ -0,0 +1,226 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Alert Ledger Module
+
+Trwały rejestr (SQLite) wysłanych alertów, kluczowany przez host:port,
+fingerprint certyfikatu i poziom alertu. Alert wychodzi tylko gdy:
+- host pojawia się w oknie alertów po raz pierwszy (OK -> WARNING)
+- zmienia się poziom (WARNING -> CRITICAL -> EXPIRED)
+- zmienia się fingerprint (nowy certyfikat po odnowieniu)
+- minął interwał przypomnienia dla danego poziomu (max N przypomnień)
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import logging
+
+from cert_checker import CertificateInfo
+
+
+class AlertLedger:
+    """Klasa pamiętająca wysłane alerty (deduplikacja między przebiegami)"""
+
+    def __init__(
+        self,
+        db_path: Path,
+        cooldown_hours: int = 24,
+        max_alerts_per_cert: int = 3,
+        reminder_hours: Optional[Dict[str, int]] = None
+    ):
+        """
+        Inicjalizacja ledgera
+
+        Args:
+            db_path: Ścieżka do pliku bazy SQLite
+            cooldown_hours: Domyślny odstęp między przypomnieniami (godziny)
+            max_alerts_per_cert: Maksymalna liczba alertów dla tego samego stanu
+            reminder_hours: Odstęp przypomnień per poziom, np. {"WARNING": 168}
+        """
+        self.db_path = Path(db_path)
+        self.cooldown = timedelta(hours=int(cooldown_hours))
+        self.max_alerts_per_cert = int(max_alerts_per_cert)
+        self.reminder_intervals = {
+            level: timedelta(hours=int(hours))
+            for level, hours in (reminder_hours or {}).items()
+        }
+        self.logger = logging.getLogger(__name__)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS alerts (
+                host_key TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                alert_level TEXT NOT NULL,
+                first_alerted TEXT NOT NULL,
+                last_alerted TEXT NOT NULL,
+                alert_count INTEGER NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def due(
+        self,
+        alert_certs: Dict[str, CertificateInfo],
+        now: Optional[datetime] = None
+    ) -> Dict[str, CertificateInfo]:
+        """
+        Wybierz certyfikaty, dla których alert powinien wyjść teraz
+
+        Args:
+            alert_certs: {hostname:port -> CertificateInfo} w oknie alertów
+            now: Aktualny czas (domyślnie teraz, UTC)
+
+        Returns:
+            Podzbiór alert_certs (przejścia stanu i przypomnienia)
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+
+        rows = self._rows()
+
+        due = {}
+        for key, cert_info in alert_certs.items():
+            row = rows.get(key)
+
+            if row is None:
+                due[key] = cert_info
+                continue
+
+            fingerprint, level, last_alerted, count = row
+
+            # Przejście: nowy certyfikat lub zmiana poziomu
+            if fingerprint != cert_info.fingerprint or level != cert_info.alert_level:
+                due[key] = cert_info
+                continue
+
+            # Przypomnienie dla niezmienionego stanu
+            if self._reminder_due(level, last_alerted, count, now):
+                due[key] = cert_info
+
+        return due
+
+    def settled(self, now: Optional[datetime] = None) -> Dict[str, Tuple[Optional[str], str]]:
+        """
+        Stany, dla których teraz nie wypada przypomnienie
+
+        Certyfikat w tym samym stanie (fingerprint, poziom) można pominąć
+        bez wywołania due() - przy porównaniu przebiegów (cert_diff) alerty
+        przetwarzają tylko zmienione hosty i te spoza tego zbioru.
+
+        Args:
+            now: Aktualny czas (domyślnie teraz, UTC)
+
+        Returns:
+            {hostname:port -> (fingerprint, alert_level)} ostatniego alertu
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+
+        return {
+            key: (fingerprint, level)
+            for key, (fingerprint, level, last_alerted, count) in self._rows().items()
+            if not self._reminder_due(level, last_alerted, count, now)
+        }
+
+    def _rows(self) -> Dict[str, tuple]:
+        """host_key -> (fingerprint, alert_level, last_alerted, alert_count)"""
+        with self._lock:
+            return {
+                row[0]: row[1:]
+                for row in self._conn.execute(
+                    "SELECT host_key, fingerprint, alert_level, last_alerted, alert_count "
+                    "FROM alerts"
+                )
+            }
+
+    def _reminder_due(self, level: str, last_alerted: str, count: int, now: datetime) -> bool:
+        """Czy minął interwał przypomnienia dla poziomu (i limit nie wyczerpany)"""
+        interval = self.reminder_intervals.get(level, self.cooldown)
+        return (
+            count < self.max_alerts_per_cert and
+            now - datetime.fromisoformat(last_alerted) >= interval
+        )
+
+    def record(
+        self,
+        sent: Dict[str, CertificateInfo],
+        now: Optional[datetime] = None
+    ) -> None:
+        """
+        Zapisz wysłane alerty
+
+        Args:
+            sent: {hostname:port -> CertificateInfo} dla których alert wyszedł
+            now: Aktualny czas (domyślnie teraz, UTC)
+        """
+        if not sent:
+            return
+
+        timestamp = (now or datetime.now(timezone.utc)).isoformat()
+
+        with self._lock:
+            for key, cert_info in sent.items():
+                row = self._conn.execute(
+                    "SELECT fingerprint, alert_level, alert_count FROM alerts "
+                    "WHERE host_key = ?",
+                    (key,)
+                ).fetchone()
+
+                # Ten sam stan -> przypomnienie (licznik++), inaczej nowy stan
+                if row and row[0] == cert_info.fingerprint and row[1] == cert_info.alert_level:
+                    self._conn.execute(
+                        "UPDATE alerts SET last_alerted = ?, alert_count = alert_count + 1 "
+                        "WHERE host_key = ?",
+                        (timestamp, key)
+                    )
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO alerts "
+                        "(host_key, fingerprint, alert_level, first_alerted, last_alerted, alert_count) "
+                        "VALUES (?, ?, ?, ?, ?, 1)",
+                        (key, cert_info.fingerprint, cert_info.alert_level, timestamp, timestamp)
+                    )
+            self._conn.commit()
+
+    def resolve(self, certificates: Dict[str, CertificateInfo]) -> int:
+        """
+        Usuń wpisy dla certyfikatów, które wróciły do OK
+
+        Kolejne wejście w okno alertów jest wtedy traktowane jako przejście.
+
+        Args:
+            certificates: Wszystkie wyniki sprawdzenia
+
+        Returns:
+            Liczba usuniętych wpisów
+        """
+        ok_keys = [
+            (key,) for key, cert_info in certificates.items()
+            if not cert_info.error and cert_info.alert_level == "OK"
+        ]
+
+        if not ok_keys:
+            return 0
+
+        with self._lock:
+            cursor = self._conn.executemany(
+                "DELETE FROM alerts WHERE host_key = ?", ok_keys
+            )
+            self._conn.commit()
+
+        return cursor.rowcount
+
+    def close(self) -> None:
+        """Zamknij połączenie z bazą"""
+        with self._lock:
+            self._conn.close()
@@ -8,21 +8,157 @@ System alertów dla wygasających certyfikatów:
 - Email alerts (SMTP)
 - Slack notifications
 - Microsoft Teams notifications
+
+AlertDispatcher wysyła alerty z jednego przebiegu razem: jedna sesja SMTP,
+digest per odbiorca, webhooki równolegle przez wspólną sesję HTTP
+z retry/backoff i limitem (token bucket).
 """
 
+import random
 import smtplib
+import threading
+import time
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 from datetime import datetime
 from pathlib import Path
 import logging
-from jinja2 import Template
 
 from cert_checker import CertificateInfo
-from utils import ConfigLoader, FileUtils
+from utils import ConfigLoader, FileUtils, TemplateRenderer
+
+
+class TokenBucket:
+    """Limit zapytań (token bucket) - thread-safe"""
+    
+    def __init__(self, rate: float, capacity: Optional[int] = None):
+        """
+        Inicjalizacja
+        
+        Args:
+            rate: Liczba tokenów na sekundę (<= 0 = bez limitu)
+            capacity: Maksymalny burst (domyślnie max(1, rate))
+        """
+        self.rate = float(rate)
+        self.capacity = float(capacity or max(1.0, self.rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> None:
+        """Pobierz token (czeka jeśli wyczerpane)"""
+        if self.rate <= 0:
+            return
+        
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                
+                wait = (1 - self._tokens) / self.rate
+            
+            time.sleep(wait)
+
+
+class WebhookClient:
+    """
+    Klient HTTP dla webhooków: wspólna sesja (pool połączeń),
+    limit zapytań i retry z wykładniczym backoff
+    """
+    
+    # Statusy, po których warto ponowić
+    RETRY_STATUSES = {429, 500, 502, 503, 504}
+    
+    def __init__(
+        self,
+        session: Optional[requests.Session] = None,
+        rate_limit_per_second: float = 0,
+        burst: Optional[int] = None,
+        max_retries: int = 3,
+        backoff_seconds: float = 1.0,
+        timeout: int = 10
+    ):
+        """
+        Inicjalizacja
+        
+        Args:
+            session: Współdzielona requests.Session (domyślnie nowa)
+            rate_limit_per_second: Limit zapytań/s (0 = bez limitu)
+            burst: Maksymalny burst token bucket
+            max_retries: Liczba ponowień po błędzie
+            backoff_seconds: Bazowe opóźnienie backoff
+            timeout: Timeout zapytania (sekundy)
+        """
+        self.session = session or requests.Session()
+        self.bucket = TokenBucket(rate_limit_per_second, burst)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+    
+    def post(self, url: str, payload: dict, headers: Optional[dict] = None) -> requests.Response:
+        """
+        POST JSON z limitem i retry
+        
+        Args:
+            url: Webhook URL
+            payload: Payload JSON
+            headers: Dodatkowe nagłówki
+        
+        Returns:
+            Ostatnia odpowiedź (wyjątek jeśli wszystkie próby się nie powiodły)
+        """
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            
+            try:
+                response = self.session.post(
+                    url, json=payload, headers=headers, timeout=self.timeout
+                )
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                self.logger.warning(f"Webhook error ({e}), retry in {delay:.1f}s")
+                time.sleep(delay)
+                continue
+            
+            if response.status_code not in self.RETRY_STATUSES or attempt >= self.max_retries:
+                return response
+            
+            delay = self._retry_after(response) or self._backoff(attempt)
+            self.logger.warning(
+                f"Webhook returned {response.status_code}, retry in {delay:.1f}s"
+            )
+            time.sleep(delay)
+        
+        return response
+    
+    def _backoff(self, attempt: int) -> float:
+        """Wykładniczy backoff z jitterem"""
+        return self.backoff_seconds * (2 ** attempt) * random.uniform(0.5, 1.5)
+    
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """Opóźnienie z nagłówka Retry-After (sekundy)"""
+        try:
+            return float(response.headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            return None
 
 
 class EmailAlerter:
@@ -55,6 +191,29 @@ class EmailAlerter:
         self.from_address = from_address
         self.use_tls = use_tls
         self.logger = logging.getLogger(__name__)
+        
+        # Otwarta sesja SMTP (w bloku session())
+        self._server: Optional[smtplib.SMTP] = None
+    
+    @contextmanager
+    def session(self):
+        """
+        Jedno połączenie SMTP (STARTTLS + login) dla wielu wiadomości
+        
+        Przykład:
+            with email_alerter.session():
+                email_alerter.send_alert(...)
+                email_alerter.send_digest(...)
+        """
+        self._server = self._connect()
+        try:
+            yield self
+        finally:
+            server, self._server = self._server, None
+            try:
+                server.quit()
+            except Exception:
+                server.close()
     
     def send_alert(
         self,
@@ -145,14 +304,105 @@ class EmailAlerter:
             self.logger.error(f"Failed to send daily report: {e}")
             return False
     
-    def _send_email(self, msg: MIMEMultipart, to_addresses: List[str]) -> None:
-        """Wyślij email przez SMTP"""
-        with smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=10) as server:
+    def send_digest(
+        self,
+        to_addresses: List[str],
+        certificates: List[CertificateInfo]
+    ) -> bool:
+        """
+        Wyślij jeden email z alertami dla wielu certyfikatów
+        
+        Args:
+            to_addresses: Lista odbiorców
+            certificates: Certyfikaty wymagające uwagi
+        
+        Returns:
+            True jeśli sukces
+        """
+        try:
+            msg = MIMEMultipart('alternative')
+            msg['Subject'] = self._create_digest_subject(certificates)
+            msg['From'] = self.from_address
+            msg['To'] = ', '.join(to_addresses)
+            msg.attach(MIMEText(self._create_digest_text(certificates), 'plain'))
+            
+            self._send_email(msg, to_addresses)
+            
+            self.logger.info(
+                f"Alert digest ({len(certificates)} certificates) "
+                f"sent to {len(to_addresses)} recipients"
+            )
+            return True
+            
+        except Exception as e:
+            self.logger.error(f"Failed to send alert digest: {e}")
+            return False
+    
+    def _connect(self) -> smtplib.SMTP:
+        """Połącz z SMTP (STARTTLS + login)"""
+        server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=10)
+        try:
             if self.use_tls:
                 server.starttls()
             
             server.login(self.smtp_username, self.smtp_password)
-            server.send_message(msg)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def _send_email(self, msg: MIMEMultipart, to_addresses: List[str]) -> None:
+        """Wyślij email przez SMTP (przez otwartą sesję, jeśli jest)"""
+        if self._server is None:
+            with self._connect() as server:
+                server.send_message(msg)
+            return
+        
+        try:
+            self._server.send_message(msg)
+        except smtplib.SMTPServerDisconnected:
+            # Serwer zamknął sesję (np. limit czasu) - jedno ponowne połączenie
+            self.logger.warning("SMTP session closed by server, reconnecting")
+            self._server = self._connect()
+            self._server.send_message(msg)
+    
+    def _create_digest_subject(self, certificates: List[CertificateInfo]) -> str:
+        """Utwórz subject dla digestu (najwyższy poziom alertu)"""
+        levels = {c.alert_level for c in certificates}
+        for level in ("EXPIRED", "CRITICAL", "WARNING"):
+            if level in levels:
+                prefix = f"[{level}]"
+                break
+        else:
+            prefix = "[INFO]"
+        
+        return f"{prefix} SSL Certificate Alert - {len(certificates)} certificates"
+    
+    def _create_digest_text(self, certificates: List[CertificateInfo]) -> str:
+        """Utwórz plain text body digestu"""
+        lines = [
+            "",
+            "Certificate Alerts",
+            "==================",
+            ""
+        ]
+        
+        for cert in sorted(certificates, key=lambda c: c.days_remaining):
+            lines.append(
+                f"[{cert.alert_level}] {cert.hostname}:{cert.port} - "
+                f"{cert.common_name} - expires {cert.valid_until.strftime('%Y-%m-%d')} "
+                f"({cert.days_remaining} days)"
+            )
+        
+        lines += [
+            "",
+            "Please renew these certificates as soon as possible.",
+            "",
+            "---",
+            "Certificate Expiry Monitor",
+            f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
+        ]
+        return "\n".join(lines)
     
     def _create_subject(self, cert_info: CertificateInfo) -> str:
         """Utwórz subject dla alertu"""
@@ -201,11 +451,9 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         cert_info: CertificateInfo,
         template_path: Path
     ) -> str:
-        """Utwórz HTML body z template"""
-        template_content = FileUtils.read_file(template_path)
-        template = Template(template_content)
-        
-        return template.render(
+        """Utwórz HTML body z template (skompilowany raz na proces)"""
+        return TemplateRenderer.render(
+            template_path,
             cert=cert_info,
             now=datetime.now()
         )
@@ -257,11 +505,9 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         certificates: List[CertificateInfo],
         template_path: Path
     ) -> str:
-        """Utwórz HTML daily report z template"""
-        template_content = FileUtils.read_file(template_path)
-        template = Template(template_content)
-        
-        return template.render(
+        """Utwórz HTML daily report z template (skompilowany raz na proces)"""
+        return TemplateRenderer.render(
+            template_path,
             certificates=certificates,
             now=datetime.now()
         )
@@ -270,16 +516,23 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 class SlackAlerter:
     """Klasa do wysyłania alertów do Slack"""
     
-    def __init__(self, webhook_url: str, channel: Optional[str] = None):
+    def __init__(
+        self,
+        webhook_url: str,
+        channel: Optional[str] = None,
+        client: Optional[WebhookClient] = None
+    ):
         """
         Inicjalizacja Slack alerter
         
         Args:
             webhook_url: Slack webhook URL
             channel: Kanał Slack (opcjonalnie)
+            client: WebhookClient (pool połączeń, limit, retry)
         """
         self.webhook_url = webhook_url
         self.channel = channel
+        self.client = client or WebhookClient()
         self.logger = logging.getLogger(__name__)
     
     def send_alert(
@@ -302,11 +555,7 @@ class SlackAlerter:
             payload = self._create_alert_payload(cert_info, mention)
             
             # Wyślij
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
+            response = self.client.post(self.webhook_url, payload)
             
             if response.status_code == 200:
                 self.logger.info(f"Slack alert sent for {cert_info.hostname}:{cert_info.port}")
@@ -335,11 +584,7 @@ class SlackAlerter:
         try:
             payload = self._create_summary_payload(certificates)
             
-            response = requests.post(
-                self.webhook_url,
-                json=payload,
-                timeout=10
-            )
+            response = self.client.post(self.webhook_url, payload)
             
             if response.status_code == 200:
                 self.logger.info("Slack summary sent")
@@ -488,14 +733,16 @@ class SlackAlerter:
 class TeamsAlerter:
     """Klasa do wysyłania alertów do Microsoft Teams"""
     
-    def __init__(self, webhook_url: str):
+    def __init__(self, webhook_url: str, client: Optional[WebhookClient] = None):
         """
         Inicjalizacja Teams alerter
         
         Args:
             webhook_url: Teams webhook URL
+            client: WebhookClient (pool połączeń, limit, retry)
         """
         self.webhook_url = webhook_url
+        self.client = client or WebhookClient()
         self.logger = logging.getLogger(__name__)
     
     def send_alert(self, cert_info: CertificateInfo) -> bool:
@@ -511,11 +758,10 @@ class TeamsAlerter:
         try:
             payload = self._create_alert_payload(cert_info)
             
-            response = requests.post(
+            response = self.client.post(
                 self.webhook_url,
-                json=payload,
-                headers={"Content-Type": "application/json"},
-                timeout=10
+                payload,
+                headers={"Content-Type": "application/json"}
             )
             
             if response.status_code == 200:
@@ -580,6 +826,183 @@ class TeamsAlerter:
         return payload
 
 
+@dataclass
+class DispatchResult:
+    """Wynik AlertDispatcher.dispatch"""
+    
+    # {kanał -> (wysłane, nieudane)}
+    stats: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    
+    # {kanał -> klucze hostname:port, których alert dotarł tym kanałem}
+    delivered: Dict[str, Set[str]] = field(default_factory=dict)
+    
+    def delivered_keys(self) -> Set[str]:
+        """Klucze certyfikatów dostarczonych choć jednym kanałem"""
+        return set().union(*self.delivered.values())
+
+
+class AlertDispatcher:
+    """
+    Wysyłka alertów z jednego przebiegu
+    
+    - Email: jedna sesja SMTP, digest per odbiorca (group_alerts)
+    - Slack/Teams: równolegle, przez WebhookClient (pool, limit, retry)
+    """
+    
+    def __init__(
+        self,
+        email_alerter: Optional[EmailAlerter] = None,
+        slack_alerter: Optional[SlackAlerter] = None,
+        teams_alerter: Optional[TeamsAlerter] = None,
+        group_alerts: bool = True,
+        max_workers: int = 8
+    ):
+        """
+        Inicjalizacja
+        
+        Args:
+            email_alerter: EmailAlerter (None = wyłączony)
+            slack_alerter: SlackAlerter (None = wyłączony)
+            teams_alerter: TeamsAlerter (None = wyłączony)
+            group_alerts: Czy wysyłać email jako digest per odbiorca
+            max_workers: Liczba równoległych wysyłek webhooków
+        """
+        self.email_alerter = email_alerter
+        self.slack_alerter = slack_alerter
+        self.teams_alerter = teams_alerter
+        self.group_alerts = group_alerts
+        self.max_workers = max(1, int(max_workers))
+        self.logger = logging.getLogger(__name__)
+    
+    def dispatch(
+        self,
+        alert_certs: Dict[str, CertificateInfo],
+        recipients: Dict[str, List[str]],
+        slack_mentions: Optional[Dict[str, str]] = None
+    ) -> DispatchResult:
+        """
+        Wyślij alerty wszystkimi włączonymi kanałami
+        
+        Args:
+            alert_certs: {hostname:port -> CertificateInfo}
+            recipients: {hostname:port -> lista adresów email}
+            slack_mentions: {alert_level -> mention} dla Slack
+        
+        Returns:
+            DispatchResult: liczniki i dostarczone certyfikaty per kanał
+        """
+        slack_mentions = slack_mentions or {}
+        tasks = []
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            # Email w osobnym wątku - jedna sesja SMTP, wiadomości sekwencyjnie
+            if self.email_alerter:
+                tasks.append((
+                    'email', None,
+                    executor.submit(self._send_email_alerts, alert_certs, recipients)
+                ))
+            
+            for key, cert_info in alert_certs.items():
+                if self.slack_alerter:
+                    mention = slack_mentions.get(cert_info.alert_level)
+                    tasks.append((
+                        'slack', key,
+                        executor.submit(self.slack_alerter.send_alert, cert_info, mention)
+                    ))
+                if self.teams_alerter:
+                    tasks.append((
+                        'teams', key,
+                        executor.submit(self.teams_alerter.send_alert, cert_info)
+                    ))
+            
+            futures = {future: (channel, key) for channel, key, future in tasks}
+            result = DispatchResult()
+            
+            for future in as_completed(futures):
+                channel, key = futures[future]
+                sent, failed = result.stats.get(channel, (0, 0))
+                delivered = result.delivered.setdefault(channel, set())
+                
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    self.logger.error(f"{channel} alert failed: {e}")
+                    outcome = False
+                
+                if isinstance(outcome, tuple):
+                    sent, failed = sent + outcome[0], failed + outcome[1]
+                    delivered.update(outcome[2])
+                elif outcome:
+                    sent += 1
+                    delivered.add(key)
+                else:
+                    failed += 1
+                
+                result.stats[channel] = (sent, failed)
+        
+        return result
+    
+    def _send_email_alerts(
+        self,
+        alert_certs: Dict[str, CertificateInfo],
+        recipients: Dict[str, List[str]]
+    ) -> Tuple[int, int, Set[str]]:
+        """
+        Wyślij emaile w jednej sesji SMTP
+        
+        Returns:
+            (wysłane, nieudane, klucze dostarczone do wszystkich odbiorców)
+        """
+        # Odbiorcy z identycznym zestawem certyfikatów dostają jedną wiadomość
+        batches: Dict[tuple, List[str]] = {}
+        
+        if self.group_alerts:
+            per_recipient: Dict[str, List[str]] = {}
+            for key in alert_certs:
+                for address in recipients.get(key, []):
+                    per_recipient.setdefault(address, []).append(key)
+            
+            for address, keys in per_recipient.items():
+                batches.setdefault(tuple(keys), []).append(address)
+        else:
+            for key in alert_certs:
+                if recipients.get(key):
+                    batches[(key,)] = recipients[key]
+        
+        if not batches:
+            return 0, 0, set()
+        
+        sent = failed = 0
+        delivered_batches = set()
+        
+        try:
+            with self.email_alerter.session():
+                for keys, addresses in batches.items():
+                    certs = [alert_certs[key] for key in keys]
+                    
+                    if len(certs) == 1:
+                        ok = self.email_alerter.send_alert(addresses, certs[0])
+                    else:
+                        ok = self.email_alerter.send_digest(addresses, certs)
+                    
+                    if ok:
+                        sent += 1
+                        delivered_batches.add(keys)
+                    else:
+                        failed += 1
+        except Exception as e:
+            self.logger.error(f"SMTP session failed: {e}")
+            failed += len(batches) - sent - failed
+        
+        # Certyfikat jest dostarczony, gdy wyszły wszystkie wiadomości z nim
+        # (inaczej część odbiorców go nie dostała)
+        delivered = {key for keys in delivered_batches for key in keys}
+        for keys in batches.keys() - delivered_batches:
+            delivered.difference_update(keys)
+        
+        return sent, failed, delivered
+
+
 # Przykład użycia
 if __name__ == "__main__":
     import logging
@@ -0,0 +1,756 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark Module
+
+Pomiar wydajności sprawdzania certyfikatów na lokalnych serwerach TLS:
+- N listenerów TLS na loopback (w tym procesie, jeden wątek z event loop)
+- konfigurowalne opóźnienie przed handshake'iem, rozmiar klucza, liczba
+  SAN i długość łańcucha; certyfikaty ważne, wygasające i wygasłe
+- fazy: checker (handshake + parsowanie), validator (walidacja łańcuchów),
+  full (CertificateMonitor.run_full_check w tymczasowym projekcie)
+
+Dla każdej fazy: hosts/sec, p50/p99 czasu handshake'u, CPU (bez wątku
+serwerów) i szczytowe RSS procesu. Wynik można zapisać (--json) i porównać
+z poprzednim (--baseline) - spadek przepustowości powyżej progu kończy
+się kodem wyjścia 1 (np. w CI przed wdrożeniem).
+
+Przykład:
+    python scripts/benchmark.py --hosts 500 --latency-ms 20 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import ipaddress
+import json
+import os
+import shutil
+import ssl
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+
+import yaml
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from cryptography.x509.oid import NameOID
+
+from cert_checker import CertificateChecker, HostTarget
+from cert_model import ParsedCertificate
+from cert_validator import CertificateValidator
+from revocation import RevocationChecker
+from trust_store import TrustStore
+from utils import ConfigLoader
+
+try:
+    import resource
+except ImportError:  # Windows - brak getrusage, RSS nie jest raportowane
+    resource = None
+
+
+PHASES = ('checker', 'validator', 'full')
+
+# Dni do wygaśnięcia kolejnych wariantów certyfikatu (OK, WARNING, CRITICAL, EXPIRED)
+VALIDITY_DAYS = (365, 90, 20, 5, -3)
+
+
+# ----------------------------------------------------------------------
+# Certyfikaty
+# ----------------------------------------------------------------------
+
+class BenchmarkPki:
+    """Root CA, pośrednie CA i warianty certyfikatów serwera (w pamięci + PEM)"""
+
+    def __init__(
+        self,
+        work_dir: Path,
+        chain_length: int = 3,
+        key_type: str = 'rsa',
+        key_size: int = 2048,
+        san_count: int = 1,
+        variants: int = 8
+    ):
+        """
+        Inicjalizacja (generuje klucze i certyfikaty)
+
+        Args:
+            work_dir: Katalog na pliki PEM
+            chain_length: Długość łańcucha: 1 = self-signed, 2 = root + leaf,
+                3+ = root + pośrednie + leaf
+            key_type: rsa lub ec (P-256)
+            key_size: Rozmiar klucza RSA (bity)
+            san_count: Liczba dodatkowych nazw SAN (rozmiar certyfikatu)
+            variants: Ile różnych certyfikatów serwera (przydzielane po kolei)
+        """
+        self.work_dir = Path(work_dir)
+        self.chain_length = max(1, int(chain_length))
+        self.key_type = key_type
+        self.key_size = int(key_size)
+        self.san_count = max(0, int(san_count))
+        self.now = datetime.now(timezone.utc)
+
+        self.root_path = self.work_dir / "root.pem"
+        self.variants: List[Tuple[Path, Path]] = []
+
+        self._build(max(1, int(variants)))
+
+    def _key(self):
+        """Nowy klucz prywatny wg konfiguracji"""
+        if self.key_type == 'ec':
+            return ec.generate_private_key(ec.SECP256R1())
+        return rsa.generate_private_key(public_exponent=65537, key_size=self.key_size)
+
+    def _certificate(
+        self,
+        common_name: str,
+        key,
+        issuer_name: Optional[x509.Name],
+        issuer_key,
+        days: int,
+        ca: bool,
+        san: Optional[List[x509.GeneralName]] = None
+    ) -> x509.Certificate:
+        """Wystaw certyfikat (issuer None = self-signed)"""
+        name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)])
+        not_after = self.now + timedelta(days=days)
+
+        builder = (
+            x509.CertificateBuilder()
+            .subject_name(name)
+            .issuer_name(issuer_name or name)
+            .public_key(key.public_key())
+            .serial_number(x509.random_serial_number())
+            .not_valid_before(min(self.now, not_after) - timedelta(days=30))
+            .not_valid_after(not_after)
+            .add_extension(x509.BasicConstraints(ca=ca, path_length=None), critical=True)
+        )
+
+        if san:
+            builder = builder.add_extension(x509.SubjectAlternativeName(san), critical=False)
+
+        return builder.sign(issuer_key or key, hashes.SHA256())
+
+    def _build(self, variants: int) -> None:
+        """Wygeneruj łańcuch CA i warianty certyfikatu serwera"""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+
+        san = [x509.DNSName('localhost'), x509.IPAddress(ipaddress.ip_address('127.0.0.1'))]
+        san += [x509.DNSName(f"host{i}.benchmark.local") for i in range(self.san_count)]
+
+        # Łańcuch CA: root -> pośrednie (leaf podpisuje ostatnie)
+        ca_chain = []
+        issuer_name = issuer_key = None
+        for level in range(self.chain_length - 1):
+            key = self._key()
+            common_name = "Benchmark Root CA" if level == 0 else f"Benchmark Intermediate CA {level}"
+            cert = self._certificate(common_name, key, issuer_name, issuer_key, 3650, True)
+            ca_chain.append(cert)
+            issuer_name, issuer_key = cert.subject, key
+
+        # Serwer wysyła leaf + pośrednie (bez root)
+        intermediates = b''.join(self._pem(cert) for cert in reversed(ca_chain[1:]))
+
+        roots = []
+
+        for index in range(variants):
+            key = self._key()
+            days = VALIDITY_DAYS[index % len(VALIDITY_DAYS)]
+            leaf = self._certificate("127.0.0.1", key, issuer_name, issuer_key, days, False, san)
+
+            cert_path = self.work_dir / f"server-{index}.pem"
+            key_path = self.work_dir / f"server-{index}.key"
+            cert_path.write_bytes(self._pem(leaf) + intermediates)
+            key_path.write_bytes(key.private_bytes(
+                serialization.Encoding.PEM,
+                serialization.PrivateFormat.PKCS8,
+                serialization.NoEncryption()
+            ))
+            self.variants.append((cert_path, key_path))
+            roots.append(leaf)
+
+        # Zaufany root; self-signed leaf jest swoim własnym root
+        if ca_chain:
+            roots = ca_chain[:1]
+        self.root_path.write_bytes(b''.join(self._pem(cert) for cert in roots))
+
+    @staticmethod
+    def _pem(cert: x509.Certificate) -> bytes:
+        return cert.public_bytes(serialization.Encoding.PEM)
+
+
+# ----------------------------------------------------------------------
+# Serwery TLS
+# ----------------------------------------------------------------------
+
+class _HandshakeProtocol(asyncio.Protocol):
+    """Połączenie serwera: opóźnienie, handshake TLS, czekaj na rozłączenie klienta"""
+
+    def __init__(self, context: ssl.SSLContext, latency: float):
+        self.context = context
+        self.latency = latency
+
+    def connection_made(self, transport) -> None:
+        # ClientHello zostaje w buforze gniazda do startu TLS
+        transport.pause_reading()
+        asyncio.get_running_loop().create_task(self._handshake(transport))
+
+    async def _handshake(self, transport) -> None:
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            await asyncio.get_running_loop().start_tls(
+                transport, self, self.context, server_side=True, ssl_handshake_timeout=30
+            )
+        except Exception:
+            transport.abort()
+
+
+class TlsListeners:
+    """N listenerów TLS na 127.0.0.1 obsługiwanych przez jeden event loop (osobny wątek)"""
+
+    def __init__(
+        self,
+        pki: BenchmarkPki,
+        count: int,
+        latency: float = 0.0
+    ):
+        """
+        Inicjalizacja
+
+        Args:
+            pki: Certyfikaty (listener i dostaje wariant i % liczba wariantów)
+            count: Liczba listenerów (portów)
+            latency: Opóźnienie przed handshake'iem (sekundy) - symulacja RTT
+        """
+        self.pki = pki
+        self.count = int(count)
+        self.latency = float(latency)
+        self.ports: List[int] = []
+
+        self._contexts = []
+        for cert_path, key_path in pki.variants:
+            context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+            context.load_cert_chain(str(cert_path), str(key_path))
+            self._contexts.append(context)
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._servers = []
+
+    def start(self) -> List[int]:
+        """
+        Uruchom listenery
+
+        Returns:
+            Lista portów
+        """
+        self._thread.start()
+        self.ports = self._call(self._start_servers())
+        return self.ports
+
+    async def _start_servers(self) -> List[int]:
+        loop = asyncio.get_running_loop()
+        ports = []
+        for index in range(self.count):
+            context = self._contexts[index % len(self._contexts)]
+            server = await loop.create_server(
+                lambda c=context: _HandshakeProtocol(c, self.latency),
+                '127.0.0.1', 0,
+                backlog=1024
+            )
+            self._servers.append(server)
+            ports.append(server.sockets[0].getsockname()[1])
+        return ports
+
+    def cpu_time(self) -> float:
+        """Czas CPU wątku serwerów (do odjęcia od CPU procesu)"""
+        return self._call(self._thread_time())
+
+    @staticmethod
+    async def _thread_time() -> float:
+        return time.thread_time()
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    def stop(self) -> None:
+        """Zatrzymaj listenery i event loop"""
+        async def close():
+            for server in self._servers:
+                server.close()
+
+        self._call(close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+
+
+# ----------------------------------------------------------------------
+# Pomiary
+# ----------------------------------------------------------------------
+
+def peak_rss_mb() -> Optional[float]:
+    """Szczytowe RSS procesu (MB) lub None (brak modułu resource)"""
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: bajty
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Percentyl (nearest-rank) z listy wartości"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def instrument_checker(checker: CertificateChecker, latencies: List[float]) -> None:
+    """
+    Mierz czas pobrania łańcucha (connect + STARTTLS + handshake) checkera
+
+    Args:
+        checker: CertificateChecker (metody podmieniane na instancji)
+        latencies: Lista, do której trafiają czasy (sekundy)
+    """
+    blocking = checker._get_certificate_chain_der
+    async_fetch = checker._get_certificate_chain_der_async
+
+    def timed(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return blocking(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    async def timed_async(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return await async_fetch(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    checker._get_certificate_chain_der = timed
+    checker._get_certificate_chain_der_async = timed_async
+
+
+class PhaseTimer:
+    """Czas, CPU (z procesami roboczymi, bez wątku serwerów) i RSS jednej fazy"""
+
+    def __init__(self, name: str, listeners: TlsListeners):
+        self.name = name
+        self.listeners = listeners
+        self.latencies: List[float] = []
+        self.result: Dict = {}
+
+    def __enter__(self) -> 'PhaseTimer':
+        self._server_cpu = self.listeners.cpu_time()
+        self._cpu = self._process_cpu()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        elapsed = time.perf_counter() - self._start
+        cpu = self._process_cpu() - self._cpu
+        cpu -= self.listeners.cpu_time() - self._server_cpu
+
+        self.result.update(
+            phase=self.name,
+            seconds=round(elapsed, 3),
+            cpu_seconds=round(max(0.0, cpu), 3),
+            peak_rss_mb=peak_rss_mb()
+        )
+
+    @staticmethod
+    def _process_cpu() -> float:
+        """CPU procesu + zakończonych procesów potomnych (pula shardów)"""
+        times = os.times()
+        return time.process_time() + times.children_user + times.children_system
+
+    def finish(self, items: int, errors: int = 0, latency_name: str = 'handshake') -> Dict:
+        """
+        Uzupełnij wynik fazy
+
+        Args:
+            items: Liczba sprawdzonych hostów / łańcuchów
+            errors: Liczba błędów
+            latency_name: Co mierzą latencies (handshake, validate)
+
+        Returns:
+            Dictionary z wynikami fazy
+        """
+        seconds = self.result['seconds'] or 1e-9
+        p50 = percentile(self.latencies, 0.50)
+        p99 = percentile(self.latencies, 0.99)
+
+        self.result.update(
+            items=items,
+            errors=errors,
+            per_second=round(items / seconds, 1),
+            latency=latency_name,
+            p50_ms=round(p50 * 1000, 2) if p50 is not None else None,
+            p99_ms=round(p99 * 1000, 2) if p99 is not None else None
+        )
+        return self.result
+
+
+# ----------------------------------------------------------------------
+# Fazy
+# ----------------------------------------------------------------------
+
+class CertificateBenchmark:
+    """Uruchamia fazy benchmarku na lokalnych listenerach TLS"""
+
+    def __init__(self, args: argparse.Namespace):
+        """
+        Inicjalizacja
+
+        Args:
+            args: Argumenty z linii poleceń
+        """
+        self.args = args
+        self.logger = logging.getLogger(__name__)
+        self.work_dir = Path(tempfile.mkdtemp(prefix="cert-benchmark-"))
+        self.pki: Optional[BenchmarkPki] = None
+        self.listeners: Optional[TlsListeners] = None
+        self.hosts: List[HostTarget] = []
+        self.chains: List[Tuple[str, List[bytes]]] = []
+
+    def setup(self) -> None:
+        """Certyfikaty i listenery"""
+        args = self.args
+
+        start = time.perf_counter()
+        self.pki = BenchmarkPki(
+            self.work_dir / "pki",
+            chain_length=args.chain_length,
+            key_type=args.key_type,
+            key_size=args.key_size,
+            san_count=args.san_count,
+            variants=args.unique_certs
+        )
+        print(f"Generated {len(self.pki.variants)} certificates in {time.perf_counter() - start:.1f}s")
+
+        self.listeners = TlsListeners(self.pki, args.hosts, latency=args.latency_ms / 1000)
+        ports = self.listeners.start()
+        self.hosts = [HostTarget('127.0.0.1', port, 'https') for port in ports]
+        print(f"Started {len(ports)} TLS listeners on 127.0.0.1 (latency {args.latency_ms} ms)")
+
+    def teardown(self) -> None:
+        """Zatrzymaj listenery i usuń pliki tymczasowe"""
+        if self.listeners:
+            self.listeners.stop()
+        if not self.args.keep:
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+
+    def run(self) -> List[Dict]:
+        """
+        Uruchom wybrane fazy
+
+        Returns:
+            Lista wyników faz
+        """
+        phases: Dict[str, Callable[[], Dict]] = {
+            'checker': self.run_checker,
+            'validator': self.run_validator,
+            'full': self.run_full_check
+        }
+
+        results = []
+        for name in self.args.phases:
+            print(f"Running phase: {name}...")
+            results.append(phases[name]())
+        return results
+
+    def _check(self, checker: CertificateChecker) -> dict:
+        """Sprawdź wszystkie hosty wybranym silnikiem"""
+        if self.args.engine == 'asyncio':
+            return checker.check_multiple_hosts_async(self.hosts, concurrent=self.args.concurrency)
+        return checker.check_multiple_hosts(self.hosts, concurrent=self.args.concurrency)
+
+    def run_checker(self) -> Dict:
+        """Faza checker: handshake + pobranie łańcucha + parsowanie (bez walidacji)"""
+        checker = CertificateChecker(timeout=self.args.timeout, verify=False)
+
+        # Łańcuchy DER zapamiętane dla fazy validator
+        fetch = checker._get_certificate_chain_der
+        fetch_async = checker._get_certificate_chain_der_async
+
+        def capture(hostname, *args, **kwargs):
+            chain = fetch(hostname, *args, **kwargs)
+            self.chains.append((hostname, chain))
+            return chain
+
+        async def capture_async(hostname, *args, **kwargs):
+            chain = await fetch_async(hostname, *args, **kwargs)
+            self.chains.append((hostname, chain))
+            return chain
+
+        checker._get_certificate_chain_der = capture
+        checker._get_certificate_chain_der_async = capture_async
+
+        with PhaseTimer('checker', self.listeners) as timer:
+            instrument_checker(checker, timer.latencies)
+            results = self._check(checker)
+
+        errors = sum(1 for cert_info in results.values() if cert_info.error)
+        return timer.finish(len(results), errors)
+
+    def run_validator(self) -> Dict:
+        """Faza validator: parsowanie + walidacja łańcuchów z fazy checker"""
+        if not self.chains:
+            # Faza checker nie była uruchomiona - pobierz łańcuchy raz
+            checker = CertificateChecker(timeout=self.args.timeout, verify=False)
+            for host in self.hosts:
+                self.chains.append(
+                    (host.hostname, checker._get_certificate_chain_der(*host[:3]))
+                )
+
+        validator = CertificateValidator(
+            timeout=self.args.timeout,
+            revocation_checker=RevocationChecker(timeout=self.args.timeout),
+            trust_store=TrustStore.load(cafile=str(self.pki.root_path))
+        )
+
+        errors = 0
+        with PhaseTimer('validator', self.listeners) as timer:
+            for hostname, chain_der in self.chains:
+                start = time.perf_counter()
+                chain = [ParsedCertificate(der) for der in chain_der]
+                result = validator.validate_chain(
+                    chain, hostname, check_revocation=False, verify_hostname=True
+                )
+                timer.latencies.append(time.perf_counter() - start)
+                if not (result.chain_valid and result.trusted_ca):
+                    errors += 1
+
+        # "errors" = łańcuchy niepoprawne (wygasłe warianty są oczekiwane)
+        return timer.finish(len(self.chains), errors, latency_name='validate')
+
+    def _project(self) -> Path:
+        """Tymczasowy projekt: konfiguracja z repozytorium, hosty benchmarku, bez kanałów alertów"""
+        source = Path(__file__).parent.parent
+        project = self.work_dir / "project"
+        (project / "config").mkdir(parents=True, exist_ok=True)
+
+        # Zmienne środowiskowe: .env projektu lub wartości przykładowe
+        for env_name in ('.env', '.env.example'):
+            if (source / env_name).exists():
+                shutil.copy(source / env_name, project / '.env')
+                break
+
+        with open(source / "config/settings.yml", encoding='utf-8') as f:
+            settings = yaml.safe_load(f)
+
+        general = settings['general']
+        general['probe_engine'] = self.args.engine
+        general['concurrent_checks'] = self.args.concurrency
+        general['async_concurrent_checks'] = self.args.concurrency
+        general['connection_timeout'] = self.args.timeout
+        general['retry_attempts'] = 1
+        general.setdefault('sharding', {})['workers'] = self.args.workers
+        general['sharding']['min_hosts'] = 1
+
+        for channel in ('smtp', 'slack', 'teams'):
+            settings.setdefault(channel, {})['enabled'] = False
+
+        settings['validation'].update(
+            verify_chain=True,
+            check_revocation=False,
+            trust_store={'cafile': str(self.pki.root_path), 'capath': None}
+        )
+        settings['logging'].update(
+            level='WARNING',
+            file='output/logs/benchmark.log',
+            max_size_mb=10,
+            backup_count=1,
+            console=False
+        )
+
+        with open(project / "config/settings.yml", 'w', encoding='utf-8') as f:
+            yaml.safe_dump(settings, f, allow_unicode=True, sort_keys=False)
+
+        domains = {
+            'benchmark': [
+                {
+                    'name': f"benchmark-{host.port}",
+                    'host': host.hostname,
+                    'port': host.port,
+                    'protocol': host.protocol,
+                    'enabled': True,
+                    'tags': ['benchmark']
+                }
+                for host in self.hosts
+            ]
+        }
+        with open(project / "config/domains.yml", 'w', encoding='utf-8') as f:
+            yaml.safe_dump(domains, f, sort_keys=False)
+
+        return project
+
+    def run_full_check(self) -> Dict:
+        """Faza full: CertificateMonitor.run_full_check (sprawdzenie, walidacja, historia, raporty)"""
+        # Import tutaj - main.py ładuje wszystkie moduły (alerty, raporty)
+        from main import CertificateMonitor
+
+        project = self._project()
+        monitor = CertificateMonitor(ConfigLoader(project), use_cache=False)
+
+        results = {}
+        check_all = monitor.check_all_certificates
+
+        def check_and_keep(*args, **kwargs):
+            results.update(check_all(*args, **kwargs))
+            return results
+
+        monitor.check_all_certificates = check_and_keep
+
+        # Raporty i statusy hostów drukowane przez monitor - pomijane
+        with PhaseTimer('full', self.listeners) as timer:
+            instrument_checker(monitor.checker, timer.latencies)
+            with contextlib.redirect_stdout(io.StringIO()):
+                try:
+                    monitor.run_full_check()
+                except SystemExit:
+                    self.logger.error("Full check failed - see output/logs/benchmark.log")
+
+        errors = sum(1 for cert_info in results.values() if cert_info.error)
+        result = timer.finish(len(results), errors)
+
+        if self.args.workers > 1:
+            # Handshake'i w procesach roboczych - brak czasów w tym procesie
+            result.update(p50_ms=None, p99_ms=None)
+
+        return result
+
+
+# ----------------------------------------------------------------------
+# Raport
+# ----------------------------------------------------------------------
+
+def print_results(results: List[Dict]) -> None:
+    """Tabela wyników faz"""
+    header = f"{'phase':<10} {'items':>6} {'errors':>6} {'seconds':>8} {'per sec':>9} " \
+             f"{'p50 ms':>8} {'p99 ms':>8} {'cpu s':>7} {'peak MB':>8}"
+    print("\n" + header)
+    print("-" * len(header))
+
+    def fmt(value: Optional[float], width: int) -> str:
+        return f"{value:>{width}.2f}" if value is not None else f"{'n/a':>{width}}"
+
+    for r in results:
+        print(
+            f"{r['phase']:<10} {r['items']:>6} {r['errors']:>6} {r['seconds']:>8.2f} "
+            f"{r['per_second']:>9.1f} {fmt(r['p50_ms'], 8)} {fmt(r['p99_ms'], 8)} "
+            f"{r['cpu_seconds']:>7.2f} {fmt(r['peak_rss_mb'], 8)}"
+        )
+
+
+def compare_baseline(results: List[Dict], baseline_path: Path, max_regression: float) -> bool:
+    """
+    Porównaj przepustowość z poprzednim wynikiem
+
+    Args:
+        results: Wyniki bieżącego przebiegu
+        baseline_path: Plik JSON z poprzedniego przebiegu (--json)
+        max_regression: Dopuszczalny spadek hosts/sec (procent)
+
+    Returns:
+        True jeśli żadna faza nie jest wolniejsza ponad próg
+    """
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {r['phase']: r for r in json.load(f)['results']}
+
+    ok = True
+    print(f"\nBaseline: {baseline_path}")
+    for r in results:
+        previous = baseline.get(r['phase'])
+        if not previous or not previous['per_second']:
+            continue
+
+        change = (r['per_second'] - previous['per_second']) / previous['per_second'] * 100
+        regressed = change < -max_regression
+        ok = ok and not regressed
+
+        marker = "REGRESSION" if regressed else "ok"
+        print(
+            f"  {r['phase']:<10} {previous['per_second']:>9.1f} -> {r['per_second']:>9.1f} "
+            f"hosts/s ({change:+.1f}%) {marker}"
+        )
+
+    return ok
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(
+        description="Certificate Expiry Monitor - benchmark on local TLS listeners"
+    )
+    parser.add_argument('--hosts', type=int, default=200, help='Number of TLS listeners (default: 200)')
+    parser.add_argument('--latency-ms', type=float, default=0, help='Delay before each handshake (ms)')
+    parser.add_argument('--chain-length', type=int, default=3,
+                        help='Certificates in chain incl. root (1 = self-signed, default: 3)')
+    parser.add_argument('--key-type', choices=('rsa', 'ec'), default='rsa', help='Key type (default: rsa)')
+    parser.add_argument('--key-size', type=int, default=2048, help='RSA key size (default: 2048)')
+    parser.add_argument('--san-count', type=int, default=1, help='Extra SAN entries per certificate')
+    parser.add_argument('--unique-certs', type=int, default=8,
+                        help='Distinct server certificates (valid/expiring/expired mix, default: 8)')
+    parser.add_argument('--engine', choices=('threads', 'asyncio'), default='threads',
+                        help='Probe engine (default: threads)')
+    parser.add_argument('--concurrency', type=int, default=50, help='Concurrent checks (default: 50)')
+    parser.add_argument('--workers', type=int, default=1, help='Worker processes in full phase (default: 1)')
+    parser.add_argument('--timeout', type=int, default=10, help='Connection timeout (seconds)')
+    parser.add_argument('--phases', default=','.join(PHASES),
+                        help=f"Comma-separated phases (default: {','.join(PHASES)})")
+    parser.add_argument('--json', type=Path, help='Save results to JSON file')
+    parser.add_argument('--baseline', type=Path, help='Compare hosts/sec with a previous --json result')
+    parser.add_argument('--max-regression', type=float, default=20,
+                        help='Allowed hosts/sec drop vs baseline in percent (default: 20)')
+    parser.add_argument('--keep', action='store_true', help='Keep temporary certificates and project')
+
+    args = parser.parse_args()
+    args.phases = [p.strip() for p in args.phases.split(',') if p.strip()]
+
+    unknown = [p for p in args.phases if p not in PHASES]
+    if unknown:
+        parser.error(f"Unknown phases: {', '.join(unknown)} (use {', '.join(PHASES)})")
+
+    logging.basicConfig(level=logging.ERROR, format='[%(levelname)s] %(message)s')
+
+    benchmark = CertificateBenchmark(args)
+    try:
+        benchmark.setup()
+        results = benchmark.run()
+    finally:
+        benchmark.teardown()
+        if args.keep:
+            print(f"Temporary files kept in {benchmark.work_dir}")
+
+    print_results(results)
+
+    if args.json:
+        payload = {
+            'generated_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'parameters': {k: v for k, v in vars(args).items() if k not in ('json', 'baseline')},
+            'results': results
+        }
+        args.json.write_text(json.dumps(payload, indent=2, default=str), encoding='utf-8')
+        print(f"\n✓ Results: {args.json}")
+
+    if args.baseline and not compare_baseline(results, args.baseline, args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Certificate Cache Module
+
+Trwały cache (SQLite) ostatniego wyniku sprawdzenia dla każdego host:port.
+Na jego podstawie scheduler decyduje, które hosty trzeba ponownie
+sprawdzić (handshake), a które można wziąć z cache:
+- certyfikat blisko wygaśnięcia -> sprawdzaj często (np. codziennie)
+- certyfikat z dużym zapasem -> sprawdzaj rzadko (np. co tydzień)
+- poprzednie sprawdzenie z błędem -> sprawdź zawsze
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from cert_checker import CertificateInfo
+
+
+# Część interwału, po której host jest już "do sprawdzenia" - last_probed
+# zapisywany jest na końcu przebiegu, więc kolejny przebieg (np. codzienny
+# przy interwale 24h) widzi wiek minimalnie krótszy niż interwał
+PROBE_INTERVAL_TOLERANCE = 0.9
+
+
+class CertificateCache:
+    """Klasa przechowująca ostatnie wyniki sprawdzeń certyfikatów"""
+
+    def __init__(
+        self,
+        db_path: Path,
+        near_expiry_days: int = 30,
+        near_expiry_interval_hours: int = 24,
+        default_interval_hours: int = 168
+    ):
+        """
+        Inicjalizacja cache
+
+        Args:
+            db_path: Ścieżka do pliku bazy SQLite
+            near_expiry_days: Próg "blisko wygaśnięcia" (dni)
+            near_expiry_interval_hours: Co ile sprawdzać certyfikaty blisko wygaśnięcia
+            default_interval_hours: Co ile sprawdzać pozostałe certyfikaty
+        """
+        self.db_path = Path(db_path)
+        self.near_expiry_days = int(near_expiry_days)
+        self.near_expiry_interval = timedelta(hours=int(near_expiry_interval_hours))
+        self.default_interval = timedelta(hours=int(default_interval_hours))
+        self.logger = logging.getLogger(__name__)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS certificates (
+                host_key TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                valid_until TEXT,
+                last_probed TEXT NOT NULL,
+                error INTEGER NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, host_key: str) -> Optional[Tuple[CertificateInfo, datetime]]:
+        """
+        Pobierz ostatni wynik dla host:port
+
+        Args:
+            host_key: Klucz "hostname:port"
+
+        Returns:
+            (CertificateInfo, last_probed) lub None jeśli brak w cache
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, last_probed FROM certificates WHERE host_key = ?",
+                (host_key,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        try:
+            cert_info = CertificateInfo.from_dict(json.loads(row[0]))
+            last_probed = datetime.fromisoformat(row[1])
+        except Exception as e:
+            self.logger.warning(f"Corrupted cache entry for {host_key}: {e}")
+            return None
+
+        return cert_info, last_probed
+
+    def needs_probe(
+        self,
+        cert_info: CertificateInfo,
+        last_probed: datetime,
+        now: Optional[datetime] = None
+    ) -> bool:
+        """
+        Zdecyduj czy host wymaga ponownego sprawdzenia
+
+        Args:
+            cert_info: Ostatni wynik z cache
+            last_probed: Kiedy host był ostatnio sprawdzony
+            now: Aktualny czas (domyślnie teraz, UTC)
+
+        Returns:
+            True jeśli trzeba zrobić nowy handshake
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+
+        # Błąd lub brak fingerprintu -> zawsze sprawdzaj ponownie
+        if cert_info.error or not cert_info.fingerprint:
+            return True
+
+        # valid_until jest znane - days_remaining liczymy bez handshake'u,
+        # ponowne sprawdzenie wykrywa tylko zmianę/odnowienie certyfikatu
+        age = now - last_probed
+        days_remaining = (cert_info.valid_until - now).days
+
+        if days_remaining <= self.near_expiry_days:
+            return age >= self.near_expiry_interval * PROBE_INTERVAL_TOLERANCE
+
+        return age >= self.default_interval * PROBE_INTERVAL_TOLERANCE
+
+    def split_hosts(
+        self,
+        hosts: List[tuple]
+    ) -> Tuple[List[tuple], Dict[str, CertificateInfo]]:
+        """
+        Podziel hosty na wymagające sprawdzenia i obsłużone z cache
+
+        Args:
+            hosts: Lista tuple (hostname, port, protocol)
+
+        Returns:
+            (hosty do sprawdzenia, {hostname:port -> CertificateInfo z cache})
+        """
+        now = datetime.now(timezone.utc)
+
+        to_probe = []
+        cached = {}
+
+        for host in hosts:
+            key = f"{host[0]}:{host[1]}"
+            entry = self.get(key)
+
+            if entry is None or self.needs_probe(entry[0], entry[1], now):
+                to_probe.append(host)
+            else:
+                cached[key] = entry[0]
+
+        return to_probe, cached
+
+    def store(self, results: Dict[str, CertificateInfo]) -> None:
+        """
+        Zapisz wyniki sprawdzeń do cache
+
+        Args:
+            results: Dictionary {hostname:port -> CertificateInfo}
+        """
+        now = datetime.now(timezone.utc).isoformat()
+
+        rows = [
+            (
+                key,
+                cert_info.fingerprint,
+                cert_info.valid_until.isoformat(),
+                now,
+                1 if cert_info.error else 0,
+                json.dumps(cert_info.to_dict(), ensure_ascii=False)
+            )
+            for key, cert_info in results.items()
+        ]
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO certificates "
+                "(host_key, fingerprint, valid_until, last_probed, error, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Zamknij połączenie z bazą"""
+        with self._lock:
+            self._conn.close()
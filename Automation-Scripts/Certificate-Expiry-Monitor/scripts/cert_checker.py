@@ -11,14 +11,65 @@ i zwraca szczegółowe informacje.
 
 import ssl
 import socket
+import select
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import nullcontext
 from datetime import datetime, timezone
-from typing import Dict, Optional, Tuple
-from dataclasses import dataclass, asdict
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
-from OpenSSL import SSL
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache
 import logging
 
+from circuit_breaker import CircuitBreaker
+from dns_resolver import DnsResolver
+from starttls import negotiate, negotiate_async, starttls_mode
+
+if TYPE_CHECKING:
+    # cryptography i pyOpenSSL ładowane dopiero przy pierwszym handshake'u -
+    # moduły korzystające tylko z CertificateInfo ich nie importują
+    from cert_model import ParsedCertificate
+    from cert_validator import CertificateValidator
+
+
+# Łańcuch z połączenia stdlib: SSLSocket/SSLObject.get_unverified_chain()
+# jest publiczne od 3.13. Na 3.10-3.12 ta sama metoda istnieje tylko
+# w prywatnym _ssl._SSLSocket (_sslobj) - używana jako zapasowa ścieżka.
+# Bez żadnej z nich handshake robi pyOpenSSL (get_peer_cert_chain)
+_PUBLIC_CHAIN = (
+    hasattr(ssl.SSLSocket, 'get_unverified_chain')
+    and hasattr(ssl.SSLObject, 'get_unverified_chain')
+)
+_PRIVATE_CHAIN = hasattr(
+    getattr(getattr(ssl, '_ssl', None), '_SSLSocket', None), 'get_unverified_chain'
+)
+_STDLIB_CHAIN = _PUBLIC_CHAIN or _PRIVATE_CHAIN
+
+
+@lru_cache(maxsize=None)
+def _log_once(level: int, message: str) -> None:
+    """Zaloguj komunikat tylko przy pierwszym wystąpieniu"""
+    logging.getLogger(__name__).log(level, message)
+
+
+class HandshakeTimeout(TimeoutError):
+    """Serwer przyjął połączenie, ale nie dokończył STARTTLS lub handshake'u TLS na czas"""
+
+
+class HostTarget(NamedTuple):
+    """Host do sprawdzenia (wpis z domains.yml)"""
+    
+    hostname: str
+    port: int
+    protocol: str
+    name: Optional[str] = None
+    group: Optional[str] = None
+    tags: Tuple[str, ...] = ()
+    alert_days: Optional[int] = None
+
 
 @dataclass
 class CertificateInfo:
@@ -56,23 +107,43 @@ class CertificateInfo:
     san_domains: list
     has_wildcard: bool
     
+    # Fingerprint (SHA-256 z DER, hex)
+    fingerprint: Optional[str] = None
+    
+    # Adres IP, z którego pochodzi wynik, i wszystkie sprawdzone adresy hosta
+    ip_address: Optional[str] = None
+    addresses: list = field(default_factory=list)
+    
     # Chain info
     chain_valid: Optional[bool] = None
     chain_length: Optional[int] = None
+    validation_errors: list = field(default_factory=list)
     
     # Alert level
     alert_level: str = "OK"  # OK, WARNING, CRITICAL, EXPIRED
     
+    # Próg WARNING użyty dla hosta (alert_days z domains.yml)
+    alert_days: Optional[int] = None
+    
     # Error info
     error: Optional[str] = None
     
     def to_dict(self) -> dict:
         """Konwertuj do dictionary"""
-        data = asdict(self)
+        # Płytka kopia pól (asdict kopiuje rekurencyjnie - wolne przy dużej liczbie)
+        data = {name: getattr(self, name) for name in self.__dataclass_fields__}
         # Konwertuj datetime do string
         data['valid_from'] = self.valid_from.isoformat()
         data['valid_until'] = self.valid_until.isoformat()
         return data
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> 'CertificateInfo':
+        """Utwórz z dictionary (odwrotność to_dict)"""
+        data = dict(data)
+        data['valid_from'] = datetime.fromisoformat(data['valid_from'])
+        data['valid_until'] = datetime.fromisoformat(data['valid_until'])
+        return cls(**data)
 
 
 class CertificateChecker:
@@ -80,17 +151,75 @@ class CertificateChecker:
     Główna klasa do sprawdzania certyfikatów SSL/TLS
     """
     
-    def __init__(self, timeout: int = 10, verify: bool = False):
+    # Domyślne progi poziomów alertu (dni do wygaśnięcia)
+    WARNING_DAYS = 30
+    CRITICAL_DAYS = 7
+    
+    def __init__(
+        self,
+        timeout: int = 10,
+        verify: bool = False,
+        validator: Optional['CertificateValidator'] = None,
+        check_revocation: bool = True,
+        verify_hostname: bool = True,
+        retry_attempts: int = 1,
+        retry_delay: float = 5,
+        breaker: Optional[CircuitBreaker] = None,
+        resolver: Optional[DnsResolver] = None,
+        probe_all_addresses: bool = True,
+        starttls_timeout: float = 5,
+        metrics=None
+    ):
         """
         Inicjalizacja checker
         
         Args:
             timeout: Timeout dla połączenia (sekundy)
             verify: Czy weryfikować certyfikat
+            validator: CertificateValidator - jeśli podany, łańcuch z tego
+                samego handshake'u jest od razu walidowany
+            check_revocation: Czy validator ma sprawdzać revocation
+            verify_hostname: Czy validator ma weryfikować hostname
+            retry_attempts: Ile prób łącznie przy przejściowym błędzie połączenia
+            retry_delay: Bazowe opóźnienie ponowienia (sekundy, rośnie x2 + jitter)
+            breaker: CircuitBreaker - hosty uporczywie nieosiągalne są pomijane
+            resolver: DnsResolver - nazwy rozwiązywane z góry, połączenia na adres IP
+            probe_all_addresses: Czy sprawdzać każdy adres IP hosta (load balancing)
+            starttls_timeout: Timeout każdej fazy dialogu STARTTLS (sekundy)
+            metrics: RunMetrics - czasy faz (connect, starttls, handshake, parse, validation)
         """
         self.timeout = timeout
         self.verify = verify
+        self.validator = validator
+        self.check_revocation = check_revocation
+        self.verify_hostname = verify_hostname
+        self.retry_attempts = max(1, int(retry_attempts))
+        self.retry_delay = float(retry_delay)
+        self.breaker = breaker
+        self.resolver = resolver
+        self.probe_all_addresses = probe_all_addresses
+        self.starttls_timeout = starttls_timeout
+        self.metrics = metrics
         self.logger = logging.getLogger(__name__)
+        
+        # hostname:port -> próg WARNING (alert_days z domains.yml)
+        self.alert_days: Dict[str, int] = {}
+        
+        # SSL contexty tworzone raz i współdzielone między połączeniami
+        self._ssl_contexts: Dict[bool, ssl.SSLContext] = {}
+    
+    def set_alert_days(self, hosts: Iterable[tuple]) -> None:
+        """
+        Ustaw progi WARNING per host (zastępuje poprzednie)
+        
+        Args:
+            hosts: Lista HostTarget (hosty bez alert_days - próg domyślny)
+        """
+        self.alert_days = {
+            f"{host.hostname}:{host.port}": int(host.alert_days)
+            for host in hosts
+            if isinstance(host, HostTarget) and host.alert_days is not None
+        }
     
     def check_certificate(
         self,
@@ -116,39 +245,242 @@ class CertificateChecker:
         # Returns:
         #     CertificateInfo object z danymi certyfikatu
         # """
-        self.logger.info(f"Checking certificate for {hostname}:{port}")
+        blocked = self._circuit_open_info(hostname, port, protocol)
+        if blocked:
+            return blocked
+        
+        host, addresses = self._resolve_targets([(hostname, port, protocol)])[0]
+        
+        outcomes = []
+        for address in addresses:
+            attempt = 0
+            while True:
+                cert_info, error = self._probe(*host, address)
+                
+                if not self._should_retry(error, attempt, f"{hostname}:{port}"):
+                    break
+                
+                # Pojedynczy host - można czekać w bieżącym wątku
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+            
+            outcomes.append((cert_info, error))
+        
+        return self._finish_probe(*self._aggregate(outcomes))
+    
+    def _probe(
+        self,
+        hostname: str,
+        port: int,
+        protocol: str,
+        address: Optional[str] = None
+    ) -> Tuple[CertificateInfo, Optional[Exception]]:
+        """
+        Jedna próba sprawdzenia certyfikatu (bez ponowień)
+        
+        Args:
+            hostname: Hostname lub IP
+            port: Port SSL/TLS
+            protocol: Protokół
+            address: Adres IP do połączenia (None = rozwiąż hostname)
+        
+        Returns:
+            (CertificateInfo, błąd połączenia lub None)
+        """
+        target = f" ({address})" if address and address != hostname else ""
+        self.logger.info(f"Checking certificate for {hostname}:{port}{target}")
+        
+        try:
+            # Pobierz łańcuch certyfikatów (jeden handshake)
+            chain_der = self._get_certificate_chain_der(hostname, port, protocol, address)
+        except Exception as e:
+            cert_info = self._create_error_info(hostname, port, protocol, str(e))
+            cert_info.ip_address = address
+            return cert_info, e
         
         try:
-            # Pobierz certyfikat
-            cert_pem = self._get_certificate_pem(hostname, port, protocol)
+            # Parse + walidacja
+            cert_info = self._build_certificate_info(chain_der, hostname, port, protocol)
+        except Exception as e:
+            cert_info = self._create_error_info(hostname, port, protocol, str(e))
+        
+        cert_info.ip_address = address
+        return cert_info, None
+    
+    def _resolve_targets(self, hosts: list) -> List[Tuple[tuple, List[Optional[str]]]]:
+        """
+        Rozwiąż nazwy wszystkich hostów naraz (DnsResolver)
+        
+        Args:
+            hosts: Lista HostTarget lub tuple (hostname, port, protocol)
+        
+        Returns:
+            Lista (host, adresy IP do sprawdzenia); [None] = rozwiąż przy połączeniu
+        """
+        hosts = [(str(h[0]), int(h[1]), str(h[2])) for h in hosts]
+        
+        if not self.resolver:
+            return [(host, [None]) for host in hosts]
+        
+        answers = self.resolver.resolve_many(host[0] for host in hosts)
+        
+        targets = []
+        for host in hosts:
+            addresses = answers.get(host[0])
             
-            # Parse certyfikat
-            cert = x509.load_pem_x509_certificate(cert_pem, default_backend())
+            if isinstance(addresses, Exception) or not addresses:
+                # Błąd DNS obsłuży zwykła ścieżka (klasyfikacja, ponowienia)
+                addresses = [None]
+            elif not self.probe_all_addresses:
+                addresses = addresses[:1]
             
-            # Ekstraktuj informacje
-            cert_info = self._extract_certificate_info(
-                cert, hostname, port, protocol
+            targets.append((host, addresses))
+        
+        return targets
+    
+    def _aggregate(
+        self,
+        outcomes: List[Tuple[CertificateInfo, Optional[Exception]]]
+    ) -> Tuple[CertificateInfo, Optional[Exception]]:
+        """
+        Połącz wyniki z wielu adresów IP hosta w jeden (najgorszy)
+        
+        Args:
+            outcomes: Lista (CertificateInfo, błąd połączenia) per adres
+        
+        Returns:
+            (CertificateInfo, błąd połączenia - tylko gdy żaden adres nie odpowiedział)
+        """
+        addresses = [
+            cert_info.ip_address for cert_info, _ in outcomes if cert_info.ip_address
+        ]
+        
+        if len(outcomes) == 1:
+            outcomes[0][0].addresses = addresses
+            return outcomes[0]
+
+        succeeded = [cert_info for cert_info, _ in outcomes if not cert_info.error]
+        failed = [cert_info for cert_info, _ in outcomes if cert_info.error]
+        
+        if not succeeded:
+            cert_info, error = outcomes[0]
+            cert_info.addresses = addresses
+            return cert_info, error
+        
+        # Najgorszy: poziom alertu, potem najmniej dni, potem niepoprawny łańcuch
+        severity = {"OK": 0, "WARNING": 1, "CRITICAL": 2, "EXPIRED": 3}
+        worst = max(
+            succeeded,
+            key=lambda c: (
+                severity.get(c.alert_level, 0),
+                -c.days_remaining,
+                c.chain_valid is False
             )
-            
-            self.logger.info(
-                f"Certificate for {hostname}:{port} - "
-                f"{cert_info.days_remaining} days remaining"
+        )
+        
+        worst.addresses = addresses
+        worst.validation_errors = list(worst.validation_errors)
+        
+        fingerprints = {c.fingerprint for c in succeeded}
+        if len(fingerprints) > 1:
+            worst.validation_errors.append(
+                f"Mixed certificates: {len(fingerprints)} different certificates "
+                f"across {len(succeeded)} addresses"
             )
-            
-            return cert_info
-            
-        except Exception as e:
-            self.logger.error(f"Error checking {hostname}:{port}: {str(e)}")
-            return self._create_error_info(hostname, port, protocol, str(e))
+        
+        for cert_info in failed:
+            worst.validation_errors.append(
+                f"Address {cert_info.ip_address} failed: {cert_info.error}"
+            )
+        
+        return worst, None
+    
+    @staticmethod
+    def _is_unreachable(error: Optional[Exception]) -> bool:
+        """
+        Czy błąd oznacza brak połączenia z hostem (a nie problem z TLS)
+        
+        Timeout STARTTLS lub handshake'u (HandshakeTimeout) to zastój
+        protokołu na przyjętym połączeniu - host odpowiada.
+        
+        Args:
+            error: Wyjątek z próby połączenia
+        
+        Returns:
+            True dla timeoutów połączenia, odmowy połączenia, błędów DNS/sieci
+        """
+        if error is None or isinstance(error, (ssl.SSLError, HandshakeTimeout)):
+            return False
+        return isinstance(error, OSError)
+    
+    def _should_retry(self, error: Optional[Exception], attempt: int, host_key: str) -> bool:
+        """
+        Czy ponowić próbę po błędzie
+        
+        Host z breakerem w stanie half-open dostaje jedną próbę kontrolną,
+        bez ponowień.
+        
+        Args:
+            error: Wyjątek z próby połączenia (None = sukces lub błąd TLS/parse)
+            attempt: Numer wykonanej próby (0 = pierwsza)
+            host_key: Klucz "hostname:port"
+        
+        Returns:
+            True jeśli błąd jest przejściowy i zostały próby
+        """
+        if attempt + 1 >= self.retry_attempts or not self._is_unreachable(error):
+            return False
+        
+        if self.breaker and self.breaker.is_half_open(host_key):
+            return False
+        
+        # Nieistniejąca domena nie pojawi się za kilka sekund
+        if isinstance(error, socket.gaierror):
+            return error.errno == socket.EAI_AGAIN
+        
+        return True
+    
+    def _backoff(self, attempt: int) -> float:
+        """Opóźnienie przed ponowieniem: retry_delay * 2^attempt ± 50%"""
+        return self.retry_delay * (2 ** attempt) * random.uniform(0.5, 1.5)
     
-    def _get_certificate_pem(
+    def _finish_probe(
+        self,
+        cert_info: CertificateInfo,
+        error: Optional[Exception]
+    ) -> CertificateInfo:
+        """
+        Zakończ sprawdzenie hosta: log błędu i stan circuit breakera
+        
+        Args:
+            cert_info: Wynik ostatniej próby
+            error: Błąd połączenia z ostatniej próby (lub None)
+        
+        Returns:
+            cert_info
+        """
+        key = f"{cert_info.hostname}:{cert_info.port}"
+        
+        if cert_info.error:
+            self.logger.error(f"Error checking {key}: {cert_info.error}")
+        
+        if self.breaker:
+            # Błąd TLS/walidacji też oznacza, że host odpowiada
+            if self._is_unreachable(error):
+                self.breaker.record_failure(key, cert_info.error)
+            else:
+                self.breaker.record_success(key)
+        
+        return cert_info
+    
+    def _circuit_open_info(
         self,
         hostname: str,
         port: int,
         protocol: str
-    ) -> bytes:
+    ) -> Optional[CertificateInfo]:
         """
-        Pobierz certyfikat w formacie PEM
+        Błąd bez połączenia dla hosta z otwartym circuit breakerem
         
         Args:
             hostname: Hostname
@@ -156,40 +488,195 @@ class CertificateChecker:
             protocol: Protokół
         
         Returns:
-            Certyfikat w formacie PEM (bytes)
+            CertificateInfo z błędem lub None (host można sprawdzić)
         """
-        # Utwórz SSL context
-        context = ssl.create_default_context()
+        key = f"{hostname}:{port}"
         
-        if not self.verify or hostname in ['localhost', '127.0.0.1']:
-            # Dla self-signed - wyłącz weryfikację
-            context.check_hostname = False
-            context.verify_mode = ssl.CERT_NONE
+        if not self.breaker or self.breaker.allow(key):
+            return None
+        
+        error = (
+            f"Circuit open until {self.breaker.open_until(key).isoformat()} "
+            f"({self.breaker.failures(key)} consecutive failures)"
+        )
+        self.logger.warning(f"Skipping {key}: {error}")
+        return self._create_error_info(hostname, port, protocol, error)
+    
+    def _order_hosts(self, hosts: list) -> list:
+        """
+        Hosty z wcześniejszymi porażkami na koniec kolejki
+        
+        Zdrowe hosty nie czekają za długim ogonem timeoutów.
+        
+        Args:
+            hosts: Lista tuple (hostname, port, protocol)
+        
+        Returns:
+            Posortowana lista (stabilnie - zdrowe w oryginalnej kolejności)
+        """
+        if not self.breaker:
+            return list(hosts)
+        
+        return sorted(hosts, key=lambda h: self.breaker.failures(f"{h[0]}:{h[1]}"))
+    
+    def _get_certificate_chain_der(
+        self,
+        hostname: str,
+        port: int,
+        protocol: str,
+        address: Optional[str] = None
+    ) -> List[bytes]:
+        """
+        Pobierz certyfikat i łańcuch przesłany przez serwer (DER)
+        
+        Args:
+            hostname: Hostname (SNI)
+            port: Port
+            protocol: Protokół
+            address: Adres IP do połączenia (None = hostname)
+        
+        Returns:
+            Lista certyfikatów DER (leaf -> intermediate -> root)
+        """
+        # Pobierz SSL context
+        context = self._get_ssl_context(hostname)
         
         # Połącz z serwerem
-        with socket.create_connection((hostname, port), timeout=self.timeout) as sock:
-            # Wrap w SSL
-            with context.wrap_socket(sock, server_hostname=hostname) as ssock:
-                # Pobierz certyfikat w DER format
-                cert_der = ssock.getpeercert(binary_form=True)
+        with self._timer('connect', hostname, port):
+            sock = socket.create_connection((address or hostname, port), timeout=self.timeout)
+        
+        with sock:
+            try:
+                # SMTP/IMAP/LDAP/FTP na portach STARTTLS - najpierw dialog protokołu
+                mode = starttls_mode(protocol, port)
+                if mode:
+                    with self._timer('starttls', hostname, port):
+                        negotiate(sock, mode, min(self.starttls_timeout, self.timeout))
                 
-                # Konwertuj DER do PEM
-                cert_pem = ssl.DER_cert_to_PEM_cert(cert_der).encode('utf-8')
+                if not _STDLIB_CHAIN:
+                    with self._timer('handshake', hostname, port):
+                        return self._pyopenssl_chain_der(sock, hostname)
                 
-                return cert_pem
+                # Wrap w SSL (handshake w wrap_socket)
+                with self._timer('handshake', hostname, port):
+                    ssock = context.wrap_socket(sock, server_hostname=hostname)
+            except (socket.timeout, TimeoutError) as e:
+                raise HandshakeTimeout(str(e)) from e
+            
+            with ssock:
+                return self._peer_chain_der(ssock)
     
-    def _extract_certificate_info(
+    def _timer(self, phase: str, hostname: str, port: int):
+        """Pomiar czasu fazy dla hosta (bez metryk - pusty context manager)"""
+        if not self.metrics:
+            return nullcontext()
+        return self.metrics.timer(phase, f"{hostname}:{port}")
+    
+    @staticmethod
+    def _pyopenssl_chain_der(sock: socket.socket, hostname: str) -> List[bytes]:
+        """
+        Handshake pyOpenSSL na połączonym gnieździe i łańcuch z serwera
+        
+        Używane gdy stdlib nie udostępnia łańcucha (Python < 3.10).
+        
+        Args:
+            sock: Połączone gniazdo (po ewentualnym STARTTLS)
+            hostname: Hostname (SNI)
+        
+        Returns:
+            Lista certyfikatów DER (leaf -> intermediate -> root)
+        
+        Raises:
+            socket.timeout: Brak odpowiedzi serwera w czasie timeoutu gniazda
+        """
+        from OpenSSL import SSL, crypto
+        
+        context = SSL.Context(SSL.TLS_CLIENT_METHOD)
+        context.set_verify(SSL.VERIFY_NONE, lambda *args: True)
+        
+        connection = SSL.Connection(context, sock)
+        connection.set_tlsext_host_name(hostname.encode('idna'))
+        connection.set_connect_state()
+        
+        # Gniazdo z timeoutem jest nieblokujące dla OpenSSL - czekaj select()
+        while True:
+            try:
+                connection.do_handshake()
+                break
+            except SSL.WantReadError:
+                ready = select.select([sock], [], [], sock.gettimeout())[0]
+            except SSL.WantWriteError:
+                ready = select.select([], [sock], [], sock.gettimeout())[1]
+            if not ready:
+                raise socket.timeout("TLS handshake timed out")
+        
+        return [
+            crypto.dump_certificate(crypto.FILETYPE_ASN1, cert)
+            for cert in connection.get_peer_cert_chain() or []
+        ]
+    
+    @staticmethod
+    def _peer_chain_der(ssl_object) -> List[bytes]:
+        """
+        Odczytaj łańcuch certyfikatów z połączenia SSL (stdlib)
+        
+        Python 3.13+: publiczne get_unverified_chain() (lista DER). Na 3.10-3.12
+        łańcuch daje prywatne _sslobj.get_unverified_chain() (obiekty
+        _ssl.Certificate) - jeśli zawiedzie, zwracany jest sam leaf, a ostrzeżenie
+        trafia do logu raz. Na Python < 3.10 łańcuch pobiera _pyopenssl_chain_der.
+        
+        Args:
+            ssl_object: ssl.SSLSocket lub ssl.SSLObject po handshake'u
+        
+        Returns:
+            Lista certyfikatów DER (leaf -> intermediate -> root)
+        """
+        if _PUBLIC_CHAIN:
+            chain = ssl_object.get_unverified_chain()
+        else:
+            chain = CertificateChecker._private_chain_der(ssl_object)
+        
+        if not chain:
+            return [ssl_object.getpeercert(binary_form=True)]
+        
+        return chain
+    
+    @staticmethod
+    def _private_chain_der(ssl_object) -> Optional[List[bytes]]:
+        """
+        Łańcuch z prywatnego API _ssl (Python 3.10-3.12)
+        
+        Args:
+            ssl_object: ssl.SSLSocket lub ssl.SSLObject po handshake'u
+        
+        Returns:
+            Lista certyfikatów DER lub None (API niedostępne / zmienione)
+        """
+        _log_once(logging.DEBUG, "Reading peer chain via private ssl._ssl API (Python < 3.13)")
+        
+        try:
+            chain = ssl_object._sslobj.get_unverified_chain()
+            return [cert.public_bytes(ssl._ssl.ENCODING_DER) for cert in chain or []]
+        except (AttributeError, TypeError, ValueError) as e:
+            _log_once(
+                logging.WARNING,
+                f"Private ssl API for the peer chain failed ({type(e).__name__}: {e}) - "
+                f"reporting the leaf certificate only"
+            )
+            return None
+    
+    def _build_certificate_info(
         self,
-        cert: x509.Certificate,
+        chain_der: List[bytes],
         hostname: str,
         port: int,
         protocol: str
     ) -> CertificateInfo:
         """
-        Ekstraktuj informacje z certyfikatu
+        Zbuduj CertificateInfo (i wynik walidacji) z przechwyconego łańcucha
         
         Args:
-            cert: x509.Certificate object
+            chain_der: Łańcuch certyfikatów DER (leaf pierwszy)
             hostname: Hostname
             port: Port
             protocol: Protokół
@@ -197,22 +684,111 @@ class CertificateChecker:
         Returns:
             CertificateInfo object
         """
-        # Subject
-        subject = cert.subject
-        subject_str = self._format_name(subject)
-        common_name = self._get_common_name(subject)
-        organization = self._get_organization(subject)
+        from cert_model import ParsedCertificate
+        
+        with self._timer('parse', hostname, port):
+            # Parse certyfikaty (jeden raz, bezpośrednio z DER)
+            chain = [ParsedCertificate(der) for der in chain_der]
+            
+            # Ekstraktuj informacje
+            cert_info = self._extract_certificate_info(
+                chain[0], hostname, port, protocol
+            )
+        
+        # Walidacja łańcucha z tego samego handshake'u
+        if self.validator:
+            with self._timer('validation', hostname, port):
+                result = self.validator.validate_chain(
+                    chain,
+                    hostname,
+                    check_revocation=self.check_revocation,
+                    verify_hostname=self.verify_hostname
+                )
+            cert_info.chain_valid = result.chain_valid and result.trusted_ca
+            cert_info.chain_length = result.chain_length
+            cert_info.validation_errors = (
+                result.chain_errors + result.hostname_errors + result.security_issues
+            )
+        
+        self.logger.info(
+            f"Certificate for {hostname}:{port} - "
+            f"{cert_info.days_remaining} days remaining"
+        )
+        
+        return cert_info
+    
+    def _get_ssl_context(self, hostname: str) -> ssl.SSLContext:
+        """
+        Pobierz (współdzielony) SSL context dla hosta
         
-        # Issuer
-        issuer = cert.issuer
-        issuer_str = self._format_name(issuer)
+        Args:
+            hostname: Hostname
         
-        # Sprawdź czy self-signed
-        is_self_signed = subject_str == issuer_str
+        Returns:
+            ssl.SSLContext (z weryfikacją lub bez)
+        """
+        verify = self.verify and hostname not in ['localhost', '127.0.0.1']
         
+        context = self._ssl_contexts.get(verify)
+        if context is None:
+            context = ssl.create_default_context()
+            
+            if not verify:
+                # Dla self-signed - wyłącz weryfikację
+                context.check_hostname = False
+                context.verify_mode = ssl.CERT_NONE
+            
+            self._ssl_contexts[verify] = context
+        
+        return context
+    
+    def certificate_info(
+        self,
+        cert: 'ParsedCertificate',
+        hostname: str,
+        port: int,
+        protocol: str
+    ) -> CertificateInfo:
+        """
+        Zbuduj CertificateInfo z certyfikatu spoza handshake'u (np. z pliku)
+        
+        Args:
+            cert: ParsedCertificate object
+            hostname: Hostname (dla pliku - ścieżka)
+            port: Port (dla pliku - numer certyfikatu w pliku)
+            protocol: Protokół (dla pliku - format: pem, der, pkcs7, pkcs12)
+        
+        Returns:
+            CertificateInfo object
+        """
+        return self._extract_certificate_info(cert, hostname, port, protocol)
+    
+    def error_info(self, hostname: str, port: int, protocol: str, error: str) -> CertificateInfo:
+        """CertificateInfo z błędem (np. nieczytelny plik) - jak dla hosta"""
+        return self._create_error_info(hostname, port, protocol, error)
+    
+    def _extract_certificate_info(
+        self,
+        cert: 'ParsedCertificate',
+        hostname: str,
+        port: int,
+        protocol: str
+    ) -> CertificateInfo:
+        """
+        Ekstraktuj informacje z certyfikatu
+        
+        Args:
+            cert: ParsedCertificate object
+            hostname: Hostname
+            port: Port
+            protocol: Protokół
+        
+        Returns:
+            CertificateInfo object
+        """
         # Daty
-        valid_from = cert.not_valid_before_utc
-        valid_until = cert.not_valid_after_utc
+        valid_from = cert.valid_from
+        valid_until = cert.valid_until
         
         # Oblicz dni do wygaśnięcia
         now = datetime.now(timezone.utc)
@@ -222,115 +798,95 @@ class CertificateChecker:
         is_valid = valid_from <= now <= valid_until
         is_expired = now > valid_until
         
-        # Szczegóły techniczne
-        serial_number = format(cert.serial_number, 'x')
-        version = cert.version.value
-        signature_algorithm = cert.signature_algorithm_oid._name
-        
-        # Public key info
-        public_key = cert.public_key()
-        public_key_algorithm = public_key.__class__.__name__
-        key_size = public_key.key_size if hasattr(public_key, 'key_size') else 0
-        
         # SAN (Subject Alternative Names)
-        san_domains = self._get_san_domains(cert)
+        san_domains = list(cert.san_domains)
         has_wildcard = any(domain.startswith('*.') for domain in san_domains)
         
-        # Określ alert level
-        alert_level = self._determine_alert_level(days_remaining, is_expired)
+        # Określ alert level (próg WARNING hosta z domains.yml)
+        alert_days = self.alert_days.get(f"{hostname}:{port}")
+        alert_level = self._determine_alert_level(days_remaining, is_expired, alert_days)
         
         return CertificateInfo(
             hostname=hostname,
             port=port,
             protocol=protocol,
-            subject=subject_str,
-            issuer=issuer_str,
-            common_name=common_name,
-            organization=organization,
+            subject=cert.subject_str,
+            issuer=cert.issuer_str,
+            common_name=cert.common_name,
+            organization=cert.organization,
             valid_from=valid_from,
             valid_until=valid_until,
             days_remaining=days_remaining,
             is_valid=is_valid,
             is_expired=is_expired,
-            is_self_signed=is_self_signed,
-            serial_number=serial_number,
-            version=version,
-            signature_algorithm=signature_algorithm,
-            public_key_algorithm=public_key_algorithm,
-            key_size=key_size,
+            is_self_signed=cert.is_self_signed,
+            serial_number=cert.serial_number,
+            version=cert.version,
+            signature_algorithm=cert.signature_algorithm,
+            public_key_algorithm=cert.public_key_algorithm,
+            key_size=cert.key_size,
             san_domains=san_domains,
             has_wildcard=has_wildcard,
-            alert_level=alert_level
+            fingerprint=cert.fingerprint,
+            alert_level=alert_level,
+            alert_days=alert_days
         )
     
-    def _format_name(self, name: x509.Name) -> str:
-        """Formatuj X509 Name do string"""
-        parts = []
-        for attr in name:
-            parts.append(f"{attr.oid._name}={attr.value}")
-        return ", ".join(parts)
-    
-    def _get_common_name(self, name: x509.Name) -> str:
-        """Pobierz Common Name (CN) z Subject"""
-        try:
-            cn = name.get_attributes_for_oid(x509.NameOID.COMMON_NAME)
-            return cn.value if cn else "N/A"
-        except Exception:
-            return "N/A"
-    
-    def _get_organization(self, name: x509.Name) -> Optional[str]:
-        """Pobierz Organization (O) z Subject"""
-        try:
-            org = name.get_attributes_for_oid(x509.NameOID.ORGANIZATION_NAME)
-            return org.value if org else None
-        except Exception:
-            return None
-    
-    def _get_san_domains(self, cert: x509.Certificate) -> list:
-        """
-        Pobierz listę domen z SAN (Subject Alternative Name)
-        
-        Args:
-            cert: x509.Certificate
-        
-        Returns:
-            Lista domen
-        """
-        try:
-            san_ext = cert.extensions.get_extension_for_oid(
-                x509.ExtensionOID.SUBJECT_ALTERNATIVE_NAME
-            )
-            san_domains = [
-                name.value for name in san_ext.value
-                if isinstance(name, x509.DNSName)
-            ]
-            return san_domains
-        except x509.ExtensionNotFound:
-            return []
-        except Exception as e:
-            self.logger.warning(f"Error extracting SAN: {e}")
-            return []
-    
-    def _determine_alert_level(self, days_remaining: int, is_expired: bool) -> str:
+    def _determine_alert_level(
+        self,
+        days_remaining: int,
+        is_expired: bool,
+        alert_days: Optional[int] = None
+    ) -> str:
         """
         Określ poziom alertu na podstawie dni do wygaśnięcia
         
         Args:
             days_remaining: Dni do wygaśnięcia
             is_expired: Czy certyfikat wygasł
+            alert_days: Próg WARNING hosta (None = WARNING_DAYS);
+                próg CRITICAL nie jest większy niż alert_days
         
         Returns:
             Alert level: OK, WARNING, CRITICAL, EXPIRED
         """
+        warning_days = self.WARNING_DAYS if alert_days is None else alert_days
+        critical_days = min(self.CRITICAL_DAYS, warning_days)
+        
         if is_expired:
             return "EXPIRED"
-        elif days_remaining <= 7:
+        elif days_remaining <= critical_days:
             return "CRITICAL"
-        elif days_remaining <= 30:
+        elif days_remaining <= warning_days:
             return "WARNING"
         else:
             return "OK"
     
+    def refresh_certificate_info(self, cert_info: CertificateInfo) -> CertificateInfo:
+        """
+        Przelicz pola zależne od czasu (np. dla wyniku z cache)
+        
+        Args:
+            cert_info: CertificateInfo z wcześniejszego sprawdzenia
+        
+        Returns:
+            Ten sam CertificateInfo z aktualnymi days_remaining i alert_level
+        """
+        if cert_info.error:
+            return cert_info
+        
+        now = datetime.now(timezone.utc)
+        
+        cert_info.days_remaining = (cert_info.valid_until - now).days
+        cert_info.is_valid = cert_info.valid_from <= now <= cert_info.valid_until
+        cert_info.is_expired = now > cert_info.valid_until
+        cert_info.alert_days = self.alert_days.get(f"{cert_info.hostname}:{cert_info.port}")
+        cert_info.alert_level = self._determine_alert_level(
+            cert_info.days_remaining, cert_info.is_expired, cert_info.alert_days
+        )
+        
+        return cert_info
+    
     def _create_error_info(
         self,
         hostname: str,
@@ -380,7 +936,8 @@ class CertificateChecker:
     def check_multiple_hosts(
         self,
         hosts: list,
-        concurrent: int = 10
+        concurrent: int = 10,
+        on_result: Optional[Callable[[CertificateInfo], None]] = None
     ) -> Dict[str, CertificateInfo]:
         """
         Sprawdź wiele hostów jednocześnie
@@ -388,58 +945,369 @@ class CertificateChecker:
         Args:
             hosts: Lista tuple (hostname, port, protocol)
             concurrent: Ile jednocześnie
+            on_result: Wywoływane dla każdego wyniku zaraz po sprawdzeniu
 
         Returns:
             Dictionary {hostname:port -> CertificateInfo}
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-    
+        from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+        
         results = {}
-    
+        
+        def finish(cert_info: CertificateInfo) -> None:
+            key = f"{cert_info.hostname}:{cert_info.port}"
+            results[key] = cert_info
+            
+            self.logger.debug(f"Checked {key}")
+            
+            if on_result:
+                on_result(cert_info)
+        
+        # Wyniki per adres zbierane do agregacji: host -> {adres -> (cert_info, błąd)}
+        addresses_by_host: Dict[tuple, list] = {}
+        outcomes: Dict[tuple, dict] = {}
+        
+        # future -> (host, adres, próba); ponowienia w kopcu (termin, seq, host, adres, próba)
+        pending = {}
+        retries: List[tuple] = []
+        sequence = itertools.count()
+        
+        unblocked = []
+        for host in self._order_hosts(hosts):
+            blocked = self._circuit_open_info(str(host[0]), int(host[1]), str(host[2]))
+            if blocked:
+                finish(blocked)
+            else:
+                unblocked.append(host)
+        
+        # DNS dla wszystkich hostów naraz, przed handshake'ami
+        targets = self._resolve_targets(unblocked)
+        
         with ThreadPoolExecutor(max_workers=concurrent) as executor:
-            # Submit wszystkie zadania
-            future_to_host = {}
+            for host, addresses in targets:
+                addresses_by_host[host] = addresses
+                outcomes[host] = {}
+                
+                for address in addresses:
+                    future = executor.submit(self._probe, *host, address)
+                    pending[future] = (host, address, 0)
             
-            for host in hosts:
-                hostname = host
-                port = host[1]
-                protocol = host[2]
+            while pending or retries:
+                # Ponowienia, których termin minął, wracają do puli
+                now = time.monotonic()
+                while retries and retries[0][0] <= now:
+                    _, _, host, address, attempt = heapq.heappop(retries)
+                    future = executor.submit(self._probe, *host, address)
+                    pending[future] = (host, address, attempt)
+                
+                # Czekamy w wątku głównym - worker nie jest blokowany przez backoff
+                timeout = max(0.0, retries[0][0] - now) if retries else None
+                done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    host, address, attempt = pending.pop(future)
+                    
+                    try:
+                        cert_info, error = future.result()
+                    except Exception as e:
+                        cert_info = self._create_error_info(*host, error=str(e))
+                        cert_info.ip_address = address
+                        error = None
+                    
+                    if self._should_retry(error, attempt, f"{host[0]}:{host[1]}"):
+                        delay = self._backoff(attempt)
+                        self.logger.debug(
+                            f"Retrying {host[0]}:{host[1]} in {delay:.1f}s "
+                            f"(attempt {attempt + 2}): {cert_info.error}"
+                        )
+                        heapq.heappush(
+                            retries,
+                            (time.monotonic() + delay, next(sequence), host, address, attempt + 1)
+                        )
+                        continue
+                    
+                    outcomes[host][address] = (cert_info, error)
+                    
+                    # Wszystkie adresy hosta sprawdzone - jeden wynik per host
+                    if len(outcomes[host]) == len(addresses_by_host[host]):
+                        by_address = outcomes.pop(host)
+                        finish(self._finish_probe(*self._aggregate(
+                            [by_address[a] for a in addresses_by_host.pop(host)]
+                        )))
+        
+        return results
+    
+    def check_multiple_hosts_async(
+        self,
+        hosts: list,
+        concurrent: int = 1000,
+        on_result: Optional[Callable[[CertificateInfo], None]] = None
+    ) -> Dict[str, CertificateInfo]:
+        """
+        Sprawdź wiele hostów jednocześnie w jednym event loop (asyncio)
+        
+        Zamiast jednego wątku na połączenie, wszystkie handshake'i działają
+        w jednym wątku - dzięki temu można mieć tysiące połączeń w locie.
+        
+        Args:
+            hosts: Lista tuple (hostname, port, protocol)
+            concurrent: Maksymalna liczba handshake'ów w locie
+            on_result: Wywoływane dla każdego wyniku zaraz po sprawdzeniu
+        
+        Returns:
+            Dictionary {hostname:port -> CertificateInfo}
+        """
+        return asyncio.run(self._check_hosts_async(hosts, concurrent, on_result))
+    
+    async def _check_hosts_async(
+        self,
+        hosts: list,
+        concurrent: int,
+        on_result: Optional[Callable[[CertificateInfo], None]] = None
+    ) -> Dict[str, CertificateInfo]:
+        """
+        Uruchom sprawdzanie wszystkich hostów (ograniczone semaforem)
+        
+        Args:
+            hosts: Lista tuple (hostname, port, protocol)
+            concurrent: Maksymalna liczba handshake'ów w locie
+            on_result: Wywoływane dla każdego wyniku zaraz po sprawdzeniu
+        
+        Returns:
+            Dictionary {hostname:port -> CertificateInfo}
+        """
+        semaphore = asyncio.BoundedSemaphore(concurrent)
+        
+        results = {}
+        
+        def finish(cert_info: CertificateInfo) -> None:
+            key = f"{cert_info.hostname}:{cert_info.port}"
+            results[key] = cert_info
+            
+            self.logger.debug(f"Checked {key}")
+            
+            if on_result:
+                on_result(cert_info)
+        
+        unblocked = []
+        for host in self._order_hosts(hosts):
+            blocked = self._circuit_open_info(str(host[0]), int(host[1]), str(host[2]))
+            if blocked:
+                finish(blocked)
+            else:
+                unblocked.append(host)
+        
+        # DNS dla wszystkich hostów naraz (pula wątków resolvera), przed handshake'ami
+        loop = asyncio.get_running_loop()
+        targets = await loop.run_in_executor(None, self._resolve_targets, unblocked)
+        
+        tasks = [
+            asyncio.create_task(
+                self._check_certificate_async(*host, semaphore, addresses)
+            )
+            for host, addresses in targets
+        ]
+        
+        for task in asyncio.as_completed(tasks):
+            finish(await task)
+        
+        return results
+    
+    async def _check_certificate_async(
+        self,
+        hostname: str,
+        port: int,
+        protocol: str,
+        semaphore: asyncio.Semaphore,
+        addresses: Optional[List[Optional[str]]] = None
+    ) -> CertificateInfo:
+        """
+        Sprawdź certyfikat na danym hoście (asyncio)
+        
+        Args:
+            hostname: Hostname lub IP
+            port: Port SSL/TLS
+            protocol: Protokół
+            semaphore: Semafor ograniczający liczbę połączeń w locie
+            addresses: Adresy IP do sprawdzenia (domyślnie [None] = hostname)
+        
+        Returns:
+            CertificateInfo object z danymi certyfikatu (najgorszy z adresów)
+        """
+        hostname = str(hostname)
+        port = int(port)
+        protocol = str(protocol)
+        
+        outcomes = await asyncio.gather(*(
+            self._probe_async(hostname, port, protocol, address, semaphore)
+            for address in (addresses or [None])
+        ))
+        
+        return self._finish_probe(*self._aggregate(list(outcomes)))
+    
+    async def _probe_async(
+        self,
+        hostname: str,
+        port: int,
+        protocol: str,
+        address: Optional[str],
+        semaphore: asyncio.Semaphore
+    ) -> Tuple[CertificateInfo, Optional[Exception]]:
+        """
+        Sprawdź jeden adres hosta (asyncio, z ponowieniami)
+        
+        Backoff między próbami odbywa się poza semaforem - czekający
+        host nie zajmuje slotu połączenia.
+        
+        Args:
+            hostname: Hostname (SNI)
+            port: Port SSL/TLS
+            protocol: Protokół
+            address: Adres IP do połączenia (None = hostname)
+            semaphore: Semafor ograniczający liczbę połączeń w locie
+        
+        Returns:
+            (CertificateInfo, błąd połączenia lub None)
+        """
+        attempt = 0
+        while True:
+            async with semaphore:
+                target = f" ({address})" if address and address != hostname else ""
+                self.logger.info(f"Checking certificate for {hostname}:{port}{target}")
+                
+                # Ustawiane po nawiązaniu połączenia TCP przed STARTTLS
+                connected = asyncio.Event()
                 
-                future = executor.submit(self.check_certificate, hostname, port, protocol)
-                future_to_host[future] = host
-            #     executor.submit(
-            #         self.check_certificate,
-            #         host,
-            #         host[1],
-            #         host[2]
-            #     ): host for host in hosts
-            # }
-
-            # Zbierz rezultaty
-            for future in as_completed(future_to_host):
-                host = future_to_host[future]
                 try:
-                    cert_info = future.result()
-                    # FIX: Użyj wartości z cert_info, nie z host tuple
-                    key = f"{cert_info.hostname}:{cert_info.port}"
-                    results[key] = cert_info
-
-                    self.logger.debug(f"Successfully checked {key}")
-
+                    if _STDLIB_CHAIN:
+                        fetch = self._get_certificate_chain_der_async(
+                            hostname, port, protocol, address, connected
+                        )
+                    else:
+                        # Python < 3.10: SSLObject nie udostępnia łańcucha -
+                        # handshake pyOpenSSL w wątku
+                        fetch = asyncio.get_running_loop().run_in_executor(
+                            None, self._get_certificate_chain_der,
+                            hostname, port, protocol, address
+                        )
+                    
+                    # Pobierz łańcuch (timeout na cały host: connect + handshake)
+                    chain_der = await asyncio.wait_for(fetch, timeout=self.timeout)
+                    error = None
+                except asyncio.TimeoutError as e:
+                    message = str(e) or f"Timeout after {self.timeout}s"
+                    # Zastój STARTTLS/handshake'u na przyjętym połączeniu
+                    error = HandshakeTimeout(message) if connected.is_set() else e
                 except Exception as e:
-                    self.logger.error(f"Error processing {host[0]}:{host[1]}: {e}")
-
-                    # FIX: Dodaj error cert_info do wyników
-                    error_info = self._create_error_info(
-                        hostname=host[0],
-                        port=host[1],
-                        protocol=host[2],
-                        error=str(e)
+                    error = e
+                    message = str(e)
+            
+            if error is None:
+                break
+            
+            if self._should_retry(error, attempt, f"{hostname}:{port}"):
+                await asyncio.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+            
+            cert_info = self._create_error_info(hostname, port, protocol, message)
+            cert_info.ip_address = address
+            return cert_info, error
+        
+        try:
+            # Parse + walidacja poza semaforem i poza event loop
+            # (walidacja może wykonywać blokujące zapytania OCSP/CRL)
+            loop = asyncio.get_running_loop()
+            cert_info = await loop.run_in_executor(
+                None,
+                self._build_certificate_info,
+                chain_der, hostname, port, protocol
+            )
+        except Exception as e:
+            cert_info = self._create_error_info(hostname, port, protocol, str(e))
+        
+        cert_info.ip_address = address
+        return cert_info, None
+    
+    async def _get_certificate_chain_der_async(
+        self,
+        hostname: str,
+        port: int,
+        protocol: str = "https",
+        address: Optional[str] = None,
+        connected: Optional[asyncio.Event] = None
+    ) -> List[bytes]:
+        """
+        Pobierz łańcuch certyfikatów (DER) przez asyncio.open_connection
+        
+        Implicit TLS: połączenie i handshake w jednym open_connection
+        (jedna faza 'handshake'). STARTTLS: połączenie TCP, dialog protokołu
+        i upgrade przez loop.start_tls (StreamWriter.start_tls jest
+        dostępne dopiero od Pythona 3.11).
+        
+        Args:
+            hostname: Hostname (SNI)
+            port: Port
+            protocol: Protokół
+            address: Adres IP do połączenia (None = hostname)
+            connected: Ustawiane po połączeniu TCP (STARTTLS) - timeout
+                po nim to zastój protokołu, a nie brak połączenia; przy
+                implicit TLS open_connection nie rozdziela tych faz
+        
+        Returns:
+            Lista certyfikatów DER (leaf -> intermediate -> root)
+        
+        Raises:
+            HandshakeTimeout: Timeout dialogu STARTTLS lub handshake'u po nim
+        """
+        context = self._get_ssl_context(hostname)
+        mode = starttls_mode(protocol, port)
+        
+        if not mode:
+            with self._timer('handshake', hostname, port):
+                _, writer = await asyncio.open_connection(
+                    address or hostname,
+                    port,
+                    ssl=context,
+                    server_hostname=hostname,
+                    ssl_handshake_timeout=self.timeout
+                )
+            transport = writer.transport
+        else:
+            with self._timer('connect', hostname, port):
+                reader, writer = await asyncio.open_connection(address or hostname, port)
+            
+            if connected is not None:
+                connected.set()
+            
+            try:
+                # STARTTLS: dialog protokołu przed handshake'iem
+                with self._timer('starttls', hostname, port):
+                    await negotiate_async(
+                        reader, writer, mode, min(self.starttls_timeout, self.timeout)
                     )
-                    key = f"{host[0]}:{host[1]}"
-                    results[key] = error_info
-
-        return results
+                
+                with self._timer('handshake', hostname, port):
+                    transport = await asyncio.get_running_loop().start_tls(
+                        writer.transport,
+                        writer.transport.get_protocol(),
+                        context,
+                        server_hostname=hostname,
+                        ssl_handshake_timeout=self.timeout
+                    )
+            except (TimeoutError, asyncio.TimeoutError) as e:
+                writer.transport.abort()
+                raise HandshakeTimeout(str(e)) from e
+            except BaseException:
+                writer.transport.abort()
+                raise
+        
+        try:
+            ssl_object = transport.get_extra_info('ssl_object')
+            return self._peer_chain_der(ssl_object)
+        finally:
+            # Nie czekaj na close_notify od serwera - certyfikat już mamy
+            transport.abort()
 
 
 
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Certificate Diff Module
+
+Porównanie wyników przebiegu z poprzednim stanem każdego host:port
+(snapshot w SQLite, w pamięci słownik host:port -> stan - jedno wyszukanie
+na wynik, O(n)). Wykrywane zmiany:
+- new: host sprawdzony po raz pierwszy
+- renewed: nowy certyfikat (inny fingerprint / numer seryjny)
+- issuer_changed: inny wystawca
+- key_downgraded: słabszy klucz (mniej bitów bezpieczeństwa)
+- san_changed: inny zestaw domen w SAN
+- unreachable: host przestał odpowiadać
+- recovered: host znów odpowiada
+- level_changed: zmiana poziomu alertu (OK -> WARNING -> ...)
+
+Dla hosta z błędem snapshot zachowuje ostatni poprawnie odczytany
+certyfikat - po powrocie hosta odnowienie jest wykrywane względem niego.
+Zapisywane są tylko wiersze hostów ze zmianą.
+"""
+
+import json
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+import logging
+
+from cert_checker import CertificateInfo
+
+
+CHANGE_TYPES = (
+    'new',
+    'renewed',
+    'issuer_changed',
+    'key_downgraded',
+    'san_changed',
+    'unreachable',
+    'recovered',
+    'level_changed',
+)
+
+
+class CertificateState(NamedTuple):
+    """Stan host:port zapamiętany po ostatnim przebiegu"""
+    fingerprint: Optional[str]
+    serial_number: Optional[str]
+    issuer: Optional[str]
+    key_algorithm: Optional[str]
+    key_size: int
+    san_domains: Tuple[str, ...]
+    alert_level: str
+    error: Optional[str]
+
+
+@dataclass
+class CertificateChange:
+    """Zmiany jednego host:port względem poprzedniego przebiegu"""
+    host_key: str
+    changes: List[str]
+    cert: CertificateInfo
+    details: Dict[str, Any] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Konwertuj do słownika (raport zmian)"""
+        return {
+            'host': self.host_key,
+            'changes': self.changes,
+            'alert_level': self.cert.alert_level,
+            'days_remaining': self.cert.days_remaining,
+            'details': self.details,
+        }
+
+
+def key_strength(algorithm: Optional[str], key_size: int) -> int:
+    """
+    Przybliżona siła klucza w bitach bezpieczeństwa (NIST SP 800-57)
+
+    Args:
+        algorithm: Nazwa klasy klucza (RSAPublicKey, ECPublicKey, ...)
+        key_size: Rozmiar klucza (bity)
+
+    Returns:
+        Bity bezpieczeństwa, 0 jeśli nieznane
+    """
+    algorithm = algorithm or ''
+
+    if algorithm.startswith('Ed25519'):
+        return 128
+    if algorithm.startswith('Ed448'):
+        return 224
+    if not key_size:
+        return 0
+    if algorithm.startswith('EC'):
+        return key_size // 2
+
+    # RSA, DSA: rozmiar modułu -> bity bezpieczeństwa
+    for modulus, bits in ((15360, 256), (7680, 192), (3072, 128), (2048, 112), (1024, 80)):
+        if key_size >= modulus:
+            return bits
+    return key_size // 16
+
+
+class CertificateDiff:
+    """Klasa porównująca wyniki z poprzednim przebiegiem"""
+
+    def __init__(self, db_path: Path):
+        """
+        Inicjalizacja
+
+        Args:
+            db_path: Ścieżka do pliku bazy SQLite ze snapshotem
+        """
+        self.db_path = Path(db_path)
+        self.logger = logging.getLogger(__name__)
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS snapshots (
+                host_key TEXT PRIMARY KEY,
+                fingerprint TEXT,
+                serial_number TEXT,
+                issuer TEXT,
+                key_algorithm TEXT,
+                key_size INTEGER,
+                san_domains TEXT,
+                alert_level TEXT NOT NULL,
+                error TEXT
+            )
+            """
+        )
+        self._conn.commit()
+
+        # host:port -> CertificateState (wczytywane raz, potem tylko zmiany)
+        self._state: Dict[str, CertificateState] = {}
+        self._load()
+
+    def _load(self) -> None:
+        """Wczytaj snapshot z bazy"""
+        for row in self._conn.execute(
+            "SELECT host_key, fingerprint, serial_number, issuer, key_algorithm, "
+            "key_size, san_domains, alert_level, error FROM snapshots"
+        ):
+            key, *values = row
+            values[4] = values[4] or 0
+            values[5] = tuple(json.loads(values[5])) if values[5] else ()
+            self._state[key] = CertificateState(*values)
+
+    def diff(self, certificates: Dict[str, CertificateInfo]) -> Dict[str, CertificateChange]:
+        """
+        Porównaj wyniki z poprzednim stanem i zapisz nowy stan
+
+        Hosty nieobecne w wynikach (np. poza partią demona) nie są zmieniane.
+
+        Args:
+            certificates: {hostname:port -> CertificateInfo}
+
+        Returns:
+            {hostname:port -> CertificateChange} tylko dla hostów ze zmianą
+        """
+        changed: Dict[str, CertificateChange] = {}
+        updates: Dict[str, CertificateState] = {}
+
+        with self._lock:
+            for key, cert_info in certificates.items():
+                previous = self._state.get(key)
+                current = self._state_of(cert_info, previous)
+
+                if current == previous:
+                    continue
+
+                updates[key] = current
+
+                change = self._compare(key, cert_info, previous, current)
+                if change.changes:
+                    changed[key] = change
+
+            self._state.update(updates)
+            self._save(updates)
+
+        return changed
+
+    @staticmethod
+    def _state_of(
+        cert_info: CertificateInfo,
+        previous: Optional[CertificateState]
+    ) -> CertificateState:
+        """Stan z wyniku (błąd: certyfikat z poprzedniego stanu)"""
+        if cert_info.error:
+            if previous is None:
+                return CertificateState(None, None, None, None, 0, (), cert_info.alert_level, cert_info.error)
+            return previous._replace(alert_level=cert_info.alert_level, error=cert_info.error)
+
+        return CertificateState(
+            fingerprint=cert_info.fingerprint,
+            serial_number=cert_info.serial_number,
+            issuer=cert_info.issuer,
+            key_algorithm=cert_info.public_key_algorithm,
+            key_size=cert_info.key_size or 0,
+            san_domains=tuple(sorted(set(cert_info.san_domains or ()))),
+            alert_level=cert_info.alert_level,
+            error=None
+        )
+
+    @staticmethod
+    def _compare(
+        key: str,
+        cert_info: CertificateInfo,
+        previous: Optional[CertificateState],
+        current: CertificateState
+    ) -> CertificateChange:
+        """Klasyfikuj różnice między dwoma stanami"""
+        change = CertificateChange(host_key=key, changes=[], cert=cert_info)
+
+        if previous is None:
+            change.changes.append('new')
+            if current.error:
+                change.changes.append('unreachable')
+                change.details['error'] = current.error
+            return change
+
+        if current.error:
+            # Sam tekst błędu może się zmieniać (timeout / refused) - to nie zmiana
+            if not previous.error:
+                change.changes.append('unreachable')
+                change.details['error'] = current.error
+        elif previous.error:
+            change.changes.append('recovered')
+
+        # Porównanie certyfikatów tylko gdy oba stany mają odczytany certyfikat
+        if not current.error and previous.fingerprint:
+            if (current.fingerprint, current.serial_number) != (previous.fingerprint, previous.serial_number):
+                change.changes.append('renewed')
+                change.details['fingerprint'] = [previous.fingerprint, current.fingerprint]
+                change.details['serial_number'] = [previous.serial_number, current.serial_number]
+
+            if current.issuer != previous.issuer:
+                change.changes.append('issuer_changed')
+                change.details['issuer'] = [previous.issuer, current.issuer]
+
+            old_bits = key_strength(previous.key_algorithm, previous.key_size)
+            new_bits = key_strength(current.key_algorithm, current.key_size)
+            if new_bits and old_bits and new_bits < old_bits:
+                change.changes.append('key_downgraded')
+                change.details['key'] = [
+                    f"{previous.key_algorithm} {previous.key_size}",
+                    f"{current.key_algorithm} {current.key_size}",
+                ]
+
+            if current.san_domains != previous.san_domains:
+                old_san, new_san = set(previous.san_domains), set(current.san_domains)
+                change.changes.append('san_changed')
+                change.details['san_added'] = sorted(new_san - old_san)
+                change.details['san_removed'] = sorted(old_san - new_san)
+
+        if current.alert_level != previous.alert_level:
+            change.changes.append('level_changed')
+            change.details['alert_level'] = [previous.alert_level, current.alert_level]
+
+        return change
+
+    def _save(self, updates: Dict[str, CertificateState]) -> None:
+        """Zapisz zmienione wiersze snapshotu"""
+        if not updates:
+            return
+
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO snapshots "
+            "(host_key, fingerprint, serial_number, issuer, key_algorithm, "
+            "key_size, san_domains, alert_level, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    key, state.fingerprint, state.serial_number, state.issuer,
+                    state.key_algorithm, state.key_size,
+                    json.dumps(state.san_domains), state.alert_level, state.error
+                )
+                for key, state in updates.items()
+            ]
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def summarize(changes: Iterable[CertificateChange]) -> Dict[str, int]:
+        """
+        Liczba hostów per typ zmiany
+
+        Args:
+            changes: Wynik diff()
+
+        Returns:
+            {typ zmiany -> liczba hostów} (tylko niezerowe, kolejność CHANGE_TYPES)
+        """
+        counts = dict.fromkeys(CHANGE_TYPES, 0)
+        for change in changes:
+            for kind in change.changes:
+                counts[kind] += 1
+        return {kind: count for kind, count in counts.items() if count}
+
+    def close(self) -> None:
+        """Zamknij połączenie z bazą"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Certificate Model Module
+
+Wspólny model sparsowanego certyfikatu używany przez checker i validator.
+Certyfikat jest ładowany bezpośrednio z DER dokładnie raz, a pola
+(subject, issuer, SAN, klucz publiczny, URL-e OCSP/CRL) są dekodowane
+leniwie - dopiero przy pierwszym odczycie - i zapamiętywane.
+"""
+
+import hashlib
+from datetime import datetime
+from functools import cached_property
+from typing import List, Optional
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.x509.oid import ExtensionOID, NameOID
+
+
+class ParsedCertificate:
+    """Certyfikat X.509 sparsowany raz z DER, z leniwie dekodowanymi polami"""
+
+    def __init__(self, der: bytes):
+        """
+        Inicjalizacja
+
+        Args:
+            der: Certyfikat w formacie DER
+        """
+        self.der = der
+
+    @classmethod
+    def from_x509(cls, cert: x509.Certificate) -> 'ParsedCertificate':
+        """Utwórz z już sparsowanego x509.Certificate (bez ponownego parsowania)"""
+        parsed = cls(cert.public_bytes(serialization.Encoding.DER))
+        parsed.__dict__['cert'] = cert
+        return parsed
+
+    @cached_property
+    def cert(self) -> x509.Certificate:
+        """Sparsowany certyfikat (cryptography)"""
+        return x509.load_der_x509_certificate(self.der)
+
+    # ------------------------------------------------------------------
+    # Subject / Issuer
+    # ------------------------------------------------------------------
+
+    @property
+    def subject(self) -> x509.Name:
+        """Subject jako x509.Name"""
+        return self.cert.subject
+
+    @property
+    def issuer(self) -> x509.Name:
+        """Issuer jako x509.Name"""
+        return self.cert.issuer
+
+    @cached_property
+    def subject_str(self) -> str:
+        """Subject jako string (np. "commonName=example.com, ...")"""
+        return self._format_name(self.subject)
+
+    @cached_property
+    def issuer_str(self) -> str:
+        """Issuer jako string"""
+        return self._format_name(self.issuer)
+
+    @cached_property
+    def common_name(self) -> str:
+        """Common Name (CN) z Subject"""
+        try:
+            cn = self.subject.get_attributes_for_oid(NameOID.COMMON_NAME)
+            return cn[0].value if cn else "N/A"
+        except Exception:
+            return "N/A"
+
+    @cached_property
+    def organization(self) -> Optional[str]:
+        """Organization (O) z Subject"""
+        try:
+            org = self.subject.get_attributes_for_oid(NameOID.ORGANIZATION_NAME)
+            return org[0].value if org else None
+        except Exception:
+            return None
+
+    @cached_property
+    def subject_hash(self) -> bytes:
+        """SHA-256 z DER Subject (klucz indeksu)"""
+        return hashlib.sha256(self.subject.public_bytes()).digest()
+
+    @cached_property
+    def issuer_hash(self) -> bytes:
+        """SHA-256 z DER Issuer (klucz indeksu)"""
+        return hashlib.sha256(self.issuer.public_bytes()).digest()
+
+    @cached_property
+    def is_self_signed(self) -> bool:
+        """Czy Subject == Issuer"""
+        return self.subject == self.issuer
+
+    # ------------------------------------------------------------------
+    # Daty i szczegóły techniczne
+    # ------------------------------------------------------------------
+
+    @property
+    def valid_from(self) -> datetime:
+        """Początek ważności (UTC)"""
+        return self.cert.not_valid_before_utc
+
+    @property
+    def valid_until(self) -> datetime:
+        """Koniec ważności (UTC)"""
+        return self.cert.not_valid_after_utc
+
+    @cached_property
+    def serial_number(self) -> str:
+        """Numer seryjny (hex)"""
+        return format(self.cert.serial_number, 'x')
+
+    @property
+    def version(self) -> int:
+        """Wersja X.509"""
+        return self.cert.version.value
+
+    @cached_property
+    def signature_algorithm(self) -> str:
+        """Nazwa algorytmu podpisu (np. sha256WithRSAEncryption)"""
+        return self.cert.signature_algorithm_oid._name
+
+    @cached_property
+    def public_key(self):
+        """Klucz publiczny (cryptography)"""
+        return self.cert.public_key()
+
+    @cached_property
+    def public_key_algorithm(self) -> str:
+        """Nazwa klasy klucza publicznego"""
+        return self.public_key.__class__.__name__
+
+    @cached_property
+    def key_size(self) -> int:
+        """Rozmiar klucza (bity), 0 jeśli nie dotyczy"""
+        return getattr(self.public_key, 'key_size', 0)
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Fingerprint SHA-256 (hex)"""
+        return self.cert.fingerprint(hashes.SHA256()).hex()
+
+    # ------------------------------------------------------------------
+    # Extensions
+    # ------------------------------------------------------------------
+
+    @cached_property
+    def san_domains(self) -> List[str]:
+        """Lista domen z SAN (Subject Alternative Name)"""
+        try:
+            san_ext = self.cert.extensions.get_extension_for_oid(
+                ExtensionOID.SUBJECT_ALTERNATIVE_NAME
+            )
+            return [
+                name.value for name in san_ext.value
+                if isinstance(name, x509.DNSName)
+            ]
+        except x509.ExtensionNotFound:
+            return []
+
+    @cached_property
+    def subject_key_identifier(self) -> Optional[bytes]:
+        """Subject Key Identifier (SKI)"""
+        try:
+            return self.cert.extensions.get_extension_for_class(
+                x509.SubjectKeyIdentifier
+            ).value.digest
+        except x509.ExtensionNotFound:
+            return None
+
+    @cached_property
+    def authority_key_identifier(self) -> Optional[bytes]:
+        """Authority Key Identifier (AKI) - SKI wystawcy"""
+        try:
+            return self.cert.extensions.get_extension_for_class(
+                x509.AuthorityKeyIdentifier
+            ).value.key_identifier
+        except x509.ExtensionNotFound:
+            return None
+
+    @cached_property
+    def basic_constraints(self) -> Optional[x509.BasicConstraints]:
+        """Basic Constraints (ca, path_length) lub None"""
+        try:
+            return self.cert.extensions.get_extension_for_class(
+                x509.BasicConstraints
+            ).value
+        except x509.ExtensionNotFound:
+            return None
+
+    @cached_property
+    def key_usage(self) -> Optional[x509.KeyUsage]:
+        """Key Usage lub None"""
+        try:
+            return self.cert.extensions.get_extension_for_class(x509.KeyUsage).value
+        except x509.ExtensionNotFound:
+            return None
+
+    @property
+    def is_ca(self) -> bool:
+        """Czy certyfikat jest certyfikatem CA (Basic Constraints ca=True)"""
+        constraints = self.basic_constraints
+        return bool(constraints and constraints.ca)
+
+    @cached_property
+    def ocsp_urls(self) -> List[str]:
+        """OCSP URLs z Authority Information Access"""
+        try:
+            aia = self.cert.extensions.get_extension_for_oid(
+                ExtensionOID.AUTHORITY_INFORMATION_ACCESS
+            )
+            return [
+                desc.access_location.value
+                for desc in aia.value
+                if desc.access_method == x509.AuthorityInformationAccessOID.OCSP
+            ]
+        except x509.ExtensionNotFound:
+            return []
+
+    @cached_property
+    def crl_urls(self) -> List[str]:
+        """CRL URLs z CRL Distribution Points"""
+        try:
+            crl_dist = self.cert.extensions.get_extension_for_oid(
+                ExtensionOID.CRL_DISTRIBUTION_POINTS
+            )
+        except x509.ExtensionNotFound:
+            return []
+
+        crl_urls = []
+        for dist_point in crl_dist.value:
+            if dist_point.full_name:
+                for name in dist_point.full_name:
+                    if isinstance(name, x509.UniformResourceIdentifier):
+                        crl_urls.append(name.value)
+        return crl_urls
+
+    @staticmethod
+    def _format_name(name: x509.Name) -> str:
+        """Formatuj X509 Name do string"""
+        return ", ".join(f"{attr.oid._name}={attr.value}" for attr in name)
+
+    def __repr__(self) -> str:
+        return f"ParsedCertificate(subject={self.subject_str!r})"
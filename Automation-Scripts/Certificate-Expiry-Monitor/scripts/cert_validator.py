@@ -4,7 +4,8 @@
 """
 Certificate Validator Module
 
-Waliduje łańcuch certyfikatów, sprawdza zaufane CA,
+Waliduje łańcuch certyfikatów (ścieżka do root z trust store,
+weryfikacja podpisów), sprawdza zaufane CA,
 weryfikuje revocation (CRL/OCSP).
 """
 
@@ -12,12 +13,13 @@ import ssl
 import socket
 from typing import List, Tuple, Optional
 from dataclasses import dataclass
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
-from cryptography.x509.oid import ExtensionOID
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
 from OpenSSL import SSL, crypto
 import logging
-import requests
+
+from cert_model import ParsedCertificate
+from revocation import RevocationChecker
+from trust_store import TrustStore
 
 
 @dataclass
@@ -75,14 +77,26 @@ class CertificateValidator:
     MIN_RSA_KEY_SIZE = 2048
     MIN_ECDSA_KEY_SIZE = 256
     
-    def __init__(self, timeout: int = 10):
+    def __init__(
+        self,
+        timeout: int = 10,
+        revocation_checker: Optional[RevocationChecker] = None,
+        trust_store: Optional[TrustStore] = None,
+        allow_self_signed: bool = False
+    ):
         """
         Inicjalizacja validator
         
         Args:
             timeout: Timeout dla połączeń (sekundy)
+            revocation_checker: Współdzielony RevocationChecker (cache OCSP/CRL)
+            trust_store: Trust store (domyślnie systemowy, ładowany raz na proces)
+            allow_self_signed: Czy pojedynczy self-signed certyfikat jest zaufany
         """
         self.timeout = timeout
+        self.revocation_checker = revocation_checker or RevocationChecker(timeout=timeout)
+        self.trust_store = trust_store or TrustStore.load()
+        self.allow_self_signed = allow_self_signed
         self.logger = logging.getLogger(__name__)
     
     def validate_certificate(
@@ -106,48 +120,84 @@ class CertificateValidator:
         """
         self.logger.info(f"Validating certificate for {hostname}:{port}")
         
+        # Pobierz łańcuch certyfikatów
+        cert_chain = self._get_certificate_chain(hostname, port)
+        
+        if not cert_chain:
+            return self._create_invalid_result(
+                "Failed to retrieve certificate chain"
+            )
+        
+        return self.validate_chain(
+            cert_chain,
+            hostname,
+            check_revocation=check_revocation,
+            verify_hostname=verify_hostname
+        )
+    
+    def validate_chain(
+        self,
+        cert_chain: List[ParsedCertificate],
+        hostname: str,
+        check_revocation: bool = True,
+        verify_hostname: bool = True
+    ) -> ValidationResult:
+        """
+        Walidacja już pobranego łańcucha (bez nowego połączenia)
+        
+        Używane przez CertificateChecker - łańcuch z jednego handshake'u
+        służy zarówno do sprawdzenia wygaśnięcia, jak i do walidacji.
+        
+        Args:
+            cert_chain: Łańcuch certyfikatów (leaf -> intermediate -> root)
+            hostname: Hostname
+            check_revocation: Czy sprawdzać revocation
+            verify_hostname: Czy weryfikować hostname
+        
+        Returns:
+            ValidationResult
+        """
         chain_errors = []
         hostname_errors = []
         security_issues = []
         
+        if not cert_chain:
+            return self._create_invalid_result("Empty certificate chain")
+        
         try:
-            # Pobierz łańcuch certyfikatów
-            cert_chain = self._get_certificate_chain(hostname, port)
-            
-            if not cert_chain:
-                return self._create_invalid_result(
-                    "Failed to retrieve certificate chain"
-                )
-            
-            # Waliduj łańcuch
-            chain_valid, chain_err = self._validate_chain(cert_chain)
-            if chain_err:
-                chain_errors.extend(chain_err)
-            
-            # Sprawdź zaufane CA
-            trusted_ca, root_ca_name = self._check_trusted_ca(cert_chain)
+            # Zbuduj ścieżkę do zaufanego CA (podpisy weryfikowane)
+            chain_valid, chain_err, path, trusted_ca, root_ca_name = (
+                self._validate_chain(cert_chain)
+            )
+            chain_errors.extend(chain_err)
             
             # Sprawdź revocation
             revocation_checked = False
             is_revoked = False
             revocation_method = None
             
+            leaf = cert_chain[0]
+            
             if check_revocation:
-                is_revoked, revocation_method = self._check_revocation(cert_chain)
-                revocation_checked = True
+                issuer = path[1] if len(path) > 1 else None
+                is_revoked, revocation_method = self._check_revocation(leaf, issuer)
+                revocation_checked = revocation_method is not None
             
             # Sprawdź hostname
             hostname_valid = True
             if verify_hostname:
                 hostname_valid, hostname_err = self._verify_hostname(
-                    cert_chain, hostname
+                    leaf, hostname
                 )
                 if hostname_err:
                     hostname_errors.extend(hostname_err)
             
-            # Sprawdź security
-            weak_signature = self._check_weak_signature(cert_chain)
-            weak_key = self._check_weak_key(cert_chain)
+            # Sprawdź security (podpis root CA nie ma znaczenia)
+            weak_signature = any(
+                self._check_weak_signature(cert)
+                for cert in cert_chain if not cert.is_self_signed
+            )
+            weak_key = any(self._check_weak_key(cert) for cert in cert_chain)
             
             if weak_signature:
                 security_issues.append("Weak signature algorithm detected")
@@ -182,14 +232,14 @@ class CertificateValidator:
             )
             
         except Exception as e:
-            self.logger.error(f"Validation error for {hostname}:{port}: {e}")
+            self.logger.error(f"Validation error for {hostname}: {e}")
             return self._create_invalid_result(str(e))
     
     def _get_certificate_chain(
         self,
         hostname: str,
         port: int
-    ) -> List[x509.Certificate]:
+    ) -> List[ParsedCertificate]:
         """
         Pobierz pełny łańcuch certyfikatów
         
@@ -219,12 +269,13 @@ class CertificateValidator:
             # Pobierz chain
             chain_openssl = ssl_sock.get_peer_cert_chain()
             
-            # Konwertuj do cryptography x509
-            chain = []
-            for cert_openssl in chain_openssl:
-                cert_pem = crypto.dump_certificate(crypto.FILETYPE_PEM, cert_openssl)
-                cert = x509.load_pem_x509_certificate(cert_pem, default_backend())
-                chain.append(cert)
+            # Konwertuj do ParsedCertificate (DER, parsowany raz - leniwie)
+            chain = [
+                ParsedCertificate(
+                    crypto.dump_certificate(crypto.FILETYPE_ASN1, cert_openssl)
+                )
+                for cert_openssl in chain_openssl
+            ]
             
             # Cleanup
             ssl_sock.shutdown()
@@ -238,173 +289,65 @@ class CertificateValidator:
     
     def _validate_chain(
         self,
-        chain: List[x509.Certificate]
-    ) -> Tuple[bool, List[str]]:
-        """
-        Waliduj łańcuch certyfikatów
-        
-        Args:
-            chain: Lista certyfikatów
-        
-        Returns:
-            (valid, errors)
-        """
-        errors = []
-        
-        if len(chain) < 1:
-            return False, ["Empty certificate chain"]
-        
-        # Sprawdź każdy certyfikat w łańcuchu
-        for i in range(len(chain) - 1):
-            cert = chain[i]
-            issuer_cert = chain[i + 1]
-            
-            # Sprawdź czy issuer się zgadza
-            if cert.issuer != issuer_cert.subject:
-                errors.append(
-                    f"Chain break at position {i}: "
-                    f"Issuer mismatch"
-                )
-                return False, errors
-            
-            # Sprawdź signature (w uproszczeniu - pełna walidacja wymaga więcej)
-            try:
-                # Weryfikacja podpisu jest skomplikowana w cryptography
-                # W produkcji użyj OpenSSL verify
-                pass
-            except Exception as e:
-                errors.append(f"Signature verification failed at position {i}: {e}")
-                return False, errors
-        
-        # Jeśli dotarliśmy tu - chain jest OK
-        return True, errors
-    
-    def _check_trusted_ca(
-        self,
-        chain: List[x509.Certificate]
-    ) -> Tuple[bool, Optional[str]]:
+        chain: List[ParsedCertificate]
+    ) -> Tuple[bool, List[str], List[ParsedCertificate], bool, Optional[str]]:
         """
-        Sprawdź czy root CA jest zaufany
+        Zbuduj ścieżkę do zaufanego root i zweryfikuj podpisy
         
         Args:
-            chain: Lista certyfikatów
+            chain: Lista certyfikatów z handshake'u
         
         Returns:
-            (trusted, root_ca_name)
+            (valid, errors, path, trusted, root_ca_name)
         """
-        if not chain:
-            return False, None
+        path, anchor, errors = self.trust_store.build_path(chain)
         
-        # Pobierz root cert (ostatni w łańcuchu)
-        root_cert = chain[-1]
-        
-        # Pobierz CA name
-        try:
-            cn_list = root_cert.subject.get_attributes_for_oid(
-                x509.NameOID.COMMON_NAME
-            )
-            root_ca_name = cn_list.value if cn_list else "Unknown CA"
-        except Exception:
+        root_cert = anchor or path[-1]
+        root_ca_name = root_cert.common_name
+        if root_ca_name == "N/A":
             root_ca_name = "Unknown CA"
         
-        # Sprawdź czy self-signed (root CA)
-        is_self_signed = root_cert.issuer == root_cert.subject
-        
-        if not is_self_signed:
-            # Nie dotarliśmy do root - chain niepełny
-            return False, root_ca_name
-        
-        # W produkcji: sprawdź czy root CA jest w systemowym trust store
-        # To jest uproszczone - zwracamy True jeśli to self-signed root
-        # W prawdziwej implementacji porównaj z /etc/ssl/certs/ lub Windows cert store
+        trusted = anchor is not None
         
-        # Sprawdź znane CA (uproszczone)
-        known_cas = [
-            "Let's Encrypt",
-            "DigiCert",
-            "GlobalSign",
-            "Sectigo",
-            "GeoTrust",
-            "Thawte",
-            "Entrust"
-        ]
+        # Pojedynczy self-signed z poprawnym podpisem - akceptowany z konfiguracji
+        if (
+            not trusted and
+            self.allow_self_signed and
+            len(path) == 1 and
+            root_cert.is_self_signed and
+            self.trust_store.verify_issued_by(root_cert, root_cert)
+        ):
+            trusted = True
+            errors = [e for e in errors if not e.startswith("Untrusted root")]
         
-        is_known_ca = any(ca.lower() in root_ca_name.lower() for ca in known_cas)
-        
-        return is_known_ca or is_self_signed, root_ca_name
+        return not errors, errors, path, trusted, root_ca_name
     
     def _check_revocation(
         self,
-        cert: x509.Certificate
+        cert: ParsedCertificate,
+        issuer: Optional[ParsedCertificate] = None
     ) -> Tuple[bool, Optional[str]]:
         """
         Sprawdź czy certyfikat został unieważniony (revoked)
         
         Args:
             cert: Certyfikat
+            issuer: Certyfikat wystawcy (z łańcucha)
         
         Returns:
             (is_revoked, method)
         """
-        # Sprawdź OCSP
-        try:
-            ocsp_urls = self._get_ocsp_urls(cert)
-            if ocsp_urls:
-                # W pełnej implementacji: zrób OCSP request
-                # To wymaga budowania OCSP request, wysłania, parsowania response
-                # Dla uproszczenia - zakładamy że nie revoked
-                return False, "OCSP"
-        except Exception as e:
-            self.logger.debug(f"OCSP check failed: {e}")
+        is_revoked, method = self.revocation_checker.check(cert, issuer)
         
-        # Sprawdź CRL
-        try:
-            crl_urls = self._get_crl_urls(cert)
-            if crl_urls:
-                # W pełnej implementacji: pobierz CRL, sprawdź czy cert jest na liście
-                # To wymaga pobierania i parsowania CRL
-                # Dla uproszczenia - zakładamy że nie revoked
-                return False, "CRL"
-        except Exception as e:
-            self.logger.debug(f"CRL check failed: {e}")
+        if is_revoked:
+            self.logger.warning(f"Certificate revoked ({method}): {cert.subject_str}")
         
-        # Nie udało się sprawdzić
-        return False, None
-    
-    def _get_ocsp_urls(self, cert: x509.Certificate) -> List[str]:
-        """Pobierz OCSP URLs z certyfikatu"""
-        try:
-            aia = cert.extensions.get_extension_for_oid(
-                ExtensionOID.AUTHORITY_INFORMATION_ACCESS
-            )
-            ocsp_urls = [
-                desc.access_location.value
-                for desc in aia.value
-                if desc.access_method == x509.AuthorityInformationAccessOID.OCSP
-            ]
-            return ocsp_urls
-        except x509.ExtensionNotFound:
-            return []
-    
-    def _get_crl_urls(self, cert: x509.Certificate) -> List[str]:
-        """Pobierz CRL URLs z certyfikatu"""
-        try:
-            crl_dist = cert.extensions.get_extension_for_oid(
-                ExtensionOID.CRL_DISTRIBUTION_POINTS
-            )
-            crl_urls = []
-            for dist_point in crl_dist.value:
-                if dist_point.full_name:
-                    for name in dist_point.full_name:
-                        if isinstance(name, x509.UniformResourceIdentifier):
-                            crl_urls.append(name.value)
-            return crl_urls
-        except x509.ExtensionNotFound:
-            return []
+        # None = nie udało się sprawdzić
+        return bool(is_revoked), method
     
     def _verify_hostname(
         self,
-        cert: x509.Certificate,
+        cert: ParsedCertificate,
         hostname: str
     ) -> Tuple[bool, List[str]]:
         """
@@ -420,23 +363,10 @@ class CertificateValidator:
         errors = []
         
         # Pobierz CN
-        try:
-            cn_list = cert.subject.get_attributes_for_oid(x509.NameOID.COMMON_NAME)
-            cn = cn_list.value if cn_list else None
-        except Exception:
-            cn = None
+        cn = cert.common_name if cert.common_name != "N/A" else None
         
         # Pobierz SAN
-        try:
-            san_ext = cert.extensions.get_extension_for_oid(
-                ExtensionOID.SUBJECT_ALTERNATIVE_NAME
-            )
-            san_domains = [
-                name.value for name in san_ext.value
-                if isinstance(name, x509.DNSName)
-            ]
-        except x509.ExtensionNotFound:
-            san_domains = []
+        san_domains = cert.san_domains
         
         # Sprawdź match
         all_names = [cn] + san_domains if cn else san_domains
@@ -459,22 +389,20 @@ class CertificateValidator:
         errors.append(f"Hostname {hostname} does not match certificate")
         return False, errors
     
-    def _check_weak_signature(self, cert: x509.Certificate) -> bool:
+    def _check_weak_signature(self, cert: ParsedCertificate) -> bool:
         """Sprawdź czy signature algorithm jest słaby"""
-        sig_alg = cert.signature_algorithm_oid._name.lower()
+        sig_alg = cert.signature_algorithm.lower()
         return any(weak in sig_alg for weak in self.WEAK_SIGNATURE_ALGORITHMS)
     
-    def _check_weak_key(self, cert: x509.Certificate) -> bool:
+    def _check_weak_key(self, cert: ParsedCertificate) -> bool:
         """Sprawdź czy klucz jest za słaby"""
         try:
-            public_key = cert.public_key()
+            public_key = cert.public_key
             
-            # RSA
-            if hasattr(public_key, 'key_size'):
-                if 'RSA' in public_key.__class__.__name__:
-                    return public_key.key_size < self.MIN_RSA_KEY_SIZE
-                elif 'EC' in public_key.__class__.__name__:
-                    return public_key.key_size < self.MIN_ECDSA_KEY_SIZE
+            if isinstance(public_key, rsa.RSAPublicKey):
+                return public_key.key_size < self.MIN_RSA_KEY_SIZE
+            elif isinstance(public_key, ec.EllipticCurvePublicKey):
+                return public_key.key_size < self.MIN_ECDSA_KEY_SIZE
             
             return False
         except Exception:
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Circuit Breaker Module
+
+Pamięta hosty, które uporczywie nie odpowiadają (timeout, connection
+refused). Po N kolejnych nieudanych sprawdzeniach host jest pomijany
+(szybki błąd bez połączenia) przez okres "otwarcia", który rośnie
+wykładniczo przy kolejnych porażkach. Po upływie okresu host dostaje
+jedną próbę (half-open) - sukces zamyka breaker.
+
+Stan jest trzymany w pamięci i zapisywany (SQLite) raz na przebieg.
+"""
+
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Optional
+import logging
+
+
+class CircuitBreaker:
+    """Per-host circuit breaker z trwałym stanem"""
+
+    def __init__(
+        self,
+        db_path: Optional[Path] = None,
+        failure_threshold: int = 3,
+        open_hours: float = 24,
+        max_open_hours: float = 168
+    ):
+        """
+        Inicjalizacja
+
+        Args:
+            db_path: Plik SQLite ze stanem (None = tylko w pamięci)
+            failure_threshold: Po ilu kolejnych porażkach otworzyć breaker
+            open_hours: Pierwszy okres otwarcia (godziny)
+            max_open_hours: Maksymalny okres otwarcia (godziny)
+        """
+        self.db_path = Path(db_path) if db_path else None
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.open_period = timedelta(hours=float(open_hours))
+        self.max_open_period = timedelta(hours=float(max_open_hours))
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        # host_key -> [kolejne porażki, open_until (datetime lub None), ostatni błąd]
+        self._state: Dict[str, list] = {}
+        self._dirty = set()
+        self._conn = None
+
+        if self.db_path:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS circuit_breaker (
+                    host_key TEXT PRIMARY KEY,
+                    failures INTEGER NOT NULL,
+                    open_until TEXT,
+                    last_error TEXT
+                )
+                """
+            )
+            self._conn.commit()
+            self._load()
+
+    def _load(self) -> None:
+        """Wczytaj stan z bazy"""
+        for key, failures, open_until, last_error in self._conn.execute(
+            "SELECT host_key, failures, open_until, last_error FROM circuit_breaker"
+        ):
+            self._state[key] = [
+                failures,
+                datetime.fromisoformat(open_until) if open_until else None,
+                last_error
+            ]
+
+        open_count = sum(1 for s in self._state.values() if s[1])
+        if open_count:
+            self.logger.info(f"Circuit breaker: {open_count} hosts open")
+
+    def reload(self) -> None:
+        """Wczytaj stan ponownie z bazy (np. po zapisie z innych procesów)"""
+        if not self._conn:
+            return
+
+        self.save()
+        with self._lock:
+            self._state.clear()
+            self._load()
+
+    def allow(self, host_key: str, now: Optional[datetime] = None) -> bool:
+        """
+        Czy host może być teraz sprawdzony
+
+        Args:
+            host_key: Klucz "hostname:port"
+            now: Aktualny czas (domyślnie teraz, UTC)
+
+        Returns:
+            False jeśli breaker otwarty (pomiń host)
+        """
+        with self._lock:
+            state = self._state.get(host_key)
+
+        if not state or state[1] is None:
+            return True
+
+        return (now or datetime.now(timezone.utc)) >= state[1]
+
+    def is_half_open(self, host_key: str, now: Optional[datetime] = None) -> bool:
+        """
+        Czy okres otwarcia minął i host dostaje próbę kontrolną
+
+        Args:
+            host_key: Klucz "hostname:port"
+            now: Aktualny czas (domyślnie teraz, UTC)
+
+        Returns:
+            True jeśli breaker był otwarty, a okres otwarcia już minął
+        """
+        with self._lock:
+            state = self._state.get(host_key)
+
+        if not state or state[1] is None:
+            return False
+
+        return (now or datetime.now(timezone.utc)) >= state[1]
+
+    def failures(self, host_key: str) -> int:
+        """Liczba kolejnych porażek hosta"""
+        with self._lock:
+            state = self._state.get(host_key)
+        return state[0] if state else 0
+
+    def open_until(self, host_key: str) -> Optional[datetime]:
+        """Do kiedy breaker jest otwarty (None = zamknięty)"""
+        with self._lock:
+            state = self._state.get(host_key)
+        return state[1] if state else None
+
+    def record_success(self, host_key: str) -> None:
+        """Zapisz udane sprawdzenie (zamyka breaker)"""
+        with self._lock:
+            if host_key in self._state:
+                del self._state[host_key]
+                self._dirty.add(host_key)
+
+    def record_failure(
+        self,
+        host_key: str,
+        error: str,
+        now: Optional[datetime] = None
+    ) -> None:
+        """
+        Zapisz nieudane sprawdzenie (po wyczerpaniu ponowień)
+
+        Args:
+            host_key: Klucz "hostname:port"
+            error: Opis błędu
+            now: Aktualny czas (domyślnie teraz, UTC)
+        """
+        now = now or datetime.now(timezone.utc)
+
+        with self._lock:
+            state = self._state.setdefault(host_key, [0, None, None])
+            state[0] += 1
+            state[2] = error
+
+            if state[0] >= self.failure_threshold:
+                # Okres otwarcia rośnie x2 przy każdej kolejnej porażce
+                period = min(
+                    self.open_period * (2 ** (state[0] - self.failure_threshold)),
+                    self.max_open_period
+                )
+                state[1] = now + period
+                self.logger.warning(
+                    f"Circuit open for {host_key} until {state[1].isoformat()} "
+                    f"({state[0]} consecutive failures)"
+                )
+
+            self._dirty.add(host_key)
+
+    def save(self) -> None:
+        """Zapisz zmieniony stan do bazy"""
+        if not self._conn:
+            return
+
+        with self._lock:
+            if not self._dirty:
+                return
+
+            upserts = []
+            deletes = []
+            for key in self._dirty:
+                state = self._state.get(key)
+                if state is None:
+                    deletes.append((key,))
+                else:
+                    upserts.append((
+                        key,
+                        state[0],
+                        state[1].isoformat() if state[1] else None,
+                        state[2]
+                    ))
+
+            self._conn.executemany(
+                "DELETE FROM circuit_breaker WHERE host_key = ?", deletes
+            )
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO circuit_breaker "
+                "(host_key, failures, open_until, last_error) VALUES (?, ?, ?, ?)",
+                upserts
+            )
+            self._conn.commit()
+            self._dirty.clear()
+
+    def close(self) -> None:
+        """Zapisz stan i zamknij połączenie z bazą"""
+        self.save()
+        if self._conn:
+            with self._lock:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Daemon Module
+
+Tryb ciągły (--daemon): jeden CertificateMonitor działa cały czas,
+a sprawdzenia są planowane per host z jitterem i rozłożone na cały
+interwał (zamiast jednego szczytu o 03:00 z crona).
+
+Między cyklami zostają "ciepłe": trust store, cache OCSP/CRL,
+sesje HTTP webhooków i skompilowane szablony. Należne hosty są
+sprawdzane zawsze (harmonogram daemon zastępuje interwały cache wyników;
+wyniki są nadal zapisywane w cache dla uruchomień jednorazowych).
+domains.yml jest przeładowywany tylko gdy plik się zmieni.
+"""
+
+import heapq
+import random
+import signal
+import threading
+import time
+from typing import Dict, List, Tuple
+import logging
+
+from cert_checker import CertificateInfo
+from cert_diff import CertificateChange
+
+
+class MonitorDaemon:
+    """Scheduler sprawdzeń per host dla działającego CertificateMonitor"""
+
+    def __init__(
+        self,
+        monitor,
+        interval_hours: float = 24,
+        jitter: float = 0.1,
+        reload_seconds: int = 60,
+        batch_window_seconds: int = 30,
+        send_alerts: bool = True
+    ):
+        """
+        Inicjalizacja daemon
+
+        Args:
+            monitor: CertificateMonitor (zainicjalizowany raz)
+            interval_hours: Co ile sprawdzać każdy host
+            jitter: Losowe odchylenie interwału (ułamek, np. 0.1 = ±10%)
+            reload_seconds: Co ile sprawdzać zmianę domains.yml
+            batch_window_seconds: Hosty należne w tym oknie sprawdzane razem
+            send_alerts: Czy wysyłać alerty po każdej partii
+        """
+        self.monitor = monitor
+        self.interval = float(interval_hours) * 3600
+        self.jitter = max(0.0, min(float(jitter), 0.5))
+        self.reload_seconds = reload_seconds
+        self.batch_window = batch_window_seconds
+        self.send_alerts = send_alerts
+        self.logger = logging.getLogger(__name__)
+
+        # Kolejka (czas_należny, host_key); aktualne hosty w self._hosts
+        self._queue: List[Tuple[float, str]] = []
+        self._hosts: Dict[str, tuple] = {}
+        self._due: Dict[str, float] = {}
+
+        # Ostatnie wyniki wszystkich hostów i zmiany od ostatniego raportu
+        self.results: Dict[str, CertificateInfo] = {}
+        self.changes: Dict[str, CertificateChange] = {}
+        self._next_report = time.time() + self.interval
+
+        self._stop = threading.Event()
+
+    def stop(self, *_args) -> None:
+        """Zatrzymaj pętlę (także jako handler sygnału)"""
+        self.logger.info("Daemon stop requested")
+        self._stop.set()
+
+    def run(self) -> None:
+        """Główna pętla daemon (do SIGINT/SIGTERM)"""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self._sync_hosts(initial=True)
+        self.logger.info(
+            f"Daemon started: {len(self._hosts)} hosts, "
+            f"interval {self.interval / 3600:.1f}h"
+        )
+
+        next_reload = time.time() + self.reload_seconds
+
+        while not self._stop.is_set():
+            now = time.time()
+
+            if now >= next_reload:
+                if self.monitor.reload_domains():
+                    self._sync_hosts()
+                next_reload = now + self.reload_seconds
+
+            batch = self._pop_due(now)
+            if batch:
+                self._run_batch(batch)
+
+            if time.time() >= self._next_report:
+                self._generate_reports()
+
+            # Śpij do najbliższego zdarzenia (host / reload / raport)
+            wake_at = min(next_reload, self._next_report)
+            if self._queue:
+                wake_at = min(wake_at, self._queue[0][0])
+            self._stop.wait(max(0.0, wake_at - time.time()))
+
+        self.logger.info("Daemon stopped")
+
+    def _sync_hosts(self, initial: bool = False) -> None:
+        """Zsynchronizuj harmonogram z listą hostów z domains.yml"""
+        hosts = {f"{h[0]}:{h[1]}": h for h in self.monitor.get_enabled_hosts()}
+        now = time.time()
+
+        added = [key for key in hosts if key not in self._hosts]
+        removed = [key for key in self._hosts if key not in hosts]
+
+        for key in removed:
+            self._due.pop(key, None)
+            self.results.pop(key, None)
+
+        self._hosts = hosts
+
+        for key in added:
+            # Start: rozłóż hosty na cały interwał; nowy host: sprawdź wkrótce
+            window = self.interval if initial else min(self.interval, 300)
+            self._schedule(key, now + random.uniform(0, window))
+
+        # Usunięte hosty zostają w kopcu, ale są pomijane (brak w _due)
+        if added or removed:
+            self.logger.info(
+                f"Schedule updated: +{len(added)} / -{len(removed)} hosts "
+                f"({len(hosts)} total)"
+            )
+
+    def _schedule(self, key: str, due: float) -> None:
+        """Zaplanuj następne sprawdzenie hosta"""
+        self._due[key] = due
+        heapq.heappush(self._queue, (due, key))
+
+    def _next_due(self, now: float) -> float:
+        """Następny termin: interwał ± jitter"""
+        return now + self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _pop_due(self, now: float) -> List[tuple]:
+        """Zdejmij z kolejki hosty należne teraz (+ okno partii)"""
+        batch = []
+        limit = now + self.batch_window
+
+        while self._queue and self._queue[0][0] <= limit:
+            due, key = heapq.heappop(self._queue)
+
+            # Wpis nieaktualny (host usunięty lub przeplanowany)
+            if self._due.get(key) != due:
+                continue
+
+            batch.append(self._hosts[key])
+
+        return batch
+
+    def _run_batch(self, hosts: List[tuple]) -> None:
+        """Sprawdź partię hostów, historia i alerty, zaplanuj kolejne sprawdzenie"""
+        self.logger.info(f"Checking {len(hosts)} due hosts")
+        self.monitor.start_metrics_run(hosts)
+
+        # Host jest należny według harmonogramu daemon - cache wyników
+        # (interwały z settings.yml) nie może odroczyć sprawdzenia
+        try:
+            results = self.monitor.check_hosts(hosts, use_cache=False)
+        except Exception as e:
+            self.logger.error(f"Batch check failed: {e}", exc_info=True)
+            results = {}
+
+        self.results.update(results)
+
+        try:
+            changes = self.monitor.diff_results(results) if results else None
+        except Exception as e:
+            self.logger.error(f"Comparing with previous run failed: {e}", exc_info=True)
+            changes = None
+
+        if changes:
+            self.changes.update(changes)
+
+        self.monitor.record_history(results, changes)
+
+        if self.send_alerts and results:
+            try:
+                self.monitor.send_alerts(results, changes)
+            except Exception as e:
+                self.logger.error(f"Sending alerts failed: {e}", exc_info=True)
+
+        self.monitor.export_metrics(results)
+
+        now = time.time()
+        for host in hosts:
+            key = f"{host[0]}:{host[1]}"
+            if key in self._hosts:
+                self._schedule(key, self._next_due(now))
+
+    def _generate_reports(self) -> None:
+        """Raport z ostatnich wyników wszystkich hostów (raz na interwał)"""
+        self._next_report = time.time() + self.interval
+
+        if not self.results:
+            return
+
+        changes, self.changes = self.changes, {}
+
+        try:
+            self.monitor.generate_reports(dict(self.results), changes)
+        except Exception as e:
+            self.logger.error(f"Report generation failed: {e}", exc_info=True)
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Dashboard Module
+
+Statyczny dashboard HTML budowany z historii wyników (HistoryStore):
+- data/index.js: podsumowanie i lista fragmentów (posortowane po dacie wygaśnięcia)
+- data/chunk-*.js: wiersze jednego miesiąca wygaśnięcia (duże miesiące dzielone na strony)
+- index.html: mała strona, która ładuje fragmenty dopiero po wybraniu
+
+Fragmenty nie zawierają pól zależnych od dnia (dni do wygaśnięcia liczy
+przeglądarka z daty), więc przy kolejnym przebiegu zapisywane są tylko
+fragmenty, w których zmienił się któryś host (manifest z hashami).
+Dane są w plikach .js (a nie .json), żeby dashboard działał też z file://.
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import logging
+
+from utils import FileUtils
+
+
+class DashboardGenerator:
+    """Przyrostowy generator statycznego dashboardu"""
+
+    # Kolumny wiersza we fragmencie
+    COLUMNS = ['host', 'common_name', 'issuer', 'valid_until', 'error', 'tags', 'alert_days']
+
+    # Progi poziomów alertu (jak CertificateChecker._determine_alert_level);
+    # alert_days hosta zastępuje próg warning
+    THRESHOLDS = {'critical': 7, 'warning': 30}
+
+    MANIFEST_FILE = "manifest.json"
+
+    def __init__(self, output_dir: Path, page_size: int = 500):
+        """
+        Inicjalizacja
+
+        Args:
+            output_dir: Katalog dashboardu
+            page_size: Maksymalna liczba wierszy w jednym fragmencie
+        """
+        self.output_dir = Path(output_dir)
+        self.data_dir = self.output_dir / "data"
+        self.page_size = max(1, int(page_size))
+        self.logger = logging.getLogger(__name__)
+
+        FileUtils.ensure_directory(self.data_dir)
+
+    def build(
+        self,
+        records: Iterable[Dict],
+        now: Optional[datetime] = None
+    ) -> Dict[str, int]:
+        """
+        Zbuduj / zaktualizuj dashboard
+
+        Args:
+            records: Aktualny stan hostów (wiersze HistoryStore, po jednym na host)
+            now: Czas generowania (domyślnie teraz, UTC)
+
+        Returns:
+            Statystyki {written, unchanged, removed, rows}
+        """
+        now = now or datetime.now(timezone.utc)
+
+        rows = sorted(
+            (self._row(record) for record in records),
+            key=lambda row: (row[3] or '', row[0])
+        )
+
+        # Fragmenty: błędy osobno, reszta po miesiącu wygaśnięcia
+        buckets: Dict[str, List[list]] = {}
+        for row in rows:
+            bucket = 'errors' if row[4] else row[3][:7]
+            buckets.setdefault(bucket, []).append(row)
+
+        manifest = self._load_manifest()
+        chunks = []
+        stats = {'written': 0, 'unchanged': 0, 'removed': 0, 'rows': len(rows)}
+
+        for bucket in sorted(buckets, key=lambda b: (b != 'errors', b)):
+            bucket_rows = buckets[bucket]
+            pages = (len(bucket_rows) + self.page_size - 1) // self.page_size
+            for page in range(pages):
+                start = page * self.page_size
+                chunk = self._write_chunk(
+                    f"{bucket}-{page + 1}",
+                    bucket_rows[start:start + self.page_size],
+                    manifest,
+                    stats
+                )
+                chunk.update(bucket=bucket, page=page + 1, pages=pages)
+                chunks.append(chunk)
+
+        # Fragmenty, których już nie ma (np. minął miesiąc)
+        current = {chunk['id'] for chunk in chunks}
+        for chunk_id in [c for c in manifest if c not in current]:
+            (self.data_dir / manifest.pop(chunk_id)['file']).unlink(missing_ok=True)
+            stats['removed'] += 1
+
+        self._write_file(
+            self.data_dir / self.MANIFEST_FILE,
+            json.dumps(manifest, indent=1, sort_keys=True)
+        )
+
+        # Indeks zawsze (mały) - podsumowanie liczone na dziś
+        index = {
+            'generated_at': now.isoformat(timespec='seconds'),
+            'columns': self.COLUMNS,
+            'thresholds': self.THRESHOLDS,
+            'summary': self._summary(rows, now),
+            'chunks': chunks
+        }
+        self._write_file(
+            self.data_dir / "index.js",
+            f"dashboardIndex({json.dumps(index, ensure_ascii=False)});\n"
+        )
+
+        self._write_if_changed(self.output_dir / "index.html", DASHBOARD_HTML)
+
+        self.logger.info(
+            f"Dashboard: {stats['written']} chunks written, {stats['unchanged']} unchanged, "
+            f"{stats['removed']} removed ({stats['rows']} hosts)"
+        )
+        return stats
+
+    @staticmethod
+    def _row(record: Dict) -> list:
+        """Wiersz fragmentu z wiersza historii (bez pól zależnych od dnia)"""
+        issuer = record.get('issuer') or ''
+        for part in issuer.split(', '):
+            if part.startswith('commonName='):
+                issuer = part[len('commonName='):]
+                break
+
+        not_after = record.get('not_after')
+        return [
+            record['host'],
+            record.get('cn'),
+            issuer,
+            not_after[:10] if not_after else None,
+            record.get('error'),
+            record.get('tags') or [],
+            record.get('alert_days')
+        ]
+
+    def _summary(self, rows: List[list], now: datetime) -> Dict[str, int]:
+        """Liczniki poziomów na dzień generowania"""
+        summary = {'total': len(rows), 'ok': 0, 'warning': 0, 'critical': 0, 'expired': 0, 'error': 0}
+
+        for row in rows:
+            if row[4]:
+                summary['error'] += 1
+                continue
+
+            days = (datetime.fromisoformat(row[3]).date() - now.date()).days
+            warning = self.THRESHOLDS['warning'] if row[6] is None else row[6]
+            if days < 0:
+                summary['expired'] += 1
+            elif days <= min(self.THRESHOLDS['critical'], warning):
+                summary['critical'] += 1
+            elif days <= warning:
+                summary['warning'] += 1
+            else:
+                summary['ok'] += 1
+
+        return summary
+
+    def _write_chunk(
+        self,
+        chunk_id: str,
+        rows: List[list],
+        manifest: Dict[str, Dict],
+        stats: Dict[str, int]
+    ) -> Dict:
+        """Zapisz fragment tylko jeśli jego zawartość się zmieniła"""
+        content = (
+            f"dashboardChunk({json.dumps(chunk_id)}, "
+            f"{json.dumps(rows, ensure_ascii=False, separators=(',', ':'))});\n"
+        )
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()[:16]
+        filename = f"chunk-{chunk_id}.js"
+
+        previous = manifest.get(chunk_id)
+        if previous and previous['hash'] == digest and (self.data_dir / filename).exists():
+            stats['unchanged'] += 1
+        else:
+            self._write_file(self.data_dir / filename, content)
+            stats['written'] += 1
+
+        manifest[chunk_id] = {'file': filename, 'hash': digest, 'rows': len(rows)}
+
+        return {
+            'id': chunk_id,
+            'file': f"data/{filename}?v={digest}",
+            'rows': len(rows),
+            'first': rows[0][3],
+            'last': rows[-1][3]
+        }
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """Manifest poprzedniego przebiegu (id -> plik, hash)"""
+        try:
+            with open(self.data_dir / self.MANIFEST_FILE, encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def _write_file(path: Path, content: str) -> None:
+        """Zapis atomowy (tmp + replace) - przeglądarka nie widzi połowy pliku"""
+        tmp_path = path.with_name(path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def _write_if_changed(self, path: Path, content: str) -> None:
+        """Zapisz plik tylko jeśli się różni"""
+        try:
+            if path.read_text(encoding='utf-8') == content:
+                return
+        except OSError:
+            pass
+        self._write_file(path, content)
+
+
+# Strona dashboardu: ładuje data/index.js, fragmenty na żądanie
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Certificate Dashboard</title>
+    <style>
+        body { font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; margin: 0; padding: 20px; background: #f5f5f5; }
+        .container { max-width: 1400px; margin: 0 auto; background: white; padding: 24px; border-radius: 8px; box-shadow: 0 2px 10px rgba(0,0,0,0.1); }
+        h1 { color: #333; border-bottom: 3px solid #4CAF50; padding-bottom: 10px; }
+        .summary { display: flex; gap: 12px; margin: 16px 0; flex-wrap: wrap; }
+        .card { padding: 12px 18px; border-radius: 6px; color: white; min-width: 110px; }
+        .card b { display: block; font-size: 1.6em; }
+        .total { background: #607D8B; } .ok { background: #4CAF50; } .warning { background: #FF9800; }
+        .critical { background: #f44336; } .expired { background: #9C27B0; } .error { background: #795548; }
+        .controls { margin: 16px 0; display: flex; gap: 10px; align-items: center; flex-wrap: wrap; }
+        select, input { padding: 6px; font-size: 14px; }
+        table { width: 100%; border-collapse: collapse; }
+        th, td { padding: 8px 10px; text-align: left; border-bottom: 1px solid #eee; font-size: 14px; }
+        th { background: #4CAF50; color: white; }
+        .badge { padding: 2px 8px; border-radius: 10px; color: white; font-size: 12px; }
+        .muted { color: #888; }
+    </style>
+</head>
+<body>
+<div class="container">
+    <h1>Certificate Dashboard</h1>
+    <div class="muted" id="generated"></div>
+    <div class="summary" id="summary"></div>
+    <div class="controls">
+        <label>Expiry: <select id="chunk"></select></label>
+        <input id="filter" type="search" placeholder="Filter host, CN, issuer, tag">
+        <span class="muted" id="count"></span>
+    </div>
+    <table>
+        <thead><tr><th>Host</th><th>Common Name</th><th>Issuer</th><th>Valid Until</th><th>Days</th><th>Status</th><th>Tags</th></tr></thead>
+        <tbody id="rows"></tbody>
+    </table>
+</div>
+<script>
+    var INDEX = null, LOADED = {}, CURRENT = null;
+    var today = new Date(new Date().toISOString().slice(0, 10));
+
+    function esc(s) {
+        return String(s == null ? '' : s).replace(/[&<>"]/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;'}[c];
+        });
+    }
+
+    function level(row) {
+        if (row[4]) return ['error', null];
+        var days = Math.round((new Date(row[3]) - today) / 86400000);
+        var warning = row[6] == null ? INDEX.thresholds.warning : row[6];
+        if (days < 0) return ['expired', days];
+        if (days <= Math.min(INDEX.thresholds.critical, warning)) return ['critical', days];
+        if (days <= warning) return ['warning', days];
+        return ['ok', days];
+    }
+
+    function render() {
+        var rows = LOADED[CURRENT] || [];
+        var q = document.getElementById('filter').value.toLowerCase();
+        var html = [], shown = 0;
+        rows.forEach(function (row) {
+            if (q && [row[0], row[1], row[2], row[5].join(' ')].join(' ').toLowerCase().indexOf(q) < 0) return;
+            var l = level(row);
+            shown++;
+            html.push('<tr><td>' + esc(row[0]) + '</td><td>' + esc(row[1]) + '</td><td>' + esc(row[2]) +
+                '</td><td>' + esc(row[3] || '') + '</td><td>' + (l[1] == null ? '' : l[1]) +
+                '</td><td><span class="badge ' + l[0] + '">' + (row[4] ? esc(row[4]) : l[0].toUpperCase()) +
+                '</span></td><td>' + esc(row[5].join(', ')) + '</td></tr>');
+        });
+        document.getElementById('rows').innerHTML = html.join('');
+        document.getElementById('count').textContent = shown + ' / ' + rows.length + ' hosts';
+    }
+
+    function show(id) {
+        CURRENT = id;
+        if (LOADED[id]) return render();
+        var chunk = INDEX.chunks.filter(function (c) { return c.id === id; })[0];
+        var s = document.createElement('script');
+        s.src = chunk.file;
+        document.head.appendChild(s);
+    }
+
+    function dashboardChunk(id, rows) {
+        LOADED[id] = rows;
+        if (id === CURRENT) render();
+    }
+
+    function dashboardIndex(index) {
+        INDEX = index;
+        document.getElementById('generated').textContent = 'Generated: ' + index.generated_at;
+        var s = index.summary;
+        document.getElementById('summary').innerHTML = ['total', 'ok', 'warning', 'critical', 'expired', 'error'].map(function (k) {
+            return '<div class="card ' + k + '"><b>' + s[k] + '</b>' + k.toUpperCase() + '</div>';
+        }).join('');
+        var select = document.getElementById('chunk');
+        select.innerHTML = index.chunks.map(function (c) {
+            var label = c.bucket === 'errors' ? 'Errors' : c.bucket;
+            if (c.pages > 1) label += ' (page ' + c.page + '/' + c.pages + ')';
+            return '<option value="' + esc(c.id) + '">' + esc(label) + ' - ' + c.rows + ' hosts</option>';
+        }).join('');
+        select.onchange = function () { show(select.value); };
+        document.getElementById('filter').oninput = render;
+        if (index.chunks.length) show(index.chunks[0].id);
+    }
+</script>
+<script>
+    // Indeks bez cache przeglądarki (zmienia się przy każdym przebiegu)
+    var indexScript = document.createElement('script');
+    indexScript.src = 'data/index.js?t=' + Date.now();
+    document.head.appendChild(indexScript);
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DNS Resolver Module
+
+Rozwiązywanie nazw hostów przed sprawdzaniem certyfikatów: wszystkie
+hostnames są rozwiązywane równolegle na starcie, a odpowiedzi trzymane
+w cache przez TTL. Handshake łączy się już z konkretnym adresem IP
+(z SNI = hostname), więc opóźnienie DNS nie blokuje workerów.
+
+Resolver systemowy (getaddrinfo) nie zwraca TTL rekordów - czas życia
+wpisu w cache jest konfigurowany (ttl_seconds).
+"""
+
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Tuple, Union
+import logging
+
+
+class DnsResolver:
+    """Równoległe rozwiązywanie nazw z cache TTL"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 300,
+        negative_ttl_seconds: float = 60,
+        max_workers: int = 32,
+        metrics=None
+    ):
+        """
+        Inicjalizacja resolvera
+
+        Args:
+            ttl_seconds: Jak długo pamiętać udaną odpowiedź (sekundy)
+            negative_ttl_seconds: Jak długo pamiętać błąd rozwiązania (sekundy)
+            max_workers: Ile zapytań DNS jednocześnie
+            metrics: RunMetrics - czas każdego zapytania (faza dns)
+        """
+        self.ttl = float(ttl_seconds)
+        self.negative_ttl = float(negative_ttl_seconds)
+        self.max_workers = max(1, int(max_workers))
+        self.metrics = metrics
+        self.logger = logging.getLogger(__name__)
+
+        # hostname -> (wygasa (monotonic), lista adresów lub wyjątek)
+        self._cache: Dict[str, Tuple[float, Union[List[str], Exception]]] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, hostname: str) -> List[str]:
+        """
+        Rozwiąż jeden hostname (z cache)
+
+        Args:
+            hostname: Nazwa hosta lub adres IP
+
+        Returns:
+            Lista unikalnych adresów IP (kolejność z resolvera)
+
+        Raises:
+            socket.gaierror: Gdy nazwy nie da się rozwiązać
+        """
+        result = self.resolve_many([hostname])[hostname]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def resolve_many(
+        self,
+        hostnames: Iterable[str]
+    ) -> Dict[str, Union[List[str], Exception]]:
+        """
+        Rozwiąż wiele hostnames równolegle
+
+        Args:
+            hostnames: Nazwy hostów (duplikaty są pomijane)
+
+        Returns:
+            {hostname -> lista adresów IP lub wyjątek z resolvera}
+        """
+        now = time.monotonic()
+        results = {}
+        missing = []
+
+        with self._lock:
+            for hostname in dict.fromkeys(hostnames):
+                entry = self._cache.get(hostname)
+                if entry and entry[0] > now:
+                    results[hostname] = entry[1]
+                else:
+                    missing.append(hostname)
+
+        if not missing:
+            return results
+
+        workers = min(self.max_workers, len(missing))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            answers = list(executor.map(self._lookup, missing))
+
+        now = time.monotonic()
+        with self._lock:
+            for hostname, answer in zip(missing, answers):
+                results[hostname] = answer
+
+                # Błąd tymczasowy (EAI_AGAIN) nie trafia do cache
+                if isinstance(answer, socket.gaierror) and answer.errno == socket.EAI_AGAIN:
+                    continue
+
+                ttl = self.negative_ttl if isinstance(answer, Exception) else self.ttl
+                self._cache[hostname] = (now + ttl, answer)
+
+        self.logger.debug(
+            f"Resolved {len(missing)} hostnames "
+            f"({len(results) - len(missing)} from cache)"
+        )
+
+        return results
+
+    def _lookup(self, hostname: str) -> Union[List[str], Exception]:
+        """
+        Jedno zapytanie getaddrinfo
+
+        Args:
+            hostname: Nazwa hosta
+
+        Returns:
+            Lista unikalnych adresów IP lub wyjątek
+        """
+        start = time.perf_counter()
+        try:
+            infos = socket.getaddrinfo(hostname, None, type=socket.SOCK_STREAM)
+        except OSError as e:
+            return e
+        finally:
+            if self.metrics:
+                self.metrics.observe('dns', time.perf_counter() - start, hostname)
+
+        return list(dict.fromkeys(info[4][0] for info in infos))
+
+    def clear(self) -> None:
+        """Wyczyść cache"""
+        with self._lock:
+            self._cache.clear()
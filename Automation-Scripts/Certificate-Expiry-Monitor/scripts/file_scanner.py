@@ -0,0 +1,436 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+File Scanner Module
+
+Skanowanie certyfikatów zapisanych na dysku (PEM, DER, PKCS#7, PKCS#12):
+- drzewa katalogów przechodzone iteracyjnie (os.scandir), ścieżki trafiają
+  do puli procesów partiami - w pamięci jest tylko kilka partii naraz
+- plik mapowany do pamięci (mmap): bloki PEM wyszukiwane po bajtach
+  (mmap.find), DER / PKCS#7 / PKCS#12 rozpoznawane po nagłówku ASN.1,
+  pliki bez certyfikatu nie są dekodowane
+- parsowanie (cryptography) w procesach roboczych, do procesu głównego
+  wracają gotowe CertificateInfo
+
+Wynik to te same rekordy CertificateInfo co z sondowania hostów:
+hostname = ścieżka pliku, port = numer certyfikatu w pliku (0 = pierwszy),
+protocol = format (pem, der, pkcs7, pkcs12).
+"""
+
+import base64
+import binascii
+import mmap
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from cert_checker import CertificateChecker, CertificateInfo
+
+
+PEM_BEGIN = b'-----BEGIN '
+PEM_DASHES = b'-----'
+
+# Etykiety PEM z certyfikatami -> format
+PEM_LABELS = {
+    b'CERTIFICATE': 'pem',
+    b'TRUSTED CERTIFICATE': 'pem',
+    b'X509 CERTIFICATE': 'pem',
+    b'PKCS7': 'pkcs7',
+}
+
+# OID signedData (1.2.840.113549.1.7.2) - początek ContentInfo PKCS#7
+PKCS7_SIGNED_DATA = b'\x06\x09\x2a\x86\x48\x86\xf7\x0d\x01\x07\x02'
+
+# INTEGER 3 - wersja PFX (PKCS#12)
+PKCS12_VERSION = b'\x02\x01\x03'
+
+DEFAULT_EXTENSIONS = ('.pem', '.crt', '.cer', '.der', '.p7b', '.p7c', '.p12', '.pfx')
+DEFAULT_EXCLUDE = ('.git', 'node_modules', '__pycache__')
+
+
+def _der_header(buffer, offset: int = 0) -> Tuple[int, int]:
+    """
+    Nagłówek ASN.1 SEQUENCE (bez dekodowania treści)
+
+    Args:
+        buffer: bytes lub mmap
+        offset: Początek TLV
+
+    Returns:
+        (długość nagłówka, długość całego TLV) lub (0, 0) jeśli to nie SEQUENCE
+    """
+    if len(buffer) < offset + 2 or buffer[offset] != 0x30:
+        return 0, 0
+
+    first = buffer[offset + 1]
+    if first < 0x80:
+        return 2, 2 + first
+
+    count = first & 0x7f
+    if not 0 < count <= 4 or len(buffer) < offset + 2 + count:
+        return 0, 0
+
+    length = int.from_bytes(buffer[offset + 2:offset + 2 + count], 'big')
+    return 2 + count, 2 + count + length
+
+
+def find_certificate_blocks(buffer) -> Iterator[Tuple[str, bytes, bool]]:
+    """
+    Znajdź bloki z certyfikatami w zawartości pliku
+
+    Args:
+        buffer: bytes lub mmap (czytane tylko potrzebne fragmenty)
+
+    Yields:
+        (format, dane, czy PEM) - format: pem, der, pkcs7 lub pkcs12;
+        dane: DER lub treść bloku PEM (base64, dekodowana przez pem_to_der)
+    """
+    size = len(buffer)
+
+    # Binarny: DER certyfikatu, PKCS#7 lub PKCS#12 - jeden obiekt na cały
+    # plik (najwyżej CRLF na końcu), długość zawsze w formie długiej (> 127 B)
+    header, total = _der_header(buffer)
+    if header > 2 and total > header and 0 <= size - total <= 2:
+        if buffer[header] == 0x30:
+            yield 'der', bytes(buffer[:total]), False
+        elif buffer[header:header + len(PKCS12_VERSION)] == PKCS12_VERSION:
+            yield 'pkcs12', bytes(buffer[:total]), False
+        elif buffer[header:header + len(PKCS7_SIGNED_DATA)] == PKCS7_SIGNED_DATA:
+            yield 'pkcs7', bytes(buffer[:total]), False
+        return
+
+    # Tekstowy: bloki -----BEGIN <label>----- ... -----END <label>-----
+    position = buffer.find(PEM_BEGIN)
+    while position != -1:
+        label_start = position + len(PEM_BEGIN)
+        label_end = buffer.find(PEM_DASHES, label_start, label_start + 64)
+        if label_end == -1:
+            position = buffer.find(PEM_BEGIN, label_start)
+            continue
+
+        label = bytes(buffer[label_start:label_end])
+        body_start = label_end + len(PEM_DASHES)
+        end = buffer.find(b'-----END ' + label + PEM_DASHES, body_start)
+        if end == -1:
+            return
+
+        fmt = PEM_LABELS.get(label)
+        if fmt:
+            yield fmt, bytes(buffer[body_start:end]), True
+
+        position = buffer.find(PEM_BEGIN, end)
+
+
+def pem_to_der(body: bytes) -> bytes:
+    """
+    Treść bloku PEM -> DER
+
+    Args:
+        body: Tekst base64 między liniami BEGIN i END
+
+    Returns:
+        DER (dla TRUSTED CERTIFICATE bez danych pomocniczych OpenSSL)
+
+    Raises:
+        ValueError: Niepoprawny base64
+    """
+    try:
+        der = base64.b64decode(b''.join(body.split()), validate=True)
+    except binascii.Error as e:
+        raise ValueError(f"Invalid base64 in PEM block: {e}")
+
+    header, total = _der_header(der)
+    return der[:total] if header else der
+
+
+class CertificateFileParser:
+    """Odczyt certyfikatów z plików (w procesie roboczym lub lokalnie)"""
+
+    def __init__(self, pkcs12_passwords: Iterable[str] = ()):
+        """
+        Inicjalizacja
+
+        Args:
+            pkcs12_passwords: Hasła do plików PKCS#12 (bez hasła - zawsze)
+        """
+        self.passwords: List[Optional[bytes]] = [None, b''] + [
+            password.encode('utf-8') for password in pkcs12_passwords if password
+        ]
+        self.checker = CertificateChecker()
+        self.logger = logging.getLogger(__name__)
+
+    def parse_file(self, path: str) -> List[CertificateInfo]:
+        """
+        Certyfikaty z jednego pliku
+
+        Args:
+            path: Ścieżka pliku
+
+        Returns:
+            Lista CertificateInfo (pusta gdy plik nie zawiera certyfikatu,
+            wynik z błędem gdy plik jest nieczytelny lub uszkodzony)
+        """
+        try:
+            with open(path, 'rb') as f:
+                if os.fstat(f.fileno()).st_size == 0:
+                    return []
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                    blocks = list(find_certificate_blocks(buffer))
+        except (OSError, ValueError) as e:
+            # Nieczytelny plik (uprawnienia, zmieniony w trakcie skanowania)
+            return [self.checker.error_info(path, 0, 'file', str(e))]
+
+        results = []
+        for fmt, data, is_pem in blocks:
+            try:
+                certificates = self._load(fmt, pem_to_der(data) if is_pem else data)
+            except ValueError as e:
+                results.append(self.checker.error_info(path, len(results), fmt, str(e)))
+                continue
+
+            for cert in certificates:
+                results.append(self.checker.certificate_info(cert, path, len(results), fmt))
+
+        return results
+
+    def parse_batch(self, paths: List[str]) -> List[CertificateInfo]:
+        """Certyfikaty z partii plików"""
+        results = []
+        for path in paths:
+            results.extend(self.parse_file(path))
+        return results
+
+    def _load(self, fmt: str, der: bytes) -> list:
+        """
+        Certyfikaty z jednego bloku
+
+        Returns:
+            Lista ParsedCertificate
+
+        Raises:
+            ValueError: Blok nie jest poprawnym certyfikatem / kontenerem
+        """
+        from cert_model import ParsedCertificate
+
+        if fmt in ('pem', 'der'):
+            parsed = ParsedCertificate(der)
+            parsed.cert  # Błąd parsowania teraz, nie przy pierwszym polu
+            return [parsed]
+
+        if fmt == 'pkcs7':
+            from cryptography.hazmat.primitives.serialization import pkcs7
+            return [ParsedCertificate.from_x509(c) for c in pkcs7.load_der_pkcs7_certificates(der)]
+
+        from cryptography.hazmat.primitives.serialization import pkcs12
+
+        for password in self.passwords:
+            try:
+                _, cert, additional = pkcs12.load_key_and_certificates(der, password)
+            except ValueError:
+                continue
+            return [ParsedCertificate.from_x509(c) for c in [cert, *additional] if c is not None]
+
+        raise ValueError("PKCS#12: invalid password or unsupported file")
+
+
+# Parser procesu roboczego puli (jeden na proces)
+_worker_parser: Optional[CertificateFileParser] = None
+
+
+def _init_scan_worker(pkcs12_passwords: List[str]) -> None:
+    """Utwórz parser w procesie roboczym (initializer ProcessPoolExecutor)"""
+    global _worker_parser
+    _worker_parser = CertificateFileParser(pkcs12_passwords)
+
+
+def _scan_batch(paths: List[str]) -> List[CertificateInfo]:
+    """Parsuj partię plików w procesie roboczym"""
+    return _worker_parser.parse_batch(paths)
+
+
+class FileScanner:
+    """Skaner drzew katalogów w poszukiwaniu plików z certyfikatami"""
+
+    def __init__(
+        self,
+        extensions: Optional[Iterable[str]] = DEFAULT_EXTENSIONS,
+        exclude: Iterable[str] = DEFAULT_EXCLUDE,
+        max_file_size_mb: float = 10,
+        follow_symlinks: bool = False,
+        workers: int = 0,
+        batch_size: int = 256,
+        pkcs12_passwords: Iterable[str] = ()
+    ):
+        """
+        Inicjalizacja
+
+        Args:
+            extensions: Tylko pliki z tymi rozszerzeniami (puste/None = wszystkie)
+            exclude: Pomijane nazwy katalogów
+            max_file_size_mb: Pliki większe niż limit są pomijane
+            follow_symlinks: Czy wchodzić w dowiązania symboliczne
+            workers: Procesy parsujące (0 = liczba rdzeni, 1 = bez puli)
+            batch_size: Plików na zadanie dla procesu roboczego
+            pkcs12_passwords: Hasła do plików PKCS#12
+        """
+        self.extensions = tuple(ext.lower() for ext in extensions or ())
+        self.exclude = set(exclude or ())
+        self.max_file_size = int(float(max_file_size_mb) * 1024 * 1024)
+        self.follow_symlinks = follow_symlinks
+        self.workers = int(workers) or os.cpu_count() or 1
+        self.batch_size = max(1, int(batch_size))
+        self.pkcs12_passwords = [p for p in pkcs12_passwords if p]
+        self.logger = logging.getLogger(__name__)
+
+        self.stats = {'files': 0, 'skipped': 0, 'certificates': 0, 'errors': 0}
+
+    def iter_files(self, roots: Iterable[Path]) -> Iterator[str]:
+        """
+        Pliki do sprawdzenia (generator - drzewo nie jest listowane w całości)
+
+        Args:
+            roots: Katalogi lub pojedyncze pliki
+
+        Yields:
+            Ścieżki plików
+        """
+        stack = []
+        for root in roots:
+            root = str(root)
+            if os.path.isdir(root):
+                stack.append(root)
+            elif os.path.isfile(root):
+                self.stats['files'] += 1
+                yield root
+            else:
+                self.logger.warning(f"Scan path not found: {root}")
+
+        while stack:
+            directory = stack.pop()
+            try:
+                entries = os.scandir(directory)
+            except OSError as e:
+                self.logger.warning(f"Cannot read directory {directory}: {e}")
+                continue
+
+            with entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=self.follow_symlinks):
+                            if entry.name not in self.exclude:
+                                stack.append(entry.path)
+                            continue
+
+                        if not entry.is_file(follow_symlinks=self.follow_symlinks):
+                            continue
+
+                        if self.extensions and not entry.name.lower().endswith(self.extensions):
+                            continue
+
+                        if entry.stat(follow_symlinks=self.follow_symlinks).st_size > self.max_file_size:
+                            self.stats['skipped'] += 1
+                            continue
+                    except OSError:
+                        self.stats['skipped'] += 1
+                        continue
+
+                    self.stats['files'] += 1
+                    yield entry.path
+
+    def _batches(self, roots: Iterable[Path]) -> Iterator[List[str]]:
+        """Ścieżki w partiach po batch_size"""
+        batch = []
+        for path in self.iter_files(roots):
+            batch.append(path)
+            if len(batch) >= self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def scan(
+        self,
+        roots: Iterable[Path],
+        on_result: Optional[Callable[[CertificateInfo], None]] = None
+    ) -> Dict[str, CertificateInfo]:
+        """
+        Przeskanuj katalogi
+
+        Args:
+            roots: Katalogi lub pojedyncze pliki
+            on_result: Wywoływane dla każdego wyniku (np. ReportStream.write)
+
+        Returns:
+            Dictionary {ścieżka:numer -> CertificateInfo}
+        """
+        self.stats = dict.fromkeys(self.stats, 0)
+        results: Dict[str, CertificateInfo] = {}
+
+        def collect(batch_results: List[CertificateInfo]) -> None:
+            for cert_info in batch_results:
+                results[f"{cert_info.hostname}:{cert_info.port}"] = cert_info
+                self.stats['errors' if cert_info.error else 'certificates'] += 1
+                if on_result:
+                    on_result(cert_info)
+
+        if self.workers == 1:
+            parser = CertificateFileParser(self.pkcs12_passwords)
+            for batch in self._batches(roots):
+                collect(parser.parse_batch(batch))
+            return results
+
+        # Parser w procesie głównym - tylko gdy proces roboczy padnie
+        local_parser: Optional[CertificateFileParser] = None
+
+        def parse_locally(batch: List[str]) -> None:
+            nonlocal local_parser
+            if local_parser is None:
+                local_parser = CertificateFileParser(self.pkcs12_passwords)
+            collect(local_parser.parse_batch(batch))
+
+        # W kolejce najwyżej 2 partie na proces - ścieżki czytane w tempie parsowania
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_scan_worker,
+            initargs=(self.pkcs12_passwords,)
+        ) as executor:
+            pending = {}
+            broken = False
+
+            def drain() -> None:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = pending.pop(future)
+                    try:
+                        collect(future.result())
+                    except Exception as e:
+                        # Proces roboczy padł - partia parsowana lokalnie
+                        self.logger.error(
+                            f"Scan batch of {len(batch)} files failed ({e}), parsing locally"
+                        )
+                        parse_locally(batch)
+
+            for batch in self._batches(roots):
+                if not broken:
+                    try:
+                        pending[executor.submit(_scan_batch, batch)] = batch
+                    except BrokenProcessPool as e:
+                        # Pula po śmierci procesu nie przyjmuje zadań - reszta lokalnie
+                        self.logger.error(
+                            f"Scan worker pool is broken ({e}), parsing remaining files locally"
+                        )
+                        broken = True
+
+                if broken:
+                    parse_locally(batch)
+                elif len(pending) >= self.workers * 2:
+                    drain()
+
+            while pending:
+                drain()
+
+        return results
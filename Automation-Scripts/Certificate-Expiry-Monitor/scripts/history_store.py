@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+History Store Module
+
+Historia wszystkich wyników sprawdzeń (append-only), partycjonowana
+po dniu: history/YYYY-MM/YYYY-MM-DD.ndjson - jeden wynik na linię,
+tylko pola potrzebne do analiz. Plik index.json trzyma dla każdej
+partycji zakres czasu i liczbę wierszy, więc zapytanie o zakres dat
+czyta tylko pasujące partycje (bez parsowania raportów JSON).
+
+Z porównaniem przebiegów (diff) dopisywane są tylko hosty ze zmianą
+oraz pierwszy wiersz dnia dla pozostałych - trend dzienny i ostatni
+stan zostają kompletne, a przebiegi bez zmian nie powiększają historii.
+
+Zapytania:
+- latest: ostatni stan każdego hosta (np. dla dashboardu)
+- renewal_lead_times: ile dni przed wygaśnięciem odnawiane są certyfikaty (per issuer)
+- flapping_hosts: hosty, których stan zmieniał się wielokrotnie
+- days_remaining_trend: dni do wygaśnięcia w czasie (per tag, per dzień)
+"""
+
+import json
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+import logging
+
+from cert_checker import CertificateInfo
+
+
+class HistoryStore:
+    """Append-only historia wyników (partycjonowany NDJSON + indeks)"""
+
+    INDEX_FILE = "index.json"
+
+    def __init__(self, base_dir: Path):
+        """
+        Inicjalizacja
+
+        Args:
+            base_dir: Katalog historii (partycje + index.json)
+        """
+        self.base_dir = Path(base_dir)
+        self.index_path = self.base_dir / self.INDEX_FILE
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self._index = self._load_index()
+
+        # Partycja dnia -> hosty, które mają w niej już wiersz
+        self._sampled: Dict[str, Set[str]] = {}
+
+    def _load_index(self) -> Dict[str, Dict]:
+        """Wczytaj indeks partycji (lub odbuduj z plików)"""
+        try:
+            with open(self.index_path, encoding='utf-8') as f:
+                return json.load(f)['partitions']
+        except FileNotFoundError:
+            pass
+        except (ValueError, KeyError) as e:
+            self.logger.warning(f"History index damaged, rebuilding: {e}")
+
+        return self._rebuild_index()
+
+    def _rebuild_index(self) -> Dict[str, Dict]:
+        """Odbuduj indeks skanując partycje (np. po utracie index.json)"""
+        partitions = {}
+
+        for path in sorted(self.base_dir.glob("*/*.ndjson")):
+            rows = 0
+            first = last = None
+            with open(path, encoding='utf-8') as f:
+                for line in f:
+                    ts = json.loads(line)['ts']
+                    first = first or ts
+                    last = ts
+                    rows += 1
+
+            if rows:
+                partitions[path.stem] = {
+                    'file': str(path.relative_to(self.base_dir)),
+                    'rows': rows,
+                    'first': first,
+                    'last': last
+                }
+
+        return partitions
+
+    def _save_index(self) -> None:
+        """Zapisz indeks atomowo (tmp + replace)"""
+        tmp_path = self.index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'partitions': self._index}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    @staticmethod
+    def to_record(
+        cert: CertificateInfo,
+        timestamp: str,
+        tags: Optional[List[str]] = None
+    ) -> Dict:
+        """
+        Wiersz historii z wyniku sprawdzenia
+
+        Args:
+            cert: Wynik sprawdzenia
+            timestamp: Czas przebiegu (ISO, UTC)
+            tags: Tagi hosta z domains.yml
+
+        Returns:
+            Dictionary (pola do analiz, bez szczegółów technicznych)
+        """
+        return {
+            'ts': timestamp,
+            'host': f"{cert.hostname}:{cert.port}",
+            'tags': tags or [],
+            'cn': cert.common_name,
+            'issuer': cert.issuer,
+            'fp': cert.fingerprint,
+            'not_after': None if cert.error else cert.valid_until.isoformat(),
+            'days': None if cert.error else cert.days_remaining,
+            'level': cert.alert_level,
+            'alert_days': cert.alert_days,
+            'error': cert.error
+        }
+
+    def append(
+        self,
+        certificates: Iterable[CertificateInfo],
+        tags: Optional[Dict[str, List[str]]] = None,
+        now: Optional[datetime] = None,
+        changed: Optional[Iterable[str]] = None
+    ) -> int:
+        """
+        Dopisz wyniki przebiegu do partycji dnia
+
+        Args:
+            certificates: Wyniki sprawdzenia
+            tags: {hostname:port -> tagi} z domains.yml
+            now: Czas przebiegu (domyślnie teraz, UTC)
+            changed: Hosty ze zmianą względem poprzedniego przebiegu - gdy
+                podane, pozostałe hosty są dopisywane tylko raz dziennie
+
+        Returns:
+            Liczba dopisanych wierszy
+        """
+        now = now or datetime.now(timezone.utc)
+        timestamp = now.isoformat(timespec='seconds')
+        tags = tags or {}
+
+        partition = now.strftime('%Y-%m-%d')
+        relative = f"{now.strftime('%Y-%m')}/{partition}.ndjson"
+        path = self.base_dir / relative
+
+        with self._lock:
+            sampled = self._sampled_hosts(partition, path, load=changed is not None)
+            changed = set(changed) if changed is not None else None
+
+            rows = []
+            for cert in certificates:
+                key = f"{cert.hostname}:{cert.port}"
+                if changed is None or key in changed or key not in sampled:
+                    rows.append((key, cert))
+
+            if not rows:
+                return 0
+
+            lines = [
+                json.dumps(
+                    self.to_record(cert, timestamp, tags.get(key)),
+                    ensure_ascii=False,
+                    separators=(',', ':')
+                )
+                for key, cert in rows
+            ]
+
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+
+            entry = self._index.setdefault(
+                partition,
+                {'file': relative, 'rows': 0, 'first': timestamp, 'last': timestamp}
+            )
+            entry['rows'] += len(lines)
+            entry['last'] = timestamp
+            self._save_index()
+
+            if sampled is not None:
+                sampled.update(key for key, _ in rows)
+
+        self.logger.debug(f"History: {len(lines)} rows appended to {relative}")
+        return len(lines)
+
+    def _sampled_hosts(self, partition: str, path: Path, load: bool) -> Optional[Set[str]]:
+        """
+        Hosty z wierszem w partycji dnia (wczytywane raz na dzień i proces)
+
+        Args:
+            partition: Nazwa partycji (YYYY-MM-DD)
+            path: Plik partycji
+            load: Wczytaj z pliku, jeśli zbiór nie jest jeszcze w pamięci
+
+        Returns:
+            Zbiór hostname:port lub None (nie wczytany i load=False)
+        """
+        if partition not in self._sampled:
+            if not load:
+                return None
+
+            hosts = set()
+            try:
+                with open(path, encoding='utf-8') as f:
+                    hosts = {json.loads(line)['host'] for line in f}
+            except FileNotFoundError:
+                pass
+
+            # Poprzednie dni nie są już potrzebne
+            self._sampled = {partition: hosts}
+
+        return self._sampled[partition]
+
+    def partitions(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> List[Path]:
+        """
+        Partycje z danymi w zakresie czasu (wg indeksu)
+
+        Args:
+            since: Początek zakresu (włącznie)
+            until: Koniec zakresu (włącznie)
+
+        Returns:
+            Lista plików partycji (chronologicznie)
+        """
+        since_ts = since.isoformat(timespec='seconds') if since else None
+        until_ts = until.isoformat(timespec='seconds') if until else None
+
+        with self._lock:
+            entries = sorted(self._index.items())
+
+        return [
+            self.base_dir / entry['file']
+            for _, entry in entries
+            if (since_ts is None or entry['last'] >= since_ts)
+            and (until_ts is None or entry['first'] <= until_ts)
+        ]
+
+    def scan(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        hosts: Optional[Iterable[str]] = None
+    ) -> Iterator[Dict]:
+        """
+        Iteruj po wierszach historii (chronologicznie)
+
+        Args:
+            since: Początek zakresu (włącznie)
+            until: Koniec zakresu (włącznie)
+            hosts: Tylko te hosty (hostname:port)
+
+        Yields:
+            Wiersze historii (dict)
+        """
+        since_ts = since.isoformat(timespec='seconds') if since else None
+        until_ts = until.isoformat(timespec='seconds') if until else None
+        hosts = set(hosts) if hosts else None
+
+        for path in self.partitions(since, until):
+            try:
+                f = open(path, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+
+            with f:
+                for line in f:
+                    record = json.loads(line)
+                    if since_ts and record['ts'] < since_ts:
+                        continue
+                    if until_ts and record['ts'] > until_ts:
+                        continue
+                    if hosts is not None and record['host'] not in hosts:
+                        continue
+                    yield record
+
+    # ------------------------------------------------------------------
+    # Zapytania
+    # ------------------------------------------------------------------
+
+    def latest(self, since: Optional[datetime] = None) -> Dict[str, Dict]:
+        """
+        Ostatni wiersz dla każdego hosta (aktualny stan inwentarza)
+
+        Args:
+            since: Uwzględnij tylko wiersze od tego czasu
+
+        Returns:
+            {hostname:port -> ostatni wiersz}
+        """
+        latest = {}
+        for record in self.scan(since):
+            latest[record['host']] = record
+        return latest
+
+    def renewal_lead_times(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Dict[str, Dict]:
+        """
+        Z jakim wyprzedzeniem odnawiane są certyfikaty (per issuer)
+
+        Odnowienie = zmiana fingerprint hosta; wyprzedzenie = dni do
+        wygaśnięcia starego certyfikatu przy ostatniej obserwacji.
+
+        Args:
+            since: Początek zakresu
+            until: Koniec zakresu
+
+        Returns:
+            {issuer nowego certyfikatu -> {renewals, avg_days, min_days, max_days}}
+        """
+        last_seen: Dict[str, Dict] = {}
+        lead_times: Dict[str, List[int]] = defaultdict(list)
+
+        for record in self.scan(since, until):
+            if record['error'] or not record['fp']:
+                continue
+
+            previous = last_seen.get(record['host'])
+            if previous and previous['fp'] != record['fp']:
+                lead_times[record['issuer']].append(previous['days'])
+
+            last_seen[record['host']] = record
+
+        return {
+            issuer: {
+                'renewals': len(days),
+                'avg_days': round(sum(days) / len(days), 1),
+                'min_days': min(days),
+                'max_days': max(days)
+            }
+            for issuer, days in lead_times.items()
+        }
+
+    def flapping_hosts(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        min_changes: int = 2
+    ) -> Dict[str, int]:
+        """
+        Hosty, których stan (poziom alertu / błąd) zmieniał się wielokrotnie
+
+        Args:
+            since: Początek zakresu
+            until: Koniec zakresu
+            min_changes: Minimalna liczba zmian stanu
+
+        Returns:
+            {hostname:port -> liczba zmian}, malejąco
+        """
+        last_level: Dict[str, str] = {}
+        changes: Dict[str, int] = defaultdict(int)
+
+        for record in self.scan(since, until):
+            level = record['level']
+            previous = last_level.get(record['host'])
+            if previous is not None and previous != level:
+                changes[record['host']] += 1
+            last_level[record['host']] = level
+
+        flapping = {h: n for h, n in changes.items() if n >= min_changes}
+        return dict(sorted(flapping.items(), key=lambda item: -item[1]))
+
+    def days_remaining_trend(
+        self,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        tag: Optional[str] = None
+    ) -> Dict[str, List[Dict]]:
+        """
+        Dni do wygaśnięcia w czasie, per tag i dzień
+
+        Args:
+            since: Początek zakresu
+            until: Koniec zakresu
+            tag: Tylko ten tag (domyślnie wszystkie)
+
+        Returns:
+            {tag -> [{date, hosts, min_days, avg_days}, ...]} chronologicznie
+        """
+        # (tag, dzień) -> {host -> ostatnie days tego dnia}
+        buckets: Dict[tuple, Dict[str, int]] = defaultdict(dict)
+
+        for record in self.scan(since, until):
+            if record['days'] is None:
+                continue
+
+            day = record['ts'][:10]
+            for record_tag in record['tags'] or ['untagged']:
+                if tag is None or record_tag == tag:
+                    buckets[(record_tag, day)][record['host']] = record['days']
+
+        trend: Dict[str, List[Dict]] = defaultdict(list)
+        for (record_tag, day), by_host in sorted(buckets.items()):
+            days = list(by_host.values())
+            trend[record_tag].append({
+                'date': day,
+                'hosts': len(days),
+                'min_days': min(days),
+                'avg_days': round(sum(days) / len(days), 1)
+            })
+
+        return dict(trend)
+
+    def export_parquet(
+        self,
+        output_path: Path,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Path:
+        """
+        Eksport historii do Parquet (kolumnowo, np. dla pandas/DuckDB)
+
+        Wymaga pyarrow (opcjonalna zależność).
+
+        Args:
+            output_path: Plik wynikowy (.parquet)
+            since: Początek zakresu
+            until: Koniec zakresu
+
+        Returns:
+            Ścieżka do pliku
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet export requires pyarrow: pip install pyarrow")
+
+        records = list(self.scan(since, until))
+
+        # Starsze wiersze mogą nie mieć nowszych pól (np. alert_days) -> null
+        names = list(dict.fromkeys(name for record in records for name in record))
+        columns = {name: [record.get(name) for record in records] for name in names}
+
+        pq.write_table(pa.table(columns), str(output_path))
+        return Path(output_path)
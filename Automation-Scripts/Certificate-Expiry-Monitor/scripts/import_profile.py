@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Import Profile Module
+
+Koszt importów dla polecenia main.py (--import-profile): polecenie jest
+uruchamiane ponownie z `python -X importtime`, a wynik zsumowany per
+pakiet (cryptography, requests, jinja2, ...) i per import najwyższego
+poziomu. Pozwala zauważyć, że zmiana wciągnęła ciężką zależność do
+ścieżki, która jej nie potrzebuje (np. --help, --shard).
+"""
+
+import subprocess
+import sys
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+
+PREFIX = "import time:"
+
+
+def parse_importtime(lines: List[str]) -> List[Tuple[str, int, int, int]]:
+    """
+    Parsuj wyjście -X importtime
+
+    Args:
+        lines: Linie stderr
+
+    Returns:
+        Lista (moduł, poziom zagnieżdżenia, self us, cumulative us)
+    """
+    entries = []
+
+    for line in lines:
+        if not line.startswith(PREFIX):
+            continue
+
+        try:
+            self_us, cumulative_us, name = line[len(PREFIX):].split('|', 2)
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            # Nagłówek "self [us] | cumulative | imported package"
+            continue
+
+        # Importy równoległe w wątkach (np. wysyłka alertów) potrafią dać
+        # ujemny czas własny - liczniki -X importtime są wspólne dla procesu
+        depth = (len(name) - len(name.lstrip(' ')) - 1) // 2
+        entries.append((name.strip(), depth, max(0, self_us), max(0, cumulative_us)))
+
+    return entries
+
+
+def summarize(entries: List[Tuple[str, int, int, int]], top: int = 15) -> str:
+    """
+    Raport: suma, pakiety według czasu własnego, importy najwyższego poziomu
+
+    Args:
+        entries: Wynik parse_importtime
+        top: Ile pozycji w każdej tabeli
+
+    Returns:
+        Tekst raportu
+    """
+    total_us = sum(e[2] for e in entries)
+
+    packages: Dict[str, int] = defaultdict(int)
+    for name, _, self_us, _ in entries:
+        packages[name.split('.')[0]] += self_us
+
+    # Poziom 0 = import wykonany bezpośrednio przez skrypt (także leniwy, w funkcji)
+    roots = sorted((e for e in entries if e[1] == 0), key=lambda e: -e[3])
+
+    lines = [
+        "",
+        "=" * 60,
+        f"Import profile: {len(entries)} modules, {total_us / 1000:.1f} ms total",
+        "=" * 60,
+        f"{'package':<36} {'ms':>9} {'%':>6}",
+        "-" * 60,
+    ]
+    for package, self_us in sorted(packages.items(), key=lambda p: -p[1])[:top]:
+        lines.append(
+            f"{package:<36} {self_us / 1000:>9.1f} {100 * self_us / max(total_us, 1):>5.1f}%"
+        )
+
+    lines += [
+        "",
+        f"{'top-level import':<36} {'cumulative ms':>15}",
+        "-" * 60,
+    ]
+    for name, _, _, cumulative_us in roots[:top]:
+        lines.append(f"{name:<36} {cumulative_us / 1000:>15.1f}")
+
+    return "\n".join(lines)
+
+
+def run_import_profile(script: Path, argv: List[str], top: int = 15) -> int:
+    """
+    Uruchom skrypt ponownie z -X importtime i wypisz raport importów
+
+    Args:
+        script: Ścieżka do main.py
+        argv: Argumenty polecenia (bez --import-profile; puste = --help)
+        top: Ile pozycji w każdej tabeli
+
+    Returns:
+        Kod wyjścia profilowanego polecenia
+    """
+    command = [sys.executable, '-X', 'importtime', str(script)] + (argv or ['--help'])
+
+    process = subprocess.run(command, stderr=subprocess.PIPE, text=True)
+
+    lines = process.stderr.splitlines()
+
+    # Pozostałe stderr (logi, błędy) bez zmian
+    other = [line for line in lines if not line.startswith(PREFIX)]
+    if other:
+        print("\n".join(other), file=sys.stderr)
+
+    print(summarize(parse_importtime(lines), top=top))
+
+    return process.returncode
@@ -12,35 +12,61 @@ Główny skrypt orkiestrujący:
 - Generowanie raportów
 """
 
+import os
 import sys
+import json
 import argparse
+from contextlib import nullcontext
+from datetime import datetime, timezone
+from functools import cached_property
 from pathlib import Path
-from typing import List, Dict
+from typing import TYPE_CHECKING, Callable, List, Dict, Optional, Tuple
 import logging
 
-from cert_checker import CertificateChecker, CertificateInfo
-from cert_validator import CertificateValidator
-from alerting import EmailAlerter, SlackAlerter, TeamsAlerter
-from reporting import ReportGenerator
-from utils import ConfigLoader, ColorPrinter, LoggerSetup, FileUtils
+from cert_checker import CertificateChecker, CertificateInfo, HostTarget
+from cert_cache import CertificateCache
+from cert_diff import CertificateChange, CertificateDiff
+from alert_ledger import AlertLedger
+from circuit_breaker import CircuitBreaker
+from dns_resolver import DnsResolver
+from history_store import HistoryStore
+from daemon import MonitorDaemon
+from import_profile import run_import_profile
+from reporting import ReportGenerator, ReportStream
+from sharding import SHARD_STRATEGIES, parse_shard, split_hosts
+from settings_schema import SETTINGS_SCHEMA
+from utils import ConfigLoader, ColorPrinter, LoggerSetup, FileUtils, TemplateRenderer
+
+if TYPE_CHECKING:
+    # Importowane przy pierwszym użyciu: walidacja (cryptography, pyOpenSSL,
+    # requests) przy pierwszym sprawdzaniu, alerty (requests, smtplib) przy
+    # pierwszej wysyłce, metryki tylko gdy prometheus.enabled
+    from alerting import AlertDispatcher
+    from cert_validator import CertificateValidator
+    from metrics import MetricsServer
 
 
 class CertificateMonitor:
     """Główna klasa orchestrująca cały proces"""
     
-    def __init__(self, config_loader: ConfigLoader):
+    def __init__(self, config_loader: ConfigLoader, use_cache: bool = True):
         """
         Inicjalizacja monitora
         
         Args:
             config_loader: ConfigLoader instance
+            use_cache: Czy korzystać z cache wyników (False = sprawdź wszystko)
         """
         self.config_loader = config_loader
         self.project_root = config_loader.project_root
         
         # Załaduj konfigurację
+        self.domains_path = self.project_root / "config/domains.yml"
+        self.domains_mtime = self.domains_path.stat().st_mtime
         self.domains_config = config_loader.load_yaml("config/domains.yml")
-        self.settings_config = config_loader.load_yaml("config/settings.yml")
+        self.settings_config = config_loader.load_yaml(
+            "config/settings.yml", schema=SETTINGS_SCHEMA
+        )
         
         # Setup logger
         log_config = self.settings_config['logging']
@@ -56,31 +82,253 @@ class CertificateMonitor:
         # Color printer
         self.printer = ColorPrinter()
         
-        # Inicjalizuj komponenty
+        # Inicjalizuj komponenty (validator i dispatcher - przy pierwszym użyciu)
+        self._init_metrics()
         self._init_checker()
-        self._init_validator()
-        self._init_alerters()
+        self._init_cache(use_cache)
+        self._init_ledger()
+        self._init_diff()
         self._init_reporter()
     
     def _init_checker(self):
         """Inicjalizuj certificate checker"""
         general_config = self.settings_config['general']
+        validation_config = self.settings_config['validation']
+        dns_config = general_config.get('dns', {})
+        
+        # Handshake bez weryfikacji - łańcuch z tego samego połączenia
+        # waliduje CertificateValidator (wygasłe/self-signed też są raportowane)
+        self.verify_chain = ConfigLoader.as_bool(validation_config.get('verify_chain'))
         
         self.checker = CertificateChecker(
             timeout=general_config['connection_timeout'],
-            verify=self.settings_config['validation']['verify_chain']
+            verify=False,
+            validator=None,
+            check_revocation=ConfigLoader.as_bool(
+                validation_config.get('check_revocation')
+            ),
+            verify_hostname=ConfigLoader.as_bool(
+                validation_config.get('verify_hostname', True)
+            ),
+            retry_attempts=int(general_config.get('retry_attempts', 1)),
+            retry_delay=float(general_config.get('retry_delay', 5)),
+            breaker=self._init_breaker(),
+            resolver=self._init_resolver(),
+            probe_all_addresses=ConfigLoader.as_bool(
+                dns_config.get('probe_all_addresses', True)
+            ),
+            starttls_timeout=float(general_config.get('starttls_timeout', 5)),
+            metrics=self.metrics
+        )
+        
+        # Progi WARNING per host (alert_days z domains.yml)
+        self.checker.set_alert_days(self.get_enabled_hosts())
+    
+    def _init_resolver(self) -> Optional[DnsResolver]:
+        """Inicjalizuj resolver DNS (rozwiązywanie nazw przed handshake'ami)"""
+        dns_config = self.settings_config['general'].get('dns', {})
+        
+        if not ConfigLoader.as_bool(dns_config.get('enabled', False)):
+            return None
+        
+        return DnsResolver(
+            ttl_seconds=dns_config.get('ttl_seconds', 300),
+            negative_ttl_seconds=dns_config.get('negative_ttl_seconds', 60),
+            max_workers=dns_config.get('max_workers', 32),
+            metrics=self.metrics
+        )
+    
+    def _init_metrics(self):
+        """Inicjalizuj metryki czasów faz (eksport OpenMetrics / Prometheus)"""
+        prometheus_config = self.settings_config.get('prometheus') or {}
+        
+        if not ConfigLoader.as_bool(prometheus_config.get('enabled', False)):
+            self.metrics = None
+            return
+        
+        from metrics import RunMetrics
+        
+        self.metrics = RunMetrics(
+            enabled_metrics=prometheus_config.get('metrics'),
+            per_host_top=prometheus_config.get('per_host_top', 50)
+        )
+    
+    def _timed(self, phase: str):
+        """Pomiar czasu fazy przebiegu (alerts, reports, ...) gdy metryki włączone"""
+        return self.metrics.timer(phase) if self.metrics else nullcontext()
+    
+    def start_metrics_run(self, hosts: Optional[List[HostTarget]] = None):
+        """
+        Rozpocznij pomiar przebiegu
+        
+        Args:
+            hosts: Partia hostów (--daemon) lub None dla pełnego przebiegu
+        """
+        if self.metrics:
+            self.metrics.start_run(
+                None if hosts is None else [f"{h[0]}:{h[1]}" for h in hosts]
+            )
+    
+    def export_metrics(self, certificates: Dict[str, CertificateInfo]):
+        """
+        Zakończ pomiar przebiegu i zapisz plik OpenMetrics
+        
+        Args:
+            certificates: Wyniki przebiegu (partii)
+        """
+        if not self.metrics:
+            return
+        
+        self.metrics.finish_run(
+            hosts=len(certificates),
+            errors=sum(1 for c in certificates.values() if c.error)
+        )
+        self.metrics.retain_hosts(f"{h[0]}:{h[1]}" for h in self.get_enabled_hosts())
+        
+        textfile = self.settings_config['prometheus'].get('textfile')
+        if not textfile:
+            return
+        
+        try:
+            self.metrics.write(self.project_root / textfile)
+        except OSError as e:
+            self.logger.error(f"Failed to write metrics: {e}")
+    
+    def start_metrics_server(self) -> Optional['MetricsServer']:
+        """
+        Uruchom endpoint HTTP z metrykami (tryb --daemon)
+        
+        Returns:
+            MetricsServer lub None (metryki wyłączone / brak portu)
+        """
+        if not self.metrics:
+            return None
+        
+        from metrics import MetricsServer
+        
+        prometheus_config = self.settings_config['prometheus']
+        
+        try:
+            server = MetricsServer(
+                self.metrics,
+                port=int(prometheus_config.get('port')),
+                path=prometheus_config.get('path') or "/metrics",
+                bind=prometheus_config.get('bind', "127.0.0.1")
+            )
+        except (TypeError, ValueError, OSError) as e:
+            self.logger.error(f"Metrics endpoint not started: {e}")
+            return None
+        
+        server.start()
+        return server
+    
+    def _init_breaker(self) -> Optional[CircuitBreaker]:
+        """Inicjalizuj circuit breaker dla nieosiągalnych hostów"""
+        breaker_config = self.settings_config.get('circuit_breaker', {})
+        
+        if not ConfigLoader.as_bool(breaker_config.get('enabled', False)):
+            return None
+        
+        return CircuitBreaker(
+            db_path=self.project_root / breaker_config['path'],
+            failure_threshold=breaker_config.get('failure_threshold', 3),
+            open_hours=breaker_config.get('open_hours', 24),
+            max_open_hours=breaker_config.get('max_open_hours', 168)
         )
     
-    def _init_validator(self):
-        """Inicjalizuj certificate validator"""
+    @cached_property
+    def validator(self) -> 'CertificateValidator':
+        """Certificate validator (tworzony przy pierwszym sprawdzaniu hostów)"""
+        from cert_validator import CertificateValidator
+        from revocation import RevocationChecker
+        from trust_store import TrustStore
+        
         general_config = self.settings_config['general']
+        validation_config = self.settings_config['validation']
+        revocation_config = validation_config.get('revocation', {})
         
-        self.validator = CertificateValidator(
-            timeout=general_config['connection_timeout']
+        # Jeden RevocationChecker na proces - cache OCSP/CRL współdzielony przez hosty
+        cache_dir = revocation_config.get('cache_dir')
+        revocation_checker = RevocationChecker(
+            cache_dir=self.project_root / cache_dir if cache_dir else None,
+            timeout=revocation_config.get('timeout', general_config['connection_timeout'])
         )
+        
+        # Trust store ładowany raz na proces (brak ścieżek = systemowy)
+        trust_config = validation_config.get('trust_store') or {}
+        cafile = trust_config.get('cafile')
+        capath = trust_config.get('capath')
+        trust_store = TrustStore.load(
+            cafile=self.project_root / cafile if cafile else None,
+            capath=self.project_root / capath if capath else None
+        )
+        
+        return CertificateValidator(
+            timeout=general_config['connection_timeout'],
+            revocation_checker=revocation_checker,
+            trust_store=trust_store,
+            allow_self_signed=ConfigLoader.as_bool(
+                validation_config.get('allow_self_signed', False)
+            )
+        )
+    
+    def _init_cache(self, use_cache: bool):
+        """Inicjalizuj cache wyników sprawdzeń"""
+        cache_config = self.settings_config.get('certificate_cache', {})
+        
+        if use_cache and cache_config.get('enabled', False):
+            self.cache = CertificateCache(
+                db_path=self.project_root / cache_config['path'],
+                near_expiry_days=cache_config.get('near_expiry_days', 30),
+                near_expiry_interval_hours=cache_config.get('near_expiry_interval_hours', 24),
+                default_interval_hours=cache_config.get('default_interval_hours', 168)
+            )
+        else:
+            self.cache = None
+    
+    def _init_ledger(self):
+        """Inicjalizuj rejestr wysłanych alertów (deduplikacja)"""
+        alerts_config = self.settings_config['alerts']
+        ledger_config = alerts_config.get('ledger', {})
+        
+        if ledger_config.get('enabled', False):
+            self.ledger = AlertLedger(
+                db_path=self.project_root / ledger_config['path'],
+                cooldown_hours=alerts_config.get('alert_cooldown_hours', 24),
+                max_alerts_per_cert=alerts_config.get('max_alerts_per_cert', 3),
+                reminder_hours=ledger_config.get('reminder_hours')
+            )
+        else:
+            self.ledger = None
+    
+    def _init_diff(self):
+        """Inicjalizuj porównanie wyników z poprzednim przebiegiem"""
+        diff_config = self.settings_config.get('diff', {})
+        
+        if diff_config.get('enabled', False):
+            self.differ = CertificateDiff(self.project_root / diff_config['path'])
+        else:
+            self.differ = None
     
-    def _init_alerters(self):
-        """Inicjalizuj alerters"""
+    @cached_property
+    def dispatcher(self) -> 'AlertDispatcher':
+        """Alerters i dispatcher (tworzone przy pierwszej wysyłce alertów)"""
+        from alerting import (
+            AlertDispatcher, EmailAlerter, SlackAlerter, TeamsAlerter, WebhookClient
+        )
+        
+        dispatch_config = self.settings_config['alerts'].get('dispatch', {})
+        
+        def webhook_client() -> WebhookClient:
+            # Osobny limit (token bucket) dla każdego webhooka
+            return WebhookClient(
+                rate_limit_per_second=dispatch_config.get('webhook_rate_per_second', 1),
+                burst=dispatch_config.get('webhook_burst', 5),
+                max_retries=dispatch_config.get('max_retries', 3),
+                backoff_seconds=dispatch_config.get('backoff_seconds', 1),
+                timeout=self.settings_config['general']['connection_timeout']
+            )
+        
         # Email
         smtp_config = self.settings_config['smtp']
         if smtp_config['enabled']:
@@ -100,7 +348,8 @@ class CertificateMonitor:
         if slack_config['enabled']:
             self.slack_alerter = SlackAlerter(
                 webhook_url=slack_config['webhook_url'],
-                channel=slack_config.get('channel')
+                channel=slack_config.get('channel'),
+                client=webhook_client()
             )
         else:
             self.slack_alerter = None
@@ -109,24 +358,76 @@ class CertificateMonitor:
         teams_config = self.settings_config['teams']
         if teams_config['enabled']:
             self.teams_alerter = TeamsAlerter(
-                webhook_url=teams_config['webhook_url']
+                webhook_url=teams_config['webhook_url'],
+                client=webhook_client()
             )
         else:
             self.teams_alerter = None
+        
+        alerts_config = self.settings_config['alerts']
+        return AlertDispatcher(
+            email_alerter=(
+                self.email_alerter if alerts_config.get('alert_on_warning', True) else None
+            ),
+            slack_alerter=self.slack_alerter,
+            teams_alerter=self.teams_alerter,
+            group_alerts=ConfigLoader.as_bool(alerts_config.get('group_alerts', True)),
+            max_workers=dispatch_config.get('max_workers', 8)
+        )
     
     def _init_reporter(self):
         """Inicjalizuj report generator"""
         report_config = self.settings_config['reporting']
         output_path = self.project_root / report_config['output_path']
         
-        self.reporter = ReportGenerator(output_path)
+        # Skompilowane szablony Jinja2 (email/raporty) współdzielone między uruchomieniami
+        template_cache_dir = report_config.get('template_cache_dir')
+        if template_cache_dir:
+            TemplateRenderer.bytecode_cache_dir = self.project_root / template_cache_dir
+        
+        # Historia wyników (append-only) - źródło zapytań ReportGenerator
+        history_config = self.settings_config.get('history', {})
+        if ConfigLoader.as_bool(history_config.get('enabled', False)):
+            self.history = HistoryStore(self.project_root / history_config['path'])
+        else:
+            self.history = None
+        
+        self.reporter = ReportGenerator(output_path, history=self.history)
     
-    def get_enabled_hosts(self) -> List[tuple]:
+    def reload_domains(self) -> bool:
+        """
+        Przeładuj domains.yml jeśli plik się zmienił (mtime)
+        
+        Returns:
+            True jeśli konfiguracja została przeładowana
+        """
+        try:
+            mtime = self.domains_path.stat().st_mtime
+        except OSError as e:
+            self.logger.error(f"Cannot stat {self.domains_path}: {e}")
+            return False
+        
+        if mtime == self.domains_mtime:
+            return False
+        
+        try:
+            self.domains_config = self.config_loader.load_yaml("config/domains.yml")
+        except Exception as e:
+            # Zostaw poprzednią konfigurację (np. plik w trakcie edycji)
+            self.logger.error(f"Failed to reload domains.yml: {e}")
+            return False
+        
+        self.domains_mtime = mtime
+        self.checker.set_alert_days(self.get_enabled_hosts())
+        self.logger.info("domains.yml changed - configuration reloaded")
+        return True
+    
+    def get_enabled_hosts(self) -> List[HostTarget]:
         """
         Pobierz listę aktywnych hostów do sprawdzenia
 
         Returns:
-            Lista tuple (hostname, port, protocol)
+            Lista HostTarget (hostname, port, protocol + name, grupa, tagi, alert_days)
         """
         hosts = []
 
@@ -134,19 +435,69 @@ class CertificateMonitor:
             if isinstance(group_hosts, list):
                 for host_config in group_hosts:
                     if host_config.get('enabled', False):
-                        hostname = str(host_config['host'])
-                        port = int(host_config['port'])
-                        protocol = str(host_config['protocol'])
+                        alert_days = host_config.get('alert_days')
 
-                        hosts.append((hostname, port, protocol))
+                        hosts.append(HostTarget(
+                            hostname=str(host_config['host']),
+                            port=int(host_config['port']),
+                            protocol=str(host_config['protocol']),
+                            name=host_config.get('name'),
+                            group=group_name,
+                            tags=tuple(str(t) for t in host_config.get('tags') or []),
+                            alert_days=int(alert_days) if alert_days is not None else None
+                        ))
 
         return hosts
 
+    def get_host_recipients(self) -> Dict[str, List[str]]:
+        """
+        Pobierz dodatkowych odbiorców alertów per host (pole 'notify')
+
+        Returns:
+            Dictionary {hostname:port -> lista adresów email}
+        """
+        recipients = {}
+
+        for group_hosts in self.domains_config.values():
+            if isinstance(group_hosts, list):
+                for host_config in group_hosts:
+                    notify = host_config.get('notify')
+                    if not notify:
+                        continue
+                    if isinstance(notify, str):
+                        notify = notify.split(',')
+                    key = f"{host_config['host']}:{host_config['port']}"
+                    recipients[key] = [str(a).strip() for a in notify if str(a).strip()]
+
+        return recipients
+
+    def get_host_tags(self) -> Dict[str, List[str]]:
+        """
+        Pobierz tagi hostów (pole 'tags')
+
+        Returns:
+            Dictionary {hostname:port -> lista tagów}
+        """
+        tags = {}
+
+        for group_hosts in self.domains_config.values():
+            if isinstance(group_hosts, list):
+                for host_config in group_hosts:
+                    key = f"{host_config['host']}:{host_config['port']}"
+                    tags[key] = [str(t) for t in host_config.get('tags') or []]
+
+        return tags
     
-    def check_all_certificates(self) -> Dict[str, CertificateInfo]:
+    def check_all_certificates(
+        self,
+        on_result: Optional[Callable[[CertificateInfo], None]] = None
+    ) -> Dict[str, CertificateInfo]:
         """
         Sprawdź wszystkie aktywne certyfikaty
         
+        Args:
+            on_result: Wywoływane dla każdego wyniku (np. ReportStream.write)
+        
         Returns:
             Dictionary {hostname:port -> CertificateInfo}
         """
@@ -161,15 +512,9 @@ class CertificateMonitor:
             self.printer.warning("No enabled hosts found!")
             return {}
         
-        self.logger.info(f"Checking {len(hosts)} hosts")
         print(f"Checking {len(hosts)} hosts...\n")
         
-        # Sprawdź certyfikaty
-        general_config = self.settings_config['general']
-        results = self.checker.check_multiple_hosts(
-            hosts,
-            concurrent=general_config['concurrent_checks']
-        )
+        results = self.check_hosts(hosts, on_result=on_result)
         
         # Wyświetl rezultaty
         print("\nResults:")
@@ -188,132 +533,760 @@ class CertificateMonitor:
         self.logger.info(f"Certificate check completed: {len(results)} hosts")
         return results
     
-    def send_alerts(self, certificates: Dict[str, CertificateInfo]):
+    def check_hosts(
+        self,
+        hosts: List[HostTarget],
+        on_result: Optional[Callable[[CertificateInfo], None]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, CertificateInfo]:
+        """
+        Sprawdź podane hosty (cache + wybrany silnik, duże partie w wielu
+        procesach), bez wyświetlania
+        
+        Args:
+            hosts: Lista HostTarget
+            on_result: Wywoływane dla każdego wyniku (np. ReportStream.write)
+            use_cache: False = sprawdź wszystkie hosty (wyniki i tak trafiają
+                do cache), np. gdy harmonogram daemon uznał je za należne
+        
+        Returns:
+            Dictionary {hostname:port -> CertificateInfo}
+        """
+        workers = self._shard_workers(len(hosts))
+        
+        with self._timed('sweep'):
+            if workers > 1:
+                results = self.check_hosts_sharded(
+                    hosts, workers, on_result=on_result, use_cache=use_cache
+                )
+            else:
+                results = self.probe_hosts(hosts, on_result=on_result, use_cache=use_cache)
+        
+        if self.metrics:
+            self.metrics.record_certificates(results.values())
+        
+        return results
+    
+    def probe_hosts(
+        self,
+        hosts: List[HostTarget],
+        on_result: Optional[Callable[[CertificateInfo], None]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, CertificateInfo]:
+        """
+        Sprawdź hosty w bieżącym procesie (cache + wybrany silnik)
+        
+        Args:
+            hosts: Lista HostTarget
+            on_result: Wywoływane dla każdego wyniku (np. ReportStream.write)
+            use_cache: False = bez odczytu cache (wyniki są zapisywane)
+        
+        Returns:
+            Dictionary {hostname:port -> CertificateInfo}
+        """
+        # Hosty z aktualnym wynikiem w cache nie wymagają handshake'u
+        cached = {}
+        if self.cache and use_cache:
+            hosts, cached = self.cache.split_hosts(hosts)
+            
+            for cert_info in cached.values():
+                self.checker.refresh_certificate_info(cert_info)
+                if on_result:
+                    on_result(cert_info)
+            
+            self.logger.info(f"{len(cached)} hosts served from cache")
+        
+        self.logger.info(f"Checking {len(hosts)} hosts")
+        
+        # Walidacja łańcucha z tego samego handshake'u (import kryptografii
+        # dopiero teraz - --history, --merge-shards itp. jej nie potrzebują)
+        if hosts and self.verify_chain and self.checker.validator is None:
+            self.checker.validator = self.validator
+        
+        # Sprawdź certyfikaty
+        general_config = self.settings_config['general']
+        
+        if not hosts:
+            results = {}
+        elif general_config.get('probe_engine', 'threads') == 'asyncio':
+            results = self.checker.check_multiple_hosts_async(
+                hosts,
+                concurrent=int(general_config.get('async_concurrent_checks', 1000)),
+                on_result=on_result
+            )
+        else:
+            results = self.checker.check_multiple_hosts(
+                hosts,
+                concurrent=general_config['concurrent_checks'],
+                on_result=on_result
+            )
+        
+        if self.cache:
+            self.cache.store(results)
+        
+        if self.checker.breaker:
+            self.checker.breaker.save()
+        
+        results.update(cached)
+        
+        return results
+    
+    def record_history(
+        self,
+        results: Dict[str, CertificateInfo],
+        changes: Optional[Dict[str, CertificateChange]] = None
+    ):
+        """
+        Dopisz wyniki do historii (tylko w procesie głównym)
+        
+        Args:
+            results: Dictionary z certyfikatami
+            changes: Wynik diff_results - hosty bez zmiany są dopisywane
+                raz dziennie (None = wszystkie wyniki)
+        """
+        if not self.history or not results:
+            return
+        
+        try:
+            with self._timed('history'):
+                self.history.append(
+                    results.values(),
+                    tags=self.get_host_tags(),
+                    changed=changes.keys() if changes is not None else None
+                )
+        except OSError as e:
+            self.logger.error(f"Failed to append history: {e}")
+    
+    def _sharding_config(self) -> Dict:
+        """Sekcja general.sharding z settings.yml"""
+        return self.settings_config['general'].get('sharding') or {}
+    
+    def _shard_workers(self, host_count: int) -> int:
+        """
+        Ile procesów użyć dla partii hostów
+        
+        Args:
+            host_count: Liczba hostów w partii
+        
+        Returns:
+            Liczba procesów (1 = bez puli procesów)
+        """
+        sharding_config = self._sharding_config()
+        
+        workers = int(sharding_config.get('workers', 1))
+        if workers == 0:
+            workers = os.cpu_count() or 1
+        
+        # Małe partie (np. w trybie --daemon) nie uzasadniają startu procesów
+        if host_count < int(sharding_config.get('min_hosts', 200)):
+            return 1
+        
+        return max(1, min(workers, host_count))
+    
+    def check_hosts_sharded(
+        self,
+        hosts: List[HostTarget],
+        workers: int,
+        on_result: Optional[Callable[[CertificateInfo], None]] = None,
+        use_cache: bool = True
+    ) -> Dict[str, CertificateInfo]:
+        """
+        Sprawdź hosty w puli procesów - jeden shard na proces
+        
+        Każdy proces ma własny checker (parsowanie, walidacja i TLS na
+        osobnym rdzeniu), cache i circuit breaker zapisują do wspólnej
+        bazy SQLite. Wyniki łączone są tutaj, w procesie głównym.
+        
+        Args:
+            hosts: Lista HostTarget
+            workers: Liczba procesów (= liczba shardów)
+            on_result: Wywoływane dla każdego wyniku (po zakończeniu sharda)
+            use_cache: False = bez odczytu cache (wyniki są zapisywane)
+        
+        Returns:
+            Dictionary {hostname:port -> CertificateInfo}
+        """
+        strategy = self._sharding_config().get('strategy', 'hash')
+        shards = [shard for shard in split_hosts(hosts, workers, strategy) if shard]
+        
+        self.logger.info(
+            f"Checking {len(hosts)} hosts in {len(shards)} shards "
+            f"(strategy: {strategy})"
+        )
+        
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+        
+        results = {}
+        
+        with ProcessPoolExecutor(
+            max_workers=len(shards),
+            initializer=_init_shard_worker,
+            initargs=(self.project_root, self.cache is not None)
+        ) as executor:
+            futures = {
+                executor.submit(_probe_shard, shard, use_cache): shard for shard in shards
+            }
+            
+            for future in as_completed(futures):
+                shard = futures[future]
+                
+                try:
+                    shard_results, snapshot = future.result()
+                    if self.metrics and snapshot:
+                        self.metrics.merge(snapshot)
+                except Exception as e:
+                    # Proces roboczy padł - shard sprawdzany lokalnie
+                    self.logger.error(
+                        f"Shard of {len(shard)} hosts failed ({e}), checking locally"
+                    )
+                    shard_results = self.probe_hosts(shard, use_cache=use_cache)
+                
+                if on_result:
+                    for cert_info in shard_results.values():
+                        on_result(cert_info)
+                
+                results.update(shard_results)
+        
+        # Procesy robocze zapisały stan breakera do bazy
+        if self.checker.breaker:
+            self.checker.breaker.reload()
+        
+        return results
+    
+    def _shard_path(self, index: int, count: int) -> Path:
+        """Plik z wynikami sharda i/n (--shard, --merge-shards)"""
+        shard_dir = self._sharding_config().get('path', 'output/shards')
+        return self.project_root / shard_dir / f"shard-{index}-of-{count}.json"
+    
+    def run_shard(self, index: int, count: int, strategy: Optional[str] = None) -> Path:
+        """
+        Sprawdź jeden shard (osobne uruchomienie) i zapisz wyniki do połączenia
+        
+        Args:
+            index: Numer sharda (od 1)
+            count: Liczba shardów
+            strategy: hash, group lub tag (domyślnie z settings.yml)
+        
+        Returns:
+            Ścieżka do pliku z wynikami sharda
+        """
+        strategy = strategy or self._sharding_config().get('strategy', 'hash')
+        hosts = split_hosts(self.get_enabled_hosts(), count, strategy)[index - 1]
+        
+        self.logger.info(f"Shard {index}/{count} ({strategy}): {len(hosts)} hosts")
+        print(f"Shard {index}/{count} ({strategy}): checking {len(hosts)} hosts...")
+        
+        results = self.probe_hosts(hosts)
+        
+        payload = {
+            'shard': index,
+            'count': count,
+            'strategy': strategy,
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'results': [cert_info.to_dict() for cert_info in results.values()]
+        }
+        
+        path = self._shard_path(index, count)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        # Zapis atomowy - --merge-shards nie przeczyta połowy pliku
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        
+        print(f"✓ Shard results: {path}")
+        return path
+    
+    def merge_shards(self, count: int) -> Dict[str, CertificateInfo]:
+        """
+        Połącz wyniki shardów z osobnych uruchomień (--shard i/n)
+        
+        Args:
+            count: Liczba shardów
+        
+        Returns:
+            Dictionary {hostname:port -> CertificateInfo} (tylko aktywne hosty)
+        """
+        max_age_hours = self.settings_config['general'].get('check_interval_hours', 24)
+        now = datetime.now(timezone.utc)
+        results = {}
+        strategies = set()
+        
+        for index in range(1, count + 1):
+            path = self._shard_path(index, count)
+            
+            try:
+                with open(path, encoding='utf-8') as f:
+                    payload = json.load(f)
+            except FileNotFoundError:
+                self.logger.warning(f"Missing shard results: {path}")
+                self.printer.warning(f"Missing shard {index}/{count}: {path}")
+                continue
+            
+            age = now - datetime.fromisoformat(payload['generated_at'])
+            if age.total_seconds() > max_age_hours * 3600:
+                self.printer.warning(
+                    f"Shard {index}/{count} is {age.total_seconds() / 3600:.0f}h old"
+                )
+            
+            strategies.add(payload['strategy'])
+            
+            for data in payload['results']:
+                cert_info = self.checker.refresh_certificate_info(
+                    CertificateInfo.from_dict(data)
+                )
+                results[f"{cert_info.hostname}:{cert_info.port}"] = cert_info
+        
+        if len(strategies) > 1:
+            self.printer.warning(
+                f"Shards use different strategies ({', '.join(sorted(strategies))})"
+            )
+        
+        enabled = {f"{h.hostname}:{h.port}" for h in self.get_enabled_hosts()}
+        results = {key: cert for key, cert in results.items() if key in enabled}
+        
+        missing = len(enabled - results.keys())
+        if missing:
+            self.logger.warning(f"{missing} enabled hosts missing from shard results")
+            self.printer.warning(f"{missing} enabled hosts missing from shard results")
+        
+        return results
+    
+    def run_merged_check(self, count: int, send_alerts: bool = True):
+        """
+        Połącz shardy, potem alerty + raporty (jak run_full_check)
+        
+        Args:
+            count: Liczba shardów
+            send_alerts: Czy wysyłać alerty
+        """
+        self.printer.header("Certificate Expiry Monitor")
+        self.start_metrics_run()
+        
+        certificates = self.merge_shards(count)
+        
+        if not certificates:
+            self.printer.warning("No shard results to merge!")
+            return
+        
+        print(f"Merged {len(certificates)} hosts from {count} shards")
+        
+        if self.metrics:
+            self.metrics.record_certificates(certificates.values())
+        
+        changes = self.diff_results(certificates)
+        
+        self.record_history(certificates, changes)
+        
+        if send_alerts:
+            self.send_alerts(certificates, changes)
+        
+        self.generate_reports(certificates, changes)
+        self._print_summary(certificates)
+        self.export_metrics(certificates)
+    
+    def diff_results(
+        self,
+        certificates: Dict[str, CertificateInfo]
+    ) -> Optional[Dict[str, CertificateChange]]:
+        """
+        Porównaj wyniki z poprzednim przebiegiem i wypisz zmiany
+        
+        Args:
+            certificates: Dictionary z certyfikatami
+        
+        Returns:
+            {hostname:port -> CertificateChange} tylko dla hostów ze zmianą,
+            None gdy porównanie jest wyłączone
+        """
+        if not self.differ:
+            return None
+        
+        with self._timed('diff'):
+            changes = self.differ.diff(certificates)
+        
+        if not changes:
+            self.logger.info("No certificate changes since last run")
+            print("\n✓ No certificate changes since last run")
+            return changes
+        
+        summary = CertificateDiff.summarize(changes.values())
+        self.logger.info(
+            f"Certificate changes: {len(changes)} hosts "
+            f"({', '.join(f'{kind}={count}' for kind, count in summary.items())})"
+        )
+        
+        print(f"\nChanges since last run: {len(changes)} hosts")
+        for kind, count in summary.items():
+            print(f"  {kind}: {count}")
+        
+        # Słabszy klucz lub inny wystawca - zawsze widoczne w konsoli
+        for key, change in sorted(changes.items()):
+            if 'key_downgraded' in change.changes:
+                old_key, new_key = change.details['key']
+                self.printer.warning(f"{key} - key downgraded: {old_key} -> {new_key}")
+            if 'issuer_changed' in change.changes:
+                self.printer.warning(f"{key} - issuer changed: {change.details['issuer'][1]}")
+        
+        return changes
+    
+    def send_alerts(
+        self,
+        certificates: Dict[str, CertificateInfo],
+        changes: Optional[Dict[str, CertificateChange]] = None
+    ):
         """
         Wyślij alerty dla certyfikatów wymagających uwagi
         
         Args:
             certificates: Dictionary z certyfikatami
+            changes: Wynik diff_results - z ledgerem przetwarzane są tylko
+                hosty ze zmianą i te z zaległym przypomnieniem
         """
+        # Wpisy ledgera dla certyfikatów, które wróciły do OK - na pełnych wynikach
+        if self.ledger:
+            self.ledger.resolve(certificates)
+        
+        # Porównanie przebiegów + ledger: niezmieniony host, dla którego
+        # ledger pamięta ten sam stan i nie wypada przypomnienie, jest pomijany
+        if self.ledger and changes is not None:
+            settled = self.ledger.settled()
+            certificates = {
+                k: v for k, v in certificates.items()
+                if k in changes or (
+                    v.alert_level in ('WARNING', 'CRITICAL', 'EXPIRED') and
+                    settled.get(k) != (v.fingerprint, v.alert_level)
+                )
+            }
+        
         # Filtruj certyfikaty wymagające alertów
         alert_certs = {
             k: v for k, v in certificates.items()
             if v.alert_level in ['WARNING', 'CRITICAL', 'EXPIRED']
         }
         
+        # Deduplikacja: tylko przejścia stanu i zaplanowane przypomnienia
+        if self.ledger:
+            due_certs = self.ledger.due(alert_certs)
+            suppressed = len(alert_certs) - len(due_certs)
+            
+            if suppressed:
+                self.logger.info(f"Suppressed {suppressed} unchanged alerts (already sent)")
+                print(f"\n{suppressed} alerts unchanged since last notification - skipped")
+            
+            alert_certs = due_certs
+        
         if not alert_certs:
-            self.logger.info("No alerts to send - all certificates OK")
-            print("\n✓ All certificates OK - no alerts needed")
+            self.logger.info("No alerts to send - all certificates OK or already notified")
+            print("\n✓ No new alerts to send")
             return
         
         self.logger.info(f"Sending alerts for {len(alert_certs)} certificates")
         print(f"\nSending alerts for {len(alert_certs)} certificates...")
         
-        alerts_config = self.settings_config['alerts']
         smtp_config = self.settings_config['smtp']
+        slack_config = self.settings_config['slack']
         
-        # Email alerts
-        if self.email_alerter and alerts_config.get('alert_on_warning', True):
-            to_addresses = smtp_config['to_addresses'].split(',')
-            
-            for cert_info in alert_certs.values():
-                try:
-                    self.email_alerter.send_alert(to_addresses, cert_info)
-                    self.logger.info(f"Email alert sent for {cert_info.hostname}:{cert_info.port}")
-                except Exception as e:
-                    self.logger.error(f"Failed to send email alert: {e}")
+        # Odbiorcy: globalni (ALERT_EMAIL_TO) + opcjonalni per host (notify)
+        default_recipients = [
+            a.strip() for a in str(smtp_config['to_addresses']).split(',') if a.strip()
+        ]
+        host_recipients = self.get_host_recipients()
+        recipients = {
+            key: list(dict.fromkeys(default_recipients + host_recipients.get(key, [])))
+            for key in alert_certs
+        }
         
-        # Slack alerts
-        if self.slack_alerter:
-            for cert_info in alert_certs.values():
-                try:
-                    mention = None
-                    if cert_info.alert_level == 'CRITICAL':
-                        mention = self.settings_config['slack'].get('mention_on_critical')
-                    
-                    self.slack_alerter.send_alert(cert_info, mention)
-                    self.logger.info(f"Slack alert sent for {cert_info.hostname}:{cert_info.port}")
-                except Exception as e:
-                    self.logger.error(f"Failed to send Slack alert: {e}")
+        with self._timed('alerts'):
+            result = self.dispatcher.dispatch(
+                alert_certs,
+                recipients,
+                slack_mentions={
+                    'CRITICAL': slack_config.get('mention_on_critical'),
+                    'EXPIRED': slack_config.get('mention_on_expired'),
+                }
+            )
         
-        # Teams alerts
-        if self.teams_alerter:
-            for cert_info in alert_certs.values():
-                try:
-                    self.teams_alerter.send_alert(cert_info)
-                    self.logger.info(f"Teams alert sent for {cert_info.hostname}:{cert_info.port}")
-                except Exception as e:
-                    self.logger.error(f"Failed to send Teams alert: {e}")
+        if self.metrics:
+            self.metrics.record_alerts(result.stats)
+        
+        for channel, (sent, failed) in result.stats.items():
+            self.logger.info(f"{channel} alerts: {sent} sent, {failed} failed")
+        
+        # Zapisz w ledgerze tylko certyfikaty, których alert wyszedł choć
+        # jednym kanałem - pozostałe zostaną ponowione w następnym przebiegu
+        delivered = result.delivered_keys()
+        if self.ledger:
+            self.ledger.record({k: v for k, v in alert_certs.items() if k in delivered})
         
-        print(f"✓ Alerts sent for {len(alert_certs)} certificates")
+        undelivered = len(alert_certs) - len(delivered)
+        if undelivered:
+            self.logger.warning(f"Alerts for {undelivered} certificates were not delivered")
+            self.printer.warning(f"Alerts for {undelivered} certificates were not delivered")
+        
+        print(f"✓ Alerts sent for {len(delivered)} certificates")
     
-    def generate_reports(self, certificates: Dict[str, CertificateInfo]):
+    def generate_reports(
+        self,
+        certificates: Dict[str, CertificateInfo],
+        changes: Optional[Dict[str, CertificateChange]] = None
+    ):
         """
         Generuj raporty
         
         Args:
             certificates: Dictionary z certyfikatami
+            changes: Wynik diff_results (raport zmian)
         """
         if not certificates:
             self.logger.warning("No certificates to report")
             return
         
+        stream = self.open_report_stream()
+        if stream is None:
+            return
+        
+        try:
+            with self._timed('reports'):
+                for cert_info in certificates.values():
+                    stream.write(cert_info)
+        except Exception:
+            stream.abort()
+            raise
+        
+        self.finish_reports(stream, changes)
+    
+    def open_report_stream(self) -> Optional[ReportStream]:
+        """
+        Otwórz strumieniowy zapis raportów dla włączonych formatów
+        
+        Returns:
+            ReportStream lub None jeśli żaden format nie jest włączony
+        """
+        formats = self.settings_config['reporting']['formats']
+        enabled = [
+            fmt for fmt, on in formats.items()
+            if fmt in ReportStream.EXTENSIONS and ConfigLoader.as_bool(on)
+        ]
+        
+        if not enabled:
+            return None
+        
+        return self.reporter.open_stream(enabled)
+    
+    def finish_reports(
+        self,
+        stream: ReportStream,
+        changes: Optional[Dict[str, CertificateChange]] = None
+    ):
+        """
+        Dokończ raporty ze strumienia (podsumowanie, sortowanie HTML)
+        i zapisz raport zmian (diff.report)
+        
+        Args:
+            stream: ReportStream z zapisanymi wynikami
+            changes: Wynik diff_results - tylko hosty ze zmianą
+        """
         self.logger.info("Generating reports")
         print("\nGenerating reports...")
         
-        cert_list = list(certificates.values())
-        report_config = self.settings_config['reporting']
-        formats = report_config['formats']
+        try:
+            with self._timed('reports'):
+                paths = stream.close()
+        except Exception as e:
+            self.logger.error(f"Failed to generate reports: {e}")
+            return
         
-        # HTML
-        if formats.get('html', True):
-            try:
-                html_path = self.reporter.generate_html_report(cert_list)
-                print(f"✓ HTML report: {html_path}")
-            except Exception as e:
-                self.logger.error(f"Failed to generate HTML report: {e}")
+        for fmt, path in paths.items():
+            print(f"✓ {fmt.upper()} report: {path}")
         
-        # CSV
-        if formats.get('csv', True):
+        diff_config = self.settings_config.get('diff', {})
+        if changes and ConfigLoader.as_bool(diff_config.get('report', False)):
             try:
-                csv_path = self.reporter.generate_csv_report(cert_list)
-                print(f"✓ CSV report: {csv_path}")
+                path = self.reporter.generate_changes_report(changes.values())
+                print(f"✓ Changes report: {path}")
             except Exception as e:
-                self.logger.error(f"Failed to generate CSV report: {e}")
+                self.logger.error(f"Failed to generate changes report: {e}")
         
-        # JSON
-        if formats.get('json', True):
-            try:
-                json_path = self.reporter.generate_json_report(cert_list)
-                print(f"✓ JSON report: {json_path}")
-            except Exception as e:
-                self.logger.error(f"Failed to generate JSON report: {e}")
+        with self._timed('dashboard'):
+            self.update_dashboard()
         
         self.logger.info("Reports generated successfully")
     
-    def run_full_check(self):
-        """Uruchom pełny check: sprawdź + alerty + raporty"""
+    def update_dashboard(self):
+        """Zaktualizuj dashboard (tylko zmienione fragmenty)"""
+        dashboard_config = self.settings_config['reporting'].get('dashboard', {})
+        
+        if not ConfigLoader.as_bool(dashboard_config.get('enabled', False)) or not self.history:
+            return
+        
+        dashboard_dir = self.project_root / dashboard_config['path']
+        
+        try:
+            self.reporter.generate_dashboard(
+                dashboard_dir,
+                lookback_days=dashboard_config.get('lookback_days', 8),
+                page_size=dashboard_config.get('page_size', 500),
+                hosts=[f"{h[0]}:{h[1]}" for h in self.get_enabled_hosts()]
+            )
+        except Exception as e:
+            self.logger.error(f"Failed to update dashboard: {e}")
+            return
+        
+        print(f"✓ Dashboard: {dashboard_dir / 'index.html'}")
+    
+    def run_full_check(self, send_alerts: bool = True):
+        """
+        Uruchom pełny check: sprawdź + alerty + raporty
+        
+        Args:
+            send_alerts: Czy wysyłać alerty
+        """
+        report_stream = None
+        self.start_metrics_run()
+        
         try:
+            # Raporty zapisywane na bieżąco, w trakcie sprawdzania
+            report_stream = self.open_report_stream()
+            
             # Sprawdź certyfikaty
-            certificates = self.check_all_certificates()
+            certificates = self.check_all_certificates(
+                on_result=report_stream.write if report_stream else None
+            )
             
             if not certificates:
+                if report_stream:
+                    report_stream.abort()
                 return
             
+            # Zmiany względem poprzedniego przebiegu - liczone raz dla
+            # historii, alertów i raportu zmian
+            changes = self.diff_results(certificates)
+            
+            self.record_history(certificates, changes)
+            
             # Wyślij alerty
-            self.send_alerts(certificates)
+            if send_alerts:
+                self.send_alerts(certificates, changes)
             
-            # Wygeneruj raporty
-            self.generate_reports(certificates)
+            # Dokończ raporty
+            if report_stream:
+                self.finish_reports(report_stream, changes)
             
             # Podsumowanie
             self._print_summary(certificates)
             
+            self.export_metrics(certificates)
+            
         except Exception as e:
+            if report_stream:
+                report_stream.abort()
             self.logger.error(f"Error during full check: {e}", exc_info=True)
             self.printer.error(f"Error: {e}")
             sys.exit(1)
     
+    def run_file_scan(self, paths: Optional[List[str]] = None, send_alerts: bool = True):
+        """
+        Skanuj certyfikaty w plikach (PEM, DER, PKCS#7, PKCS#12), potem
+        historia, alerty i raporty jak dla hostów
+        
+        Args:
+            paths: Katalogi / pliki (None lub puste = file_scan.paths z settings.yml)
+            send_alerts: Czy wysyłać alerty
+        """
+        from file_scanner import FileScanner
+        
+        scan_config = self.settings_config.get('file_scan') or {}
+        
+        # Ścieżki z CLI względem bieżącego katalogu, z settings.yml - projektu
+        if paths:
+            roots = [Path(path) for path in paths]
+        else:
+            roots = [self.project_root / path for path in scan_config.get('paths') or []]
+        
+        self.printer.header("Certificate Expiry Monitor - File Scan")
+        
+        if not roots:
+            self.logger.warning("No scan paths given (--scan-files PATH or file_scan.paths)")
+            self.printer.warning("No scan paths given!")
+            return
+        
+        # Nieustawione PKCS12_PASSWORDS zostaje jako "${PKCS12_PASSWORDS}"
+        passwords = str(scan_config.get('pkcs12_passwords') or '')
+        if passwords.startswith('${'):
+            passwords = ''
+        scanner = FileScanner(
+            extensions=scan_config.get('extensions'),
+            exclude=scan_config.get('exclude', ['.git', 'node_modules', '__pycache__']),
+            max_file_size_mb=scan_config.get('max_file_size_mb', 10),
+            follow_symlinks=ConfigLoader.as_bool(scan_config.get('follow_symlinks', False)),
+            workers=scan_config.get('workers', 0),
+            batch_size=scan_config.get('batch_size', 256),
+            pkcs12_passwords=[p.strip() for p in passwords.split(',')]
+        )
+        
+        report_stream = None
+        self.start_metrics_run()
+        
+        try:
+            report_stream = self.open_report_stream()
+            
+            print(f"Scanning {', '.join(str(root) for root in roots)}...\n")
+            self.logger.info(f"Starting file scan: {', '.join(str(root) for root in roots)}")
+            
+            with self._timed('scan'):
+                certificates = scanner.scan(
+                    roots, on_result=report_stream.write if report_stream else None
+                )
+            
+            stats = scanner.stats
+            self.logger.info(
+                f"File scan completed: {stats['files']} files, "
+                f"{stats['certificates']} certificates, {stats['errors']} errors, "
+                f"{stats['skipped']} skipped"
+            )
+            print(
+                f"Scanned {stats['files']} files: {stats['certificates']} certificates, "
+                f"{stats['errors']} errors, {stats['skipped']} skipped"
+            )
+            
+            if not certificates:
+                if report_stream:
+                    report_stream.abort()
+                self.printer.warning("No certificates found!")
+                return
+            
+            for key, cert_info in sorted(certificates.items()):
+                if cert_info.error:
+                    self.printer.error(f"{key} - ERROR: {cert_info.error}")
+                elif cert_info.alert_level != "OK":
+                    self.printer.status_line(key, cert_info.days_remaining, cert_info.alert_level)
+            
+            if self.metrics:
+                self.metrics.record_certificates(certificates.values())
+            
+            changes = self.diff_results(certificates)
+            
+            self.record_history(certificates, changes)
+            
+            if send_alerts:
+                self.send_alerts(certificates, changes)
+            
+            if report_stream:
+                self.finish_reports(report_stream, changes)
+            
+            self._print_summary(certificates)
+            
+            self.export_metrics(certificates)
+            
+        except Exception as e:
+            if report_stream:
+                report_stream.abort()
+            self.logger.error(f"Error during file scan: {e}", exc_info=True)
+            self.printer.error(f"Error: {e}")
+            sys.exit(1)
+    
     def _print_summary(self, certificates: Dict[str, CertificateInfo]):
         """Wydrukuj podsumowanie"""
         total = len(certificates)
@@ -336,6 +1309,39 @@ class CertificateMonitor:
         print("=" * 60)
 
 
+# Monitor procesu roboczego puli shardów (jeden na proces)
+_shard_monitor: Optional[CertificateMonitor] = None
+
+
+def _init_shard_worker(project_root: Path, use_cache: bool) -> None:
+    """Utwórz monitor w procesie roboczym (initializer ProcessPoolExecutor)"""
+    global _shard_monitor
+    _shard_monitor = CertificateMonitor(ConfigLoader(project_root), use_cache=use_cache)
+
+
+def _probe_shard(
+    hosts: List[HostTarget],
+    use_cache: bool = True
+) -> Tuple[Dict[str, CertificateInfo], Optional[Dict]]:
+    """
+    Sprawdź shard w procesie roboczym (historia, alerty i raporty - w głównym)
+    
+    Args:
+        hosts: Hosty sharda
+        use_cache: False = bez odczytu cache (wyniki są zapisywane)
+    
+    Returns:
+        (wyniki, snapshot metryk czasów faz lub None)
+    """
+    metrics = _shard_monitor.metrics
+    if metrics:
+        metrics.reset()
+    
+    results = _shard_monitor.probe_hosts(hosts, use_cache=use_cache)
+    
+    return results, metrics.snapshot() if metrics else None
+
+
 def main():
     """Main entry point"""
     # Parse arguments
@@ -373,9 +1379,75 @@ def main():
         action='store_true',
         help='Skip sending alerts'
     )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Ignore result cache and probe every enabled host'
+    )
+    parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help='Run continuously, checking each host every check_interval_hours'
+    )
+    parser.add_argument(
+        '--history',
+        choices=ReportGenerator.HISTORY_QUERIES,
+        help='Query result history (renewal lead times, flapping hosts, trend per tag)'
+    )
+    parser.add_argument(
+        '--since-days',
+        type=int,
+        help='Limit history query to the last N days'
+    )
+    parser.add_argument(
+        '--tag',
+        type=str,
+        help='Tag filter for history trend query'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        help='Worker processes for large sweeps (overrides general.sharding.workers, 0 = all cores)'
+    )
+    parser.add_argument(
+        '--shard',
+        type=str,
+        metavar='I/N',
+        help='Check only shard I of N and save results for --merge-shards'
+    )
+    parser.add_argument(
+        '--shard-by',
+        choices=SHARD_STRATEGIES,
+        help='Shard strategy for --shard (default: general.sharding.strategy)'
+    )
+    parser.add_argument(
+        '--merge-shards',
+        type=int,
+        metavar='N',
+        help='Merge results of N shards, then send alerts and generate reports'
+    )
+    parser.add_argument(
+        '--scan-files',
+        nargs='*',
+        metavar='PATH',
+        help='Scan certificate files (PEM, DER, PKCS#7, PKCS#12) under PATH '
+             '(default: file_scan.paths), then send alerts and generate reports'
+    )
+    parser.add_argument(
+        '--import-profile',
+        action='store_true',
+        help='Run the given command under -X importtime and report import costs'
+    )
     
     args = parser.parse_args()
     
+    # Profil importów - polecenie uruchamiane ponownie w osobnym procesie
+    if args.import_profile:
+        sys.exit(run_import_profile(
+            Path(__file__).resolve(),
+            [arg for arg in sys.argv[1:] if arg != '--import-profile']
+        ))
+    
     # Config loader
     config_loader = ConfigLoader()
     
@@ -406,22 +1478,60 @@ def main():
         
         sys.exit(0)
     
+    shard = None
+    if args.shard:
+        try:
+            shard = parse_shard(args.shard)
+        except ValueError as e:
+            print(f"Error: {e}")
+            sys.exit(1)
+    
     # Utwórz monitor
-    monitor = CertificateMonitor(config_loader)
+    try:
+        monitor = CertificateMonitor(config_loader, use_cache=not args.force)
+    except ValueError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    
+    if args.workers is not None:
+        monitor.settings_config['general'].setdefault('sharding', {})['workers'] = args.workers
     
     # Run check
-    if args.check_now:
-        monitor.run_full_check()
+    if args.daemon:
+        general_config = monitor.settings_config['general']
+        daemon_config = general_config.get('daemon', {})
+        
+        # Endpoint /metrics dla Prometheusa (prometheus.enabled)
+        metrics_server = monitor.start_metrics_server()
+        
+        try:
+            MonitorDaemon(
+                monitor,
+                interval_hours=general_config.get('check_interval_hours', 24),
+                jitter=daemon_config.get('jitter', 0.1),
+                reload_seconds=daemon_config.get('reload_seconds', 60),
+                batch_window_seconds=daemon_config.get('batch_window_seconds', 30),
+                send_alerts=not args.no_alerts
+            ).run()
+        finally:
+            if metrics_server:
+                metrics_server.stop()
+    elif args.history:
+        result = monitor.reporter.query_history(
+            args.history, since_days=args.since_days, tag=args.tag
+        )
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+    elif shard:
+        monitor.run_shard(*shard, strategy=args.shard_by)
+    elif args.merge_shards:
+        monitor.run_merged_check(args.merge_shards, send_alerts=not args.no_alerts)
+    elif args.scan_files is not None:
+        monitor.run_file_scan(args.scan_files, send_alerts=not args.no_alerts)
+    elif args.check_now:
+        monitor.run_full_check(send_alerts=not args.no_alerts)
     else:
         parser.print_help()
 
 
 if __name__ == "__main__":
-    import sys
-    
-    # Jeśli uruchomiono bez argumentów - użyj domyślnych
-    if len(sys.argv) == 1:
-        print("🚀 Running with default arguments: --check-now --no-alerts\n")
-        sys.argv = ['main.py', '--check-now', '--no-alerts']
-        
     main()
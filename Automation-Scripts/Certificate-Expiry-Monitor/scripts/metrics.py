@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Metrics Module
+
+Pomiar czasu faz sprawdzania (DNS, TCP connect, STARTTLS, TLS handshake,
+parsowanie, walidacja) per host oraz faz przebiegu (sweep, alerty,
+raporty). Czasy trafiają do histogramów i są eksportowane w formacie
+OpenMetrics (Prometheus):
+- plik tekstowy po każdym przebiegu (np. dla node_exporter textfile collector)
+- opcjonalny endpoint HTTP w trybie --daemon
+
+Histogramy i liczniki rosną przez cały czas życia procesu (daemon),
+gauge'e opisują ostatni przebieg / ostatni wynik hosta.
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import logging
+
+from cert_checker import CertificateInfo
+
+
+# Fazy sprawdzania hosta (kolejność w raporcie per host)
+HOST_PHASES = ('dns', 'connect', 'starttls', 'handshake', 'parse', 'validation')
+
+# Granice kubełków histogramów (sekundy)
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Metryki z prometheus.metrics w settings.yml (domyślnie wszystkie)
+METRIC_NAMES = (
+    'cert_expiry_days', 'cert_valid', 'cert_chain_valid',
+    'alert_sent', 'check_duration_seconds'
+)
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class RunMetrics:
+    """Histogramy czasów faz, czasy per host i stan certyfikatów (thread-safe)"""
+
+    def __init__(
+        self,
+        enabled_metrics: Optional[Iterable[str]] = None,
+        per_host_top: int = 50
+    ):
+        """
+        Inicjalizacja
+
+        Args:
+            enabled_metrics: Eksportowane metryki (nazwy z METRIC_NAMES, None = wszystkie)
+            per_host_top: Ilu najwolniejszych hostów eksportować z czasami faz (0 = wszystkie)
+        """
+        self.enabled = set(enabled_metrics) if enabled_metrics else set(METRIC_NAMES)
+        self.per_host_top = max(0, int(per_host_top))
+        self.logger = logging.getLogger(__name__)
+
+        self._lock = threading.Lock()
+        # faza -> [liczniki kubełków, suma, liczba]
+        self._histograms: Dict[str, list] = {}
+        # hostname:port -> {faza -> sekundy} (bieżący przebieg)
+        self._host_phases: Dict[str, Dict[str, float]] = {}
+        # hostname -> sekundy DNS (resolver nie zna portu)
+        self._dns: Dict[str, float] = {}
+        # faza przebiegu -> sekundy (ostatni przebieg)
+        self._run_phases: Dict[str, float] = {}
+        # (kanał, wynik) -> liczba
+        self._alerts: Dict[Tuple[str, str], int] = {}
+        # host -> (dni, valid, chain_valid, błąd)
+        self._certificates: Dict[str, tuple] = {}
+        self._last_run: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # Zbieranie
+    # ------------------------------------------------------------------
+
+    def observe(self, phase: str, seconds: float, host: Optional[str] = None) -> None:
+        """
+        Zapisz czas fazy
+
+        Args:
+            phase: Nazwa fazy (np. handshake, alerts)
+            seconds: Czas trwania
+            host: hostname:port (dla fazy dns - hostname) lub None dla faz przebiegu
+        """
+        with self._lock:
+            histogram = self._histograms.get(phase)
+            if histogram is None:
+                histogram = self._histograms[phase] = [[0] * len(BUCKETS), 0.0, 0]
+
+            for index, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    histogram[0][index] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+
+            if host is None:
+                self._run_phases[phase] = self._run_phases.get(phase, 0.0) + seconds
+            elif phase == 'dns':
+                self._dns[host] = self._dns.get(host, 0.0) + seconds
+            else:
+                phases = self._host_phases.setdefault(host, {})
+                phases[phase] = phases.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def timer(self, phase: str, host: Optional[str] = None) -> Iterator[None]:
+        """Zmierz czas bloku: with metrics.timer('handshake', key): ..."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - start, host)
+
+    def start_run(self, hosts: Optional[Iterable[str]] = None) -> None:
+        """
+        Nowy przebieg - wyczyść czasy faz przebiegu i czasy per host
+
+        Args:
+            hosts: Klucze hostname:port sprawdzane w tym przebiegu (partia
+                w --daemon - czasy pozostałych hostów zostają); None = wszystkie
+        """
+        with self._lock:
+            if hosts is None:
+                self._host_phases.clear()
+                self._dns.clear()
+            else:
+                for key in hosts:
+                    self._host_phases.pop(key, None)
+                    self._dns.pop(key.rsplit(':', 1)[0], None)
+
+            self._run_phases.clear()
+            self._last_run['start'] = time.time()
+
+    def finish_run(self, hosts: int, errors: int) -> None:
+        """
+        Zakończ przebieg (gauge'e czasu i liczby hostów)
+
+        Args:
+            hosts: Liczba sprawdzonych hostów
+            errors: Liczba hostów z błędem
+        """
+        with self._lock:
+            now = time.time()
+            self._last_run.update(
+                end=now,
+                duration=now - self._last_run.get('start', now),
+                hosts=hosts,
+                errors=errors
+            )
+
+    def record_alerts(self, stats: Dict[str, Tuple[int, int]]) -> None:
+        """
+        Zapisz wynik wysyłki alertów
+
+        Args:
+            stats: {kanał -> (wysłane, nieudane)} z DispatchResult.stats
+        """
+        with self._lock:
+            for channel, (sent, failed) in stats.items():
+                for result, count in (('sent', sent), ('failed', failed)):
+                    key = (channel, result)
+                    self._alerts[key] = self._alerts.get(key, 0) + count
+
+    def record_certificates(self, certificates: Iterable[CertificateInfo]) -> None:
+        """
+        Zapisz stan certyfikatów (ostatni wynik każdego hosta)
+
+        Args:
+            certificates: Wyniki sprawdzenia
+        """
+        with self._lock:
+            for cert in certificates:
+                self._certificates[f"{cert.hostname}:{cert.port}"] = (
+                    None if cert.error else cert.days_remaining,
+                    not cert.error and cert.is_valid,
+                    cert.chain_valid,
+                    bool(cert.error)
+                )
+
+    def retain_hosts(self, hosts: Iterable[str]) -> None:
+        """Usuń stan hostów, których nie ma już w konfiguracji (hostname:port)"""
+        hosts = set(hosts)
+        with self._lock:
+            for key in [k for k in self._certificates if k not in hosts]:
+                del self._certificates[key]
+            for key in [k for k in self._host_phases if k not in hosts]:
+                del self._host_phases[key]
+
+            hostnames = {key.rsplit(':', 1)[0] for key in hosts}
+            for hostname in [h for h in self._dns if h not in hostnames]:
+                del self._dns[hostname]
+
+    # ------------------------------------------------------------------
+    # Procesy robocze (shardy)
+    # ------------------------------------------------------------------
+
+    def snapshot(self) -> Dict:
+        """Stan histogramów i czasów per host (do przekazania z procesu roboczego)"""
+        with self._lock:
+            return {
+                'histograms': {
+                    phase: [list(h[0]), h[1], h[2]] for phase, h in self._histograms.items()
+                },
+                'host_phases': {host: dict(p) for host, p in self._host_phases.items()},
+                'dns': dict(self._dns)
+            }
+
+    def merge(self, snapshot: Dict) -> None:
+        """Dołącz stan z procesu roboczego (snapshot)"""
+        with self._lock:
+            for phase, (counts, total, count) in snapshot['histograms'].items():
+                histogram = self._histograms.setdefault(phase, [[0] * len(BUCKETS), 0.0, 0])
+                histogram[0] = [a + b for a, b in zip(histogram[0], counts)]
+                histogram[1] += total
+                histogram[2] += count
+
+            for host, phases in snapshot['host_phases'].items():
+                target = self._host_phases.setdefault(host, {})
+                for phase, seconds in phases.items():
+                    target[phase] = target.get(phase, 0.0) + seconds
+
+            for hostname, seconds in snapshot['dns'].items():
+                self._dns[hostname] = self._dns.get(hostname, 0.0) + seconds
+
+    def reset(self) -> None:
+        """Wyczyść histogramy i czasy (proces roboczy - przed każdym shardem)"""
+        with self._lock:
+            self._histograms.clear()
+            self._host_phases.clear()
+            self._dns.clear()
+
+    # ------------------------------------------------------------------
+    # Eksport
+    # ------------------------------------------------------------------
+
+    def slowest_hosts(self, limit: Optional[int] = None) -> List[Tuple[str, Dict[str, float]]]:
+        """
+        Hosty posortowane malejąco po łącznym czasie faz (bieżący przebieg)
+
+        Args:
+            limit: Maksymalna liczba hostów (None = per_host_top, 0 = wszystkie)
+
+        Returns:
+            Lista (host, {faza -> sekundy})
+        """
+        limit = self.per_host_top if limit is None else limit
+
+        with self._lock:
+            hosts = []
+            for host, phases in self._host_phases.items():
+                phases = dict(phases)
+                dns = self._dns.get(host.rsplit(':', 1)[0])
+                if dns is not None:
+                    phases['dns'] = dns
+                hosts.append((host, phases))
+
+        hosts.sort(key=lambda item: -sum(item[1].values()))
+        return hosts[:limit] if limit else hosts
+
+    def render(self) -> str:
+        """
+        Metryki w formacie OpenMetrics
+
+        Returns:
+            Tekst (zakończony "# EOF")
+        """
+        lines: List[str] = []
+
+        if 'check_duration_seconds' in self.enabled:
+            self._render_durations(lines)
+
+        with self._lock:
+            certificates = sorted(self._certificates.items())
+            alerts = sorted(self._alerts.items())
+            last_run = dict(self._last_run)
+
+        if 'cert_expiry_days' in self.enabled:
+            lines += [
+                "# TYPE cert_expiry_days gauge",
+                "# HELP cert_expiry_days Days until certificate expiry."
+            ]
+            lines += [
+                f'cert_expiry_days{{host="{_escape(host)}"}} {days}'
+                for host, (days, _, _, _) in certificates if days is not None
+            ]
+
+        if 'cert_valid' in self.enabled:
+            lines += [
+                "# TYPE cert_valid gauge",
+                "# HELP cert_valid Certificate currently valid (1) or not / check failed (0)."
+            ]
+            lines += [
+                f'cert_valid{{host="{_escape(host)}"}} {int(bool(valid))}'
+                for host, (_, valid, _, _) in certificates
+            ]
+
+        if 'cert_chain_valid' in self.enabled:
+            lines += [
+                "# TYPE cert_chain_valid gauge",
+                "# HELP cert_chain_valid Certificate chain validated and trusted (1) or not (0)."
+            ]
+            lines += [
+                f'cert_chain_valid{{host="{_escape(host)}"}} {int(bool(chain_valid))}'
+                for host, (_, _, chain_valid, _) in certificates if chain_valid is not None
+            ]
+
+        if 'alert_sent' in self.enabled:
+            lines += [
+                "# TYPE alert_sent counter",
+                "# HELP alert_sent Alerts dispatched per channel and result."
+            ]
+            lines += [
+                f'alert_sent_total{{channel="{_escape(channel)}",result="{result}"}} {count}'
+                for (channel, result), count in alerts
+            ]
+
+        if 'end' in last_run:
+            lines += [
+                "# TYPE certmon_last_run_timestamp_seconds gauge",
+                f"certmon_last_run_timestamp_seconds {last_run['end']:.3f}",
+                "# TYPE certmon_last_run_duration_seconds gauge",
+                f"certmon_last_run_duration_seconds {last_run['duration']:.6f}",
+                "# TYPE certmon_last_run_hosts gauge",
+                f"certmon_last_run_hosts {last_run['hosts']}",
+                "# TYPE certmon_last_run_errors gauge",
+                f"certmon_last_run_errors {last_run['errors']}",
+            ]
+
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def _render_durations(self, lines: List[str]) -> None:
+        """Histogram faz, czasy faz przebiegu i najwolniejsze hosty"""
+        with self._lock:
+            histograms = sorted(
+                (phase, list(h[0]), h[1], h[2]) for phase, h in self._histograms.items()
+            )
+            run_phases = sorted(self._run_phases.items())
+
+        lines += [
+            "# TYPE check_duration_seconds histogram",
+            "# HELP check_duration_seconds Duration of monitor phases (per host and per run)."
+        ]
+        for phase, counts, total, count in histograms:
+            label = f'phase="{_escape(phase)}"'
+            for bound, bucket in zip(BUCKETS, counts):
+                lines.append(f'check_duration_seconds_bucket{{{label},le="{bound}"}} {bucket}')
+            lines.append(f'check_duration_seconds_bucket{{{label},le="+Inf"}} {count}')
+            lines.append(f'check_duration_seconds_sum{{{label}}} {total:.6f}')
+            lines.append(f'check_duration_seconds_count{{{label}}} {count}')
+
+        lines += [
+            "# TYPE certmon_run_phase_seconds gauge",
+            "# HELP certmon_run_phase_seconds Wall time of run phases in the last run."
+        ]
+        lines += [
+            f'certmon_run_phase_seconds{{phase="{_escape(phase)}"}} {seconds:.6f}'
+            for phase, seconds in run_phases
+        ]
+
+        lines += [
+            "# TYPE certmon_host_phase_seconds gauge",
+            "# HELP certmon_host_phase_seconds Time per phase for the slowest hosts of the last run."
+        ]
+        for host, phases in self.slowest_hosts():
+            for phase in sorted(phases, key=_phase_order):
+                lines.append(
+                    f'certmon_host_phase_seconds{{host="{_escape(host)}",phase="{phase}"}} '
+                    f'{phases[phase]:.6f}'
+                )
+
+    def write(self, path: Path) -> None:
+        """
+        Zapisz metryki do pliku (atomowo - collector nie czyta połowy pliku)
+
+        Args:
+            path: Plik .prom
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        tmp_path = path.with_suffix('.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+
+def _escape(value: str) -> str:
+    """Wartość etykiety OpenMetrics (\\, " i nowa linia)"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _phase_order(phase: str) -> int:
+    return HOST_PHASES.index(phase) if phase in HOST_PHASES else len(HOST_PHASES)
+
+
+class MetricsServer:
+    """Lokalny endpoint HTTP z metrykami (tryb --daemon)"""
+
+    def __init__(
+        self,
+        metrics: RunMetrics,
+        port: int = 9090,
+        path: str = "/metrics",
+        bind: str = "127.0.0.1"
+    ):
+        """
+        Inicjalizacja
+
+        Args:
+            metrics: RunMetrics do udostępnienia
+            port: Port HTTP
+            path: Ścieżka endpointu
+            bind: Adres nasłuchiwania (domyślnie tylko lokalnie)
+        """
+        self.metrics = metrics
+        self.path = path or "/metrics"
+        self.logger = logging.getLogger(__name__)
+
+        handler = self._handler_class()
+        self._server = ThreadingHTTPServer((bind, int(port)), handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def _handler_class(self):
+        metrics, path = self.metrics, self.path
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != path:
+                    self.send_error(404)
+                    return
+
+                body = metrics.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> None:
+        """Uruchom serwer w wątku w tle"""
+        self._thread.start()
+        host, port = self._server.server_address[:2]
+        self.logger.info(f"Metrics endpoint: http://{host}:{port}{self.path}")
+
+    def stop(self) -> None:
+        """Zatrzymaj serwer"""
+        self._server.shutdown()
+        self._server.server_close()
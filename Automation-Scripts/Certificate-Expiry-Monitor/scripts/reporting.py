@@ -8,36 +8,121 @@ Generowanie raportów o certyfikatach:
 - HTML reports (interactive)
 - CSV reports (Excel)
 - JSON reports (API integration)
+- NDJSON reports (jeden certyfikat na linię)
+- Raport zmian względem poprzedniego przebiegu (cert_diff)
+- Zapytania o historię (HistoryStore): wyprzedzenie odnowień, flapping, trendy
+- Dashboard (statyczny, przyrostowy) z ostatniego stanu w historii
+
+Raporty są zapisywane strumieniowo (ReportStream): każdy wynik trafia
+do wszystkich formatów od razu po sprawdzeniu, a podsumowanie liczone
+jest w tym samym przebiegu - bez budowania całego dokumentu w pamięci.
 """
 
+import contextlib
 import csv
 import json
+import tempfile
 from pathlib import Path
-from typing import List, Dict, Optional
-from datetime import datetime
-from jinja2 import Template
+from typing import Iterable, List, Dict, Optional
+from datetime import datetime, timedelta, timezone
 import logging
 
 from cert_checker import CertificateInfo
-from utils import FileUtils, DateFormatter
+from cert_diff import CertificateChange, CertificateDiff
+from dashboard import DashboardGenerator
+from history_store import HistoryStore
+from utils import FileUtils, DateFormatter, TemplateRenderer
 
 
 class ReportGenerator:
     """Klasa do generowania raportów"""
     
-    def __init__(self, output_dir: Path):
+    # Kolumny raportu CSV
+    CSV_HEADER = [
+        'Hostname',
+        'Port',
+        'Protocol',
+        'Common Name',
+        'Issuer',
+        'Valid From',
+        'Valid Until',
+        'Days Remaining',
+        'Alert Level',
+        'Is Valid',
+        'Is Expired',
+        'Is Self-Signed',
+        'Key Size',
+        'Signature Algorithm'
+    ]
+    
+    # Zakończenie built-in HTML
+    HTML_FOOTER = """
+            </tbody>
+        </table>
+        
+        <div class="footer">
+            <p>Certificate Expiry Monitor</p>
+            <p>This report was automatically generated.</p>
+        </div>
+    </div>
+</body>
+</html>
+        """
+    
+    # Zapytania o historię dostępne z CLI (--history)
+    HISTORY_QUERIES = ('lead-times', 'flapping', 'trend')
+    
+    def __init__(self, output_dir: Path, history: Optional[HistoryStore] = None):
         """
         Inicjalizacja report generator
         
         Args:
             output_dir: Folder do zapisywania raportów
+            history: HistoryStore - źródło zapytań o historię (opcjonalne)
         """
         self.output_dir = output_dir
+        self.history = history
         self.logger = logging.getLogger(__name__)
         
         # Ensure directory exists
         FileUtils.ensure_directory(output_dir)
     
+    def open_stream(self, formats: Iterable[str]) -> 'ReportStream':
+        """
+        Otwórz strumieniowy zapis raportów
+        
+        Args:
+            formats: Formaty do zapisania (html, csv, json, ndjson)
+        
+        Returns:
+            ReportStream - write(cert) dla każdego wyniku, potem close()
+        """
+        return ReportStream(self, formats)
+    
+    def generate_reports(
+        self,
+        certificates: Iterable[CertificateInfo],
+        formats: Iterable[str]
+    ) -> Dict[str, Path]:
+        """
+        Generuj kilka formatów w jednym przebiegu po wynikach
+        
+        Args:
+            certificates: Iterator certyfikatów (np. wyniki na bieżąco)
+            formats: Formaty do zapisania (html, csv, json, ndjson)
+        
+        Returns:
+            Dictionary {format -> Path}
+        """
+        stream = self.open_stream(formats)
+        try:
+            for cert in certificates:
+                stream.write(cert)
+        except Exception:
+            stream.abort()
+            raise
+        return stream.close()
+    
     def generate_html_report(
         self,
         certificates: List[CertificateInfo],
@@ -56,22 +141,16 @@ class ReportGenerator:
             Path do wygenerowanego pliku
         """
         try:
-            # Default filename
-            if output_filename is None:
-                timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-                output_filename = f"certificate_report_{timestamp}.html"
-            
-            output_path = self.output_dir / output_filename
-            
-            # Jeśli template podany, użyj go
+            # Jeśli template podany, użyj go (template potrzebuje pełnej listy)
             if template_path and template_path.exists():
+                output_path = self.output_dir / (
+                    output_filename or f"certificate_report_{self._timestamp()}.html"
+                )
                 html_content = self._render_template(certificates, template_path)
+                FileUtils.write_file(output_path, html_content)
             else:
-                # Użyj built-in template
-                html_content = self._generate_builtin_html(certificates)
-            
-            # Zapisz
-            FileUtils.write_file(output_path, html_content)
+                # Built-in template - zapis strumieniowy
+                output_path = self._generate_single('html', certificates, output_filename)
             
             self.logger.info(f"HTML report generated: {output_path}")
             return output_path
@@ -96,53 +175,7 @@ class ReportGenerator:
             Path do wygenerowanego pliku
         """
         try:
-            # Default filename
-            if output_filename is None:
-                timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-                output_filename = f"certificate_report_{timestamp}.csv"
-            
-            output_path = self.output_dir / output_filename
-            
-            # Zapisz CSV
-            with open(output_path, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                
-                # Header
-                writer.writerow([
-                    'Hostname',
-                    'Port',
-                    'Protocol',
-                    'Common Name',
-                    'Issuer',
-                    'Valid From',
-                    'Valid Until',
-                    'Days Remaining',
-                    'Alert Level',
-                    'Is Valid',
-                    'Is Expired',
-                    'Is Self-Signed',
-                    'Key Size',
-                    'Signature Algorithm'
-                ])
-                
-                # Data rows
-                for cert in certificates:
-                    writer.writerow([
-                        cert.hostname,
-                        cert.port,
-                        cert.protocol,
-                        cert.common_name,
-                        cert.issuer,
-                        cert.valid_from.strftime('%Y-%m-%d %H:%M:%S'),
-                        cert.valid_until.strftime('%Y-%m-%d %H:%M:%S'),
-                        cert.days_remaining,
-                        cert.alert_level,
-                        cert.is_valid,
-                        cert.is_expired,
-                        cert.is_self_signed,
-                        cert.key_size,
-                        cert.signature_algorithm
-                    ])
+            output_path = self._generate_single('csv', certificates, output_filename)
             
             self.logger.info(f"CSV report generated: {output_path}")
             return output_path
@@ -167,24 +200,7 @@ class ReportGenerator:
             Path do wygenerowanego pliku
         """
         try:
-            # Default filename
-            if output_filename is None:
-                timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-                output_filename = f"certificate_report_{timestamp}.json"
-            
-            output_path = self.output_dir / output_filename
-            
-            # Konwertuj do dict
-            data = {
-                'generated_at': datetime.now().isoformat(),
-                'total_certificates': len(certificates),
-                'summary': self._generate_summary(certificates),
-                'certificates': [cert.to_dict() for cert in certificates]
-            }
-            
-            # Zapisz JSON
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(data, f, indent=2, ensure_ascii=False)
+            output_path = self._generate_single('json', certificates, output_filename)
             
             self.logger.info(f"JSON report generated: {output_path}")
             return output_path
@@ -193,30 +209,105 @@ class ReportGenerator:
             self.logger.error(f"Failed to generate JSON report: {e}")
             raise
     
+    def generate_changes_report(
+        self,
+        changes: Iterable[CertificateChange],
+        output_filename: Optional[str] = None
+    ) -> Path:
+        """
+        Generuj raport zmian względem poprzedniego przebiegu (JSON)
+        
+        Zawiera tylko hosty ze zmianą - rozmiar zależy od liczby zmian,
+        nie od liczby hostów.
+        
+        Args:
+            changes: Zmiany z CertificateDiff.diff()
+            output_filename: Nazwa pliku output
+        
+        Returns:
+            Path do wygenerowanego pliku
+        """
+        changes = sorted(changes, key=lambda change: change.host_key)
+        output_path = self.output_dir / (
+            output_filename or f"certificate_changes_{self._timestamp()}.json"
+        )
+        
+        report = {
+            'generated_at': datetime.now(timezone.utc).isoformat(),
+            'total_changed': len(changes),
+            'summary': CertificateDiff.summarize(changes),
+            'changes': [change.to_dict() for change in changes],
+        }
+        
+        try:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            self.logger.error(f"Failed to generate changes report: {e}")
+            raise
+        
+        self.logger.info(f"Changes report generated: {output_path}")
+        return output_path
+    
+    def _generate_single(
+        self,
+        fmt: str,
+        certificates: Iterable[CertificateInfo],
+        output_filename: Optional[str]
+    ) -> Path:
+        """Zapisz jeden format przez ReportStream"""
+        filenames = {fmt: output_filename} if output_filename else None
+        stream = ReportStream(self, [fmt], filenames=filenames)
+        try:
+            for cert in certificates:
+                stream.write(cert)
+        except Exception:
+            stream.abort()
+            raise
+        return stream.close()[fmt]
+    
+    @staticmethod
+    def _timestamp() -> str:
+        """Znacznik czasu do nazw plików"""
+        return datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    
+    @staticmethod
+    def _csv_row(cert: CertificateInfo) -> list:
+        """Wiersz CSV dla certyfikatu"""
+        return [
+            cert.hostname,
+            cert.port,
+            cert.protocol,
+            cert.common_name,
+            cert.issuer,
+            cert.valid_from.strftime('%Y-%m-%d %H:%M:%S'),
+            cert.valid_until.strftime('%Y-%m-%d %H:%M:%S'),
+            cert.days_remaining,
+            cert.alert_level,
+            cert.is_valid,
+            cert.is_expired,
+            cert.is_self_signed,
+            cert.key_size,
+            cert.signature_algorithm
+        ]
+    
     def _render_template(
         self,
         certificates: List[CertificateInfo],
         template_path: Path
     ) -> str:
-        """Render HTML z Jinja2 template"""
-        template_content = FileUtils.read_file(template_path)
-        template = Template(template_content)
-        
-        return template.render(
+        """Render HTML z Jinja2 template (skompilowany raz na proces)"""
+        return TemplateRenderer.render(
+            template_path,
             certificates=certificates,
             summary=self._generate_summary(certificates),
             generated_at=datetime.now(),
             formatter=DateFormatter()
         )
     
-    def _generate_builtin_html(self, certificates: List[CertificateInfo]) -> str:
-        """Generuj HTML używając built-in template"""
-        summary = self._generate_summary(certificates)
-        
-        # Sort by days_remaining
-        sorted_certs = sorted(certificates, key=lambda c: c.days_remaining)
-        
-        html = f"""
+    def _html_header(self, summary: Dict, generated_at: str) -> str:
+        """Nagłówek built-in HTML (style, podsumowanie, początek tabeli)"""
+        return f"""
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -319,7 +410,7 @@ class ReportGenerator:
 <body>
     <div class="container">
         <h1>🔒 Certificate Status Report</h1>
-        <p><strong>Generated:</strong> {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+        <p><strong>Generated:</strong> {generated_at}</p>
         
         <div class="summary">
             <div class="summary-item">
@@ -357,11 +448,12 @@ class ReportGenerator:
             </thead>
             <tbody>
 """
+    
+    def _html_row(self, cert: CertificateInfo) -> str:
+        """Jeden wiersz tabeli built-in HTML"""
+        badge_class = f"badge-{cert.alert_level.lower()}"
         
-        for cert in sorted_certs:
-            badge_class = f"badge-{cert.alert_level.lower()}"
-            
-            html += f"""
+        return f"""
                 <tr>
                     <td>{cert.hostname}:{cert.port}</td>
                     <td>{cert.common_name}</td>
@@ -371,32 +463,298 @@ class ReportGenerator:
                     <td><span class="status-badge {badge_class}">{cert.alert_level}</span></td>
                 </tr>
 """
+    
+    def _generate_builtin_html(self, certificates: List[CertificateInfo]) -> str:
+        """Generuj HTML używając built-in template (całość w pamięci)"""
+        summary = self._generate_summary(certificates)
+        sorted_certs = sorted(certificates, key=lambda c: c.days_remaining)
         
-        html += """
-            </tbody>
-        </table>
+        return (
+            self._html_header(summary, datetime.now().strftime('%Y-%m-%d %H:%M:%S')) +
+            "".join(self._html_row(cert) for cert in sorted_certs) +
+            self.HTML_FOOTER
+        )
+    
+    def query_history(
+        self,
+        query: str,
+        since_days: Optional[int] = None,
+        tag: Optional[str] = None
+    ) -> Dict:
+        """
+        Zapytanie o historię wyników (bez parsowania starych raportów)
         
-        <div class="footer">
-            <p>Certificate Expiry Monitor</p>
-            <p>This report was automatically generated.</p>
-        </div>
-    </div>
-</body>
-</html>
+        Args:
+            query: lead-times, flapping lub trend
+            since_days: Tylko ostatnie N dni (domyślnie cała historia)
+            tag: Tylko ten tag (dla trend)
+        
+        Returns:
+            Wynik zapytania (dictionary, gotowy do JSON)
         """
+        since = (
+            datetime.now(timezone.utc) - timedelta(days=since_days)
+            if since_days else None
+        )
+        
+        if query == 'lead-times':
+            return self.renewal_lead_times(since)
+        elif query == 'flapping':
+            return self.flapping_hosts(since)
+        elif query == 'trend':
+            return self.days_remaining_trend(since, tag)
         
-        return html
+        raise ValueError(f"Unknown history query: {query}")
+    
+    def renewal_lead_times(self, since: Optional[datetime] = None) -> Dict[str, Dict]:
+        """Wyprzedzenie odnowień (dni przed wygaśnięciem) per issuer"""
+        return self._require_history().renewal_lead_times(since)
+    
+    def flapping_hosts(
+        self,
+        since: Optional[datetime] = None,
+        min_changes: int = 2
+    ) -> Dict[str, int]:
+        """Hosty z wielokrotną zmianą stanu"""
+        return self._require_history().flapping_hosts(since, min_changes=min_changes)
     
-    def _generate_summary(self, certificates: List[CertificateInfo]) -> Dict:
-        """Generuj podsumowanie statystyk"""
+    def days_remaining_trend(
+        self,
+        since: Optional[datetime] = None,
+        tag: Optional[str] = None
+    ) -> Dict[str, List[Dict]]:
+        """Dni do wygaśnięcia w czasie per tag"""
+        return self._require_history().days_remaining_trend(since, tag=tag)
+    
+    def generate_dashboard(
+        self,
+        dashboard_dir: Path,
+        lookback_days: int = 8,
+        page_size: int = 500,
+        hosts: Optional[Iterable[str]] = None
+    ) -> Dict[str, int]:
+        """
+        Zaktualizuj dashboard z ostatniego stanu hostów w historii
+        
+        Args:
+            dashboard_dir: Katalog dashboardu
+            lookback_days: Ile dni historii przejrzeć w poszukiwaniu ostatniego wyniku
+            page_size: Maksymalna liczba wierszy w jednym fragmencie
+            hosts: Tylko te hosty (hostname:port), np. aktualnie włączone
+        
+        Returns:
+            Statystyki {written, unchanged, removed, rows}
+        """
+        since = datetime.now(timezone.utc) - timedelta(days=lookback_days)
+        latest = self._require_history().latest(since)
+        
+        if hosts is not None:
+            hosts = set(hosts)
+            latest = {key: record for key, record in latest.items() if key in hosts}
+        
+        return DashboardGenerator(dashboard_dir, page_size=page_size).build(latest.values())
+    
+    def _require_history(self) -> HistoryStore:
+        """HistoryStore lub błąd gdy historia jest wyłączona"""
+        if self.history is None:
+            raise RuntimeError("History store is disabled (history.enabled in settings.yml)")
+        return self.history
+    
+    def _generate_summary(self, certificates: Iterable[CertificateInfo]) -> Dict:
+        """Generuj podsumowanie statystyk (jeden przebieg)"""
+        summary = self._empty_summary()
+        for cert in certificates:
+            self._add_to_summary(summary, cert)
+        return summary
+    
+    @staticmethod
+    def _empty_summary() -> Dict:
+        """Puste liczniki podsumowania"""
         return {
-            'total': len(certificates),
-            'ok': sum(1 for c in certificates if c.alert_level == "OK"),
-            'warning': sum(1 for c in certificates if c.alert_level == "WARNING"),
-            'critical': sum(1 for c in certificates if c.alert_level == "CRITICAL"),
-            'expired': sum(1 for c in certificates if c.alert_level == "EXPIRED"),
-            'self_signed': sum(1 for c in certificates if c.is_self_signed)
+            'total': 0,
+            'ok': 0,
+            'warning': 0,
+            'critical': 0,
+            'expired': 0,
+            'self_signed': 0
+        }
+    
+    @staticmethod
+    def _add_to_summary(summary: Dict, cert: CertificateInfo) -> None:
+        """Dolicz certyfikat do podsumowania"""
+        summary['total'] += 1
+        level = cert.alert_level.lower()
+        if level in summary:
+            summary[level] += 1
+        if cert.is_self_signed:
+            summary['self_signed'] += 1
+
+
+class ReportStream:
+    """
+    Strumieniowy zapis raportów (wszystkie formaty w jednym przebiegu)
+    
+    - CSV / NDJSON: wiersz zapisywany od razu
+    - JSON: lista certyfikatów zapisywana na bieżąco, podsumowanie na końcu
+    - HTML: wiersze trafiają do pliku tymczasowego (UTF-8); w pamięci zostaje
+      tylko (days_remaining, offset, długość) - przy zamknięciu wiersze są
+      kopiowane w kolejności days_remaining pod nagłówek z podsumowaniem
+    """
+    
+    EXTENSIONS = {
+        'html': 'html',
+        'csv': 'csv',
+        'json': 'json',
+        'ndjson': 'ndjson'
+    }
+    
+    def __init__(
+        self,
+        generator: ReportGenerator,
+        formats: Iterable[str],
+        filenames: Optional[Dict[str, str]] = None
+    ):
+        """
+        Inicjalizacja
+        
+        Args:
+            generator: ReportGenerator (katalog wyjściowy, szablony)
+            formats: Formaty do zapisania (html, csv, json, ndjson)
+            filenames: Opcjonalne nazwy plików per format
+        """
+        self.generator = generator
+        self.formats = [f for f in formats if f in self.EXTENSIONS]
+        self.summary = ReportGenerator._empty_summary()
+        self.logger = logging.getLogger(__name__)
+        self.generated_at = datetime.now()
+        
+        timestamp = self.generated_at.strftime('%Y-%m-%d_%H-%M-%S')
+        filenames = filenames or {}
+        self.paths = {
+            fmt: generator.output_dir / filenames.get(
+                fmt, f"certificate_report_{timestamp}.{self.EXTENSIONS[fmt]}"
+            )
+            for fmt in self.formats
         }
+        
+        self._files = {}
+        self._csv_writer = None
+        self._json_first = True
+        self._html_rows = None
+        self._html_index = []
+        
+        # Błąd przy otwieraniu kolejnego pliku zamyka pliki otwarte wcześniej;
+        # po udanym otwarciu wszystkich zamyka je dopiero close() / abort()
+        with contextlib.ExitStack() as stack:
+            if 'csv' in self.formats:
+                f = self._open(stack, 'csv', newline='')
+                self._csv_writer = csv.writer(f)
+                self._csv_writer.writerow(ReportGenerator.CSV_HEADER)
+            
+            if 'ndjson' in self.formats:
+                self._open(stack, 'ndjson')
+            
+            if 'json' in self.formats:
+                f = self._open(stack, 'json')
+                f.write('{\n  "generated_at": %s,\n  "certificates": [' % json.dumps(
+                    self.generated_at.isoformat()
+                ))
+            
+            if 'html' in self.formats:
+                self._html_rows = stack.enter_context(
+                    tempfile.TemporaryFile(dir=generator.output_dir)
+                )
+            
+            stack.pop_all()
+    
+    def _open(self, stack: contextlib.ExitStack, fmt: str, newline: Optional[str] = None):
+        """Otwórz plik wyjściowy formatu (zamykany przez stack przy błędzie)"""
+        f = stack.enter_context(open(self.paths[fmt], 'w', encoding='utf-8', newline=newline))
+        self._files[fmt] = f
+        return f
+    
+    def write(self, cert: CertificateInfo) -> None:
+        """
+        Zapisz jeden wynik do wszystkich formatów
+        
+        Args:
+            cert: Informacje o certyfikacie
+        """
+        ReportGenerator._add_to_summary(self.summary, cert)
+        
+        if self._csv_writer:
+            self._csv_writer.writerow(ReportGenerator._csv_row(cert))
+        
+        if 'json' in self._files or 'ndjson' in self._files:
+            line = json.dumps(cert.to_dict(), ensure_ascii=False)
+            
+            if 'ndjson' in self._files:
+                self._files['ndjson'].write(line + '\n')
+            
+            if 'json' in self._files:
+                separator = '\n    ' if self._json_first else ',\n    '
+                self._files['json'].write(separator + line)
+                self._json_first = False
+        
+        if self._html_rows is not None:
+            row = self.generator._html_row(cert).encode('utf-8')
+            offset = self._html_rows.tell()
+            self._html_rows.write(row)
+            self._html_index.append((cert.days_remaining, offset, len(row)))
+    
+    def close(self) -> Dict[str, Path]:
+        """
+        Dokończ raporty (podsumowanie, sortowanie HTML) i zamknij pliki
+        
+        Returns:
+            Dictionary {format -> Path}
+        """
+        try:
+            if 'json' in self._files:
+                summary = json.dumps(self.summary, indent=2, ensure_ascii=False)
+                self._files['json'].write(
+                    '\n  ],\n  "total_certificates": %d,\n  "summary": %s\n}\n'
+                    % (self.summary['total'], summary.replace('\n', '\n  '))
+                )
+            
+            if self._html_rows is not None:
+                self._write_html()
+        finally:
+            self._close_files()
+        
+        return dict(self.paths)
+    
+    def abort(self) -> None:
+        """Przerwij zapis (np. po błędzie) - usuń niedokończone pliki"""
+        self._close_files()
+        
+        for path in self.paths.values():
+            path.unlink(missing_ok=True)
+    
+    def _write_html(self) -> None:
+        """Złóż HTML: nagłówek z podsumowaniem + posortowane wiersze + stopka"""
+        self._html_index.sort(key=lambda item: item[0])
+        
+        with open(self.paths['html'], 'wb') as out:
+            out.write(self.generator._html_header(
+                self.summary, self.generated_at.strftime('%Y-%m-%d %H:%M:%S')
+            ).encode('utf-8'))
+            
+            for _, offset, length in self._html_index:
+                self._html_rows.seek(offset)
+                out.write(self._html_rows.read(length))
+            
+            out.write(self.generator.HTML_FOOTER.encode('utf-8'))
+    
+    def _close_files(self) -> None:
+        """Zamknij wszystkie otwarte pliki"""
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        
+        if self._html_rows is not None:
+            self._html_rows.close()
+            self._html_rows = None
 
 
 # Przykład użycia
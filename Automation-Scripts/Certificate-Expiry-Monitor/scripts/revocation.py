@@ -0,0 +1,519 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Revocation Module
+
+Sprawdzanie czy certyfikat został unieważniony (OCSP i CRL)
+ze współdzielonym cache odpowiedzi:
+- odpowiedzi OCSP są cache'owane do ich nextUpdate (pamięć + dysk)
+- CRL są pobierane raz, trzymane na dysku i współdzielone przez
+  wszystkie hosty tego samego wystawcy (do nextUpdate; CRL z nextUpdate
+  w przeszłości jest używany jeszcze przez STALE_CRL_REFETCH od pobrania)
+- CRL jest używany tylko ze znanym wystawcą: podpis jest weryfikowany
+  przed zapisem, a cache jest kluczowany (URL, odcisk wystawcy)
+- numery seryjne z CRL są trzymane w zbiorze (set) - lookup O(1)
+"""
+
+import hashlib
+import os
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import logging
+
+import requests
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec, padding, rsa
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import ExtendedKeyUsageOID
+
+from cert_model import ParsedCertificate
+
+
+@dataclass
+class _CRLEntry:
+    """Sparsowany CRL w pamięci"""
+    revoked_serials: Set[int]
+    next_update: datetime
+    fetched_at: datetime
+
+
+@dataclass
+class _OCSPEntry:
+    """Zapamiętany status OCSP"""
+    is_revoked: bool
+    next_update: datetime
+
+
+class RevocationChecker:
+    """
+    Klasa do sprawdzania revocation (OCSP/CRL) z cache
+
+    Jedna instancja powinna być współdzielona przez wszystkie hosty
+    w ramach procesu (jest thread-safe).
+    """
+
+    # Jak długo trzymać odpowiedź bez nextUpdate
+    DEFAULT_TTL = timedelta(hours=1)
+
+    # Jak długo nie ponawiać pobierania po błędzie
+    FAILURE_TTL = timedelta(minutes=5)
+
+    # Minimalny odstęp między pobraniami CRL, którego nextUpdate już minął
+    # (spóźniony wystawca) - bez tego każdy host pobierałby CRL od nowa
+    STALE_CRL_REFETCH = timedelta(minutes=30)
+
+    # Tolerancja różnicy zegarów dla thisUpdate odpowiedzi OCSP
+    CLOCK_SKEW = timedelta(minutes=5)
+
+    def __init__(
+        self,
+        cache_dir: Optional[Path] = None,
+        timeout: int = 10,
+        session: Optional[requests.Session] = None
+    ):
+        """
+        Inicjalizacja
+
+        Args:
+            cache_dir: Folder na CRL i odpowiedzi OCSP (None = tylko pamięć)
+            timeout: Timeout dla zapytań HTTP (sekundy)
+            session: requests.Session (opcjonalnie, np. współdzielona)
+        """
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.timeout = timeout
+        self.session = session or requests.Session()
+        self.logger = logging.getLogger(__name__)
+
+        self._crl_index: Dict[Tuple[str, str], _CRLEntry] = {}
+        self._ocsp_index: Dict[Tuple[bytes, int], _OCSPEntry] = {}
+        self._failures: Dict[str, datetime] = {}
+
+        self._lock = threading.Lock()
+        # Lock per zasób + liczba wątków, które go trzymają lub na niego czekają
+        # (wpis jest usuwany, gdy nikt go już nie używa)
+        self._url_locks: Dict[str, List] = {}
+
+        if self.cache_dir:
+            (self.cache_dir / "crl").mkdir(parents=True, exist_ok=True)
+            (self.cache_dir / "ocsp").mkdir(parents=True, exist_ok=True)
+
+    def check(
+        self,
+        cert: ParsedCertificate,
+        issuer: Optional[ParsedCertificate] = None
+    ) -> Tuple[Optional[bool], Optional[str]]:
+        """
+        Sprawdź revocation certyfikatu (najpierw OCSP, potem CRL)
+
+        Args:
+            cert: Sprawdzany certyfikat
+            issuer: Certyfikat wystawcy (wymagany dla OCSP
+                i weryfikacji podpisu CRL)
+
+        Returns:
+            (is_revoked, method) - is_revoked = None gdy nie udało się sprawdzić
+            (również gdy wystawca jest nieznany)
+        """
+        # Bez wystawcy nie da się zweryfikować ani odpowiedzi OCSP, ani CRL
+        if issuer is None:
+            return None, None
+
+        # OCSP
+        for url in cert.ocsp_urls:
+            try:
+                is_revoked = self._check_ocsp(cert, issuer, url)
+                if is_revoked is not None:
+                    return is_revoked, "OCSP"
+            except Exception as e:
+                self.logger.debug(f"OCSP check failed ({url}): {e}")
+
+        # CRL
+        for url in cert.crl_urls:
+            try:
+                entry = self._get_crl(url, issuer)
+                if entry is not None:
+                    return cert.cert.serial_number in entry.revoked_serials, "CRL"
+            except Exception as e:
+                self.logger.debug(f"CRL check failed ({url}): {e}")
+
+        return None, None
+
+    # ------------------------------------------------------------------
+    # OCSP
+    # ------------------------------------------------------------------
+
+    def _check_ocsp(
+        self,
+        cert: ParsedCertificate,
+        issuer: ParsedCertificate,
+        url: str
+    ) -> Optional[bool]:
+        """
+        Sprawdź status przez OCSP (z cache do nextUpdate)
+
+        Args:
+            cert: Sprawdzany certyfikat
+            issuer: Certyfikat wystawcy
+            url: URL respondera OCSP
+
+        Returns:
+            True/False lub None jeśli status nieznany
+        """
+        request = (
+            ocsp.OCSPRequestBuilder()
+            .add_certificate(cert.cert, issuer.cert, hashes.SHA1())
+            .build()
+        )
+        key = (request.issuer_key_hash, request.serial_number)
+        now = datetime.now(timezone.utc)
+
+        entry = self._ocsp_index.get(key)
+        if entry is not None and entry.next_update > now:
+            return entry.is_revoked
+
+        with self._url_lock(f"ocsp:{key[0].hex()}:{key[1]}"):
+            # Inny wątek mógł już pobrać odpowiedź
+            entry = self._ocsp_index.get(key)
+            if entry is not None and entry.next_update > now:
+                return entry.is_revoked
+
+            cache_file = None
+            if self.cache_dir:
+                name = hashlib.sha256(key[0] + str(key[1]).encode()).hexdigest()
+                cache_file = self.cache_dir / "ocsp" / f"{name}.der"
+
+            entry = self._load_ocsp_file(cache_file, issuer, request, now)
+
+            if entry is None:
+                # Responder niedostępny -> pomiń go dla wszystkich certyfikatów,
+                # odpowiedź nieważna/UNKNOWN -> tylko dla tego certyfikatu
+                failure_key = f"ocsp:{key[0].hex()}:{key[1]}"
+                if self._recently_failed(url, now) or self._recently_failed(failure_key, now):
+                    return None
+
+                try:
+                    response = self.session.post(
+                        url,
+                        data=request.public_bytes(serialization.Encoding.DER),
+                        headers={"Content-Type": "application/ocsp-request"},
+                        timeout=self.timeout
+                    )
+                    response.raise_for_status()
+                except Exception:
+                    self._mark_failed(url, now)
+                    raise
+
+                entry = self._parse_ocsp_response(response.content, issuer, request, now)
+                if entry is None:
+                    self._mark_failed(failure_key, now)
+                    return None
+
+                if cache_file is not None:
+                    self._write_atomic(cache_file, response.content)
+
+            self._ocsp_index[key] = entry
+            return entry.is_revoked
+
+    def _load_ocsp_file(
+        self,
+        cache_file: Optional[Path],
+        issuer: ParsedCertificate,
+        request: ocsp.OCSPRequest,
+        now: datetime
+    ) -> Optional[_OCSPEntry]:
+        """Wczytaj odpowiedź OCSP z dysku (jeśli jeszcze aktualna)"""
+        if cache_file is None or not cache_file.exists():
+            return None
+
+        try:
+            entry = self._parse_ocsp_response(cache_file.read_bytes(), issuer, request, now)
+        except Exception:
+            return None
+
+        if entry is None or entry.next_update <= now:
+            return None
+
+        return entry
+
+    def _parse_ocsp_response(
+        self,
+        data: bytes,
+        issuer: ParsedCertificate,
+        request: ocsp.OCSPRequest,
+        now: datetime
+    ) -> Optional[_OCSPEntry]:
+        """
+        Sparsuj i zweryfikuj odpowiedź OCSP
+
+        Odpowiedź musi dotyczyć certyfikatu z zapytania (numer seryjny
+        i hash klucza wystawcy) i być aktualna (thisUpdate <= now < nextUpdate).
+
+        Returns:
+            _OCSPEntry lub None jeśli odpowiedź jest nieważna/nieznana
+        """
+        response = ocsp.load_der_ocsp_response(data)
+
+        if response.response_status != ocsp.OCSPResponseStatus.SUCCESSFUL:
+            return None
+
+        if not self._verify_ocsp_signature(response, issuer, now):
+            self.logger.warning("OCSP response signature verification failed")
+            return None
+
+        if (
+            response.serial_number != request.serial_number
+            or response.issuer_key_hash != request.issuer_key_hash
+        ):
+            self.logger.warning("OCSP response is for a different certificate")
+            return None
+
+        if response.this_update_utc > now + self.CLOCK_SKEW:
+            self.logger.warning(f"OCSP response thisUpdate in the future: {response.this_update_utc}")
+            return None
+
+        if response.next_update_utc is not None and response.next_update_utc <= now:
+            self.logger.warning(f"OCSP response expired (nextUpdate {response.next_update_utc})")
+            return None
+
+        status = response.certificate_status
+        if status == ocsp.OCSPCertStatus.UNKNOWN:
+            return None
+
+        next_update = response.next_update_utc or (now + self.DEFAULT_TTL)
+
+        return _OCSPEntry(
+            is_revoked=status == ocsp.OCSPCertStatus.REVOKED,
+            next_update=next_update
+        )
+
+    def _verify_ocsp_signature(
+        self,
+        response: ocsp.OCSPResponse,
+        issuer: ParsedCertificate,
+        now: datetime
+    ) -> bool:
+        """
+        Zweryfikuj podpis odpowiedzi OCSP
+
+        Odpowiedź podpisuje wystawca lub delegowany responder
+        (certyfikat z EKU OCSPSigning wystawiony przez wystawcę,
+        ważny w chwili sprawdzania).
+        """
+        signer = issuer.cert
+
+        for responder in response.certificates:
+            if responder.issuer != issuer.subject:
+                continue
+            if not responder.not_valid_before_utc <= now <= responder.not_valid_after_utc:
+                self.logger.warning(
+                    f"Ignoring OCSP responder certificate outside its validity period "
+                    f"({responder.not_valid_before_utc:%Y-%m-%d} - {responder.not_valid_after_utc:%Y-%m-%d})"
+                )
+                continue
+            try:
+                eku = responder.extensions.get_extension_for_class(
+                    x509.ExtendedKeyUsage
+                ).value
+                if ExtendedKeyUsageOID.OCSP_SIGNING not in eku:
+                    continue
+                responder.verify_directly_issued_by(issuer.cert)
+                signer = responder
+                break
+            except Exception:
+                continue
+
+        return self._verify_signature(
+            signer.public_key(),
+            response.signature,
+            response.tbs_response_bytes,
+            response.signature_hash_algorithm
+        )
+
+    # ------------------------------------------------------------------
+    # CRL
+    # ------------------------------------------------------------------
+
+    def _get_crl(
+        self,
+        url: str,
+        issuer: ParsedCertificate
+    ) -> Optional[_CRLEntry]:
+        """
+        Pobierz CRL (pamięć -> dysk -> HTTP), jeden download na URL i wystawcę
+
+        Args:
+            url: URL listy CRL
+            issuer: Certyfikat wystawcy (do weryfikacji podpisu)
+
+        Returns:
+            _CRLEntry lub None jeśli CRL niedostępny
+        """
+        now = datetime.now(timezone.utc)
+        key = (url, issuer.fingerprint)
+
+        entry = self._crl_index.get(key)
+        if entry is not None and self._crl_usable(entry, now):
+            return entry
+
+        with self._url_lock(f"crl:{url}:{issuer.fingerprint}"):
+            # Inny wątek mógł już pobrać ten CRL
+            entry = self._crl_index.get(key)
+            if entry is not None and self._crl_usable(entry, now):
+                return entry
+
+            cache_file = None
+            if self.cache_dir:
+                name = hashlib.sha256(f"{url}\n{issuer.fingerprint}".encode()).hexdigest()
+                cache_file = self.cache_dir / "crl" / f"{name}.crl"
+
+            # Dysk
+            if cache_file is not None and cache_file.exists():
+                try:
+                    fetched_at = datetime.fromtimestamp(cache_file.stat().st_mtime, timezone.utc)
+                    entry = self._parse_crl(cache_file.read_bytes(), issuer, fetched_at)
+                    if self._crl_usable(entry, now):
+                        self._warn_if_stale(url, entry, now)
+                        self._crl_index[key] = entry
+                        return entry
+                except Exception as e:
+                    self.logger.debug(f"Ignoring cached CRL {cache_file}: {e}")
+
+            # HTTP - serwer niedostępny -> pomiń URL dla wszystkich wystawców,
+            # CRL z błędnym podpisem -> tylko dla tego wystawcy
+            failure_key = f"crl:{url}:{issuer.fingerprint}"
+            if self._recently_failed(url, now) or self._recently_failed(failure_key, now):
+                return None
+
+            self.logger.info(f"Downloading CRL: {url}")
+            try:
+                response = self.session.get(url, timeout=self.timeout)
+                response.raise_for_status()
+            except Exception:
+                self._mark_failed(url, now)
+                raise
+
+            try:
+                entry = self._parse_crl(response.content, issuer, now)
+            except Exception:
+                self._mark_failed(failure_key, now)
+                raise
+
+            if cache_file is not None:
+                self._write_atomic(cache_file, response.content)
+
+            self._warn_if_stale(url, entry, now)
+            self._crl_index[key] = entry
+            return entry
+
+    def _crl_usable(self, entry: _CRLEntry, now: datetime) -> bool:
+        """CRL aktualny lub nieaktualny, ale pobrany niedawno (STALE_CRL_REFETCH)"""
+        return entry.next_update > now or now - entry.fetched_at < self.STALE_CRL_REFETCH
+
+    def _warn_if_stale(self, url: str, entry: _CRLEntry, now: datetime) -> None:
+        """Ostrzeżenie o CRL z nextUpdate w przeszłości (raz na pobranie/wczytanie)"""
+        if entry.next_update <= now:
+            self.logger.warning(
+                f"CRL {url} is stale (nextUpdate {entry.next_update:%Y-%m-%d %H:%M} UTC), "
+                f"reusing it for up to {int(self.STALE_CRL_REFETCH.total_seconds() // 60)} min"
+            )
+
+    def _parse_crl(
+        self,
+        data: bytes,
+        issuer: ParsedCertificate,
+        fetched_at: datetime
+    ) -> _CRLEntry:
+        """
+        Sparsuj CRL (DER lub PEM), zweryfikuj podpis wystawcy
+        i zbuduj indeks numerów seryjnych
+
+        Raises:
+            ValueError: CRL nie jest podpisany przez wystawcę
+        """
+        if data.lstrip().startswith(b"-----BEGIN"):
+            crl = x509.load_pem_x509_crl(data)
+        else:
+            crl = x509.load_der_x509_crl(data)
+
+        if crl.issuer != issuer.subject or not crl.is_signature_valid(issuer.public_key):
+            raise ValueError("CRL signature does not match issuer")
+
+        next_update = crl.next_update_utc or (fetched_at + self.DEFAULT_TTL)
+
+        return _CRLEntry(
+            revoked_serials={revoked.serial_number for revoked in crl},
+            next_update=next_update,
+            fetched_at=fetched_at
+        )
+
+    # ------------------------------------------------------------------
+    # Helpers
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _verify_signature(public_key, signature: bytes, data: bytes, hash_algorithm) -> bool:
+        """Zweryfikuj podpis RSA/ECDSA"""
+        try:
+            if isinstance(public_key, rsa.RSAPublicKey):
+                public_key.verify(signature, data, padding.PKCS1v15(), hash_algorithm)
+            elif isinstance(public_key, ec.EllipticCurvePublicKey):
+                public_key.verify(signature, data, ec.ECDSA(hash_algorithm))
+            else:
+                public_key.verify(signature, data)
+            return True
+        except InvalidSignature:
+            return False
+
+    @contextmanager
+    def _url_lock(self, key: str) -> Iterator[None]:
+        """
+        Lock per URL - jeden download naraz dla danego zasobu
+
+        Wpis jest usuwany, gdy zwolni go ostatni używający wątek,
+        więc słownik nie rośnie z liczbą sprawdzonych certyfikatów.
+        """
+        with self._lock:
+            slot = self._url_locks.get(key)
+            if slot is None:
+                slot = self._url_locks[key] = [threading.Lock(), 0]
+            slot[1] += 1
+
+        try:
+            with slot[0]:
+                yield
+        finally:
+            with self._lock:
+                slot[1] -= 1
+                if slot[1] == 0:
+                    del self._url_locks[key]
+
+    def _recently_failed(self, url: str, now: datetime) -> bool:
+        """Czy ostatnie pobranie z tego URL się nie powiodło (niedawno)"""
+        failed_at = self._failures.get(url)
+        return failed_at is not None and now - failed_at < self.FAILURE_TTL
+
+    def _mark_failed(self, url: str, now: datetime) -> None:
+        """Zapamiętaj błąd pobierania (i zapomnij błędy starsze niż FAILURE_TTL)"""
+        with self._lock:
+            expired = [
+                key for key, failed_at in self._failures.items()
+                if now - failed_at >= self.FAILURE_TTL
+            ]
+            for key in expired:
+                del self._failures[key]
+            self._failures[url] = now
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        """Zapisz plik atomowo (tmp + rename)"""
+        tmp_path = path.with_suffix(path.suffix + ".tmp")
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
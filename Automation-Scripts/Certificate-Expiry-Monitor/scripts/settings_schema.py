@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Settings Schema Module
+
+Typy wartości z settings.yml. Wartości podstawiane z .env (${VAR}) są
+stringami - po załadowaniu konwertowane są tutaj raz, zamiast w każdym
+miejscu użycia (int(...), as_bool(...)).
+
+Konfiguracja zostaje zagnieżdżonym dict (tak czytają ją wszystkie moduły),
+schemat gwarantuje tylko typy wartości.
+
+Pusta zmienna (VAR= w .env) daje None, ścieżki nieobecne w pliku są pomijane
+(moduły mają własne wartości domyślne). Nieustawiona zmienna (${VAR} bez
+wpisu w .env ani w środowisku) i niepoprawna wartość zatrzymują start
+z listą wszystkich błędów.
+"""
+
+import re
+from typing import Any, Dict, List
+
+
+# Ścieżka (sekcja.klucz) -> typ
+SETTINGS_SCHEMA: Dict[str, type] = {
+    # General
+    'general.check_interval_hours': float,
+    'general.daemon.jitter': float,
+    'general.daemon.reload_seconds': int,
+    'general.daemon.batch_window_seconds': int,
+    'general.concurrent_checks': int,
+    'general.async_concurrent_checks': int,
+    'general.sharding.workers': int,
+    'general.sharding.min_hosts': int,
+    'general.dns.enabled': bool,
+    'general.dns.ttl_seconds': float,
+    'general.dns.negative_ttl_seconds': float,
+    'general.dns.max_workers': int,
+    'general.dns.probe_all_addresses': bool,
+    'general.connection_timeout': float,
+    'general.starttls_timeout': float,
+    'general.retry_attempts': int,
+    'general.retry_delay': float,
+
+    # Kanały alertów
+    'smtp.enabled': bool,
+    'smtp.port': int,
+    'smtp.use_tls': bool,
+    'smtp.use_ssl': bool,
+    'slack.enabled': bool,
+    'teams.enabled': bool,
+
+    # Alerty
+    'alerts.thresholds.warning': int,
+    'alerts.thresholds.critical': int,
+    'alerts.thresholds.urgent': int,
+    'alerts.ledger.enabled': bool,
+    'alerts.dispatch.max_workers': int,
+    'alerts.dispatch.webhook_rate_per_second': float,
+    'alerts.dispatch.webhook_burst': int,
+    'alerts.dispatch.max_retries': int,
+    'alerts.dispatch.backoff_seconds': float,
+
+    # Walidacja
+    'validation.verify_chain': bool,
+    'validation.check_revocation': bool,
+    'validation.revocation.timeout': float,
+    'validation.verify_hostname': bool,
+
+    # Raporty
+    'reporting.formats.html': bool,
+    'reporting.formats.csv': bool,
+    'reporting.formats.json': bool,
+    'reporting.formats.ndjson': bool,
+    'reporting.formats.pdf': bool,
+    'reporting.dashboard.enabled': bool,
+    'reporting.dashboard.page_size': int,
+    'reporting.dashboard.lookback_days': int,
+    'reporting.retention_days': int,
+
+    # Logging
+    'logging.max_size_mb': int,
+    'logging.backup_count': int,
+    'logging.console': bool,
+
+    # Cache, historia, porównanie przebiegów, circuit breaker
+    'certificate_cache.enabled': bool,
+    'certificate_cache.near_expiry_days': int,
+    'certificate_cache.near_expiry_interval_hours': float,
+    'certificate_cache.default_interval_hours': float,
+    'history.enabled': bool,
+    'diff.enabled': bool,
+    'diff.report': bool,
+    'circuit_breaker.enabled': bool,
+    'circuit_breaker.failure_threshold': int,
+    'circuit_breaker.open_hours': float,
+    'circuit_breaker.max_open_hours': float,
+
+    # Skanowanie plików
+    'file_scan.max_file_size_mb': float,
+    'file_scan.follow_symlinks': bool,
+    'file_scan.workers': int,
+    'file_scan.batch_size': int,
+
+    # Prometheus
+    'prometheus.enabled': bool,
+    'prometheus.port': int,
+    'prometheus.per_host_top': int,
+}
+
+# Placeholder, którego ConfigLoader nie podstawił (zmienna nieustawiona)
+_UNSET_VAR = re.compile(r'\$\{([A-Za-z_][A-Za-z0-9_]*)\}')
+
+_TRUE = ('true', 'yes', '1', 'on')
+_FALSE = ('false', 'no', '0', 'off')
+
+
+def coerce_settings(config: Dict[str, Any], schema: Dict[str, type] = SETTINGS_SCHEMA) -> Dict[str, Any]:
+    """
+    Konwertuj wartości konfiguracji do typów ze schematu (w miejscu)
+
+    Args:
+        config: Konfiguracja po podstawieniu zmiennych środowiskowych
+        schema: Ścieżka (sekcja.klucz) -> int, float lub bool
+
+    Returns:
+        Ta sama konfiguracja z przekonwertowanymi wartościami
+
+    Raises:
+        ValueError: Wartość nie pasuje do typu lub wymaga nieustawionej
+            zmiennej środowiskowej (lista wszystkich błędów)
+    """
+    errors: List[str] = []
+
+    for path, kind in schema.items():
+        *parents, key = path.split('.')
+
+        section = config
+        for name in parents:
+            section = section.get(name) if isinstance(section, dict) else None
+        if not isinstance(section, dict) or key not in section:
+            continue
+
+        unset = _UNSET_VAR.search(section[key]) if isinstance(section[key], str) else None
+        if unset:
+            errors.append(f"{path}: environment variable {unset.group(1)} is not set")
+            continue
+
+        try:
+            section[key] = _coerce(section[key], kind)
+        except (TypeError, ValueError):
+            errors.append(f"{path}: expected {kind.__name__}, got {section[key]!r}")
+
+    if errors:
+        raise ValueError("Invalid settings:\n  " + "\n  ".join(errors))
+
+    return config
+
+
+def _coerce(value: Any, kind: type) -> Any:
+    """Jedna wartość -> kind (None i pusty string -> None)"""
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+
+    if kind is bool:
+        if isinstance(value, bool):
+            return value
+        text = str(value).strip().lower()
+        if text in _TRUE:
+            return True
+        if text in _FALSE:
+            return False
+        raise ValueError(value)
+
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise TypeError(value)
+
+    if kind is int and isinstance(value, float) and not value.is_integer():
+        raise ValueError(value)
+
+    return kind(value)
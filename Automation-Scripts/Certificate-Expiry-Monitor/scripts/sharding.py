@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Sharding Module
+
+Podział inwentarza hostów na shardy - każdy shard może sprawdzać osobny
+proces (pula procesów w jednym uruchomieniu) lub osobne uruchomienie
+(--shard 2/4, np. na innej maszynie), a wyniki są łączone na końcu.
+
+Strategie podziału:
+- hash: równomiernie po hostname:port
+- group: cała grupa z domains.yml w jednym shardzie
+- tag: hosty z tym samym pierwszym tagiem w jednym shardzie
+
+Przydział jest liczony rendezvous hashingiem (HRW): zmiana liczby
+shardów przenosi tylko ~1/n hostów, a ten sam host trafia zawsze do
+tego samego sharda (cache, circuit breaker, logi per maszyna).
+"""
+
+import hashlib
+from typing import List, Sequence, Tuple
+
+from cert_checker import HostTarget
+
+
+SHARD_STRATEGIES = ('hash', 'group', 'tag')
+
+
+def shard_key(host: HostTarget, strategy: str = 'hash') -> str:
+    """
+    Klucz, według którego host jest przydzielany do sharda
+
+    Args:
+        host: Host z domains.yml
+        strategy: hash, group lub tag
+
+    Returns:
+        Klucz (hosty o tym samym kluczu trafiają do tego samego sharda)
+    """
+    if strategy == 'group':
+        return f"group:{host.group or ''}"
+    if strategy == 'tag':
+        return f"tag:{host.tags[0] if host.tags else ''}"
+    if strategy == 'hash':
+        return f"{host.hostname}:{host.port}"
+
+    raise ValueError(f"Unknown shard strategy: {strategy} (use {', '.join(SHARD_STRATEGIES)})")
+
+
+def shard_index(key: str, count: int) -> int:
+    """
+    Numer sharda dla klucza (rendezvous hashing)
+
+    Args:
+        key: Klucz z shard_key
+        count: Liczba shardów
+
+    Returns:
+        Numer sharda (0 .. count-1)
+    """
+    def weight(shard: int) -> int:
+        digest = hashlib.blake2b(f"{shard}/{key}".encode('utf-8'), digest_size=8).digest()
+        return int.from_bytes(digest, 'big')
+
+    return max(range(count), key=weight)
+
+
+def split_hosts(
+    hosts: Sequence[HostTarget],
+    count: int,
+    strategy: str = 'hash'
+) -> List[List[HostTarget]]:
+    """
+    Podziel hosty na shardy
+
+    Args:
+        hosts: Lista HostTarget
+        count: Liczba shardów
+        strategy: hash, group lub tag
+
+    Returns:
+        Lista count list hostów (shard może być pusty; kolejność hostów zachowana)
+    """
+    count = max(1, int(count))
+    shards: List[List[HostTarget]] = [[] for _ in range(count)]
+
+    # Jeden klucz grupy/tagu liczony raz
+    indexes = {}
+    for host in hosts:
+        key = shard_key(host, strategy)
+        if key not in indexes:
+            indexes[key] = shard_index(key, count)
+        shards[indexes[key]].append(host)
+
+    return shards
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """
+    Parsuj specyfikację sharda z linii poleceń ("2/4")
+
+    Args:
+        spec: "i/n", numeracja od 1
+
+    Returns:
+        (i, n)
+
+    Raises:
+        ValueError: Niepoprawny format lub zakres
+    """
+    try:
+        index, count = (int(part) for part in spec.split('/'))
+    except ValueError:
+        raise ValueError(f"Invalid shard '{spec}' (expected i/n, e.g. 2/4)")
+
+    if count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard '{spec}' (1 <= i <= n)")
+
+    return index, count
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+STARTTLS Module
+
+Negocjacja STARTTLS przed handshake'iem TLS dla SMTP, IMAP, LDAP i FTP.
+Dialog każdego protokołu jest zapisany raz jako generator (sans-IO):
+zwraca ("send", bytes), ("line", None) lub ("read", n) i dostaje odpowiedź.
+Ten sam dialog wykonuje driver blokujący (socket) i asyncio (StreamReader),
+każda faza (odczyt/zapis) ma osobny, krótki timeout.
+"""
+
+import asyncio
+import socket
+from typing import Generator, Optional, Tuple
+
+
+# Rodzina protokołu dla nazw z domains.yml
+PROTOCOL_FAMILIES = {
+    'smtp': 'smtp', 'smtps': 'smtp',
+    'imap': 'imap', 'imaps': 'imap',
+    'ldap': 'ldap', 'ldaps': 'ldap',
+    'ftp': 'ftp', 'ftps': 'ftp',
+}
+
+# Porty, na których serwer oczekuje STARTTLS (a nie TLS od razu)
+STARTTLS_PORTS = {
+    'smtp': {25, 587, 2525},
+    'imap': {143},
+    'ldap': {389},
+    'ftp': {21},
+}
+
+# Maksymalna długość linii i liczba linii odpowiedzi (ochrona przed śmieciami)
+MAX_LINE = 8192
+MAX_LINES = 100
+
+# OID rozszerzenia LDAP StartTLS (RFC 4511)
+LDAP_STARTTLS_OID = b'1.3.6.1.4.1.1466.20037'
+
+Dialog = Generator[Tuple[str, Optional[object]], Optional[bytes], None]
+
+
+class StartTlsError(Exception):
+    """Serwer odrzucił lub nie obsługuje STARTTLS"""
+
+
+def starttls_mode(protocol: str, port: int) -> Optional[str]:
+    """
+    Czy host wymaga STARTTLS i jaki dialog
+
+    Jawna nazwa bez "s" (smtp, imap, ldap, ftp) lub port STARTTLS
+    (np. smtps na 587) oznacza STARTTLS. Pozostałe - TLS od razu.
+
+    Args:
+        protocol: Protokół z domains.yml
+        port: Port
+
+    Returns:
+        Rodzina protokołu ("smtp", "imap", "ldap", "ftp") lub None
+    """
+    protocol = (protocol or '').lower()
+    family = PROTOCOL_FAMILIES.get(protocol)
+
+    if family is None:
+        return None
+
+    if protocol == family or port in STARTTLS_PORTS[family]:
+        return family
+
+    return None
+
+
+# ----------------------------------------------------------------------
+# Dialogi protokołów (sans-IO)
+# ----------------------------------------------------------------------
+
+def _read_reply(code: bytes) -> Dialog:
+    """Odczytaj odpowiedź SMTP/FTP (wieloliniową "250-...", ostatnia "250 ...")"""
+    for _ in range(MAX_LINES):
+        line = yield ('line', None)
+        if len(line) < 4 or line[3:4] != b'-':
+            if not line.startswith(code):
+                raise StartTlsError(f"Unexpected reply: {_text(line)}")
+            return line
+    raise StartTlsError("Reply too long")
+
+
+def _smtp_dialog() -> Dialog:
+    """SMTP: greeting 220, EHLO, STARTTLS -> 220"""
+    yield from _read_reply(b'220')
+
+    yield ('send', b'EHLO certificate-monitor\r\n')
+    capabilities = []
+    for _ in range(MAX_LINES):
+        line = yield ('line', None)
+        capabilities.append(line[4:].strip().upper())
+        if len(line) < 4 or line[3:4] != b'-':
+            if not line.startswith(b'250'):
+                raise StartTlsError(f"EHLO rejected: {_text(line)}")
+            break
+
+    if b'STARTTLS' not in capabilities:
+        raise StartTlsError("SMTP server does not offer STARTTLS")
+
+    yield ('send', b'STARTTLS\r\n')
+    yield from _read_reply(b'220')
+
+
+def _imap_dialog() -> Dialog:
+    """IMAP: greeting * OK, a1 STARTTLS -> a1 OK"""
+    greeting = yield ('line', None)
+    if not greeting.startswith(b'* OK'):
+        raise StartTlsError(f"Unexpected IMAP greeting: {_text(greeting)}")
+
+    yield ('send', b'a1 STARTTLS\r\n')
+    for _ in range(MAX_LINES):
+        line = yield ('line', None)
+        if line.startswith(b'a1 '):
+            if not line.upper().startswith(b'A1 OK'):
+                raise StartTlsError(f"IMAP STARTTLS rejected: {_text(line)}")
+            return
+    raise StartTlsError("Reply too long")
+
+
+def _ftp_dialog() -> Dialog:
+    """FTP: greeting 220, AUTH TLS -> 234"""
+    yield from _read_reply(b'220')
+
+    yield ('send', b'AUTH TLS\r\n')
+    yield from _read_reply(b'234')
+
+
+def _ldap_dialog() -> Dialog:
+    """LDAP: ExtendedRequest StartTLS -> ExtendedResponse resultCode 0"""
+    request_name = b'\x80' + bytes([len(LDAP_STARTTLS_OID)]) + LDAP_STARTTLS_OID
+    extended_request = b'\x77' + bytes([len(request_name)]) + request_name
+    message_id = b'\x02\x01\x01'
+    body = message_id + extended_request
+    yield ('send', b'\x30' + bytes([len(body)]) + body)
+
+    # LDAPMessage: SEQUENCE (tag + długość BER)
+    header = yield ('read', 2)
+    if header[0] != 0x30:
+        raise StartTlsError("Invalid LDAP response")
+
+    length = header[1]
+    if length & 0x80:
+        length_bytes = yield ('read', length & 0x7f)
+        length = int.from_bytes(length_bytes, 'big')
+    if length > MAX_LINE:
+        raise StartTlsError("LDAP response too long")
+
+    message = yield ('read', length)
+
+    # messageID (INTEGER), potem extendedResp [APPLICATION 24]
+    offset = 2 + message[1]
+    if message[offset:offset + 1] != b'\x78':
+        raise StartTlsError("Unexpected LDAP response type")
+
+    offset += 1
+    if message[offset] & 0x80:
+        offset += message[offset] & 0x7f
+    offset += 1
+
+    # resultCode (ENUMERATED)
+    if message[offset] != 0x0a:
+        raise StartTlsError("Invalid LDAP result code")
+    result_code = message[offset + 2]
+
+    if result_code != 0:
+        raise StartTlsError(f"LDAP StartTLS rejected (resultCode {result_code})")
+
+
+DIALOGS = {
+    'smtp': _smtp_dialog,
+    'imap': _imap_dialog,
+    'ldap': _ldap_dialog,
+    'ftp': _ftp_dialog,
+}
+
+
+def _text(line: bytes) -> str:
+    """Linia odpowiedzi do komunikatu błędu"""
+    return line.decode('ascii', 'replace').strip()[:200]
+
+
+# ----------------------------------------------------------------------
+# Drivery
+# ----------------------------------------------------------------------
+
+def negotiate(sock: socket.socket, mode: str, phase_timeout: float) -> None:
+    """
+    Wykonaj dialog STARTTLS na połączonym sockecie (blokująco)
+
+    Args:
+        sock: Połączony socket TCP
+        mode: Rodzina protokołu (starttls_mode)
+        phase_timeout: Timeout każdej fazy odczytu/zapisu (sekundy)
+
+    Raises:
+        StartTlsError: Serwer nie obsługuje / odrzucił STARTTLS
+        TimeoutError: Serwer nie odpowiedział w czasie fazy
+    """
+    previous_timeout = sock.gettimeout()
+    sock.settimeout(phase_timeout)
+    buffer = b''
+
+    def read_exact(n: int) -> bytes:
+        nonlocal buffer
+        while len(buffer) < n:
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise StartTlsError("Connection closed during STARTTLS")
+            buffer += chunk
+        data, buffer = buffer[:n], buffer[n:]
+        return data
+
+    def read_line() -> bytes:
+        nonlocal buffer
+        while b'\n' not in buffer:
+            if len(buffer) > MAX_LINE:
+                raise StartTlsError("Line too long")
+            chunk = sock.recv(4096)
+            if not chunk:
+                raise StartTlsError("Connection closed during STARTTLS")
+            buffer += chunk
+        line, buffer = buffer.split(b'\n', 1)
+        return line + b'\n'
+
+    try:
+        dialog = DIALOGS[mode]()
+        reply = None
+        while True:
+            try:
+                action, arg = dialog.send(reply)
+            except StopIteration:
+                break
+
+            if action == 'send':
+                sock.sendall(arg)
+                reply = None
+            elif action == 'line':
+                reply = read_line()
+            else:
+                reply = read_exact(arg)
+    except socket.timeout:
+        raise TimeoutError(f"STARTTLS ({mode}) timed out after {phase_timeout}s")
+    finally:
+        sock.settimeout(previous_timeout)
+
+
+async def negotiate_async(
+    reader: asyncio.StreamReader,
+    writer: asyncio.StreamWriter,
+    mode: str,
+    phase_timeout: float
+) -> None:
+    """
+    Wykonaj dialog STARTTLS na połączeniu asyncio
+
+    Args:
+        reader: StreamReader połączenia TCP
+        writer: StreamWriter połączenia TCP
+        mode: Rodzina protokołu (starttls_mode)
+        phase_timeout: Timeout każdej fazy odczytu/zapisu (sekundy)
+
+    Raises:
+        StartTlsError: Serwer nie obsługuje / odrzucił STARTTLS
+        asyncio.TimeoutError: Serwer nie odpowiedział w czasie fazy
+    """
+    dialog = DIALOGS[mode]()
+    reply = None
+
+    while True:
+        try:
+            action, arg = dialog.send(reply)
+        except StopIteration:
+            break
+
+        try:
+            if action == 'send':
+                writer.write(arg)
+                await asyncio.wait_for(writer.drain(), phase_timeout)
+                reply = None
+            elif action == 'line':
+                reply = await asyncio.wait_for(reader.readline(), phase_timeout)
+                if not reply:
+                    raise StartTlsError("Connection closed during STARTTLS")
+            else:
+                reply = await asyncio.wait_for(reader.readexactly(arg), phase_timeout)
+        except asyncio.TimeoutError:
+            raise TimeoutError(f"STARTTLS ({mode}) timed out after {phase_timeout}s")
+        except asyncio.IncompleteReadError:
+            raise StartTlsError("Connection closed during STARTTLS")
+        except (asyncio.LimitOverrunError, ValueError):
+            # readline() zgłasza ValueError, gdy linia przekracza limit readera
+            raise StartTlsError("Line too long")
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Trust Store Module
+
+Zaufane certyfikaty root (bundle PEM lub katalog) ładowane raz na proces
+i indeksowane po Subject Key Identifier oraz hashu Subject DN - wyszukanie
+wystawcy to lookup w słowniku, a nie przeszukiwanie listy.
+
+Budowanie ścieżki (leaf -> intermediate -> root) weryfikuje podpisy
+i uprawnienia wystawców (Basic Constraints ca=True, keyCertSign,
+pathLenConstraint). Zweryfikowane pary (CA, wystawca) są zapamiętywane -
+wspólne intermediate'y wielu hostów weryfikowane są tylko raz; pary
+z certyfikatem końcowym nie (w trybie daemon rotowane leafy nie
+powiększają pamięci).
+"""
+
+import ssl
+import threading
+import warnings
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import logging
+
+from cryptography import x509
+
+from cert_model import ParsedCertificate
+
+
+class TrustStore:
+    """Indeks zaufanych certyfikatów root z weryfikacją ścieżki"""
+
+    # Maksymalna długość budowanej ścieżki
+    MAX_DEPTH = 10
+
+    # Instancje współdzielone w procesie: (cafile, capath) -> TrustStore
+    _instances: Dict[Tuple[Optional[str], Optional[str]], 'TrustStore'] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, certificates: List[ParsedCertificate]):
+        """
+        Inicjalizacja (użyj TrustStore.load() - cache na proces)
+
+        Args:
+            certificates: Lista zaufanych certyfikatów
+        """
+        self.logger = logging.getLogger(__name__)
+
+        self._by_fingerprint: Dict[str, ParsedCertificate] = {}
+        self._by_ski: Dict[bytes, List[ParsedCertificate]] = {}
+        self._by_subject: Dict[bytes, List[ParsedCertificate]] = {}
+
+        # Część systemowych root CA ma niezgodne z RFC 5280 pola (np. serial)
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            for cert in certificates:
+                self.add(cert)
+
+        # (fingerprint CA, fingerprint wystawcy) -> wynik weryfikacji
+        # (tylko certyfikaty CA - ich liczba jest ograniczona)
+        self._verified: Dict[Tuple[str, str], bool] = {}
+        self._verified_lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls,
+        cafile: Optional[str] = None,
+        capath: Optional[str] = None
+    ) -> 'TrustStore':
+        """
+        Załaduj trust store (raz na proces dla danej ścieżki)
+
+        Args:
+            cafile: Bundle PEM (domyślnie systemowy)
+            capath: Katalog z certyfikatami (domyślnie systemowy)
+
+        Returns:
+            TrustStore
+        """
+        if not cafile and not capath:
+            defaults = ssl.get_default_verify_paths()
+            cafile, capath = defaults.cafile, defaults.capath
+
+        key = (str(cafile) if cafile else None, str(capath) if capath else None)
+
+        with cls._instances_lock:
+            store = cls._instances.get(key)
+            if store is None:
+                store = cls(cls._read_certificates(cafile, capath))
+                cls._instances[key] = store
+                store.logger.info(
+                    f"Loaded trust store: {len(store)} certificates "
+                    f"(cafile={key[0]}, capath={key[1]})"
+                )
+            return store
+
+    @staticmethod
+    def _read_certificates(
+        cafile: Optional[str],
+        capath: Optional[str]
+    ) -> List[ParsedCertificate]:
+        """Wczytaj certyfikaty z bundle i/lub katalogu"""
+        logger = logging.getLogger(__name__)
+        files = []
+
+        if cafile and Path(cafile).is_file():
+            files.append(Path(cafile))
+
+        # Katalog czytamy tylko gdy nie ma bundle - zwykle zawiera te same CA
+        if not files and capath and Path(capath).is_dir():
+            files.extend(
+                p for p in sorted(Path(capath).iterdir())
+                if p.is_file() and p.suffix in ('.pem', '.crt', '.cer', '.0')
+            )
+
+        certificates = []
+        for path in files:
+            try:
+                data = path.read_bytes()
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    if b'-----BEGIN CERTIFICATE-----' in data:
+                        certs = x509.load_pem_x509_certificates(data)
+                    else:
+                        certs = [x509.load_der_x509_certificate(data)]
+            except Exception as e:
+                logger.debug(f"Skipping trust store file {path}: {e}")
+                continue
+
+            certificates.extend(ParsedCertificate.from_x509(c) for c in certs)
+
+        return certificates
+
+    def add(self, cert: ParsedCertificate) -> None:
+        """Dodaj zaufany certyfikat do indeksu"""
+        if cert.fingerprint in self._by_fingerprint:
+            return
+
+        self._by_fingerprint[cert.fingerprint] = cert
+        self._by_subject.setdefault(cert.subject_hash, []).append(cert)
+        if cert.subject_key_identifier:
+            self._by_ski.setdefault(cert.subject_key_identifier, []).append(cert)
+
+    def __len__(self) -> int:
+        return len(self._by_fingerprint)
+
+    def is_trusted(self, cert: ParsedCertificate) -> bool:
+        """Czy certyfikat jest w trust store"""
+        return cert.fingerprint in self._by_fingerprint
+
+    def find_issuers(self, cert: ParsedCertificate) -> List[ParsedCertificate]:
+        """
+        Znajdź kandydatów na wystawcę w trust store
+
+        Args:
+            cert: Certyfikat, którego wystawcy szukamy
+
+        Returns:
+            Lista zaufanych certyfikatów (AKI/SKI lub Subject DN)
+        """
+        aki = cert.authority_key_identifier
+        if aki and aki in self._by_ski:
+            candidates = self._by_ski[aki]
+        else:
+            candidates = self._by_subject.get(cert.issuer_hash, [])
+
+        return [c for c in candidates if c.subject == cert.issuer]
+
+    def verify_issued_by(
+        self,
+        cert: ParsedCertificate,
+        issuer: ParsedCertificate
+    ) -> bool:
+        """
+        Zweryfikuj podpis certyfikatu kluczem wystawcy
+
+        Wynik jest zapamiętywany tylko dla certyfikatów CA (intermediate).
+
+        Args:
+            cert: Certyfikat
+            issuer: Wystawca
+
+        Returns:
+            True jeśli podpis jest poprawny
+        """
+        key = (cert.fingerprint, issuer.fingerprint)
+        memoize = cert.is_ca
+
+        if memoize:
+            with self._verified_lock:
+                cached = self._verified.get(key)
+            if cached is not None:
+                return cached
+
+        try:
+            cert.cert.verify_directly_issued_by(issuer.cert)
+            ok = True
+        except Exception as e:
+            self.logger.debug(
+                f"Signature check failed: {cert.subject_str} <- {issuer.subject_str}: {e}"
+            )
+            ok = False
+
+        if memoize:
+            with self._verified_lock:
+                self._verified[key] = ok
+        return ok
+
+    def issuer_problem(
+        self,
+        issuer: ParsedCertificate,
+        intermediates_below: int
+    ) -> Optional[str]:
+        """
+        Czy certyfikat może wystawiać certyfikaty (RFC 5280, 4.2.1.3 i 4.2.1.9)
+
+        Args:
+            issuer: Kandydat na wystawcę
+            intermediates_below: Liczba certyfikatów CA między leaf a wystawcą
+
+        Returns:
+            Opis problemu lub None jeśli wystawca jest poprawny
+        """
+        constraints = issuer.basic_constraints
+
+        if constraints is None:
+            # Root X.509 v1 z trust store nie ma rozszerzeń - zaufany jawnie
+            if self.is_trusted(issuer) and issuer.version == 0:
+                return None
+            return f"Issuer is not a CA (no Basic Constraints): {issuer.common_name}"
+
+        if not constraints.ca:
+            return f"Issuer is not a CA (Basic Constraints ca=False): {issuer.common_name}"
+
+        key_usage = issuer.key_usage
+        if key_usage is not None and not key_usage.key_cert_sign:
+            return f"Issuer key usage does not allow keyCertSign: {issuer.common_name}"
+
+        if constraints.path_length is not None and intermediates_below > constraints.path_length:
+            return (
+                f"Path length constraint exceeded for {issuer.common_name} "
+                f"(pathLen {constraints.path_length})"
+            )
+
+        return None
+
+    def build_path(
+        self,
+        chain: List[ParsedCertificate],
+        now: Optional[datetime] = None
+    ) -> Tuple[List[ParsedCertificate], Optional[ParsedCertificate], List[str]]:
+        """
+        Zbuduj i zweryfikuj ścieżkę od leaf do zaufanego root
+
+        Wystawcy szukani są najpierw w trust store, potem wśród
+        certyfikatów przesłanych przez serwer (kolejność dowolna).
+
+        Args:
+            chain: Łańcuch z handshake'u (leaf pierwszy)
+            now: Aktualny czas (domyślnie teraz, UTC)
+
+        Returns:
+            (ścieżka, zaufany root lub None, błędy)
+        """
+        if not chain:
+            return [], None, ["Empty certificate chain"]
+
+        if now is None:
+            now = datetime.now(timezone.utc)
+
+        # Przesłane intermediate'y indeksowane tak samo jak trust store
+        presented: Dict[bytes, List[ParsedCertificate]] = {}
+        for cert in chain[1:]:
+            presented.setdefault(cert.subject_hash, []).append(cert)
+
+        path = [chain[0]]
+        seen = {chain[0].fingerprint}
+        errors = []
+        anchor = None
+        current = chain[0]
+
+        while len(path) <= self.MAX_DEPTH:
+            if self.is_trusted(current):
+                anchor = current
+                break
+
+            candidates = self.find_issuers(current) + [
+                c for c in presented.get(current.issuer_hash, [])
+                if c.subject == current.issuer and c.fingerprint not in seen
+            ]
+
+            # Wystawca: poprawny podpis i uprawnienia CA
+            issuer = None
+            rejected = None
+            for candidate in candidates:
+                if not self.verify_issued_by(current, candidate):
+                    continue
+
+                problem = self.issuer_problem(candidate, len(path) - 1)
+                if problem:
+                    rejected = rejected or problem
+                    continue
+
+                issuer = candidate
+                break
+
+            if issuer is None:
+                if rejected:
+                    errors.append(rejected)
+                elif current.is_self_signed:
+                    if not self.verify_issued_by(current, current):
+                        errors.append(f"Invalid self-signature: {current.common_name}")
+                    else:
+                        errors.append(
+                            f"Untrusted root certificate: {current.common_name}"
+                        )
+                elif candidates:
+                    errors.append(
+                        f"Signature verification failed for {current.common_name}"
+                    )
+                else:
+                    errors.append(
+                        f"Issuer not found for {current.common_name}: "
+                        f"{current.issuer_str}"
+                    )
+                break
+
+            path.append(issuer)
+            seen.add(issuer.fingerprint)
+            current = issuer
+        else:
+            errors.append(f"Certificate path longer than {self.MAX_DEPTH}")
+
+        # Ważność certyfikatów wystawców (leaf sprawdza CertificateChecker)
+        for cert in path[1:]:
+            if cert.valid_until < now:
+                errors.append(f"Expired CA certificate in path: {cert.common_name}")
+            elif cert.valid_from > now:
+                errors.append(f"CA certificate not yet valid: {cert.common_name}")
+
+        return path, anchor, errors
@@ -10,32 +10,65 @@ Funkcje pomocnicze używane przez inne moduły:
 - Kolorowanie CLI
 - Parsowanie dat
 - Logger setup
+- Współdzielone środowisko szablonów Jinja2
 """
 
 import os
-import yaml
+import re
+import hashlib
+import json
+import threading
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import TYPE_CHECKING, Any, Dict, Optional
 from datetime import datetime
-from colorama import Fore, Style, init as colorama_init
-from dotenv import load_dotenv
+from functools import lru_cache
 import logging
 from logging.handlers import RotatingFileHandler
 
+from settings_schema import coerce_settings
 
-# Inicjalizuj colorama
-colorama_init(autoreset=True)
+if TYPE_CHECKING:
+    # yaml, python-dotenv, jinja2 i colorama importowane dopiero przy pierwszym użyciu
+    from jinja2 import Environment, Template
+
+
+@lru_cache(maxsize=None)
+def _colors() -> Any:
+    """colorama (import i inicjalizacja przy pierwszym kolorowanym wydruku)"""
+    import colorama
+    
+    colorama.init(autoreset=True)
+    return colorama
 
 
 class ConfigLoader:
-    """Klasa do ładowania konfiguracji"""
+    """
+    Klasa do ładowania konfiguracji
+    
+    YAML parsowany jest loaderem C (libyaml), gdy jest dostępny. Wynik
+    parsowania trafia do cache na dysku (klucz: mtime i rozmiar pliku,
+    potem skrót zawartości), więc kolejne uruchomienia z niezmienionym
+    domains.yml nie parsują go od nowa (ani nie importują yaml). Cache jest
+    w JSON - odczyt nie wykonuje kodu, nawet gdy ktoś podmieni plik w
+    output/cache. Zmienne środowiskowe podstawiane są zawsze przy
+    ładowaniu - .env może się zmienić między uruchomieniami.
+    """
+    
+    # Cache sparsowanych plików (względem project_root)
+    CACHE_DIR = "output/cache/config"
     
-    def __init__(self, project_root: Optional[Path] = None):
+    # Zmiana formatu wpisu cache unieważnia stare wpisy
+    CACHE_VERSION = 2
+    
+    ENV_VAR_PATTERN = re.compile(r'\$\{([A-Za-z_][A-Za-z0-9_]*)\}')
+    
+    def __init__(self, project_root: Optional[Path] = None, use_cache: bool = True):
         """
         Inicjalizacja
         
         Args:
             project_root: Ścieżka do głównego folderu projektu
+            use_cache: Czy korzystać z cache sparsowanych plików YAML
         """
         if project_root is None:
             # Znajdź project root (folder scripts jest w głównym)
@@ -43,37 +76,147 @@ class ConfigLoader:
         else:
             self.project_root = project_root
         
+        self.use_cache = use_cache
+        self.logger = logging.getLogger(__name__)
+        
         # Załaduj .env
         env_file = self.project_root / ".env"
         if env_file.exists():
+            from dotenv import load_dotenv
             load_dotenv(env_file)
     
-    def load_yaml(self, relative_path: str) -> Dict[str, Any]:
+    def load_yaml(
+        self,
+        relative_path: str,
+        schema: Optional[Dict[str, type]] = None
+    ) -> Dict[str, Any]:
         """
         Załaduj plik YAML
         
         Args:
             relative_path: Ścieżka względem project_root
+            schema: Typy wartości (np. SETTINGS_SCHEMA) - konwersja i walidacja
         
         Returns:
             Dictionary z konfiguracją
+        
+        Raises:
+            FileNotFoundError: Brak pliku
+            ValueError: Wartość niezgodna ze schematem
         """
         file_path = self.project_root / relative_path
         
         if not file_path.exists():
             raise FileNotFoundError(f"Config file not found: {file_path}")
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            config = yaml.safe_load(f)
+        config = self._parse_yaml(file_path)
         
         # Zastąp zmienne środowiskowe
         config = self._substitute_env_vars(config)
         
+        if schema and isinstance(config, dict):
+            config = coerce_settings(config, schema)
+        
         return config
     
+    def _parse_yaml(self, file_path: Path) -> Any:
+        """
+        Sparsuj plik YAML (z cache, jeśli plik się nie zmienił)
+        
+        Args:
+            file_path: Ścieżka do pliku
+        
+        Returns:
+            Sparsowana zawartość (przed podstawieniem zmiennych)
+        """
+        if not self.use_cache:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return self._load_yaml_text(f.read())
+        
+        stat = file_path.stat()
+        cache_path = self._cache_path(file_path)
+        
+        entry = None
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            # Brak lub uszkodzony wpis - parsuj od nowa
+            pass
+        
+        if not isinstance(entry, dict) or entry.get('version') != self.CACHE_VERSION:
+            entry = None
+        
+        # Szybka ścieżka: plik nie był modyfikowany
+        if entry and (entry.get('mtime_ns'), entry.get('size')) == (stat.st_mtime_ns, stat.st_size):
+            return entry.get('data')
+        
+        with open(file_path, 'rb') as f:
+            content = f.read()
+        digest = hashlib.blake2b(content).hexdigest()
+        
+        # Ta sama zawartość, nowy mtime (np. git checkout, kopia)
+        if entry and entry.get('digest') == digest:
+            data = entry['data']
+        else:
+            data = self._load_yaml_text(content.decode('utf-8'))
+        
+        self._store_cache(cache_path, {
+            'version': self.CACHE_VERSION,
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'digest': digest,
+            'data': data
+        })
+        
+        return data
+    
+    @staticmethod
+    def _load_yaml_text(text: str) -> Any:
+        """Sparsuj YAML - loader C (libyaml, ~10x szybszy), jeśli dostępny"""
+        import yaml
+        
+        return yaml.load(text, Loader=getattr(yaml, 'CSafeLoader', yaml.SafeLoader))
+    
+    def _cache_path(self, file_path: Path) -> Path:
+        """Plik cache dla pliku YAML (nazwa + skrót pełnej ścieżki)"""
+        path_hash = hashlib.blake2b(
+            str(file_path.resolve()).encode('utf-8'), digest_size=8
+        ).hexdigest()
+        return self.project_root / self.CACHE_DIR / f"{file_path.stem}-{path_hash}.json"
+    
+    def _store_cache(self, cache_path: Path, entry: Dict[str, Any]) -> None:
+        """
+        Zapisz wpis cache atomowo (błąd zapisu nie przerywa ładowania)
+        
+        Dane, których JSON nie odtworzy wiernie (daty, klucze liczbowe),
+        nie są zapisywane - plik będzie parsowany przy każdym ładowaniu.
+        """
+        try:
+            text = json.dumps(entry, ensure_ascii=False)
+            if json.loads(text)['data'] != entry['data']:
+                raise ValueError("data does not round-trip through JSON")
+        except (TypeError, ValueError) as e:
+            self.logger.debug(f"Config cache not written: {e}")
+            return
+        
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            self.logger.debug(f"Config cache not written: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
     def _substitute_env_vars(self, obj: Any) -> Any:
         """
-        Rekurencyjnie zastąp ${VAR_NAME} zmiennymi z .env
+        Zastąp ${VAR_NAME} zmiennymi z .env (także wewnątrz tekstu)
+        
+        Struktura modyfikowana jest w miejscu, jednym przejściem -
+        przetwarzane są tylko stringi zawierające "${".
         
         Args:
             obj: Dictionary, list, lub string
@@ -81,18 +224,59 @@ class ConfigLoader:
         Returns:
             Object z podstawionymi wartościami
         """
-        if isinstance(obj, dict):
-            return {k: self._substitute_env_vars(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [self._substitute_env_vars(item) for item in obj]
-        elif isinstance(obj, str):
-            # Sprawdź czy to ${VAR_NAME}
-            if obj.startswith('${') and obj.endswith('}'):
-                var_name = obj[2:-1]
-                return os.getenv(var_name, obj)  # Zwróć wartość lub original
-            return obj
-        else:
-            return obj
+        if isinstance(obj, str):
+            return self._substitute_string(obj)
+        
+        stack = [obj] if isinstance(obj, (dict, list)) else []
+        while stack:
+            node = stack.pop()
+            items = node.items() if isinstance(node, dict) else enumerate(node)
+            
+            for key, value in items:
+                if isinstance(value, str):
+                    if '${' in value:
+                        node[key] = self._substitute_string(value)
+                elif isinstance(value, (dict, list)):
+                    stack.append(value)
+        
+        return obj
+    
+    def _substitute_string(self, value: str) -> str:
+        """
+        Podstaw zmienne w jednym stringu
+        
+        Nieustawiona zmienna zostaje jako ${VAR_NAME} (jak wcześniej).
+        
+        Args:
+            value: String z ${VAR_NAME}
+        
+        Returns:
+            String z podstawionymi wartościami
+        """
+        return self.ENV_VAR_PATTERN.sub(
+            lambda match: os.environ.get(match.group(1), match.group(0)),
+            value
+        )
+    
+    @staticmethod
+    def as_bool(value: Any) -> bool:
+        """
+        Konwertuj wartość z konfiguracji do bool
+        
+        Wartości podstawione z .env są stringami ("True", "false", "1"),
+        więc zwykłe sprawdzenie prawdziwości nie wystarcza.
+        
+        Args:
+            value: Wartość z YAML/.env
+        
+        Returns:
+            bool
+        """
+        if isinstance(value, bool):
+            return value
+        if value is None:
+            return False
+        return str(value).strip().lower() in ('true', 'yes', '1', 'on')
     
     def get_env(self, key: str, default: Any = None) -> Any:
         """
@@ -135,31 +319,40 @@ class ConfigLoader:
 class ColorPrinter:
     """Klasa do kolorowanego outputu w CLI"""
     
+    @staticmethod
+    def _print(color: str, message: str, bright: bool = False) -> None:
+        """Print w kolorze (nazwa koloru z colorama.Fore)"""
+        colorama = _colors()
+        style = colorama.Style.BRIGHT if bright else ""
+        print(f"{getattr(colorama.Fore, color)}{style}{message}{colorama.Style.RESET_ALL}")
+    
     @staticmethod
     def success(message: str) -> None:
         """Print success message (green)"""
-        print(f"{Fore.GREEN}✓ {message}{Style.RESET_ALL}")
+        ColorPrinter._print("GREEN", f"✓ {message}")
     
     @staticmethod
     def error(message: str) -> None:
         """Print error message (red)"""
-        print(f"{Fore.RED}✗ {message}{Style.RESET_ALL}")
+        ColorPrinter._print("RED", f"✗ {message}")
     
     @staticmethod
     def warning(message: str) -> None:
         """Print warning message (yellow)"""
-        print(f"{Fore.YELLOW}⚠ {message}{Style.RESET_ALL}")
+        ColorPrinter._print("YELLOW", f"⚠ {message}")
     
     @staticmethod
     def info(message: str) -> None:
         """Print info message (blue)"""
-        print(f"{Fore.BLUE}ℹ {message}{Style.RESET_ALL}")
+        ColorPrinter._print("BLUE", f"ℹ {message}")
     
     @staticmethod
     def header(message: str) -> None:
         """Print header (cyan, bold)"""
-        print(f"\n{Fore.CYAN}{Style.BRIGHT}{message}{Style.RESET_ALL}")
-        print(f"{Fore.CYAN}{'=' * len(message)}{Style.RESET_ALL}\n")
+        print()
+        ColorPrinter._print("CYAN", message, bright=True)
+        ColorPrinter._print("CYAN", '=' * len(message))
+        print()
     
     @staticmethod
     def status_line(
@@ -177,27 +370,22 @@ class ColorPrinter:
         """
         # Wybierz kolor i symbol
         if status == "OK":
-            color = Fore.GREEN
+            color = "GREEN"
             symbol = "✓"
         elif status == "WARNING":
-            color = Fore.YELLOW
+            color = "YELLOW"
             symbol = "⚠"
         elif status == "CRITICAL":
-            color = Fore.RED
+            color = "RED"
             symbol = "⚠"
         elif status == "EXPIRED":
-            color = Fore.RED
+            color = "RED"
             symbol = "✗"
         else:
-            color = Fore.WHITE
+            color = "WHITE"
             symbol = "?"
         
-        # Format
-        print(
-            f"{color}{symbol} {hostname:30} "
-            f"{days:>4} days    "
-            f"{status}{Style.RESET_ALL}"
-        )
+        ColorPrinter._print(color, f"{symbol} {hostname:30} {days:>4} days    {status}")
 
 
 class DateFormatter:
@@ -256,6 +444,8 @@ class DateFormatter:
         Returns:
             Colorama color code
         """
+        Fore = _colors().Fore
+        
         if days < 0:
             return Fore.RED  # Expired
         elif days <= 7:
@@ -389,6 +579,83 @@ class FileUtils:
             f.write(content)
 
 
+class TemplateRenderer:
+    """
+    Współdzielone środowiska Jinja2 - jedno na katalog szablonów
+    
+    Szablon jest kompilowany raz na proces (cache w Environment) i ponownie
+    tylko po zmianie pliku (auto_reload sprawdza mtime). Skompilowany
+    bytecode trafia do FileSystemBytecodeCache, więc kolejne uruchomienia
+    też nie kompilują od zera.
+    """
+    
+    # Katalog bytecode cache (None = domyślny katalog tymczasowy użytkownika)
+    bytecode_cache_dir: Optional[Path] = None
+    
+    _environments: Dict[Path, 'Environment'] = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get_environment(cls, directory: Path) -> 'Environment':
+        """
+        Pobierz (lub utwórz) Environment dla katalogu szablonów
+        
+        Args:
+            directory: Katalog z szablonami
+        
+        Returns:
+            jinja2.Environment
+        """
+        directory = Path(directory).resolve()
+        
+        with cls._lock:
+            env = cls._environments.get(directory)
+            if env is None:
+                from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+                
+                if cls.bytecode_cache_dir:
+                    FileUtils.ensure_directory(cls.bytecode_cache_dir)
+                    bytecode_cache = FileSystemBytecodeCache(str(cls.bytecode_cache_dir))
+                else:
+                    bytecode_cache = FileSystemBytecodeCache()
+                
+                env = Environment(
+                    loader=FileSystemLoader(str(directory)),
+                    auto_reload=True,
+                    bytecode_cache=bytecode_cache
+                )
+                cls._environments[directory] = env
+            return env
+    
+    @classmethod
+    def get_template(cls, template_path: Path) -> 'Template':
+        """
+        Pobierz skompilowany szablon
+        
+        Args:
+            template_path: Ścieżka do pliku szablonu
+        
+        Returns:
+            jinja2.Template
+        """
+        template_path = Path(template_path)
+        return cls.get_environment(template_path.parent).get_template(template_path.name)
+    
+    @classmethod
+    def render(cls, template_path: Path, **context: Any) -> str:
+        """
+        Wyrenderuj szablon
+        
+        Args:
+            template_path: Ścieżka do pliku szablonu
+            **context: Zmienne dla szablonu
+        
+        Returns:
+            Wyrenderowany tekst
+        """
+        return cls.get_template(template_path).render(**context)
+
+
 # Przykład użycia
 if __name__ == "__main__":
     # Config loader
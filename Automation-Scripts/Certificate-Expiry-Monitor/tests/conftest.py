@@ -0,0 +1,9 @@
+"""Wspólna konfiguracja testów - moduły ze scripts/ importowane bezpośrednio"""
+
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+sys.path.insert(0, str(ROOT / "scripts"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
@@ -0,0 +1,332 @@
+"""
+Lokalne zamienniki usług do testów: certyfikaty testowego CA,
+serwer HTTP (responder OCSP / dystrybucja CRL, webhooki), serwer SMTP
+i serwer TLS (z dialogiem STARTTLS) w wątkach
+"""
+
+import socketserver
+import ssl
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, List, Optional, Tuple
+
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+
+def make_ca(name: str = "Test Root CA"):
+    """Samopodpisany certyfikat CA i jego klucz"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    subject = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, name)])
+    now = datetime.now(timezone.utc)
+
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(subject)
+        .issuer_name(subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=3650))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    return cert, key
+
+
+def make_leaf(ca, ca_key, common_name: str = "localhost", days: int = 90, extensions=()):
+    """Certyfikat serwera wystawiony przez ca"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    now = datetime.now(timezone.utc)
+
+    builder = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)]))
+        .issuer_name(ca.subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=days))
+        .add_extension(x509.SubjectAlternativeName([x509.DNSName(common_name)]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=False, path_length=None), critical=True)
+    )
+    for extension in extensions:
+        builder = builder.add_extension(extension, critical=False)
+
+    return builder.sign(ca_key, hashes.SHA256()), key
+
+
+def make_intermediate(ca, ca_key, common_name: str = "Test Intermediate CA",
+                      path_length=None, key_usage: bool = True):
+    """Certyfikat pośredniego CA (key_usage=False - keyUsage bez keyCertSign)"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    now = datetime.now(timezone.utc)
+
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, common_name)]))
+        .issuer_name(ca.subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(days=1))
+        .not_valid_after(now + timedelta(days=1825))
+        .add_extension(x509.BasicConstraints(ca=True, path_length=path_length), critical=True)
+        .add_extension(
+            x509.KeyUsage(
+                digital_signature=not key_usage, content_commitment=False,
+                key_encipherment=False, data_encipherment=False, key_agreement=False,
+                key_cert_sign=key_usage, crl_sign=key_usage,
+                encipher_only=False, decipher_only=False
+            ),
+            critical=True
+        )
+        .sign(ca_key, hashes.SHA256())
+    )
+    return cert, key
+
+
+def to_der(cert) -> bytes:
+    return cert.public_bytes(serialization.Encoding.DER)
+
+
+def write_pem_pair(directory, cert_chain: List, key) -> Tuple[str, str]:
+    """Zapisz łańcuch i klucz jako PEM (dla ssl.SSLContext.load_cert_chain)"""
+    cert_file = directory / "cert.pem"
+    key_file = directory / "key.pem"
+
+    cert_file.write_bytes(b"".join(c.public_bytes(serialization.Encoding.PEM) for c in cert_chain))
+    key_file.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ))
+    return str(cert_file), str(key_file)
+
+
+class HttpStandIn:
+    """
+    Serwer HTTP na 127.0.0.1 w wątku
+
+    handler(method, path, body) -> (status, headers, body); każde
+    zapytanie trafia do requests (method, path, body).
+    """
+
+    def __init__(self, handler: Callable[[str, str, bytes], Tuple[int, dict, bytes]]):
+        self.handler = handler
+        self.requests: List[Tuple[str, str, bytes]] = []
+        self._lock = threading.Lock()
+
+        stand_in = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+
+                with stand_in._lock:
+                    stand_in.requests.append((self.command, self.path, body))
+
+                status, headers, payload = stand_in.handler(self.command, self.path, body)
+
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = _serve
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def count(self, method: Optional[str] = None, path: Optional[str] = None) -> int:
+        with self._lock:
+            return sum(
+                1 for m, p, _ in self.requests
+                if (method is None or m == method) and (path is None or p == path)
+            )
+
+    def __enter__(self) -> "HttpStandIn":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def cert_info(hostname: str, days_remaining: int = 10, alert_level: str = "WARNING", port: int = 443):
+    """CertificateInfo bez handshake'u (alerty, raporty)"""
+    from cert_checker import CertificateInfo
+
+    now = datetime.now(timezone.utc)
+    return CertificateInfo(
+        hostname=hostname,
+        port=port,
+        protocol="https",
+        subject=f"CN={hostname}",
+        issuer="CN=Test Root CA",
+        common_name=hostname,
+        organization=None,
+        valid_from=now - timedelta(days=30),
+        valid_until=now + timedelta(days=days_remaining),
+        days_remaining=days_remaining,
+        is_valid=days_remaining >= 0,
+        is_expired=days_remaining < 0,
+        is_self_signed=False,
+        serial_number="01",
+        version=3,
+        signature_algorithm="sha256",
+        public_key_algorithm="ECPublicKey",
+        key_size=256,
+        san_domains=[hostname],
+        has_wildcard=False,
+        fingerprint=f"fp-{hostname}",
+        alert_level=alert_level,
+    )
+
+
+class SmtpStandIn:
+    """
+    Minimalny serwer SMTP (bez TLS) na 127.0.0.1 w wątku
+
+    Zapisuje liczbę połączeń, logowań (AUTH) i wiadomości
+    (nadawca, odbiorcy, treść). reject_rcpt - adresy odrzucane w RCPT.
+    """
+
+    def __init__(self, reject_rcpt=()):
+        self.connections = 0
+        self.logins = 0
+        self.messages: List[Tuple[str, List[str], str]] = []
+        self.reject_rcpt = set(reject_rcpt)
+        self._lock = threading.Lock()
+
+        stand_in = self
+
+        class _Handler(socketserver.StreamRequestHandler):
+            def _reply(self, line):
+                self.wfile.write((line + "\r\n").encode())
+
+            def handle(self):
+                with stand_in._lock:
+                    stand_in.connections += 1
+
+                self._reply("220 localhost ESMTP stand-in")
+                sender, recipients = None, []
+
+                while True:
+                    line = self.rfile.readline().decode("utf-8", "replace").strip()
+                    if not line:
+                        return
+
+                    command = line.split(" ", 1)[0].upper()
+
+                    if command == "EHLO":
+                        self._reply("250-localhost")
+                        self._reply("250 AUTH PLAIN LOGIN")
+                    elif command == "AUTH":
+                        with stand_in._lock:
+                            stand_in.logins += 1
+                        self._reply("235 Authentication successful")
+                    elif command == "MAIL":
+                        sender, recipients = line[10:].strip("<> "), []
+                        self._reply("250 OK")
+                    elif command == "RCPT":
+                        address = line[8:].strip("<> ")
+                        if address in stand_in.reject_rcpt:
+                            self._reply("550 No such user")
+                        else:
+                            recipients.append(address)
+                            self._reply("250 OK")
+                    elif command == "DATA":
+                        self._reply("354 End data with <CR><LF>.<CR><LF>")
+                        body = []
+                        while True:
+                            data = self.rfile.readline().decode("utf-8", "replace")
+                            if data.rstrip("\r\n") == ".":
+                                break
+                            body.append(data)
+                        with stand_in._lock:
+                            stand_in.messages.append((sender, recipients, "".join(body)))
+                        self._reply("250 OK")
+                    elif command == "QUIT":
+                        self._reply("221 Bye")
+                        return
+                    else:
+                        self._reply("250 OK")
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "SmtpStandIn":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class TlsStandIn:
+    """
+    Serwer TLS na 127.0.0.1 w wątku
+
+    dialog(sock) - opcjonalny dialog STARTTLS na czystym gnieździe przed
+    handshake'iem (wyjątek w dialogu zamyka połączenie bez TLS).
+    """
+
+    def __init__(self, directory, cert_chain: List, key, dialog: Optional[Callable] = None):
+        cert_file, key_file = write_pem_pair(directory, cert_chain, key)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_file, key_file)
+        self.handshakes = 0
+        self._lock = threading.Lock()
+
+        stand_in = self
+
+        class _Handler(socketserver.BaseRequestHandler):
+            def handle(self):
+                try:
+                    if dialog:
+                        dialog(self.request)
+                    with context.wrap_socket(self.request, server_side=True) as tls:
+                        with stand_in._lock:
+                            stand_in.handshakes += 1
+                        tls.recv(1)
+                except (OSError, ValueError, AssertionError):
+                    pass
+
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "TlsStandIn":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def read_line(sock) -> bytes:
+    """Odczytaj jedną linię z gniazda (dialogi STARTTLS po stronie serwera)"""
+    line = b""
+    while not line.endswith(b"\n"):
+        data = sock.recv(1)
+        if not data:
+            break
+        line += data
+    return line
@@ -0,0 +1,169 @@
+"""Testy wysyłki alertów na lokalnym serwerze SMTP i HTTP (webhooki)"""
+
+import time
+
+import pytest
+
+from alerting import AlertDispatcher, EmailAlerter, SlackAlerter, TeamsAlerter, WebhookClient
+from support import HttpStandIn, SmtpStandIn, cert_info
+
+
+def _email_alerter(smtp):
+    return EmailAlerter(
+        smtp_host="127.0.0.1",
+        smtp_port=smtp.port,
+        smtp_username="monitor",
+        smtp_password="secret",
+        from_address="cert-monitor@example.test",
+        use_tls=False
+    )
+
+
+def _ok(method, path, body):
+    return 200, {}, b"ok"
+
+
+@pytest.fixture
+def smtp():
+    with SmtpStandIn() as smtp:
+        yield smtp
+
+
+@pytest.fixture
+def alert_certs():
+    return {
+        f"host{i}.test:443": cert_info(f"host{i}.test", days_remaining=5 + i)
+        for i in range(4)
+    }
+
+
+def test_one_smtp_login_and_one_digest_per_recipient(smtp, alert_certs):
+    keys = list(alert_certs)
+    recipients = {
+        keys[0]: ["ops@example.test", "web@example.test"],
+        keys[1]: ["ops@example.test"],
+        keys[2]: ["ops@example.test", "web@example.test"],
+        keys[3]: ["db@example.test"],
+    }
+
+    result = AlertDispatcher(email_alerter=_email_alerter(smtp)).dispatch(alert_certs, recipients)
+
+    assert result.stats == {"email": (3, 0)}
+    assert result.delivered_keys() == set(alert_certs)
+    assert smtp.connections == 1
+    assert smtp.logins == 1
+
+    delivered = [address for _, addresses, _ in smtp.messages for address in addresses]
+    assert sorted(delivered) == ["db@example.test", "ops@example.test", "web@example.test"]
+
+    # ops dostaje digest z trzema certyfikatami, db pojedynczy alert
+    by_recipient = {addresses[0]: body for _, addresses, body in smtp.messages}
+    assert all(f"host{i}.test" in by_recipient["ops@example.test"] for i in range(3))
+    assert "host3.test" not in by_recipient["ops@example.test"]
+    assert "host3.test" in by_recipient["db@example.test"]
+
+
+def test_recipients_with_same_certificates_share_one_message(smtp, alert_certs):
+    recipients = {key: ["a@example.test", "b@example.test"] for key in alert_certs}
+
+    result = AlertDispatcher(email_alerter=_email_alerter(smtp)).dispatch(alert_certs, recipients)
+
+    assert result.stats == {"email": (1, 0)}
+    assert len(smtp.messages) == 1
+    assert sorted(smtp.messages[0][1]) == ["a@example.test", "b@example.test"]
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_webhook_retries_with_backoff(status):
+    attempts = []
+
+    def handler(method, path, body):
+        attempts.append(time.monotonic())
+        if len(attempts) <= 2:
+            return status, {}, b"busy"
+        return 200, {}, b"ok"
+
+    with HttpStandIn(handler) as http:
+        client = WebhookClient(max_retries=3, backoff_seconds=0.1)
+        response = client.post(http.url + "/hook", {"text": "test"})
+
+    assert response.status_code == 200
+    assert len(attempts) == 3
+    # Backoff 0.1 * 2**attempt * [0.5, 1.5): co najmniej 0.05 + 0.1
+    assert attempts[2] - attempts[0] >= 0.15
+
+
+def test_webhook_honours_retry_after_and_gives_up():
+    with HttpStandIn(lambda method, path, body: (429, {"Retry-After": "0.2"}, b"slow down")) as http:
+        client = WebhookClient(max_retries=2, backoff_seconds=30)
+        started = time.monotonic()
+        response = client.post(http.url + "/hook", {"text": "test"})
+        elapsed = time.monotonic() - started
+
+    assert response.status_code == 429
+    assert http.count("POST") == 3
+    # Retry-After zastępuje backoff (30 s)
+    assert 0.4 <= elapsed < 5
+
+
+def test_webhook_rate_limit():
+    with HttpStandIn(_ok) as http:
+        client = WebhookClient(rate_limit_per_second=20, burst=1)
+        started = time.monotonic()
+        for _ in range(10):
+            client.post(http.url + "/hook", {"text": "test"})
+        elapsed = time.monotonic() - started
+
+    assert http.count("POST") == 10
+    # Pierwszy token od razu, kolejne 9 co 1/20 s
+    assert elapsed >= 0.45
+
+
+def test_dispatch_counts_failed_webhooks_per_channel(alert_certs):
+    def handler(method, path, body):
+        if path == "/slack" and b"host0.test" in body:
+            return 400, {}, b"invalid_payload"
+        return 200, {}, b"ok"
+
+    with HttpStandIn(handler) as http:
+        client = WebhookClient(max_retries=0)
+        dispatcher = AlertDispatcher(
+            slack_alerter=SlackAlerter(http.url + "/slack", client=client),
+            teams_alerter=TeamsAlerter(http.url + "/teams", client=client)
+        )
+        result = dispatcher.dispatch(alert_certs, recipients={})
+
+    assert result.stats == {"slack": (3, 1), "teams": (4, 0)}
+    assert http.count("POST", "/slack") == 4
+    assert http.count("POST", "/teams") == 4
+
+    # host0 nie dotarł na Slack, ale dotarł przez Teams
+    assert result.delivered["slack"] == set(alert_certs) - {"host0.test:443"}
+    assert result.delivered_keys() == set(alert_certs)
+
+
+def test_only_delivered_certificates_are_reported(alert_certs):
+    keys = list(alert_certs)
+    recipients = {
+        keys[0]: ["ops@example.test"],
+        keys[1]: ["ops@example.test", "gone@example.test"],
+        keys[2]: ["gone@example.test"],
+    }
+
+    def handler(method, path, body):
+        if b"host3.test" in body:
+            return 500, {}, b"error"
+        return 200, {}, b"ok"
+
+    with SmtpStandIn(reject_rcpt={"gone@example.test"}) as smtp, HttpStandIn(handler) as http:
+        dispatcher = AlertDispatcher(
+            email_alerter=_email_alerter(smtp),
+            slack_alerter=SlackAlerter(http.url + "/slack", client=WebhookClient(max_retries=0))
+        )
+        result = dispatcher.dispatch({k: alert_certs[k] for k in keys}, recipients)
+
+    # Wiadomość do gone@ odrzucona - host1 nie dotarł do wszystkich odbiorców
+    assert result.stats["email"] == (1, 1)
+    assert result.delivered["email"] == {keys[0]}
+    assert result.delivered["slack"] == {keys[0], keys[1], keys[2]}
+    assert result.delivered_keys() == {keys[0], keys[1], keys[2]}
@@ -0,0 +1,97 @@
+"""Testy ponowień i circuit breakera w ścieżce sprawdzania (wszystkie silniki)"""
+
+import socket
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from cert_checker import CertificateChecker
+from circuit_breaker import CircuitBreaker
+from support import TlsStandIn, make_ca, make_leaf
+
+ENGINES = ["single", "threads", "async"]
+
+
+def _closed_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _counting(checker):
+    """Licz połączenia (próby) w ścieżce blokującej i asyncio"""
+    attempts = []
+    fetch, fetch_async = checker._get_certificate_chain_der, checker._get_certificate_chain_der_async
+
+    def counted(*args, **kwargs):
+        attempts.append(time.monotonic())
+        return fetch(*args, **kwargs)
+
+    def counted_async(*args, **kwargs):
+        attempts.append(time.monotonic())
+        return fetch_async(*args, **kwargs)
+
+    checker._get_certificate_chain_der = counted
+    checker._get_certificate_chain_der_async = counted_async
+    return attempts
+
+
+def _check(checker, host, engine):
+    if engine == "single":
+        return checker.check_certificate(*host)
+    key = f"{host[0]}:{host[1]}"
+    if engine == "async":
+        return checker.check_multiple_hosts_async([host])[key]
+    return checker.check_multiple_hosts([host])[key]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_unreachable_host_is_retried(engine):
+    checker = CertificateChecker(timeout=2, retry_attempts=3, retry_delay=0.01)
+    attempts = _counting(checker)
+
+    cert_info = _check(checker, ("127.0.0.1", _closed_port(), "https"), engine)
+
+    assert cert_info.error
+    assert len(attempts) == 3
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_half_open_host_gets_one_attempt(engine):
+    port = _closed_port()
+    key = f"127.0.0.1:{port}"
+    breaker = CircuitBreaker(failure_threshold=1, open_hours=1)
+    breaker.record_failure(key, "refused", now=datetime.now(timezone.utc) - timedelta(hours=2))
+    assert breaker.is_half_open(key)
+
+    checker = CertificateChecker(timeout=2, retry_attempts=3, retry_delay=0.01, breaker=breaker)
+    attempts = _counting(checker)
+
+    cert_info = _check(checker, ("127.0.0.1", port, "https"), engine)
+
+    assert cert_info.error
+    assert len(attempts) == 1
+    # Nieudana próba kontrolna otwiera breaker ponownie
+    assert breaker.failures(key) == 2
+    assert not breaker.allow(key)
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_starttls_stall_does_not_trip_breaker(tmp_path, engine):
+    ca, ca_key = make_ca()
+    leaf, key = make_leaf(ca, ca_key, "localhost")
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    with TlsStandIn(tmp_path, [leaf, ca], key, lambda sock: time.sleep(2)) as server:
+        checker = CertificateChecker(
+            timeout=5, starttls_timeout=0.3, retry_attempts=3, retry_delay=0.01, breaker=breaker
+        )
+        attempts = _counting(checker)
+        cert_info = _check(checker, ("localhost", server.port, "imap"), engine)
+
+    # Host przyjął połączenie - zastój protokołu jak timeout handshake'u:
+    # bez ponowień i bez porażki w breakerze
+    assert "timed out" in cert_info.error
+    assert len(attempts) == 1
+    assert breaker.failures(f"localhost:{server.port}") == 0
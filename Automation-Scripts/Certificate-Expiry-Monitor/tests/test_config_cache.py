@@ -0,0 +1,68 @@
+"""Testy cache sparsowanych plików YAML (ConfigLoader)"""
+
+import json
+import os
+
+import pytest
+
+from utils import ConfigLoader
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "domains.yml").write_text(
+        "hosts:\n  - hostname: example.com\n    port: 443\n    notify: ${ALERT_TO}\n",
+        encoding="utf-8"
+    )
+    return tmp_path
+
+
+def _cache_files(project):
+    return list((project / ConfigLoader.CACHE_DIR).glob("*"))
+
+
+def test_cache_is_json_and_reused(project, monkeypatch):
+    monkeypatch.setenv("ALERT_TO", "ops@example.test")
+
+    first = ConfigLoader(project).load_yaml("config/domains.yml")
+    files = _cache_files(project)
+    assert [f.suffix for f in files] == [".json"]
+
+    entry = json.loads(files[0].read_text(encoding="utf-8"))
+    assert entry["data"]["hosts"][0]["notify"] == "${ALERT_TO}"
+
+    # Drugie ładowanie z cache (yaml nie jest potrzebny)
+    monkeypatch.setattr(ConfigLoader, "_load_yaml_text", staticmethod(pytest.fail))
+    assert ConfigLoader(project).load_yaml("config/domains.yml") == first
+    assert first["hosts"][0]["notify"] == "ops@example.test"
+
+
+def test_tampered_cache_is_ignored(project):
+    loader = ConfigLoader(project)
+    expected = loader.load_yaml("config/domains.yml")
+
+    for path in _cache_files(project):
+        path.write_bytes(b"\x80\x04\x95 not json")
+
+    assert ConfigLoader(project).load_yaml("config/domains.yml") == expected
+
+
+def test_changed_file_is_parsed_again(project):
+    ConfigLoader(project).load_yaml("config/domains.yml")
+
+    path = project / "config" / "domains.yml"
+    path.write_text("hosts: []\n", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    assert ConfigLoader(project).load_yaml("config/domains.yml") == {"hosts": []}
+
+
+def test_data_that_json_cannot_represent_is_not_cached(project):
+    (project / "config" / "dated.yml").write_text("1: 2026-01-01\n", encoding="utf-8")
+
+    config = ConfigLoader(project).load_yaml("config/dated.yml")
+
+    assert list(config) == [1]
+    assert not any(f.name.startswith("dated-") for f in _cache_files(project))
@@ -0,0 +1,62 @@
+"""Testy skanera plików z certyfikatami (FileScanner)"""
+
+import multiprocessing
+import os
+
+import pytest
+
+import file_scanner
+from file_scanner import FileScanner
+from support import make_ca, make_leaf, to_der, write_pem_pair
+
+
+@pytest.fixture(scope="module")
+def tree(tmp_path_factory):
+    root = tmp_path_factory.mktemp("certs")
+    ca, ca_key = make_ca()
+
+    for i in range(12):
+        leaf, key = make_leaf(ca, ca_key, f"host{i}.test", days=30 + i)
+        directory = root / f"site{i % 3}" / f"host{i}"
+        directory.mkdir(parents=True)
+        if i % 2:
+            (directory / "cert.der").write_bytes(to_der(leaf))
+        else:
+            write_pem_pair(directory, [leaf, ca], key)
+
+    (root / "site0" / "notes.txt").write_text("no certificates here")
+    return root
+
+
+def _dying_batch(paths):
+    """Zamiennik _scan_batch - proces roboczy kończy się bez wyniku"""
+    os._exit(1)
+
+
+_dying_batch.__module__ = "file_scanner"
+_dying_batch.__qualname__ = "_scan_batch"
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_scan_finds_pem_and_der(tree, workers):
+    results = FileScanner(workers=workers, batch_size=2).scan([tree])
+
+    # 6 plików PEM (leaf + CA) i 6 plików DER
+    assert len(results) == 18
+    assert sum(1 for c in results.values() if c.protocol == "der") == 6
+    assert {c.common_name for c in results.values()} >= {f"host{i}.test" for i in range(12)}
+    assert all(c.error is None for c in results.values())
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="procesy robocze muszą dziedziczyć podmieniony _scan_batch"
+)
+def test_scan_survives_dead_workers(tree, monkeypatch):
+    monkeypatch.setattr(file_scanner, "_scan_batch", _dying_batch)
+
+    scanner = FileScanner(workers=2, batch_size=1)
+    results = scanner.scan([tree])
+
+    assert len(results) == 18
+    assert scanner.stats["certificates"] == 18
@@ -0,0 +1,41 @@
+"""Testy historii wyników: dopisywanie tylko zmian i próbka dzienna"""
+
+from datetime import datetime, timedelta, timezone
+
+from history_store import HistoryStore
+from support import cert_info
+
+
+def _run(hosts):
+    return [cert_info(name, days_remaining=40, alert_level="OK") for name in hosts]
+
+
+def test_without_changes_every_result_is_appended(tmp_path):
+    store = HistoryStore(tmp_path)
+    results = _run(["a.test", "b.test"])
+
+    assert store.append(results) == 2
+    assert store.append(results) == 2
+
+
+def test_unchanged_hosts_are_sampled_once_a_day(tmp_path):
+    store = HistoryStore(tmp_path)
+    now = datetime(2026, 3, 2, 8, tzinfo=timezone.utc)
+    results = _run(["a.test", "b.test", "c.test"])
+
+    # Pierwszy przebieg dnia - wszystkie hosty
+    assert store.append(results, now=now, changed=[]) == 3
+    # Kolejne przebiegi - tylko zmienione
+    assert store.append(results, now=now + timedelta(hours=4), changed=["b.test:443"]) == 1
+    assert store.append(results, now=now + timedelta(hours=8), changed=[]) == 0
+
+    # Nowa instancja (kolejne uruchomienie) zna hosty z partycji dnia
+    store = HistoryStore(tmp_path)
+    assert store.append(results, now=now + timedelta(hours=12), changed=[]) == 0
+
+    # Następny dzień - znów pełna próbka
+    assert store.append(results, now=now + timedelta(days=1), changed=[]) == 3
+
+    trend = store.days_remaining_trend()["untagged"]
+    assert [(day["date"], day["hosts"]) for day in trend] == [("2026-03-02", 3), ("2026-03-03", 3)]
+    assert set(store.latest()) == {"a.test:443", "b.test:443", "c.test:443"}
@@ -0,0 +1,41 @@
+"""Testy leniwych importów: --help i import main nie ładują ciężkich zależności"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+
+SCRIPTS = Path(__file__).resolve().parent.parent / "scripts"
+
+# Ładowane dopiero przy sprawdzaniu, wysyłce alertów, raportach lub kolorowym wydruku
+HEAVY_MODULES = ("colorama", "cryptography", "OpenSSL", "requests", "jinja2", "smtplib", "yaml")
+
+
+def _loaded_after(code):
+    probe = (
+        f"import sys\n{code}\n"
+        f"print('loaded:' + ','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=SCRIPTS, capture_output=True, text=True, timeout=60, check=True
+    )
+    loaded = result.stdout.rsplit("loaded:", 1)[1].strip()
+    return loaded.split(",") if loaded else []
+
+
+def test_import_main_is_light():
+    assert _loaded_after("import main") == []
+
+
+def test_help_is_light():
+    code = (
+        "import main\n"
+        "sys.argv = ['main.py', '--help']\n"
+        "try:\n    main.main()\nexcept SystemExit:\n    pass"
+    )
+    assert _loaded_after(code) == []
+
+
+def test_colorama_imported_on_first_colored_print():
+    assert _loaded_after("from utils import ColorPrinter\nColorPrinter.success('ok')") == ["colorama"]
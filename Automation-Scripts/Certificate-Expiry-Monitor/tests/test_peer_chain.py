@@ -0,0 +1,76 @@
+"""Testy odczytu łańcucha certyfikatów z połączenia stdlib (publiczne / prywatne API)"""
+
+import asyncio
+import logging
+
+import pytest
+
+import cert_checker
+from cert_checker import CertificateChecker
+from support import TlsStandIn, make_ca, make_intermediate, make_leaf, to_der
+
+
+class SslObjectStandIn:
+    """Połączenie SSL bez _sslobj - jak po zmianie prywatnego API"""
+
+    def __init__(self, leaf_der, chain=None):
+        self.leaf_der = leaf_der
+        self.chain = chain
+
+    def get_unverified_chain(self):
+        return self.chain
+
+    def getpeercert(self, binary_form=False):
+        return self.leaf_der
+
+
+@pytest.fixture
+def chain():
+    ca, ca_key = make_ca()
+    intermediate, intermediate_key = make_intermediate(ca, ca_key)
+    leaf, key = make_leaf(intermediate, intermediate_key, "localhost", days=40)
+    return [leaf, intermediate], key
+
+
+@pytest.fixture(autouse=True)
+def fresh_log_once():
+    cert_checker._log_once.cache_clear()
+    yield
+    cert_checker._log_once.cache_clear()
+
+
+@pytest.mark.parametrize("engine", ["sync", "async"])
+def test_chain_sent_by_server_is_read(chain, tmp_path, engine):
+    certs, key = chain
+    checker = CertificateChecker(timeout=5)
+
+    with TlsStandIn(tmp_path, certs, key) as server:
+        if engine == "async":
+            chain_der = asyncio.run(
+                checker._get_certificate_chain_der_async("localhost", server.port)
+            )
+        else:
+            chain_der = checker._get_certificate_chain_der("localhost", server.port, "https")
+
+    assert chain_der == [to_der(cert) for cert in certs]
+
+
+def test_public_api_is_used_when_available(chain, monkeypatch):
+    certs, _ = chain
+    der = [to_der(cert) for cert in certs]
+    monkeypatch.setattr(cert_checker, "_PUBLIC_CHAIN", True)
+
+    assert CertificateChecker._peer_chain_der(SslObjectStandIn(der[0], der)) == der
+
+
+def test_private_api_failure_falls_back_to_leaf_and_logs_once(chain, monkeypatch, caplog):
+    certs, _ = chain
+    leaf_der = to_der(certs[0])
+    monkeypatch.setattr(cert_checker, "_PUBLIC_CHAIN", False)
+
+    with caplog.at_level(logging.WARNING, logger="cert_checker"):
+        for _ in range(3):
+            assert CertificateChecker._peer_chain_der(SslObjectStandIn(leaf_der)) == [leaf_der]
+
+    warnings = [r for r in caplog.records if "Private ssl API" in r.getMessage()]
+    assert len(warnings) == 1
@@ -0,0 +1,65 @@
+"""Testy strumieniowego zapisu raportów (ReportStream)"""
+
+import builtins
+import json
+
+import pytest
+
+import reporting
+from reporting import ReportGenerator, ReportStream
+from support import cert_info
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    """Pliki otwarte przez moduł reporting (do sprawdzenia, czy są zamknięte)"""
+    handles = []
+
+    def tracking_open(*args, **kwargs):
+        f = builtins.open(*args, **kwargs)
+        handles.append(f)
+        return f
+
+    monkeypatch.setattr(reporting, "open", tracking_open, raising=False)
+    return handles
+
+
+def test_all_formats_are_written(tmp_path):
+    stream = ReportStream(ReportGenerator(tmp_path), ["csv", "ndjson", "json", "html"])
+    stream.write(cert_info("b.test", days_remaining=40))
+    stream.write(cert_info("a.test", days_remaining=5))
+    paths = stream.close()
+
+    assert set(paths) == {"csv", "ndjson", "json", "html"}
+    report = json.loads(paths["json"].read_text(encoding="utf-8"))
+    assert report["total_certificates"] == 2
+    assert len(paths["ndjson"].read_text(encoding="utf-8").splitlines()) == 2
+
+    # HTML posortowany po days_remaining
+    html = paths["html"].read_text(encoding="utf-8")
+    assert html.index("a.test") < html.index("b.test")
+
+
+def test_failed_open_closes_files_opened_before(tmp_path, opened):
+    # Katalog w miejscu pliku JSON - open() zawodzi po otwarciu CSV i NDJSON
+    (tmp_path / "report.json").mkdir()
+    filenames = {"csv": "report.csv", "ndjson": "report.ndjson", "json": "report.json"}
+
+    with pytest.raises(OSError):
+        ReportStream(ReportGenerator(tmp_path), ["csv", "ndjson", "json"], filenames)
+
+    assert len(opened) == 2
+    assert all(f.closed for f in opened)
+
+
+def test_failed_html_buffer_closes_report_files(tmp_path, opened, monkeypatch):
+    def no_space(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+
+    monkeypatch.setattr(reporting.tempfile, "TemporaryFile", no_space)
+
+    with pytest.raises(OSError, match="No space"):
+        ReportStream(ReportGenerator(tmp_path), ["csv", "json", "html"])
+
+    assert len(opened) == 2
+    assert all(f.closed for f in opened)
@@ -0,0 +1,270 @@
+"""Testy RevocationChecker na lokalnym responderze OCSP i serwerze CRL"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.x509 import ocsp
+from cryptography.x509.oid import ExtendedKeyUsageOID
+
+from cert_model import ParsedCertificate
+from revocation import RevocationChecker
+from support import HttpStandIn, make_ca, make_leaf, to_der
+
+
+def _crl_extension(url):
+    return x509.CRLDistributionPoints([
+        x509.DistributionPoint([x509.UniformResourceIdentifier(url)], None, None, None)
+    ])
+
+
+def _ocsp_extension(url):
+    return x509.AuthorityInformationAccess([
+        x509.AccessDescription(
+            x509.AuthorityInformationAccessOID.OCSP, x509.UniformResourceIdentifier(url)
+        )
+    ])
+
+
+def _parsed(cert):
+    return ParsedCertificate(to_der(cert))
+
+
+class Pki:
+    """CA, responder OCSP i CRL na jednym lokalnym serwerze HTTP"""
+
+    def __init__(self):
+        self.ca, self.ca_key = make_ca()
+        self.revoked_serials = set()
+        self.crl_next_update = timedelta(days=1)
+        self.ocsp_this_update = timedelta(0)
+        self.ocsp_next_update = timedelta(hours=2)
+        # Odpowiedź OCSP dotycząca innego certyfikatu (serial -> certyfikat)
+        self.ocsp_substitute = {}
+        # Delegowany responder OCSP (certyfikat, klucz) zamiast CA
+        self.responder = None
+        self.certificates = {}
+        self.http = HttpStandIn(self._handle)
+
+    def leaf(self, name, revoked=False, via="crl"):
+        url = f"{self.http.url}/{via}"
+        extension = _crl_extension(url + "/ca.crl") if via == "crl" else _ocsp_extension(url)
+        cert, _ = make_leaf(self.ca, self.ca_key, name, extensions=[extension])
+        self.certificates[cert.serial_number] = cert
+        if revoked:
+            self.revoked_serials.add(cert.serial_number)
+        return _parsed(cert)
+
+    def delegate_ocsp(self, days=30):
+        eku = x509.ExtendedKeyUsage([ExtendedKeyUsageOID.OCSP_SIGNING])
+        self.responder = make_leaf(self.ca, self.ca_key, "ocsp.test", days=days, extensions=[eku])
+
+    @property
+    def issuer(self):
+        return _parsed(self.ca)
+
+    def _handle(self, method, path, body):
+        now = datetime.now(timezone.utc)
+
+        if method == "GET":
+            builder = (
+                x509.CertificateRevocationListBuilder()
+                .issuer_name(self.ca.subject)
+                .last_update(now - timedelta(days=2))
+                .next_update(now + self.crl_next_update)
+            )
+            for serial in self.revoked_serials:
+                builder = builder.add_revoked_certificate(
+                    x509.RevokedCertificateBuilder()
+                    .serial_number(serial)
+                    .revocation_date(now - timedelta(hours=1))
+                    .build()
+                )
+            crl = builder.sign(self.ca_key, hashes.SHA256())
+            return 200, {}, crl.public_bytes(serialization.Encoding.DER)
+
+        request = ocsp.load_der_ocsp_request(body)
+        serial = request.serial_number
+        cert = self.ocsp_substitute.get(serial) or self.certificates[serial]
+        revoked = cert.serial_number in self.revoked_serials
+
+        signer, signer_key = self.responder or (self.ca, self.ca_key)
+        builder = ocsp.OCSPResponseBuilder()
+        if self.responder:
+            builder = builder.certificates([signer])
+
+        response = (
+            builder
+            .add_response(
+                cert=cert,
+                issuer=self.ca,
+                algorithm=hashes.SHA1(),
+                cert_status=ocsp.OCSPCertStatus.REVOKED if revoked else ocsp.OCSPCertStatus.GOOD,
+                this_update=now + self.ocsp_this_update,
+                next_update=now + self.ocsp_next_update,
+                revocation_time=now - timedelta(hours=1) if revoked else None,
+                revocation_reason=None
+            )
+            .responder_id(ocsp.OCSPResponderEncoding.HASH, signer)
+            .sign(signer_key, hashes.SHA256())
+        )
+        return 200, {"Content-Type": "application/ocsp-response"}, response.public_bytes(
+            serialization.Encoding.DER
+        )
+
+
+@pytest.fixture
+def pki():
+    pki = Pki()
+    with pki.http:
+        yield pki
+
+
+def test_crl_reports_revoked_and_good(pki, tmp_path):
+    checker = RevocationChecker(cache_dir=tmp_path)
+    revoked = pki.leaf("revoked.test", revoked=True)
+    good = pki.leaf("good.test")
+
+    assert checker.check(revoked, pki.issuer) == (True, "CRL")
+    assert checker.check(good, pki.issuer) == (False, "CRL")
+
+
+def test_crl_downloaded_once_for_all_hosts(pki, tmp_path):
+    checker = RevocationChecker(cache_dir=tmp_path)
+    hosts = [pki.leaf(f"host{i}.test") for i in range(20)]
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        results = list(executor.map(lambda cert: checker.check(cert, pki.issuer), hosts * 5))
+
+    assert set(results) == {(False, "CRL")}
+    assert pki.http.count("GET") == 1
+    # Locki per URL są zwalniane po użyciu
+    assert checker._url_locks == {}
+
+    # Nowa instancja (kolejny przebieg) korzysta z CRL z dysku
+    assert RevocationChecker(cache_dir=tmp_path).check(hosts[0], pki.issuer) == (False, "CRL")
+    assert pki.http.count("GET") == 1
+
+
+def test_stale_crl_reused_until_refetch_interval(pki, tmp_path, caplog):
+    pki.crl_next_update = timedelta(hours=-1)
+    checker = RevocationChecker(cache_dir=tmp_path)
+    revoked = pki.leaf("revoked.test", revoked=True)
+    hosts = [pki.leaf(f"host{i}.test") for i in range(10)]
+
+    assert checker.check(revoked, pki.issuer) == (True, "CRL")
+    for cert in hosts:
+        assert checker.check(cert, pki.issuer) == (False, "CRL")
+
+    assert pki.http.count("GET") == 1
+    assert "is stale" in caplog.text
+
+    # Po STALE_CRL_REFETCH od pobrania (pamięć i plik na dysku) - jedno ponowne pobranie
+    age = RevocationChecker.STALE_CRL_REFETCH.total_seconds()
+    for entry in checker._crl_index.values():
+        entry.fetched_at -= RevocationChecker.STALE_CRL_REFETCH
+    for path in (tmp_path / "crl").iterdir():
+        mtime = path.stat().st_mtime - age
+        os.utime(path, (mtime, mtime))
+    for cert in hosts:
+        checker.check(cert, pki.issuer)
+
+    assert pki.http.count("GET") == 2
+
+
+def test_ocsp_reports_revoked_and_good_and_caches(pki, tmp_path):
+    checker = RevocationChecker(cache_dir=tmp_path)
+    revoked = pki.leaf("revoked.test", revoked=True, via="ocsp")
+    good = pki.leaf("good.test", via="ocsp")
+
+    assert checker.check(revoked, pki.issuer) == (True, "OCSP")
+    assert checker.check(good, pki.issuer) == (False, "OCSP")
+    assert checker.check(good, pki.issuer) == (False, "OCSP")
+    assert pki.http.count("POST") == 2
+
+    # Odpowiedzi z dysku w nowej instancji
+    assert RevocationChecker(cache_dir=tmp_path).check(revoked, pki.issuer) == (True, "OCSP")
+    assert pki.http.count("POST") == 2
+
+
+def test_ocsp_response_for_other_certificate_is_rejected(pki, tmp_path):
+    checker = RevocationChecker(cache_dir=tmp_path)
+    revoked = pki.leaf("revoked.test", revoked=True, via="ocsp")
+    victim = pki.leaf("victim.test", via="ocsp")
+    other = pki.leaf("other.test", via="ocsp")
+
+    # Responder odpowiada statusem innego certyfikatu
+    pki.ocsp_substitute[victim.cert.serial_number] = pki.certificates[revoked.cert.serial_number]
+
+    assert checker.check(victim, pki.issuer) == (None, None)
+    assert checker._ocsp_index == {}
+
+    # Błędna odpowiedź nie wyłącza respondera dla pozostałych certyfikatów
+    assert checker.check(other, pki.issuer) == (False, "OCSP")
+
+
+def test_ocsp_response_outside_validity_window_is_rejected(pki, tmp_path):
+    checker = RevocationChecker(cache_dir=tmp_path)
+
+    pki.ocsp_this_update = timedelta(hours=-3)
+    pki.ocsp_next_update = timedelta(hours=-1)
+    assert checker.check(pki.leaf("expired.test", via="ocsp"), pki.issuer) == (None, None)
+
+    pki.ocsp_this_update = timedelta(hours=1)
+    pki.ocsp_next_update = timedelta(hours=3)
+    assert checker.check(pki.leaf("future.test", via="ocsp"), pki.issuer) == (None, None)
+
+
+def test_crl_requires_known_issuer(pki, tmp_path):
+    checker = RevocationChecker(cache_dir=tmp_path)
+    revoked = pki.leaf("revoked.test", revoked=True)
+
+    # Bez wystawcy CRL nie jest ani pobierany, ani zapisywany w cache
+    assert checker.check(revoked, None) == (None, None)
+    assert pki.http.count("GET") == 0
+    assert checker._crl_index == {}
+
+
+def test_crl_signed_by_other_issuer_is_not_cached(pki, tmp_path):
+    checker = RevocationChecker(cache_dir=tmp_path)
+    revoked = pki.leaf("revoked.test", revoked=True)
+    impostor = _parsed(make_ca("Test Root CA")[0])
+
+    # Ta sama nazwa, inny klucz - podpis CRL się nie zgadza
+    assert checker.check(revoked, impostor) == (None, None)
+    assert checker._crl_index == {}
+    assert list((tmp_path / "crl").iterdir()) == []
+
+    # Odrzucenie dotyczy tylko tego wystawcy - prawdziwy CA pobiera CRL normalnie
+    assert checker.check(revoked, pki.issuer) == (True, "CRL")
+    assert list(checker._crl_index) == [(f"{pki.http.url}/crl/ca.crl", pki.issuer.fingerprint)]
+    assert pki.http.count("GET") == 2
+
+
+def test_ocsp_delegated_responder(pki, tmp_path):
+    pki.delegate_ocsp()
+    checker = RevocationChecker(cache_dir=tmp_path)
+
+    assert checker.check(pki.leaf("revoked.test", revoked=True, via="ocsp"), pki.issuer) == (True, "OCSP")
+    assert checker.check(pki.leaf("good.test", via="ocsp"), pki.issuer) == (False, "OCSP")
+
+
+def test_ocsp_expired_delegated_responder_is_rejected(pki, tmp_path):
+    pki.delegate_ocsp(days=0)
+    checker = RevocationChecker(cache_dir=tmp_path)
+
+    assert checker.check(pki.leaf("good.test", via="ocsp"), pki.issuer) == (None, None)
+    assert checker._ocsp_index == {}
+
+
+def test_expired_failures_are_forgotten():
+    checker = RevocationChecker()
+    now = datetime.now(timezone.utc)
+
+    checker._mark_failed("http://old.test/ca.crl", now - RevocationChecker.FAILURE_TTL)
+    checker._mark_failed("http://new.test/ca.crl", now)
+
+    assert list(checker._failures) == ["http://new.test/ca.crl"]
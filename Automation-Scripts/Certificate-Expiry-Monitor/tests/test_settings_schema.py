@@ -0,0 +1,72 @@
+"""Testy konwersji typów settings.yml (SETTINGS_SCHEMA) po podstawieniu .env"""
+
+import pytest
+
+from utils import ConfigLoader
+
+
+SETTINGS = """\
+general:
+  concurrent_checks: ${CONCURRENT_CHECKS}
+  connection_timeout: 2.5
+alerts:
+  thresholds:
+    warning: ${ALERT_WARNING_DAYS}
+    critical: ${ALERT_CRITICAL_DAYS}
+smtp:
+  enabled: ${SMTP_ENABLED}
+  host: ${SMTP_HOST}
+"""
+
+SCHEMA = {
+    'general.concurrent_checks': int,
+    'general.connection_timeout': float,
+    'alerts.thresholds.warning': int,
+    'alerts.thresholds.critical': int,
+    'smtp.enabled': bool,
+}
+
+
+@pytest.fixture
+def loader(tmp_path, monkeypatch):
+    (tmp_path / "config").mkdir()
+    (tmp_path / "config" / "settings.yml").write_text(SETTINGS, encoding="utf-8")
+    for name, value in {
+        "CONCURRENT_CHECKS": "20",
+        "ALERT_WARNING_DAYS": "30",
+        "ALERT_CRITICAL_DAYS": "7",
+        "SMTP_ENABLED": "False",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("SMTP_HOST", raising=False)
+    return ConfigLoader(tmp_path, use_cache=False)
+
+
+def test_values_are_typed(loader):
+    config = loader.load_yaml("config/settings.yml", schema=SCHEMA)
+
+    assert config['general'] == {'concurrent_checks': 20, 'connection_timeout': 2.5}
+    assert config['alerts']['thresholds'] == {'warning': 30, 'critical': 7}
+    assert config['smtp']['enabled'] is False
+    # Pola spoza schematu zostają bez zmian
+    assert config['smtp']['host'] == "${SMTP_HOST}"
+
+
+def test_empty_variable_gives_none(loader, monkeypatch):
+    monkeypatch.setenv("ALERT_CRITICAL_DAYS", "")
+
+    config = loader.load_yaml("config/settings.yml", schema=SCHEMA)
+
+    assert config['alerts']['thresholds']['critical'] is None
+
+
+def test_unset_variable_is_reported_by_name(loader, monkeypatch):
+    monkeypatch.delenv("ALERT_WARNING_DAYS")
+    monkeypatch.setenv("CONCURRENT_CHECKS", "many")
+
+    with pytest.raises(ValueError) as excinfo:
+        loader.load_yaml("config/settings.yml", schema=SCHEMA)
+
+    message = str(excinfo.value)
+    assert "alerts.thresholds.warning: environment variable ALERT_WARNING_DAYS is not set" in message
+    assert "general.concurrent_checks: expected int, got 'many'" in message
@@ -0,0 +1,153 @@
+"""Testy dialogów STARTTLS (SMTP, IMAP, FTP, LDAP) na lokalnych serwerach"""
+
+import asyncio
+import socket
+import time
+
+import pytest
+
+from cert_checker import CertificateChecker
+from starttls import LDAP_STARTTLS_OID, StartTlsError, negotiate, negotiate_async, starttls_mode
+from support import TlsStandIn, make_ca, make_leaf, read_line
+
+
+def smtp_dialog(sock, offer=True):
+    sock.sendall(b"220-mx.test ESMTP\r\n220 ready\r\n")
+    assert read_line(sock).startswith(b"EHLO ")
+    sock.sendall(
+        b"250-mx.test\r\n250-PIPELINING\r\n"
+        + (b"250-STARTTLS\r\n" if offer else b"")
+        + b"250 8BITMIME\r\n"
+    )
+    assert read_line(sock).strip() == b"STARTTLS"
+    sock.sendall(b"220 go ahead\r\n")
+
+
+def imap_dialog(sock):
+    sock.sendall(b"* OK IMAP ready\r\n")
+    assert read_line(sock).strip() == b"a1 STARTTLS"
+    sock.sendall(b"* BYE not yet\r\na1 OK Begin TLS\r\n")
+
+
+def ftp_dialog(sock):
+    sock.sendall(b"220 FTP ready\r\n")
+    assert read_line(sock).strip() == b"AUTH TLS"
+    sock.sendall(b"234 AUTH TLS ok\r\n")
+
+
+def ldap_dialog(sock, result_code=0):
+    assert LDAP_STARTTLS_OID in sock.recv(100)
+    # ExtendedResponse: resultCode, matchedDN "", diagnosticMessage ""
+    inner = b"\x0a\x01" + bytes([result_code]) + b"\x04\x00\x04\x00"
+    response = b"\x02\x01\x01" + b"\x78" + bytes([len(inner)]) + inner
+    sock.sendall(b"\x30" + bytes([len(response)]) + response)
+
+
+DIALOGS = {
+    "smtp": smtp_dialog,
+    "imap": imap_dialog,
+    "ftp": ftp_dialog,
+    "ldap": ldap_dialog,
+}
+
+
+@pytest.fixture(scope="module")
+def pki():
+    ca, ca_key = make_ca()
+    leaf, key = make_leaf(ca, ca_key, "localhost", days=40)
+    return [leaf, ca], key
+
+
+def _serve(pki, tmp_path, dialog=None):
+    chain, key = pki
+    return TlsStandIn(tmp_path, chain, key, dialog)
+
+
+def _check(hosts, engine):
+    checker = CertificateChecker(timeout=5, starttls_timeout=1)
+    if engine == "async":
+        return checker.check_multiple_hosts_async(hosts, concurrent=8)
+    return checker.check_multiple_hosts(hosts, concurrent=8)
+
+
+def test_starttls_mode():
+    assert starttls_mode("smtp", 25) == "smtp"
+    assert starttls_mode("smtps", 587) == "smtp"
+    assert starttls_mode("smtps", 465) is None
+    assert starttls_mode("ldap", 1389) == "ldap"
+    assert starttls_mode("ldaps", 636) is None
+    assert starttls_mode("https", 443) is None
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+@pytest.mark.parametrize("mode", sorted(DIALOGS))
+def test_certificate_read_after_starttls(pki, tmp_path, mode, engine):
+    with _serve(pki, tmp_path, DIALOGS[mode]) as server:
+        results = _check([("localhost", server.port, mode)], engine)
+
+    cert_info = results[f"localhost:{server.port}"]
+    assert cert_info.error is None
+    assert cert_info.common_name == "localhost"
+    assert 38 <= cert_info.days_remaining <= 40
+    assert server.handshakes == 1
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+def test_implicit_tls(pki, tmp_path, engine):
+    with _serve(pki, tmp_path) as server:
+        results = _check([("localhost", server.port, "smtps")], engine)
+
+    cert_info = results[f"localhost:{server.port}"]
+    assert cert_info.error is None
+    assert cert_info.common_name == "localhost"
+
+
+def _run_negotiation(port, mode, engine, phase_timeout=1):
+    if engine == "async":
+        async def run():
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            try:
+                await negotiate_async(reader, writer, mode, phase_timeout)
+            finally:
+                writer.close()
+
+        asyncio.run(run())
+        return
+
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        negotiate(sock, mode, phase_timeout)
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+def test_smtp_without_starttls_is_rejected(pki, tmp_path, engine):
+    with _serve(pki, tmp_path, lambda sock: smtp_dialog(sock, offer=False)) as server:
+        with pytest.raises(StartTlsError, match="does not offer STARTTLS"):
+            _run_negotiation(server.port, "smtp", engine)
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+def test_ldap_rejection_is_reported(pki, tmp_path, engine):
+    with _serve(pki, tmp_path, lambda sock: ldap_dialog(sock, result_code=2)) as server:
+        with pytest.raises(StartTlsError, match="resultCode 2"):
+            _run_negotiation(server.port, "ldap", engine)
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+def test_line_too_long(pki, tmp_path, engine):
+    def endless_greeting(sock):
+        sock.sendall(b"220" + b"x" * 200_000)
+        time.sleep(2)
+
+    with _serve(pki, tmp_path, endless_greeting) as server:
+        with pytest.raises(StartTlsError, match="Line too long"):
+            _run_negotiation(server.port, "smtp", engine)
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+def test_silent_server_times_out(pki, tmp_path, engine):
+    with _serve(pki, tmp_path, lambda sock: time.sleep(2)) as server:
+        started = time.monotonic()
+        with pytest.raises((TimeoutError, asyncio.TimeoutError)):
+            _run_negotiation(server.port, "imap", engine, phase_timeout=0.3)
+
+    assert time.monotonic() - started < 1.5
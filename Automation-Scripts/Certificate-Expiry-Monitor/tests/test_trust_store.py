@@ -0,0 +1,107 @@
+"""Testy budowania ścieżki certyfikatów (TrustStore)"""
+
+import pytest
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+
+from cert_model import ParsedCertificate
+from support import make_ca, make_intermediate, make_leaf, to_der
+from trust_store import TrustStore
+
+
+def _parsed(*certs):
+    return [ParsedCertificate(to_der(cert)) for cert in certs]
+
+
+@pytest.fixture
+def pki():
+    ca, ca_key = make_ca()
+    return ca, ca_key, TrustStore(_parsed(ca))
+
+
+def test_valid_path_reaches_anchor(pki):
+    ca, ca_key, store = pki
+    intermediate, intermediate_key = make_intermediate(ca, ca_key)
+    leaf, _ = make_leaf(intermediate, intermediate_key, "www.example.test")
+
+    path, anchor, errors = store.build_path(_parsed(leaf, intermediate))
+
+    assert errors == []
+    assert anchor is not None and anchor.cert == ca
+    assert [p.common_name for p in path] == ["www.example.test", "Test Intermediate CA", "Test Root CA"]
+
+
+def test_leaf_signed_by_leaf_is_rejected(pki):
+    ca, ca_key, store = pki
+    victim_leaf, victim_key = make_leaf(ca, ca_key, "legit.example.test")
+    forged, _ = make_leaf(victim_leaf, victim_key, "bank.example.test")
+
+    path, anchor, errors = store.build_path(_parsed(forged, victim_leaf))
+
+    assert anchor is None
+    assert len(path) == 1
+    assert errors == ["Issuer is not a CA (Basic Constraints ca=False): legit.example.test"]
+
+
+def test_issuer_without_basic_constraints_is_rejected(pki):
+    ca, ca_key, store = pki
+    # Certyfikat v3 bez żadnych rozszerzeń
+    key = ec.generate_private_key(ec.SECP256R1())
+    plain = (
+        x509.CertificateBuilder()
+        .subject_name(x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "plain.example.test")]))
+        .issuer_name(ca.subject)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(ca.not_valid_before_utc)
+        .not_valid_after(ca.not_valid_after_utc)
+        .sign(ca_key, hashes.SHA256())
+    )
+    forged, _ = make_leaf(plain, key, "bank.example.test")
+
+    _, anchor, errors = store.build_path(_parsed(forged, plain))
+
+    assert anchor is None
+    assert errors == ["Issuer is not a CA (no Basic Constraints): plain.example.test"]
+
+
+def test_issuer_without_key_cert_sign_is_rejected(pki):
+    ca, ca_key, store = pki
+    intermediate, intermediate_key = make_intermediate(ca, ca_key, key_usage=False)
+    leaf, _ = make_leaf(intermediate, intermediate_key, "www.example.test")
+
+    _, anchor, errors = store.build_path(_parsed(leaf, intermediate))
+
+    assert anchor is None
+    assert errors == ["Issuer key usage does not allow keyCertSign: Test Intermediate CA"]
+
+
+def test_path_length_constraint(pki):
+    ca, ca_key, store = pki
+    constrained, constrained_key = make_intermediate(ca, ca_key, "Constrained CA", path_length=0)
+    sub, sub_key = make_intermediate(constrained, constrained_key, "Sub CA")
+    leaf, _ = make_leaf(sub, sub_key, "www.example.test")
+
+    _, anchor, errors = store.build_path(_parsed(leaf, sub, constrained))
+
+    assert anchor is None
+    assert errors == ["Path length constraint exceeded for Constrained CA (pathLen 0)"]
+
+    # pathLen 0 pozwala wystawiać certyfikaty końcowe
+    direct, _ = make_leaf(constrained, constrained_key, "direct.example.test")
+    _, anchor, errors = store.build_path(_parsed(direct, constrained))
+    assert errors == [] and anchor is not None
+
+
+def test_only_ca_signatures_are_memoized(pki):
+    ca, ca_key, store = pki
+    intermediate, intermediate_key = make_intermediate(ca, ca_key)
+
+    for i in range(5):
+        leaf, _ = make_leaf(intermediate, intermediate_key, f"host{i}.example.test")
+        _, anchor, _ = store.build_path(_parsed(leaf, intermediate))
+        assert anchor is not None
+
+    assert len(store._verified) == 1
@@ -0,0 +1,403 @@
+﻿"""
+Infrastructure Documentation Generator
+Script: Magazyn backupów konfiguracji (content-addressed)
+
+Każda wersja konfiguracji zapisywana jest raz - jako blob gzip nazwany
+hashem SHA-256 znormalizowanej konfiguracji (tylko wynik pierwszej komendy,
+bez linii ze znacznikiem czasu, ntp clock-period itp.; sekcje show version,
+inventory i interfejsów z licznikami i uptime nie wpływają na hash).
+Niezmieniona konfiguracja nie tworzy nowego pliku, aktualizowany jest tylko
+indeks (last_seen), więc wykrycie zmiany to porównanie hasha z ostatnią
+wersją urządzenia.
+
+Struktura ({backup_dir}/.store):
+    objects/ab/abcdef....txt.gz   - treść wersji (gzip)
+    index.json                    - hostname -> lista wersji (od najstarszej)
+
+Pliki {hostname}_{date}_{time}.txt w backup_dir (dla generate_docs.py)
+powstają tylko przy zmianie. Pliki z indeksu starsze niż compress_after_days
+są usuwane z backup_dir (treść jest w magazynie, najnowszy plik urządzenia
+zostaje), wersje starsze niż retention_days są usuwane z magazynu.
+
+Autor: Sebastian
+Data: 2026-01-28
+"""
+
+import os
+import re
+import sys
+import gzip
+import json
+import hashlib
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+
+# Pierwsza linia nagłówka pliku backup (collect_configs.py)
+HEADER_PREFIX = '# Konfiguracja urządzenia:'
+
+# Linia otwierająca nagłówek i sekcje kolejnych komend w pliku backup
+SECTION_RULE = '#' + '=' * 70
+
+# Linie pomijane przy liczeniu hasha (zmieniają się bez zmiany konfiguracji)
+DEFAULT_IGNORE_PATTERNS = [
+    r'^! Last configuration change at',
+    r'^! NVRAM config last updated at',
+    r'^! No configuration change since last restart',
+    r'^Current configuration :',
+    r'^Building configuration',
+    r'^ntp clock-period',
+    r'^## Last commit:',
+    r'^: Written by',
+]
+
+
+class ConfigBackupStore:
+    """Klasa przechowująca wersje konfiguracji urządzeń"""
+
+    def __init__(
+        self,
+        backup_dir: str,
+        retention_days: int = 90,
+        compress_old: bool = True,
+        compress_after_days: int = 30,
+        ignore_patterns: Optional[List[str]] = None
+    ):
+        """
+        Inicjalizacja magazynu
+
+        Args:
+            backup_dir: Folder z plikami backup (output.backup_dir)
+            retention_days: Ile dni przechowywać wersje (0 = bez limitu)
+            compress_old: Czy przenosić stare pliki .txt do magazynu (gzip)
+            compress_after_days: Po ilu dniach plik .txt trafia do magazynu
+            ignore_patterns: Regexy linii pomijanych przy liczeniu hasha
+        """
+        self.backup_dir = Path(backup_dir)
+        self.store_dir = self.backup_dir / '.store'
+        self.objects_dir = self.store_dir / 'objects'
+        self.index_path = self.store_dir / 'index.json'
+
+        self.retention_days = int(retention_days or 0)
+        self.compress_old = bool(compress_old)
+        self.compress_after_days = int(compress_after_days or 0)
+
+        patterns = DEFAULT_IGNORE_PATTERNS if ignore_patterns is None else ignore_patterns
+        self._ignore = re.compile('|'.join(f'(?:{p})' for p in patterns), re.MULTILINE) if patterns else None
+
+        self.logger = logging.getLogger('ConfigCollector.BackupStore')
+        self._lock = threading.Lock()
+
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self) -> Dict[str, List[dict]]:
+        """Ładowanie indeksu wersji (hostname -> lista wersji)"""
+        if not self.index_path.exists():
+            return {}
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('hosts', {})
+        except (OSError, ValueError) as e:
+            self.logger.error(f"Błąd odczytu indeksu {self.index_path}: {e} - indeks zostanie odbudowany")
+            return {}
+
+    def flush(self):
+        """Zapis indeksu (atomowo: plik tymczasowy + replace)"""
+        with self._lock:
+            data = json.dumps({'hosts': self.index}, indent=2, ensure_ascii=False)
+
+        temp_path = self.index_path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(temp_path, self.index_path)
+
+    def normalize(self, content: str) -> str:
+        """
+        Normalizacja treści przed liczeniem hasha
+
+        Zostaje tylko konfiguracja: pomijany jest nagłówek pliku backup
+        (do pierwszej linii #===) i sekcje kolejnych komend (show version
+        z uptime, liczniki interfejsów), a także linie z ignore_patterns,
+        końcowe spacje i różnice CRLF/LF.
+        """
+        lines = content.replace('\r\n', '\n').split('\n')
+
+        if lines and lines[0].startswith(HEADER_PREFIX):
+            for position, line in enumerate(lines):
+                if line.startswith('#='):
+                    lines = lines[position + 1:]
+                    break
+
+            # Sekcja kolejnej komendy: #===, "# komenda", #===
+            for position in range(len(lines) - 2):
+                if (lines[position] == SECTION_RULE and lines[position + 1].startswith('# ')
+                        and lines[position + 2] == SECTION_RULE):
+                    lines = lines[:position]
+                    break
+
+        normalized = []
+        for line in lines:
+            line = line.rstrip()
+            if self._ignore and self._ignore.search(line):
+                continue
+            normalized.append(line)
+
+        return '\n'.join(normalized).strip('\n')
+
+    def digest(self, content: str) -> str:
+        """Hash SHA-256 znormalizowanej treści"""
+        return hashlib.sha256(self.normalize(content).encode('utf-8')).hexdigest()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.objects_dir / digest[:2] / f"{digest}.txt.gz"
+
+    def _write_object(self, digest: str, content: str):
+        """Zapisz blob (jeśli jeszcze nie istnieje)"""
+        path = self._object_path(digest)
+        if path.exists():
+            return
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Osobny plik tymczasowy per wątek (dwa urządzenia z identyczną konfiguracją)
+        temp_path = path.with_suffix(f'.{threading.get_ident()}.tmp')
+        with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=9) as f:
+            f.write(content)
+        os.replace(temp_path, path)
+
+    def latest(self, hostname: str) -> Optional[dict]:
+        """Ostatnia wersja urządzenia (None jeśli brak)"""
+        versions = self.index.get(hostname)
+        return versions[-1] if versions else None
+
+    def save(self, hostname: str, content: str, filename: str, now: Optional[datetime] = None) -> Tuple[bool, dict]:
+        """
+        Zapisz wersję konfiguracji urządzenia
+
+        Args:
+            hostname: Nazwa urządzenia
+            content: Treść pliku backup (nagłówek + wyniki komend)
+            filename: Nazwa pliku .txt, który zostanie zapisany przy zmianie
+            now: Czas pobrania (domyślnie teraz)
+
+        Returns:
+            Tuple (changed, wersja) - changed=False gdy treść jak w ostatniej wersji
+        """
+        now = now or datetime.now()
+        timestamp = now.isoformat(timespec='seconds')
+        digest = self.digest(content)
+
+        with self._lock:
+            latest = self.latest(hostname)
+
+            if latest and latest['digest'] == digest:
+                latest['last_seen'] = timestamp
+                return (False, latest)
+
+        self._write_object(digest, content)
+
+        version = {
+            'digest': digest,
+            'file': filename,
+            'first_seen': timestamp,
+            'last_seen': timestamp,
+        }
+
+        with self._lock:
+            self.index.setdefault(hostname, []).append(version)
+
+        return (True, version)
+
+    def read(self, digest: str) -> str:
+        """
+        Treść wersji
+
+        Raises:
+            FileNotFoundError: Brak wersji w magazynie
+        """
+        with gzip.open(self._object_path(digest), 'rt', encoding='utf-8') as f:
+            return f.read()
+
+    @staticmethod
+    def _files(version: dict) -> List[str]:
+        """Pliki .txt wersji (zapisany przy zmianie + dodane później kopie)"""
+        return [version['file']] + version.get('copies', [])
+
+    @staticmethod
+    def _read_hostname(path: Path) -> Optional[str]:
+        """Hostname z nagłówka pliku backup (None = plik bez nagłówka)"""
+        try:
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                first_line = f.readline().strip()
+        except OSError:
+            return None
+
+        if not first_line.startswith(HEADER_PREFIX):
+            return None
+        return first_line[len(HEADER_PREFIX):].strip() or None
+
+    def _ingest(self, hostname: str, path: Path):
+        """Dodaj plik .txt spoza indeksu (np. sprzed magazynu) jako wersję"""
+        content = path.read_text(encoding='utf-8', errors='replace')
+        digest = self.digest(content)
+        timestamp = datetime.fromtimestamp(path.stat().st_mtime).isoformat(timespec='seconds')
+
+        self._write_object(digest, content)
+
+        # Pliki dodawane od najstarszego - ta sama treść co poprzednia wersja
+        # tylko wydłuża jej okres (plik zostaje w indeksie jako kopia)
+        versions = self.index.setdefault(hostname, [])
+        if versions and versions[-1]['digest'] == digest:
+            versions[-1]['first_seen'] = min(versions[-1]['first_seen'], timestamp)
+            versions[-1]['last_seen'] = max(versions[-1]['last_seen'], timestamp)
+            versions[-1].setdefault('copies', []).append(path.name)
+            return
+
+        versions.append({'digest': digest, 'file': path.name, 'first_seen': timestamp, 'last_seen': timestamp})
+        versions.sort(key=lambda v: v['first_seen'])
+
+    def maintenance(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Retencja i kompresja
+
+        - pliki .txt spoza indeksu (np. sprzed magazynu) są dodawane jako
+          wersje urządzenia z nagłówka pliku; pliki bez nagłówka są pomijane
+        - pliki .txt z indeksu starsze niż compress_after_days (compress_old)
+          lub retention_days są usuwane z backup_dir (treść jest w magazynie);
+          najnowszy istniejący plik każdego urządzenia zostaje (generate_docs.py)
+        - wersje z last_seen starszym niż retention_days są usuwane
+          (ostatnia wersja urządzenia zostaje zawsze)
+        - bloby bez wersji w indeksie są usuwane
+
+        Returns:
+            Dictionary z liczbą dodanych i usuniętych plików, wersji i blobów
+        """
+        now = now or datetime.now()
+        stats = {'imported_files': 0, 'archived_files': 0, 'expired_versions': 0, 'removed_objects': 0}
+
+        ages = []
+        if self.compress_old and self.compress_after_days:
+            ages.append(self.compress_after_days)
+        if self.retention_days:
+            ages.append(self.retention_days)
+
+        with self._lock:
+            # Pliki .txt od najstarszego
+            files = sorted(
+                ((path.stat().st_mtime, path) for path in self.backup_dir.glob('*.txt')),
+                key=lambda item: item[0]
+            )
+
+            # Pliki spoza indeksu (sprzed magazynu, zapisane ręcznie) -> wersje
+            # urządzenia z nagłówka (nazwa pliku zależy od filename_format)
+            known = {name for versions in self.index.values() for v in versions for name in self._files(v)}
+            for _, path in files:
+                if path.name in known:
+                    continue
+
+                hostname = self._read_hostname(path)
+                if hostname is None:
+                    self.logger.debug(f"Pominięto {path.name} - brak nagłówka pliku backup")
+                    continue
+
+                self._ingest(hostname, path)
+                known.add(path.name)
+                stats['imported_files'] += 1
+
+            if ages:
+                cutoff = (now - timedelta(days=min(ages))).timestamp()
+                mtimes = {path.name: mtime for mtime, path in files}
+
+                # Najnowszy istniejący plik każdego urządzenia zostaje
+                keep = set()
+                for versions in self.index.values():
+                    for version in reversed(versions):
+                        names = [name for name in self._files(version) if name in mtimes]
+                        if names:
+                            keep.add(max(names, key=mtimes.get))
+                            break
+
+                for mtime, path in files:
+                    if path.name not in known or path.name in keep or mtime >= cutoff:
+                        continue
+
+                    path.unlink()
+                    stats['archived_files'] += 1
+
+            if self.retention_days:
+                expired = (now - timedelta(days=self.retention_days)).isoformat(timespec='seconds')
+
+                for hostname, versions in self.index.items():
+                    kept = [v for v in versions[:-1] if v['last_seen'] >= expired] + versions[-1:]
+                    stats['expired_versions'] += len(versions) - len(kept)
+                    versions[:] = kept
+
+            referenced = {v['digest'] for versions in self.index.values() for v in versions}
+
+        for path in self.objects_dir.glob('*/*.txt.gz'):
+            if path.name[:-len('.txt.gz')] not in referenced:
+                path.unlink()
+                stats['removed_objects'] += 1
+
+        self.flush()
+
+        if any(stats.values()):
+            self.logger.info(
+                f"Backup: {stats['imported_files']} plików dodanych do indeksu, "
+                f"{stats['archived_files']} usuniętych z backup_dir (treść w magazynie), "
+                f"{stats['expired_versions']} wersji i {stats['removed_objects']} blobów usuniętych (retencja)"
+            )
+
+        return stats
+
+
+def main():
+    """Przeglądanie wersji konfiguracji z magazynu"""
+    import yaml
+
+    parser = argparse.ArgumentParser(description='Magazyn backupów konfiguracji')
+    parser.add_argument('--config', type=str, default='config/settings.yml', help='Plik settings.yml')
+    parser.add_argument('--list', type=str, metavar='HOSTNAME', help='Lista wersji urządzenia')
+    parser.add_argument('--show', type=str, metavar='DIGEST', help='Treść wersji (hash lub jego początek)')
+    parser.add_argument('--maintenance', action='store_true', help='Uruchom retencję i kompresję')
+    args = parser.parse_args()
+
+    with open(args.config, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+
+    backup = config.get('backup', {})
+    store = ConfigBackupStore(
+        config['output']['backup_dir'],
+        retention_days=backup.get('retention_days', 90),
+        compress_old=backup.get('compress_old', True),
+        compress_after_days=backup.get('compress_after_days', 30),
+        ignore_patterns=backup.get('ignore_patterns')
+    )
+
+    if args.list:
+        for version in store.index.get(args.list, []):
+            print(f"{version['digest'][:12]}  {version['first_seen']}  ->  {version['last_seen']}  {version['file']}")
+
+    elif args.show:
+        matches = {v['digest'] for versions in store.index.values() for v in versions if v['digest'].startswith(args.show)}
+        if len(matches) != 1:
+            print(f"✗ {'Brak wersji' if not matches else 'Niejednoznaczny hash'}: {args.show}")
+            sys.exit(1)
+        print(store.read(matches.pop()))
+
+    elif args.maintenance:
+        logging.basicConfig(level=logging.INFO, format='[%(asctime)s] [%(levelname)s] %(message)s')
+        print(store.maintenance())
+
+    else:
+        for hostname, versions in sorted(store.index.items()):
+            print(f"{hostname}: {len(versions)} wersji, ostatnia {versions[-1]['last_seen']}")
+
+
+if __name__ == "__main__":
+    main()
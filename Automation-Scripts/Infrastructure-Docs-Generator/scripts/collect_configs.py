@@ -8,20 +8,39 @@ Data: 2026-01-28
 
 import os
 import sys
+import heapq
+import random
+import time
 import yaml
 import logging
+from collections import Counter, deque
 from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 from netmiko import ConnectHandler
-from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from netmiko.exceptions import NetmikoTimeoutException, NetmikoAuthenticationException, ReadTimeout
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from typing import List, Dict, Tuple
 
+from backup_store import ConfigBackupStore
+
 # Załaduj zmienne środowiskowe z .env
 load_dotenv()
 
 
+# Komendy wykonywane w jednej sesji SSH, gdy settings.yml nie definiuje
+# ssh.commands - pierwsza zwraca konfigurację (backup i dokumentacja)
+DEFAULT_COMMANDS = {
+    'cisco_ios': ['show running-config', 'show version', 'show inventory', 'show ip interface brief'],
+    'cisco_asa': ['show running-config', 'show version', 'show inventory', 'show interface ip brief'],
+    'juniper_junos': ['show configuration', 'show version', 'show chassis hardware', 'show interfaces terse'],
+    'default': ['show running-config', 'show version'],
+}
+
+# Błędy przejściowe (urządzenie zajęte, sieć) - ponawiane; błąd autentykacji nie
+RETRYABLE_ERRORS = (NetmikoTimeoutException, ReadTimeout, OSError, EOFError)
+
+
 class ConfigCollector:
     """Klasa do zbierania konfiguracji z urządzeń sieciowych"""
     
@@ -37,9 +56,11 @@ class ConfigCollector:
         self.devices = self._load_devices(devices_path)
         self._setup_logging()
         self._setup_directories()
+        self.store = self._setup_store()
         
         self.successful_collections = []
         self.failed_collections = []
+        self.unchanged_collections = []
     
     def _load_config(self, path: str) -> dict:
         """Ładowanie ustawień z settings.yml"""
@@ -107,99 +128,197 @@ class ConfigCollector:
         temp_dir = Path(self.config['output']['temp_dir'])
         temp_dir.mkdir(parents=True, exist_ok=True)
     
-    def _collect_single_device(self, device: dict) -> Tuple[bool, str, str]:
+    def _setup_store(self) -> ConfigBackupStore:
+        """Magazyn wersji konfiguracji (deduplikacja, kompresja, retencja)"""
+        backup_config = self.config.get('backup', {})
+        
+        return ConfigBackupStore(
+            self.config['output']['backup_dir'],
+            retention_days=backup_config.get('retention_days', 90),
+            compress_old=backup_config.get('compress_old', True),
+            compress_after_days=backup_config.get('compress_after_days', 30),
+            ignore_patterns=backup_config.get('ignore_patterns')
+        )
+    
+    def _connection_params(self, device: dict) -> dict:
+        """Parametry połączenia Netmiko dla urządzenia"""
+        connection_params = {
+            'device_type': device.get('device_type', 'cisco_ios'),
+            'host': device.get('ip', ''),
+            'username': device.get('username'),
+            'password': device.get('password'),
+            'port': device.get('port', 22),
+            'timeout': self.config['ssh'].get('timeout', 30),
+        }
+        
+        # Dodaj enable password jeśli istnieje
+        if device.get('secret'):
+            connection_params['secret'] = device['secret']
+        
+        return connection_params
+    
+    def _device_commands(self, device: dict) -> List[str]:
+        """
+        Komendy dla urządzenia: commands z devices.yml, potem ssh.commands
+        dla device_type, potem DEFAULT_COMMANDS
+        
+        Returns:
+            Lista komend (pierwsza zwraca konfigurację)
+        """
+        if device.get('commands'):
+            return list(device['commands'])
+        
+        device_type = device.get('device_type', 'cisco_ios')
+        commands = self.config['ssh'].get('commands') or DEFAULT_COMMANDS
+        
+        return list(commands.get(device_type) or commands.get('default') or DEFAULT_COMMANDS['default'])
+    
+    def _site_limit(self, site: str) -> int:
+        """Limit równoczesnych sesji w lokalizacji (site z devices.yml)"""
+        ssh_config = self.config['ssh']
+        site_limits = ssh_config.get('site_limits') or {}
+        
+        limit = site_limits.get(site, ssh_config.get('max_per_site'))
+        return max(1, int(limit)) if limit else int(ssh_config.get('max_concurrent', 5))
+    
+    def _retry_delay(self, attempt: int) -> float:
+        """Opóźnienie przed ponowieniem: retry_delay x2 po każdej próbie + jitter"""
+        base = float(self.config['ssh'].get('retry_delay', 10))
+        return base * 2 ** (attempt - 1) + random.uniform(0, base)
+    
+    def _run_session(self, device: dict) -> Dict[str, str]:
         """
-        Zbieranie konfiguracji z pojedynczego urządzenia
+        Wykonaj wszystkie komendy w jednej sesji SSH
         
         Args:
             device: Słownik z danymi urządzenia
-            
+        
         Returns:
-            Tuple (success, hostname, message)
+            Dictionary {komenda -> output} (kolejność komend zachowana)
         """
-        hostname = device.get('hostname', 'Unknown')
-        ip = device.get('ip', '')
+        read_timeout = self.config['ssh'].get('read_timeout', 90)
         
-        self.logger.info(f"Łączenie z {hostname} ({ip})...")
+        connection = ConnectHandler(**self._connection_params(device))
         
         try:
-            # Przygotuj dane do połączenia Netmiko
-            connection_params = {
-                'device_type': device.get('device_type', 'cisco_ios'),
-                'host': ip,
-                'username': device.get('username'),
-                'password': device.get('password'),
-                'port': device.get('port', 22),
-                'timeout': self.config['ssh'].get('timeout', 30),
-            }
-            
-            # Dodaj enable password jeśli istnieje
-            if device.get('secret'):
-                connection_params['secret'] = device['secret']
-            
-            # Połącz się z urządzeniem
-            connection = ConnectHandler(**connection_params)
-            
             # Wejdź w tryb enable (jeśli wymagany)
             if device.get('secret'):
                 connection.enable()
             
-            # Pobierz running-config
-            self.logger.info(f"Pobieranie konfiguracji z {hostname}...")
+            outputs = {}
+            for command in self._device_commands(device):
+                outputs[command] = connection.send_command(command, read_timeout=read_timeout)
             
-            if 'cisco_asa' in device['device_type']:
-                config = connection.send_command('show running-config', read_timeout=90)
-            elif 'juniper' in device['device_type']:
-                config = connection.send_command('show configuration', read_timeout=90)
-            else:
-                config = connection.send_command('show running-config', read_timeout=90)
-            
-            # Rozłącz się
+            return outputs
+        finally:
+            # Rozłącz się (także po błędzie w trakcie komend)
             connection.disconnect()
+    
+    def _save_outputs(self, device: dict, outputs: Dict[str, str]) -> Tuple[Path, bool]:
+        """
+        Zapisz konfigurację (pierwsza komenda) i wyniki pozostałych komend
+        
+        Plik .txt powstaje tylko gdy konfiguracja (po normalizacji) różni się
+        od ostatniej wersji urządzenia w magazynie backupów.
+        
+        Returns:
+            Tuple (ścieżka pliku, changed) - przy braku zmian ścieżka ostatniej wersji
+        """
+        hostname = device.get('hostname', 'Unknown')
+        backup_dir = Path(self.config['output']['backup_dir'])
+        now = datetime.now()
+        
+        filename_template = self.config['backup'].get('filename_format', '{hostname}_{date}_{time}.txt')
+        filename = filename_template.format(
+            hostname=hostname,
+            date=now.strftime('%Y-%m-%d'),
+            time=now.strftime('%H-%M-%S')
+        )
+        
+        commands = list(outputs)
+        
+        parts = [
+            f"# Konfiguracja urządzenia: {hostname}\n",
+            f"# IP: {device.get('ip', '')}\n",
+            f"# Data pobrania: {now.strftime('%Y-%m-%d %H:%M:%S')}\n",
+            f"# Device Type: {device.get('device_type')}\n",
+            "#" + "="*70 + "\n\n",
+            outputs[commands[0]],
+        ]
+        
+        # Pozostałe komendy (wersja, inventory, interfejsy) - sekcje po konfiguracji
+        for command in commands[1:]:
+            parts.append("\n\n#" + "="*70 + "\n")
+            parts.append(f"# {command}\n")
+            parts.append("#" + "="*70 + "\n\n")
+            parts.append(outputs[command])
+        
+        content = ''.join(parts)
+        
+        changed, version = self.store.save(hostname, content, filename, now)
+        if not changed:
+            return (backup_dir / version['file'], False)
+        
+        filepath = backup_dir / filename
+        with open(filepath, 'w', encoding='utf-8') as f:
+            f.write(content)
+        
+        return (filepath, True)
+    
+    def _collect_single_device(self, device: dict, attempt: int = 1) -> Tuple[bool, str, str, bool]:
+        """
+        Zbieranie konfiguracji z pojedynczego urządzenia (jedna próba)
+        
+        Args:
+            device: Słownik z danymi urządzenia
+            attempt: Numer próby (1 = pierwsza)
             
-            # Zapisz konfigurację do pliku
-            backup_dir = Path(self.config['output']['backup_dir'])
-            timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-            
-            filename_template = self.config['backup'].get('filename_format', '{hostname}_{date}_{time}.txt')
-            filename = filename_template.format(
-                hostname=hostname,
-                date=datetime.now().strftime('%Y-%m-%d'),
-                time=datetime.now().strftime('%H-%M-%S')
-            )
-            
-            filepath = backup_dir / filename
-            
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(f"# Konfiguracja urządzenia: {hostname}\n")
-                f.write(f"# IP: {ip}\n")
-                f.write(f"# Data pobrania: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"# Device Type: {device.get('device_type')}\n")
-                f.write("#" + "="*70 + "\n\n")
-                f.write(config)
+        Returns:
+            Tuple (success, hostname, message, retryable)
+        """
+        hostname = device.get('hostname', 'Unknown')
+        ip = device.get('ip', '')
+        
+        self.logger.info(f"Łączenie z {hostname} ({ip})" + (f" - próba {attempt}" if attempt > 1 else "") + "...")
+        
+        try:
+            outputs = self._run_session(device)
+            filepath, changed = self._save_outputs(device, outputs)
             
-            self.logger.info(f"✓ Sukces: {hostname} - zapisano do {filename}")
-            return (True, hostname, str(filepath))
+            if changed:
+                self.logger.info(
+                    f"✓ Sukces: {hostname} - {len(outputs)} komend, zapisano do {filepath.name}"
+                )
+            else:
+                self.unchanged_collections.append(hostname)
+                self.logger.info(f"✓ Sukces: {hostname} - bez zmian od {filepath.name}")
+            return (True, hostname, str(filepath), False)
             
         except NetmikoAuthenticationException:
             error_msg = f"✗ Błąd autentykacji: {hostname} - sprawdź username/password"
             self.logger.error(error_msg)
-            return (False, hostname, error_msg)
+            return (False, hostname, error_msg, False)
             
         except NetmikoTimeoutException:
             error_msg = f"✗ Timeout: {hostname} - urządzenie niedostępne lub firewall blokuje"
             self.logger.error(error_msg)
-            return (False, hostname, error_msg)
+            return (False, hostname, error_msg, True)
             
         except Exception as e:
             error_msg = f"✗ Błąd: {hostname} - {str(e)}"
             self.logger.error(error_msg)
-            return (False, hostname, error_msg)
+            return (False, hostname, error_msg, isinstance(e, RETRYABLE_ERRORS))
     
     def collect_all(self) -> bool:
         """
         Zbieranie konfiguracji ze wszystkich urządzeń
         
+        Sesje uruchamiane są do limitu ssh.max_concurrent, a w jednej
+        lokalizacji (site) do limitu max_per_site / site_limits - kolejne
+        lokalizacje obsługiwane na zmianę. Urządzenie z błędem przejściowym
+        czeka na ponowienie (ssh.max_retries, ssh.retry_delay x2) bez
+        zajmowania slotu.
+        
         Returns:
             True jeśli przynajmniej jedno urządzenie się powiodło
         """
@@ -207,28 +326,91 @@ class ConfigCollector:
             self.logger.warning("Brak urządzeń do przetworzenia (sprawdź config/devices.yml)")
             return False
         
-        self.logger.info(f"Rozpoczynam zbieranie konfiguracji z {len(self.devices)} urządzeń...")
+        # Retencja i kompresja starych backupów, pliki spoza indeksu -> wersje
+        # (przed zbieraniem, aby porównanie obejmowało także stare pliki)
+        self.store.maintenance()
+        
+        ssh_config = self.config['ssh']
+        max_workers = max(1, int(ssh_config.get('max_concurrent', 5)))
+        max_attempts = 1 + max(0, int(ssh_config.get('max_retries', 0)))
         
-        max_workers = self.config['ssh'].get('max_concurrent', 5)
+        # Kolejka per lokalizacja: (urządzenie, numer próby)
+        queues: Dict[str, deque] = {}
+        for device in self.devices:
+            queues.setdefault(str(device.get('site', 'default')), deque()).append((device, 1))
+        
+        self.logger.info(
+            f"Rozpoczynam zbieranie konfiguracji z {len(self.devices)} urządzeń "
+            f"({len(queues)} lokalizacji, max {max_workers} sesji)..."
+        )
+        
+        running = {}
+        site_running = Counter()
+        # Ponowienia: (termin, kolejność, site, urządzenie, numer próby)
+        retries = []
+        sequence = 0
+        
+        def submit_ready(executor: ThreadPoolExecutor) -> None:
+            # Po jednym urządzeniu z każdej lokalizacji z wolnym slotem, na zmianę
+            progress = True
+            while progress and len(running) < max_workers:
+                progress = False
+                for site, queue in queues.items():
+                    if len(running) >= max_workers:
+                        break
+                    if queue and site_running[site] < self._site_limit(site):
+                        device, attempt = queue.popleft()
+                        future = executor.submit(self._collect_single_device, device, attempt)
+                        running[future] = (site, device, attempt)
+                        site_running[site] += 1
+                        progress = True
         
-        # Zbieraj równolegle (ThreadPoolExecutor)
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {executor.submit(self._collect_single_device, device): device 
-                      for device in self.devices}
-            
-            for future in as_completed(futures):
-                success, hostname, message = future.result()
+            while running or retries or any(queues.values()):
+                # Ponowienia, których termin minął, wracają na początek kolejki
+                now = time.monotonic()
+                while retries and retries[0][0] <= now:
+                    _, _, site, device, attempt = heapq.heappop(retries)
+                    queues[site].appendleft((device, attempt))
                 
-                if success:
-                    self.successful_collections.append((hostname, message))
-                else:
-                    self.failed_collections.append((hostname, message))
+                submit_ready(executor)
+                
+                timeout = max(0.0, retries[0][0] - now) if retries else None
+                if not running:
+                    time.sleep(timeout or 0)
+                    continue
+                
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    site, device, attempt = running.pop(future)
+                    site_running[site] -= 1
+                    success, hostname, message, retryable = future.result()
+                    
+                    if success:
+                        self.successful_collections.append((hostname, message))
+                    elif retryable and attempt < max_attempts:
+                        delay = self._retry_delay(attempt)
+                        self.logger.warning(
+                            f"Ponowienie {hostname} za {delay:.0f}s "
+                            f"(próba {attempt + 1}/{max_attempts})"
+                        )
+                        sequence += 1
+                        heapq.heappush(
+                            retries, (time.monotonic() + delay, sequence, site, device, attempt + 1)
+                        )
+                    else:
+                        self.failed_collections.append((hostname, message))
+        
+        # Indeks wersji (last_seen, nowe wersje)
+        self.store.flush()
         
         # Podsumowanie
         self.logger.info("\n" + "="*70)
         self.logger.info("PODSUMOWANIE ZBIERANIA KONFIGURACJI")
         self.logger.info("="*70)
         self.logger.info(f"Sukces: {len(self.successful_collections)} / {len(self.devices)}")
+        self.logger.info(f"Bez zmian: {len(self.unchanged_collections)} / {len(self.devices)}")
         self.logger.info(f"Błędy: {len(self.failed_collections)} / {len(self.devices)}")
         
         if self.failed_collections:
@@ -0,0 +1,325 @@
+﻿"""
+Infrastructure Documentation Generator
+Script: Symulowane urządzenia Cisco IOS (serwer SSH do testów)
+
+Uruchamia N urządzeń na 127.0.0.1 (kolejne porty) i zapisuje plik devices
+do testu zbierania konfiguracji bez dostępu do sieci produkcyjnej:
+
+    python scripts/fake_devices.py --count 50 --sites 5
+    python scripts/main.py --collect-only --devices-file output/temp/fake_devices.yml
+
+Autor: Sebastian
+Data: 2026-01-28
+"""
+
+import sys
+import time
+import yaml
+import socket
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List
+
+import paramiko
+
+
+USERNAME = 'admin'
+PASSWORD = 'admin'
+SECRET = 'enable'
+
+
+class FakeDevice:
+    """Jedno symulowane urządzenie (hostname + wyniki komend)"""
+
+    def __init__(self, hostname: str, index: int, latency: float = 0.0, fail_first: int = 0):
+        """
+        Args:
+            hostname: Nazwa urządzenia (prompt)
+            index: Numer urządzenia (adresy IP w konfiguracji)
+            latency: Opóźnienie odpowiedzi na komendę (sekundy)
+            fail_first: Ile pierwszych połączeń zerwać (test ponowień)
+        """
+        self.hostname = hostname
+        self.index = index
+        self.latency = latency
+        self.fail_first = fail_first
+        self.connections = 0
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def should_fail(self) -> bool:
+        """Czy zerwać bieżące połączenie"""
+        with self._lock:
+            self.connections += 1
+            return self.connections <= self.fail_first
+
+    def output(self, command: str) -> str:
+        """Wynik komendy (pusty string = nieznana komenda)"""
+        words = command.split()
+        if not words:
+            return ''
+
+        if words[0] != 'show' or len(words) < 2:
+            return ''
+
+        if words[1].startswith('run'):
+            return self._running_config()
+        if words[1].startswith('ver'):
+            return self._version()
+        if words[1].startswith('inv'):
+            return self._inventory()
+        if words[1] == 'ip' and len(words) >= 3 and words[2].startswith('int'):
+            return self._interfaces()
+
+        return ''
+
+    def _running_config(self) -> str:
+        lines = [
+            "Building configuration...",
+            "",
+            "Current configuration : 4096 bytes",
+            "!",
+            f"! Last configuration change at {time.strftime('%H:%M:%S UTC %a %b %d %Y')} by {USERNAME}",
+            "!",
+            "version 15.2",
+            "service timestamps debug datetime msec",
+            "service timestamps log datetime msec",
+            "!",
+            f"hostname {self.hostname}",
+            "!",
+            "ntp clock-period 17179869",
+            "ntp server 10.0.0.1",
+            "!",
+        ]
+        for port in range(1, 25):
+            lines += [
+                f"interface GigabitEthernet0/{port}",
+                f" description Port {port}",
+                " switchport mode access",
+                f" switchport access vlan {10 + port % 4}",
+                "!",
+            ]
+        lines += [
+            "interface Vlan10",
+            f" ip address 10.{self.index // 250}.{self.index % 250}.1 255.255.255.0",
+            "!",
+            "line vty 0 4",
+            " transport input ssh",
+            "!",
+            "end",
+        ]
+        return "\n".join(lines)
+
+    def _version(self) -> str:
+        uptime = int(time.time() - self.started)
+        return "\n".join([
+            "Cisco IOS Software, C2960 Software (C2960-LANBASEK9-M), Version 15.2(7)E3",
+            f"{self.hostname} uptime is {uptime // 60} minutes, {uptime % 60} seconds",
+            "System image file is \"flash:c2960-lanbasek9-mz.152-7.E3.bin\"",
+            f"Processor board ID FOC{10000 + self.index}",
+        ])
+
+    def _inventory(self) -> str:
+        return "\n".join([
+            'NAME: "1", DESCR: "WS-C2960-24TT-L"',
+            f"PID: WS-C2960-24TT-L  , VID: V02  , SN: FOC{10000 + self.index}",
+        ])
+
+    def _interfaces(self) -> str:
+        lines = ["Interface              IP-Address      OK? Method Status                Protocol"]
+        lines.append(f"Vlan10                 10.{self.index // 250}.{self.index % 250}.1       YES NVRAM  up                    up")
+        for port in range(1, 25):
+            lines.append(f"GigabitEthernet0/{port:<7} unassigned      YES unset  up                    up")
+        return "\n".join(lines)
+
+
+class _Server(paramiko.ServerInterface):
+    """Autentykacja hasłem i kanał shell"""
+
+    def __init__(self):
+        self.shell_requested = threading.Event()
+
+    def get_allowed_auths(self, username):
+        return 'password'
+
+    def check_auth_password(self, username, password):
+        if username == USERNAME and password == PASSWORD:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_channel_request(self, kind, chanid):
+        if kind == 'session':
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_BY_OTHER_NAME
+
+    def check_channel_pty_request(self, *args):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_requested.set()
+        return True
+
+
+def _read_line(channel, echo: bool = True) -> str:
+    """Odczytaj linię z kanału (z echem jak terminal urządzenia)"""
+    buffer = b''
+    while True:
+        data = channel.recv(1)
+        if not data:
+            raise EOFError
+        if data in (b'\r', b'\n'):
+            if echo:
+                channel.sendall(b'\r\n')
+            return buffer.decode('utf-8', errors='replace')
+        buffer += data
+        if echo:
+            channel.sendall(data)
+
+
+def _shell(channel, device: FakeDevice) -> None:
+    """Emulacja CLI Cisco IOS"""
+    privileged = False
+
+    while True:
+        channel.sendall(f"{device.hostname}{'#' if privileged else '>'}".encode())
+        command = _read_line(channel).strip()
+
+        if not command:
+            continue
+
+        if command in ('exit', 'quit', 'logout'):
+            return
+
+        if command.startswith('terminal '):
+            continue
+
+        if command == 'enable':
+            channel.sendall(b"Password: ")
+            if _read_line(channel, echo=False) == SECRET:
+                privileged = True
+            else:
+                channel.sendall(b"% Access denied\r\n")
+            continue
+
+        if command == 'disable':
+            privileged = False
+            continue
+
+        if device.latency:
+            time.sleep(device.latency)
+
+        output = device.output(command)
+        if not output or (command.startswith('show run') and not privileged):
+            channel.sendall(b"% Invalid input detected at '^' marker.\r\n")
+            continue
+
+        channel.sendall(output.replace("\n", "\r\n").encode() + b"\r\n")
+
+
+def _handle(client: socket.socket, host_key: paramiko.PKey, device: FakeDevice) -> None:
+    """Obsługa jednego połączenia SSH"""
+    transport = paramiko.Transport(client)
+    transport.add_server_key(host_key)
+
+    try:
+        if device.should_fail():
+            # Symulacja urządzenia zajętego / zerwanej sesji
+            client.close()
+            return
+
+        server = _Server()
+        transport.start_server(server=server)
+
+        channel = transport.accept(20)
+        if channel is None or not server.shell_requested.wait(10):
+            return
+
+        try:
+            _shell(channel, device)
+        except (EOFError, OSError):
+            pass
+        finally:
+            channel.close()
+
+    except (paramiko.SSHException, EOFError, OSError):
+        pass
+    finally:
+        transport.close()
+
+
+def serve(device: FakeDevice, port: int, host_key: paramiko.PKey) -> socket.socket:
+    """Uruchom nasłuch urządzenia w wątku w tle"""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', port))
+    listener.listen(64)
+
+    def accept_loop():
+        while True:
+            try:
+                client, _ = listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=_handle, args=(client, host_key, device), daemon=True).start()
+
+    threading.Thread(target=accept_loop, daemon=True).start()
+    return listener
+
+
+def write_devices_file(path: Path, devices: List[Dict]) -> None:
+    """Zapisz plik devices (format config/devices.yml)"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(devices, f, sort_keys=False, allow_unicode=True)
+
+
+def main():
+    """Uruchom symulowane urządzenia do przerwania (Ctrl+C)"""
+    parser = argparse.ArgumentParser(description='Symulowane urządzenia Cisco IOS (serwer SSH do testów)')
+    parser.add_argument('--count', type=int, default=10, help='Liczba urządzeń')
+    parser.add_argument('--sites', type=int, default=2, help='Liczba lokalizacji (klucz site)')
+    parser.add_argument('--base-port', type=int, default=22000, help='Port pierwszego urządzenia')
+    parser.add_argument('--latency-ms', type=int, default=0, help='Opóźnienie odpowiedzi na komendę')
+    parser.add_argument('--fail-first', type=int, default=0, help='Ile pierwszych połączeń zerwać (test ponowień)')
+    parser.add_argument('--devices-file', type=str, default='output/temp/fake_devices.yml',
+                        help='Plik devices do zapisania')
+    args = parser.parse_args()
+
+    host_key = paramiko.RSAKey.generate(2048)
+    devices = []
+
+    for index in range(args.count):
+        hostname = f"FAKE-SW-{index + 1:03d}"
+        port = args.base_port + index
+        device = FakeDevice(hostname, index, args.latency_ms / 1000, args.fail_first)
+        serve(device, port, host_key)
+
+        devices.append({
+            'hostname': hostname,
+            'device_type': 'cisco_ios',
+            'ip': '127.0.0.1',
+            'port': port,
+            'username': USERNAME,
+            'password': PASSWORD,
+            'secret': SECRET,
+            'site': f"site-{index % max(1, args.sites) + 1}",
+            'description': 'Symulowane urządzenie (fake_devices.py)',
+            'enabled': True,
+        })
+
+    write_devices_file(Path(args.devices_file), devices)
+
+    print(f"✓ {args.count} urządzeń na 127.0.0.1:{args.base_port}-{args.base_port + args.count - 1}")
+    print(f"✓ Plik devices: {args.devices_file}")
+    print("  Ctrl+C aby zakończyć")
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
@@ -47,6 +47,13 @@ def main():
         help='Testuj tylko konkretne urządzenie (IP lub hostname)'
     )
     
+    parser.add_argument(
+        '--devices-file',
+        type=str,
+        default='config/devices.yml',
+        help='Plik z listą urządzeń (domyślnie config/devices.yml)'
+    )
+    
     args = parser.parse_args()
     
     # Banner
@@ -57,8 +64,8 @@ def main():
     print()
     
     # Sprawdź czy pliki konfiguracyjne istnieją
-    if not Path('config/devices.yml').exists():
-        print("✗ BŁĄD: Brak pliku config/devices.yml")
+    if not Path(args.devices_file).exists():
+        print(f"✗ BŁĄD: Brak pliku {args.devices_file}")
         print("  Utwórz plik i dodaj listę urządzeń sieciowych")
         sys.exit(1)
     
@@ -77,7 +84,7 @@ def main():
         if args.test:
             print("🧪 Tryb testowy - sprawdzanie konfiguracji...\n")
             
-            collector = ConfigCollector()
+            collector = ConfigCollector(devices_path=args.devices_file)
             print(f"✓ Załadowano {len(collector.devices)} urządzeń")
             print(f"✓ Konfiguracja: {collector.config['openai']['model']}")
             print(f"✓ Output dir: {collector.config['output']['documentation_dir']}")
@@ -87,7 +94,7 @@ def main():
         # TYLKO ZBIERANIE
         if args.collect_only:
             print("📥 Uruchamiam zbieranie konfiguracji...\n")
-            collector = ConfigCollector()
+            collector = ConfigCollector(devices_path=args.devices_file)
             success = collector.collect_all()
             
             if not success:
@@ -110,7 +117,7 @@ def main():
         # Krok 1: Zbieranie konfiguracji
         print("KROK 1/2: Zbieranie konfiguracji z urządzeń")
         print("-" * 70)
-        collector = ConfigCollector()
+        collector = ConfigCollector(devices_path=args.devices_file)
         collect_success = collector.collect_all()
         
         if not collect_success: